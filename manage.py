@@ -8,12 +8,18 @@ from typing import Optional
 from typing import Type
 from typing import Union
 
+from src.benchmark.blacklist_benchmark import blacklist_benchmark
+from src.benchmark.record_codecs_benchmark import record_codecs_benchmark
 from src.db.adapters.redis_set_db_entity_adapter import RedisSetDbEntityAdapter
 from src.db.adapters.set_db_entity_str_adapter import SetDbEntityStrAdapterUUID
 from src.db.storages.redis_db import context_async_redis_client
+from src.migration.migrate_address_encoding import migrate_address_encoding
+from src.migration.migrate_change_index import migrate_change_index
+from src.migration.migrate_record_encoding import migrate_record_encoding
 from src.migration.migrate_usage_history import migrate_usage_history
 from src.service.token_db_services import AdminTokensSetDBEntityService
 from src.service.token_db_services import AgentTokensSetDBEntityService
+from src.tasks.history_stream_task import history_stream_worker_task
 
 
 async def process_token(
@@ -45,6 +51,30 @@ def perform_migrate_usage_history():
     asyncio.run(migrate_usage_history())
 
 
+def perform_migrate_address_encoding():
+    asyncio.run(migrate_address_encoding())
+
+
+def perform_migrate_change_index():
+    asyncio.run(migrate_change_index())
+
+
+def perform_migrate_record_encoding():
+    asyncio.run(migrate_record_encoding())
+
+
+def perform_history_worker():
+    asyncio.run(history_stream_worker_task())
+
+
+def perform_blacklist_benchmark(banned_count: int, allowed_count: int, networks_count: int):
+    asyncio.run(blacklist_benchmark(banned_count, allowed_count, networks_count))
+
+
+def perform_record_codecs_benchmark(records_count: int):
+    record_codecs_benchmark(records_count)
+
+
 def main(args: list[str]):
     # parse args
     parser = argparse.ArgumentParser(description='Blacklist administration utility')
@@ -73,6 +103,17 @@ def main(args: list[str]):
         'migrate', description='perform migration routines', help='perform migration routines'
     )
     migration.add_argument('migration_type', help='migration type')
+
+    benchmark = subparsers.add_parser(
+        'benchmark', description='perform benchmark routines', help='perform benchmark routines'
+    )
+    benchmark.add_argument('benchmark_type', help='benchmark type')
+    benchmark.add_argument('--banned', type=int, default=1000000, help='banned addresses count', metavar='[count]')
+    benchmark.add_argument('--allowed', type=int, default=10000, help='allowed addresses count', metavar='[count]')
+    benchmark.add_argument('--networks', type=int, default=100, help='allowed networks count', metavar='[count]')
+    benchmark.add_argument('--records', type=int, default=100000, help='records count', metavar='[count]')
+    worker = subparsers.add_parser('worker', description='run worker process', help='run worker process')
+    worker.add_argument('worker_type', help='worker type')
     parsed_args = vars(parser.parse_args(args))
     if not parsed_args:
         parser.error('No options specified. Use --help for list of available options')
@@ -88,8 +129,31 @@ def main(args: list[str]):
             match parsed_args['migration_type']:
                 case 'usage_history':
                     perform_migrate_usage_history()
+                case 'address_encoding':
+                    perform_migrate_address_encoding()
+                case 'change_index':
+                    perform_migrate_change_index()
+                case 'record_encoding':
+                    perform_migrate_record_encoding()
+                case _:
+                    parser.error(
+                        'Wrong migration type specified, allowed: '
+                        '[usage_history, address_encoding, change_index, record_encoding]'
+                    )
+        case 'benchmark':
+            match parsed_args['benchmark_type']:
+                case 'blacklist':
+                    perform_blacklist_benchmark(parsed_args['banned'], parsed_args['allowed'], parsed_args['networks'])
+                case 'codecs':
+                    perform_record_codecs_benchmark(parsed_args['records'])
+                case _:
+                    parser.error('Wrong benchmark type specified, allowed: [blacklist, codecs]')
+        case 'worker':
+            match parsed_args['worker_type']:
+                case 'history':
+                    perform_history_worker()
                 case _:
-                    parser.error('Wrong migration type specified, allowed: [usage_history]')
+                    parser.error('Wrong worker type specified, allowed: [history]')
 
 
 if __name__ == '__main__':
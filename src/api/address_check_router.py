@@ -0,0 +1,45 @@
+# Address check router
+from ipaddress import IPv4Address
+from typing import Annotated
+from typing import Optional
+
+from fastapi import APIRouter
+from fastapi import Depends
+from fastapi import Query
+from fastapi import status
+from fastapi.exceptions import HTTPException
+
+from src.api.di.db_di_routines import download_handle_adapters
+from src.core.settings import CHECK_MAX_ADDRESSES
+from src.schemas.addresses_schemas import AddressCheckResult
+from src.schemas.addresses_schemas import AddressesCheckRequest
+from src.service.address_check_service import AddressCheckService
+from src.service.service_db_factories import ServiceAdapters
+
+api_router = APIRouter()
+
+
+@api_router.get(
+    '',
+    response_model=list[AddressCheckResult],
+    summary='Check addresses (passed in query) against banned and allowed groups and allowed networks',
+)
+async def check_addresses(
+    service_adapter_obj: Annotated[ServiceAdapters, Depends(download_handle_adapters)],
+    address: Annotated[Optional[list[IPv4Address]], Query(max_length=CHECK_MAX_ADDRESSES)] = None,
+):
+    if not address:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Expected one or more address parameters')
+    return await AddressCheckService(service_adapter_obj).check(address)
+
+
+@api_router.post(
+    '',
+    response_model=list[AddressCheckResult],
+    summary='Check addresses (passed in body) against banned and allowed groups and allowed networks',
+)
+async def check_addresses_bulk(
+    check_request: AddressesCheckRequest,
+    service_adapter_obj: Annotated[ServiceAdapters, Depends(download_handle_adapters)],
+):
+    return await AddressCheckService(service_adapter_obj).check(check_request.addresses)
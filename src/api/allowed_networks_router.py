@@ -3,19 +3,27 @@ from typing import Callable
 from typing import Optional
 
 from fastapi import APIRouter
+from fastapi import BackgroundTasks
 from fastapi import Depends
 from fastapi.security import HTTPAuthorizationCredentials
 
+from src.api.di.db_di_routines import version_db_adapter
+from src.core.settings import ALLOWED_NETWORKS_CATEGORY_NAME
+from src.core.settings import STREAM_USAGE_INFO
 from src.db.adapters.redis_set_db_entity_adapter import RedisSetDbEntityAdapter
 from src.db.adapters.set_db_entity_str_adapter import SetDbEntityStrAdapterIpNetwork
+from src.db.base_version_db import IVersionDb
 from src.db.storages.redis_db import RedisAsyncio
 from src.db.storages.redis_db import redis_client
+from src.schemas.addresses_schemas import AgentAddressesInfoWithGroup
 from src.schemas.common_response_schemas import AddResponseSchema
 from src.schemas.common_response_schemas import CountResponseSchema
 from src.schemas.common_response_schemas import DeleteResponseSchema
 from src.schemas.network_schemas import AgentNetworkInfo
 from src.schemas.network_schemas import IPv4NetworkList
+from src.schemas.usage_schemas import ActionType
 from src.service.networks_db_service import AllowedNetworksSetDBEntityService
+from src.tasks.usage_update_bg_task import update_usage_bg_task_ns
 from src.utils.router_utils import get_query_params
 
 from .http_auth_wrapper import get_proc_auth_checker
@@ -24,6 +32,19 @@ api_router = APIRouter()
 allowed_networks_auth_check: Callable = get_proc_auth_checker(need_admin_permission=False)
 
 
+def add_networks_usage_task(background_tasks: BackgroundTasks, action: ActionType, agent_info: AgentNetworkInfo):
+    """Mark allowed networks change in usage stream (record without addresses), used for blacklist deltas"""
+    background_tasks.add_task(
+        update_usage_bg_task_ns,
+        STREAM_USAGE_INFO,
+        action,
+        AgentAddressesInfoWithGroup(
+            source_agent=agent_info.source_agent, action_time=agent_info.action_time, addresses=[]
+        ),
+        ALLOWED_NETWORKS_CATEGORY_NAME,
+    )
+
+
 @api_router.get(
     '',
     summary='Retrieve allowed networks from storage (all or partial)',
@@ -43,12 +64,16 @@ async def get_allowed_networks(
 async def save_allowed_networks(
     agent_info: AgentNetworkInfo,
     redis_client_obj: Annotated[RedisAsyncio, Depends(redis_client)],
+    version_db: Annotated[IVersionDb, Depends(version_db_adapter)],
+    background_tasks: BackgroundTasks,
     auth: Optional[HTTPAuthorizationCredentials] = Depends(allowed_networks_auth_check),  # noqa: B008
 ):
     service_obj = AllowedNetworksSetDBEntityService(
-        SetDbEntityStrAdapterIpNetwork(RedisSetDbEntityAdapter(redis_client_obj))
+        SetDbEntityStrAdapterIpNetwork(RedisSetDbEntityAdapter(redis_client_obj)), version_db=version_db
     )
     added_count = await service_obj.write_records(agent_info.networks)
+    if added_count > 0:
+        add_networks_usage_task(background_tasks, ActionType.add_action, agent_info)
     return AddResponseSchema(added=added_count)
 
 
@@ -56,12 +81,16 @@ async def save_allowed_networks(
 async def delete_allowed_networks(
     agent_info: AgentNetworkInfo,
     redis_client_obj: Annotated[RedisAsyncio, Depends(redis_client)],
+    version_db: Annotated[IVersionDb, Depends(version_db_adapter)],
+    background_tasks: BackgroundTasks,
     auth: Optional[HTTPAuthorizationCredentials] = Depends(allowed_networks_auth_check),  # noqa: B008
 ):
     service_obj = AllowedNetworksSetDBEntityService(
-        SetDbEntityStrAdapterIpNetwork(RedisSetDbEntityAdapter(redis_client_obj))
+        SetDbEntityStrAdapterIpNetwork(RedisSetDbEntityAdapter(redis_client_obj)), version_db=version_db
     )
     deleted_count = await service_obj.del_records(agent_info.networks)
+    if deleted_count > 0:
+        add_networks_usage_task(background_tasks, ActionType.remove_action, agent_info)
     return DeleteResponseSchema(deleted=deleted_count)
 
 
@@ -1,28 +1,53 @@
 # Blacklist router
 import logging
 from datetime import datetime as dt_datetime
-from ipaddress import IPv4Address
-from ipaddress import IPv4Network
 from typing import Annotated
-from urllib.parse import quote
+from typing import AsyncGenerator
+from typing import Optional
 from uuid import UUID
 
 from fastapi import APIRouter
 from fastapi import Depends
-from fastapi.background import BackgroundTasks
+from fastapi import Request
+from fastapi import Response
+from fastapi import status
 from fastapi.exceptions import HTTPException
 from fastapi.responses import StreamingResponse
 
 from src.api.di.db_di_routines import download_handle_adapters
+from src.api.di.db_di_routines import download_stream_adapters
+from src.api.di.db_di_routines import get_stream_db_adapter
+from src.core.config import app_settings
 from src.core.settings import ALLOWED_ADDRESSES_GROUP_NAME
 from src.core.settings import BANNED_ADDRESSES_GROUP_NAME
-from src.core.settings import CHUNK_SIZE_BYTES
-from src.core.settings import SET_EXPIRE_SECONDS
+from src.db.base_stream_db import IStreamDb
+from src.models.query_params_models import DownloadBlackListDeltaQueryParams
 from src.models.query_params_models import DownloadBlackListQueryParams
+from src.schemas.download_schemas import BlacklistDelta
+from src.schemas.usage_schemas import StreamUsageRecord
+from src.service.blacklist_service import BlacklistQuery
 from src.service.blacklist_service import BlacklistService
 from src.service.blacklist_service import BlackListServiceError
+from src.service.derived_sets_cache_service import SetsTeardown
+from src.service.download_flights_service import blacklist_snapshot_flights
+from src.service.download_flights_service import blacklist_stream_flights
+from src.service.membership_index_service import MembershipIndexView
+from src.service.membership_index_service import fetch_indexed_blacklist
+from src.service.membership_index_service import indexed_blacklist_etag
+from src.service.membership_index_service import membership_index
 from src.service.service_db_factories import ServiceAdapters
-from src.tasks.set_management_bg_tasks import delete_temp_sets_bg
+from src.service.snapshot_cache_service import DownloadSnapshot
+from src.service.snapshot_cache_service import download_snapshot_cache
+from src.service.snapshot_cache_service import get_snapshot_body
+from src.service.usage_stream_service import get_usage_read_service
+from src.tasks.set_management_bg_tasks import teardown_sets_bg
+from src.utils.compression_utils import encoded_etag
+from src.utils.compression_utils import encoded_stream
+from src.utils.compression_utils import select_encoding
+from src.utils.router_utils import VARY_HEADER
+from src.utils.router_utils import etag_matches
+from src.utils.router_utils import get_download_headers
+from src.utils.stream_utils import chunked_stream
 
 api_router = APIRouter()
 
@@ -50,95 +75,182 @@ api_router = APIRouter()
        - transform it to set for faster search
        - read allowed networks from allowed networks set
        - transform it to set for faster search
+     - by default allowed addresses are not read: banned groups are united and allowed groups are subtracted from
+       them in storage in one step (temporarily set with difference, see IDiffSetDb), only allowed networks are read.
+       Allowed addresses are read only for lossy aggregation (query_params.aggregate_prefix < 32)
    !!! set TTL to all temporarily sets
+   United sets and sets with difference are cached in storage (see DerivedSetsCache): their identities are composed
+   from source sets identities and versions, so concurrent and subsequent requests reuse them until source sets change
+   Before preparation of sets versions of source sets and groups are checked (see snapshot_etag). Versions are
+   bumped on every change of sets and groups. ETag is composed from versions, so:
+     - on matching If-None-Match header 304 is returned (address sets are not touched)
+     - if download with same ETag is cached (download_cache_size_mb > 0) it is returned from cache
    3) prepare generator for fetching data from banned set and filtering it with allowed sets (addresses and networks)
-      if we need filtering
-   4) produce recordset for response
-   5) teardown all temporarily sets after execution in background task. If background task is not started then storage
-   remove it after timeout
+      if we need filtering. Banned sets with ARRAY_ENGINE_MIN_RECORDS or more records are filtered with array engine
+      (addresses are packed as integers and processed in bulk)
+      If query_params.aggregate is True then filtered addresses are collapsed to the minimal list of networks
+      (always with array engine). With query_params.aggregate_prefix < 32 aggregation is lossy: networks of this
+      prefix length are returned entirely unless they contain allowed addresses or networks
+   4) stream recordset in response: records are fetched from storage while the response is sent,
+      chunks of CHUNK_SIZE_BYTES are produced as soon as they are ready. Fetching stops when all clients of the
+      stream are gone. If cache is enabled then recordset is rendered at once and stored in cache
+      Response is compressed with encoding selected by Accept-Encoding header (gzip, zstd if zstandard package is
+      installed). Compressed variants of cached recordset are kept in cache too, streamed response is compressed
+      chunk by chunk
+      Identical concurrent requests are coalesced (single flight, see download_flights_service): requests with the
+      same ETag await one render of snapshot, streamed requests with the same ETag and encoding read one shared
+      stream (joining requests receive it from the start while it is within STREAM_FLIGHT_REPLAY_PIECES pieces).
+      Sets are prepared and rendered with own storage connection of shared computation
+   With membership index enabled (see MembershipIndex) and built for requested groups sets are not prepared in
+   storage: banned groups are united and allowed groups are subtracted with in-process bitmaps, ETag is composed
+   from index state
+   5) teardown all temporarily sets after the end of rendering or streaming.
+      Cached sets are released (and deleted only on eviction from cache).
+   If teardown is not executed then storage remove temporarily sets after timeout
 
    As DI to connect to storage we need
    1) Service to work with addresses (with ISetDbEntity interface)
    2) Service to work with SetDB (to set TTL for temporarily sets) (with ISetDb interface)
    3) Service to merge sets (with IUnionSetDb interface)
    4) Service for managing address groups (IHashDbS
+   5) Service for reading versions of sets (with IVersionDb interface)
 '''
 
 
+async def banned_addresses_stream(
+    query: BlacklistQuery, index_view: Optional[MembershipIndexView] = None
+) -> AsyncGenerator[str, None]:
+    """Prepare sets and fetch banned addresses while the response is streamed (with own storage connection).
+    Temporarily sets are torn down after the end of streaming. With index view addresses are taken from it
+    """
+    start_moment = dt_datetime.now()
+    records_streamed = 0
+    teardown = SetsTeardown()
+    try:
+        if index_view is not None:
+            async for addresses in fetch_indexed_blacklist(index_view, query):
+                records_streamed += 1
+                yield addresses
+            return
+        async with download_stream_adapters('blacklist stream') as stream_adapter_obj:
+            blacklist_service_obj = BlacklistService(stream_adapter_obj)
+            source = await blacklist_service_obj.prepare_download(query, teardown)
+            async for addresses in blacklist_service_obj.fetch_banned_addresses(
+                source.banned_set_id,
+                source.allowed_addresses,
+                source.allowed_networks,
+                query.records_count,
+                source.use_array_engine,
+                query.aggregate_prefix,
+            ):
+                records_streamed += 1
+                yield addresses
+    finally:
+        await teardown_sets_bg(teardown)
+        duration = dt_datetime.now() - start_moment
+        logging.debug(
+            'Finished blacklist streaming, parts count: %d, elapsed %s milliseconds',
+            records_streamed,
+            duration.seconds * 1000 + duration.microseconds / 1000,
+        )
+
+
+async def render_blacklist_snapshot(
+    etag: str, query: BlacklistQuery, index_view: Optional[MembershipIndexView] = None
+) -> DownloadSnapshot:
+    """Prepare sets, render banned addresses at once and store them in cache (with own storage connection).
+    With index view addresses are taken from it
+    """
+    if index_view is not None:
+        snapshot = DownloadSnapshot(''.join([x async for x in fetch_indexed_blacklist(index_view, query)]).encode())
+        download_snapshot_cache.put(etag, snapshot)
+        return snapshot
+    teardown = SetsTeardown()
+    try:
+        async with download_stream_adapters('blacklist snapshot') as stream_adapter_obj:
+            blacklist_service_obj = BlacklistService(stream_adapter_obj)
+            source = await blacklist_service_obj.prepare_download(query, teardown)
+            body = await blacklist_service_obj.render_banned_addresses(
+                source.banned_set_id,
+                source.allowed_addresses,
+                source.allowed_networks,
+                query.records_count,
+                source.use_array_engine,
+                query.aggregate_prefix,
+            )
+    finally:
+        await teardown_sets_bg(teardown)
+    snapshot = DownloadSnapshot(body)
+    download_snapshot_cache.put(etag, snapshot)
+    return snapshot
+
+
 @api_router.get('', summary='Get blacklisted addresses as a file')
 async def banned_addresses_as_file(
+    request: Request,
     service_adapter_obj: Annotated[ServiceAdapters, Depends(download_handle_adapters)],
     query_params: Annotated[DownloadBlackListQueryParams, Depends()],
-    background_tasks: BackgroundTasks,
 ):
     logging.debug('Starting blacklist query execution')
     start_moment = dt_datetime.now()
 
     blacklist_service_obj = BlacklistService(service_adapter_obj)
     try:
-        teardown_sets: list[UUID] = list()
-        # get information on passed banned sets
+        # get information on passed banned and allowed sets
         banned_group_sets = await blacklist_service_obj.retrieve_sets_from_params(
             BANNED_ADDRESSES_GROUP_NAME, query_params.banned_address_groups
         )
-        assert len(banned_group_sets) > 0, 'Sets list for banned addresses should have one or more values'
-        if len(banned_group_sets) > 1:
-            # create temporarily set
-            banned_set_id = await service_adapter_obj.union_set_db.union_set(banned_group_sets)
-            logging.debug('Created temporarily set for banned addresses in background, set ID: %s', banned_set_id)
-            await service_adapter_obj.set_db.set_ttl(banned_set_id, SET_EXPIRE_SECONDS)
-            teardown_sets.append(banned_set_id)
-        else:
-            banned_set_id = banned_group_sets[0]
-        # check filtering now
-        allowed_addresses_set: set[IPv4Address]
-        allowed_networks_set: set[IPv4Network]
-
-        if query_params.filter_records:
-            allowed_group_set_list: list[UUID] = await blacklist_service_obj.retrieve_sets_from_params(
+        allowed_group_sets: list[UUID] = (
+            await blacklist_service_obj.retrieve_sets_from_params(
                 ALLOWED_ADDRESSES_GROUP_NAME, query_params.allowed_address_groups
             )
-            # set allowed_set_id with only ID or None if we have empty
-            assert len(allowed_group_set_list) > 0, 'Sets list for allowed addresses should have one or more values'
-            if len(allowed_group_set_list) > 1:
-                # create temporarily set
-                allowed_set_id = await service_adapter_obj.union_set_db.union_set(allowed_group_set_list)
-                logging.debug('Created temporarily set for allowed addresses in background, set ID: %s', allowed_set_id)
-                await service_adapter_obj.set_db.set_ttl(allowed_set_id, SET_EXPIRE_SECONDS)
-                teardown_sets.append(allowed_set_id)
-            else:
-                allowed_set_id = allowed_group_set_list[0]
-            allowed_addresses_set, allowed_networks_set = await blacklist_service_obj.retrieve_exclude_data(
-                allowed_set_id
-            )
+            if query_params.filter_records
+            else []
+        )
+        query = BlacklistQuery(
+            banned_group_sets=tuple(sorted(banned_group_sets)),
+            allowed_group_sets=tuple(sorted(allowed_group_sets)),
+            filter_records=query_params.filter_records,
+            records_count=0 if query_params.all_records else query_params.records_count,
+            aggregate_prefix=query_params.aggregate_prefix if query_params.aggregate else None,
+        )
+        index_view = membership_index.view() if app_settings.membership_index_enabled else None
+        if index_view is not None and index_view.covers([*banned_group_sets, *allowed_group_sets]):
+            # download is made from membership index, its state identifies download
+            etag = await indexed_blacklist_etag(index_view, query)
         else:
-            allowed_addresses_set, allowed_networks_set = set(), set()
-
-        filename = query_params.filename
-        headers = dict()
-        if filename:
-            content_disposition_type = 'attachment'
-            content_disposition_filename = filename
-            headers['Content-Disposition'] = "{}; filename*=utf-8''{}".format(
-                content_disposition_type, quote(content_disposition_filename)
+            index_view = None
+            # check versions of data, address sets are not touched on unchanged data
+            etag = await blacklist_service_obj.snapshot_etag(
+                banned_group_sets, allowed_group_sets, query.filter_records, query.records_count, query.aggregate_prefix
+            )
+        encoding = select_encoding(request.headers.get('accept-encoding'))
+        representation_etag = encoded_etag(etag, encoding)
+        if etag_matches(request.headers.get('if-none-match'), representation_etag):
+            logging.debug('Blacklist is not modified, ETag: %s', representation_etag)
+            return Response(
+                status_code=status.HTTP_304_NOT_MODIFIED, headers={'ETag': representation_etag, 'Vary': VARY_HEADER}
             )
-        records_count: int = 0 if query_params.all_records else query_params.records_count
-        # add teardown task for clearing temporarily sets
-        background_tasks.add_task(delete_temp_sets_bg, teardown_sets)
-        # Need to fetch all data here
-        result = list()
-        accumulated = ''
-        async for address in blacklist_service_obj.get_banned_addresses(
-            banned_set_id, allowed_addresses_set, allowed_networks_set, records_count
-        ):
-            accumulated += address
-            if len(accumulated) > CHUNK_SIZE_BYTES:
-                result.append(accumulated)
-                accumulated = ''
-        result.append(accumulated)
-        logging.debug('Finish gathering result, records count: %d', len(result))
+        headers = get_download_headers(query_params.filename, encoding)
+        headers['ETag'] = representation_etag
+        if download_snapshot_cache.enabled:
+            snapshot = download_snapshot_cache.get(etag)
+            if snapshot is None:
+                # concurrent requests with the same ETag await one render of snapshot
+                snapshot = await blacklist_snapshot_flights.do(
+                    etag, lambda: render_blacklist_snapshot(etag, query, index_view)
+                )
+            else:
+                logging.debug('Blacklist is served from cache, ETag: %s', representation_etag)
+            body = await get_snapshot_body(etag, snapshot, encoding)
+            return Response(body, media_type='text/plain', headers=headers)
+        # concurrent requests with the same ETag and encoding read one shared stream
         return StreamingResponse(
-            result,
+            blacklist_stream_flights.stream(
+                (etag, encoding),
+                lambda: encoded_stream(chunked_stream(banned_addresses_stream(query, index_view)), encoding),
+                request.is_disconnected,
+            ),
             media_type='text/plain',
             headers=headers,
         )
@@ -149,6 +261,41 @@ async def banned_addresses_as_file(
     finally:
         duration = dt_datetime.now() - start_moment
         logging.debug(
-            'Finished blacklist query execution, elapsed %s milliseconds',
+            'Prepared blacklist query, elapsed %s milliseconds',
             duration.seconds * 1000 + duration.microseconds / 1000,
         )
+
+
+@api_router.get('/delta', summary='Get blacklist changes since cursor', response_model=BlacklistDelta)
+async def banned_addresses_delta(
+    service_adapter_obj: Annotated[ServiceAdapters, Depends(download_handle_adapters)],
+    usage_read_db_service: Annotated[IStreamDb[UUID, str, StreamUsageRecord], Depends(get_stream_db_adapter)],
+    query_params: Annotated[DownloadBlackListDeltaQueryParams, Depends()],
+):
+    """Changes of blacklist (with the same filtering as in full download) since usage stream record ID or datetime.
+    Changed addresses are taken from usage stream and checked against current blacklist state.
+    Use returned cursor in next request. If full_download_required is set then usage stream was trimmed
+    past the cursor or changes can't be expressed with addresses - make full download and continue with cursor
+    """
+    blacklist_service_obj = BlacklistService(service_adapter_obj)
+    try:
+        banned_group_sets = await blacklist_service_obj.retrieve_sets_from_params(
+            BANNED_ADDRESSES_GROUP_NAME, query_params.banned_address_groups
+        )
+        allowed_group_sets: list[UUID] = (
+            await blacklist_service_obj.retrieve_sets_from_params(
+                ALLOWED_ADDRESSES_GROUP_NAME, query_params.allowed_address_groups
+            )
+            if query_params.filter_records
+            else []
+        )
+        return await blacklist_service_obj.get_delta(
+            get_usage_read_service(usage_read_db_service),
+            query_params.since,
+            banned_group_sets,
+            allowed_group_sets,
+            query_params.filter_records,
+        )
+    except BlackListServiceError as e:
+        logging.error(str(e))
+        raise HTTPException(status_code=e.status, detail=str(e)) from None
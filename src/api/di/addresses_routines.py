@@ -2,9 +2,10 @@ import logging
 from datetime import datetime as dt_datetime
 from typing import Any
 
+from src.core.config import app_settings
 from src.db.adapters.redis_set_db_entity_adapter import RedisSetDbEntityAdapter
-from src.db.adapters.set_db_entity_str_adapter import SetDbEntityStrAdapterIpAddress
 from src.db.adapters.set_db_entity_str_adapter import SetDbEntityStrAdapterIpNetwork
+from src.db.adapters.set_db_entity_str_adapter import address_set_db_entity_adapter
 from src.db.storages.redis_db import RedisAsyncio
 from src.schemas.addresses_schemas import IpV4AddressList
 from src.service.addresses_db_service import AllowedAddressesSetDBEntityService
@@ -19,7 +20,7 @@ async def get_banned_addresses(redis_client_obj: RedisAsyncio, query_params: dic
     try:
         logging.debug('Starting blacklist query execution')
         service_obj = BlackListAddressesSetDBEntityService(
-            SetDbEntityStrAdapterIpAddress(RedisSetDbEntityAdapter(redis_client_obj))
+            address_set_db_entity_adapter(RedisSetDbEntityAdapter(redis_client_obj), app_settings.address_encoding)
         )
         filter_records = query_params.pop('filter_records')
         # TODO There's no need to get all records. We can fetch them for further filtering and return them without
@@ -29,7 +30,7 @@ async def get_banned_addresses(redis_client_obj: RedisAsyncio, query_params: dic
         if filter_records:
             # filter by allowed IPs
             allowed_service_obj = AllowedAddressesSetDBEntityService(
-                SetDbEntityStrAdapterIpAddress(RedisSetDbEntityAdapter(redis_client_obj))
+                address_set_db_entity_adapter(RedisSetDbEntityAdapter(redis_client_obj), app_settings.address_encoding)
             )
             allowed_records = await allowed_service_obj.get_records(all_records=True)
             allowed_net_service_obj = AllowedNetworksSetDBEntityService(
@@ -1,31 +1,68 @@
 # Dependency Injection utilities
 import logging
+from contextlib import asynccontextmanager
+from ipaddress import IPv4Address
 from typing import AsyncGenerator
 from typing import Optional
 from uuid import UUID
 
+from src.core.config import app_settings
+from src.core.settings import SETS_VERSIONS_HASH_ID
+from src.db.adapters.diff_set_db_str_adapter import DiffSetDbTransformUUIDAdapter
+from src.db.adapters.expiry_db_str_adapter import ExpiryDbStrAdapterIpAddress
+from src.db.adapters.expiry_db_str_adapter import address_expiry_db_adapter
 from src.db.adapters.hash_db_entity_str_adapter import HashDbEntityGroupDataStrAdapter
+from src.db.adapters.memory_expiry_db_adapter import MemoryExpiryDbAdapter
+from src.db.adapters.memory_hash_db_entity_adapter import MemoryHashDbEntity
+from src.db.adapters.memory_version_db_adapter import MemoryVersionDbAdapter
+from src.db.adapters.redis_diff_set_db_adapter import RedisDiffSetDbAdapter
+from src.db.adapters.redis_expiry_db_adapter import RedisExpiryDbAdapter
 from src.db.adapters.redis_hash_db_entity_adapter import RedisDBEntityAdapter
 from src.db.adapters.redis_set_db_adapter import RedisSetDbAdapter
 from src.db.adapters.redis_set_db_entity_adapter import RedisSetDbEntityAdapter
 from src.db.adapters.redis_stream_db_adapter import RedisStreamDbAdapter
+from src.db.adapters.redis_time_index_db_adapter import RedisTimeIndexDbAdapter
 from src.db.adapters.redis_union_set_db_adapter import RedisUnionSetDbAdapter
+from src.db.adapters.redis_version_db_adapter import RedisVersionDbAdapter
+from src.db.adapters.set_db_entity_str_adapter import SetDbEntityStrAdapterIntAddress
 from src.db.adapters.set_db_entity_str_adapter import SetDbEntityStrAdapterIpAddress
 from src.db.adapters.set_db_entity_str_adapter import SetDbEntityStrAdapterIpNetwork
+from src.db.adapters.set_db_entity_str_adapter import address_int_set_db_entity_adapter
+from src.db.adapters.set_db_entity_str_adapter import address_set_db_entity_adapter
 from src.db.adapters.set_db_str_adapter import SetDbStrAdapterUUID
+from src.db.adapters.time_index_db_str_adapter import TimeIndexDbStrAdapterIpAddress
 from src.db.adapters.union_set_db_str_adapter import UnionSetDbTransformUUIDAdapter
 from src.db.adapters.union_set_db_str_adapter import generate_str_uuid
 from src.db.adapters.usage_stream_db_adapter import UsageStreamRedisAdapter
+from src.db.adapters.version_db_str_adapter import VersionDbStrAdapterUUID
 from src.db.base_hash_db_entity import IHashDbEntity
 from src.db.base_set_db import ISetDb
 from src.db.base_set_db_entity import ISetDbEntity
 from src.db.base_stream_db import IStreamDb
+from src.db.base_time_index_db import ITimeIndexDb
+from src.db.base_version_db import IVersionDb
+from src.db.storages.memory_hash_storage import MemoryHashStorage
+from src.db.storages.memory_set_storage import MemorySetStorage
+from src.db.storages.redis_db import RedisAsyncio
 from src.db.storages.redis_db import context_async_redis_client
 from src.db.storages.redis_db import redis_client
 from src.schemas.usage_schemas import StreamUsageRecord
+from src.service.change_index_service import AddressChangeIndexService
 from src.service.history_db_service import HistoryDBService
 from src.service.service_db_factories import ServiceAdapters
 from src.service.service_db_factories import ServiceWithGroupDbAdapters
+from src.service.usage_stream_service import get_usage_add_service
+
+
+def get_version_db(client_obj: RedisAsyncio) -> IVersionDb[UUID]:
+    """Compose versions storage adapter for one redis connection"""
+    return VersionDbStrAdapterUUID(RedisVersionDbAdapter(client_obj, str(SETS_VERSIONS_HASH_ID)))
+
+
+async def version_db_adapter() -> AsyncGenerator[IVersionDb[UUID], None]:
+    """DI for working with versions of data sets"""
+    async for client_obj in redis_client():
+        yield get_version_db(client_obj)
 
 
 async def groups_db_service_adapter() -> AsyncGenerator[IHashDbEntity, None]:
@@ -40,31 +77,83 @@ async def address_db_service_adapter() -> AsyncGenerator[ISetDbEntity, None]:
     In further can depend on any storage for testing purposes
     """
     async for client_obj in redis_client():
-        yield SetDbEntityStrAdapterIpAddress(RedisSetDbEntityAdapter(client_obj))
+        yield address_set_db_entity_adapter(RedisSetDbEntityAdapter(client_obj), app_settings.address_encoding)
 
 
 async def address_with_groups_db_service_adapter() -> AsyncGenerator[ServiceWithGroupDbAdapters, None]:
     async for client_obj in redis_client():
         yield ServiceWithGroupDbAdapters(
-            db_service_adapter=SetDbEntityStrAdapterIpAddress(RedisSetDbEntityAdapter(client_obj)),
+            db_service_adapter=address_set_db_entity_adapter(
+                RedisSetDbEntityAdapter(client_obj), app_settings.address_encoding
+            ),
             db_hash_service_adapter=HashDbEntityGroupDataStrAdapter(RedisDBEntityAdapter(client_obj)),
+            version_db=get_version_db(client_obj),
+            db_int_service_adapter=address_int_set_db_entity_adapter(
+                RedisSetDbEntityAdapter(client_obj), app_settings.address_encoding
+            ),
+            expiry_db=address_expiry_db_adapter(RedisExpiryDbAdapter(client_obj), app_settings.address_encoding),
+            time_index_db=TimeIndexDbStrAdapterIpAddress(RedisTimeIndexDbAdapter(client_obj)),
+            usage_add_service=get_usage_add_service(
+                UsageStreamRedisAdapter(RedisStreamDbAdapter(client_obj)), change_index=get_change_index(client_obj)
+            ),
         )
 
 
+def get_download_adapters(client_obj: RedisAsyncio) -> ServiceAdapters:
+    """Compose download adapters for one redis connection"""
+    return ServiceAdapters(
+        address_set_db_entity=address_set_db_entity_adapter(
+            RedisSetDbEntityAdapter(client_obj), app_settings.address_encoding
+        ),
+        address_int_set_db_entity=address_int_set_db_entity_adapter(
+            RedisSetDbEntityAdapter(client_obj), app_settings.address_encoding
+        ),
+        network_set_db_entity=SetDbEntityStrAdapterIpNetwork(RedisSetDbEntityAdapter(client_obj)),
+        hash_db_service=HashDbEntityGroupDataStrAdapter(RedisDBEntityAdapter(client_obj)),
+        set_db=SetDbStrAdapterUUID(RedisSetDbAdapter(client_obj)),
+        union_set_db=UnionSetDbTransformUUIDAdapter(RedisUnionSetDbAdapter(client_obj, generate_str_uuid)),
+        diff_set_db=DiffSetDbTransformUUIDAdapter(RedisDiffSetDbAdapter(client_obj, generate_str_uuid)),
+        version_db=get_version_db(client_obj),
+        expiry_db=address_expiry_db_adapter(RedisExpiryDbAdapter(client_obj), app_settings.address_encoding),
+    )
+
+
+def get_memory_download_adapters() -> ServiceAdapters:
+    """Compose download adapters for new memory storages (for tests and benchmarks)"""
+    set_storage = MemorySetStorage[str, str]()
+    return ServiceAdapters(
+        address_set_db_entity=SetDbEntityStrAdapterIpAddress(set_storage.set_db_entity_adapter()),
+        address_int_set_db_entity=SetDbEntityStrAdapterIntAddress(set_storage.set_db_entity_adapter()),
+        network_set_db_entity=SetDbEntityStrAdapterIpNetwork(set_storage.set_db_entity_adapter()),
+        hash_db_service=HashDbEntityGroupDataStrAdapter(MemoryHashDbEntity[str, str, str](MemoryHashStorage())),
+        set_db=SetDbStrAdapterUUID(set_storage.set_db_adapter()),
+        union_set_db=UnionSetDbTransformUUIDAdapter(set_storage.union_set_db_adapter(generate_str_uuid)),
+        diff_set_db=DiffSetDbTransformUUIDAdapter(set_storage.diff_set_db_adapter(generate_str_uuid)),
+        version_db=MemoryVersionDbAdapter[UUID](),
+        expiry_db=ExpiryDbStrAdapterIpAddress(MemoryExpiryDbAdapter(set_storage.set_db_entity_adapter())),
+    )
+
+
 async def download_handle_adapters() -> AsyncGenerator[ServiceAdapters, None]:
     async with context_async_redis_client('download handler') as client_obj:
         # use one redis connection
         logging.debug('Provide download handle adapter')
-        yield ServiceAdapters(
-            address_set_db_entity=SetDbEntityStrAdapterIpAddress(RedisSetDbEntityAdapter(client_obj)),
-            network_set_db_entity=SetDbEntityStrAdapterIpNetwork(RedisSetDbEntityAdapter(client_obj)),
-            hash_db_service=HashDbEntityGroupDataStrAdapter(RedisDBEntityAdapter(client_obj)),
-            set_db=SetDbStrAdapterUUID(RedisSetDbAdapter(client_obj)),
-            union_set_db=UnionSetDbTransformUUIDAdapter(RedisUnionSetDbAdapter(client_obj, generate_str_uuid)),
-        )
+        yield get_download_adapters(client_obj)
         logging.debug('Finished providing download handle adapter')
 
 
+@asynccontextmanager
+async def download_stream_adapters(job_name: str) -> AsyncGenerator[ServiceAdapters, None]:
+    """Download adapters for streaming responses and shared (coalesced) computations of downloads.
+    Exit code of dependencies with yield is executed before the response body is sent,
+    so streaming generators have to own their redis connection
+    """
+    async with context_async_redis_client(job_name) as client_obj:
+        logging.debug('Provide download stream adapter')
+        yield get_download_adapters(client_obj)
+        logging.debug('Finished providing download stream adapter')
+
+
 async def get_set_db_adapter() -> AsyncGenerator[ISetDb, None]:
     async with context_async_redis_client('set management job') as client_obj:
         logging.debug('Provide set db adapter')
@@ -95,6 +184,27 @@ async def get_history_db_service() -> AsyncGenerator[HistoryDBService, None]:
         yield HistoryDBService(client_obj)
 
 
+async def time_index_db_adapter() -> AsyncGenerator[ITimeIndexDb[UUID, IPv4Address], None]:
+    """DI for working with time indexes of addresses"""
+    async for client_obj in redis_client():
+        yield TimeIndexDbStrAdapterIpAddress(RedisTimeIndexDbAdapter(client_obj))
+
+
+def get_change_index(client_obj: RedisAsyncio) -> Optional[AddressChangeIndexService]:
+    """Compose index of last changes of addresses for one redis connection (None if index is disabled)"""
+    if not app_settings.usage_change_index_enabled:
+        return None
+    return AddressChangeIndexService(
+        TimeIndexDbStrAdapterIpAddress(RedisTimeIndexDbAdapter(client_obj)), app_settings.usage_change_index_by_group
+    )
+
+
+async def change_index_service() -> AsyncGenerator[Optional[AddressChangeIndexService], None]:
+    """DI for reading of index of last changes of addresses (None if index is disabled)"""
+    async for client_obj in redis_client():
+        yield get_change_index(client_obj)
+
+
 async def get_history_db_service_for_job(job_name: Optional[str] = None) -> AsyncGenerator[HistoryDBService, None]:
     async with context_async_redis_client(
         job_name if job_name is not None else 'history db management job'
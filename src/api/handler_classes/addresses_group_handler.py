@@ -9,8 +9,10 @@ from fastapi import Depends
 from fastapi.security import HTTPAuthorizationCredentials
 
 from src.api.di.db_di_routines import groups_db_service_adapter
+from src.api.di.db_di_routines import version_db_adapter
 from src.api.http_auth_wrapper import get_proc_auth_checker
 from src.db.base_hash_db_entity import IHashDbEntity
+from src.db.base_version_db import IVersionDb
 from src.schemas.common_response_schemas import DeleteResponseSchema
 from src.schemas.set_group_schemas import AddGroupSet
 from src.schemas.set_group_schemas import GroupSet
@@ -28,9 +30,11 @@ class AddressesGroupHandler:
         self.group_category: str = group_category
         self.__router = APIRouter()
 
-    def __get_service_obj(self, db_service_adapter: IHashDbEntity) -> GroupsDbService:
+    def __get_service_obj(
+        self, db_service_adapter: IHashDbEntity, version_db: Optional[IVersionDb] = None
+    ) -> GroupsDbService:
         """Obtain service class from factory"""
-        return groups_db_service_factory(self.group_category, db_service_adapter)
+        return groups_db_service_factory(self.group_category, db_service_adapter, version_db)
 
     async def group_list(
         self,
@@ -52,18 +56,20 @@ class AddressesGroupHandler:
         self,
         group_data: AddGroupSet,
         db_service_adapter: Annotated[IHashDbEntity, Depends(groups_db_service_adapter)],
+        version_db: Annotated[IVersionDb, Depends(version_db_adapter)],
         auth: Optional[HTTPAuthorizationCredentials] = Depends(allowed_group_change_auth_check),  # noqa: B008
     ) -> GroupSet:
-        db_service = self.__get_service_obj(db_service_adapter)
+        db_service = self.__get_service_obj(db_service_adapter, version_db)
         return await db_service.add_group(group_data)
 
     async def delete_group(
         self,
         group_set_id: UUID,
         db_service_adapter: Annotated[IHashDbEntity, Depends(groups_db_service_adapter)],
+        version_db: Annotated[IVersionDb, Depends(version_db_adapter)],
         auth: Optional[HTTPAuthorizationCredentials] = Depends(allowed_group_change_auth_check),  # noqa: B008
     ) -> DeleteResponseSchema:
-        db_service = self.__get_service_obj(db_service_adapter)
+        db_service = self.__get_service_obj(db_service_adapter, version_db)
         return DeleteResponseSchema(deleted=await db_service.delete_group(group_set_id))
 
     async def update_group(
@@ -71,9 +77,10 @@ class AddressesGroupHandler:
         group_set_id: UUID,
         group_data: UpdateGroupSet,
         db_service_adapter: Annotated[IHashDbEntity, Depends(groups_db_service_adapter)],
+        version_db: Annotated[IVersionDb, Depends(version_db_adapter)],
         auth: Optional[HTTPAuthorizationCredentials] = Depends(allowed_group_change_auth_check),  # noqa: B008
     ):
-        db_service = self.__get_service_obj(db_service_adapter)
+        db_service = self.__get_service_obj(db_service_adapter, version_db)
         return await db_service.update_group(group_set_id, group_data)
 
     def router(self) -> APIRouter:
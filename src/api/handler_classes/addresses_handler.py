@@ -1,41 +1,57 @@
 # common class for processing addresses handles
+from functools import partial
 from typing import Annotated
+from typing import Any
 from typing import Optional
 from uuid import UUID
 
 from fastapi import APIRouter
 from fastapi import BackgroundTasks
 from fastapi import Depends
+from fastapi import Request
 from fastapi import status
 from fastapi.exceptions import HTTPException
 from fastapi.security import HTTPAuthorizationCredentials
 
 from src.api.di.db_di_routines import address_with_groups_db_service_adapter
 from src.api.http_auth_wrapper import get_proc_auth_checker
+from src.core.config import app_settings
 from src.core.settings import ALLOWED_ADDRESSES_CATEGORY_NAME
 from src.core.settings import BACKGROUND_ADD_RECORDS
 from src.core.settings import BACKGROUND_DELETE_RECORDS
 from src.core.settings import BANNED_ADDRESSES_CATEGORY_NAME
 from src.core.settings import HISTORY_USAGE_INFO
 from src.core.settings import STREAM_USAGE_INFO
+from src.models.query_params_models import BulkAddressesQueryParams
 from src.models.query_params_models import CommonQueryParams
 from src.models.query_params_models import CountAddress
+from src.schemas.addresses_schemas import AgentAddressesAddInfo
 from src.schemas.addresses_schemas import AgentAddressesInfoWithGroup
 from src.schemas.addresses_schemas import IpV4AddressList
+from src.schemas.base_input_schema import now_cur_tz
 from src.schemas.common_response_schemas import AddResponseSchema
+from src.schemas.common_response_schemas import BulkResponseSchema
 from src.schemas.common_response_schemas import CountResponseSchema
 from src.schemas.common_response_schemas import DeleteResponseSchema
 from src.schemas.set_group_schemas import GroupSet
 from src.schemas.usage_schemas import ActionType
 from src.service.abstract_set_db_entity_service import AbstractSetDBEntityService
+from src.service.address_expiry_service import AddressExpiryService
+from src.service.bulk_addresses_service import BulkAddressesService
 from src.service.groups_db_service import GroupsDbService
+from src.service.seen_addresses_service import SeenAddressesService
 from src.service.service_db_factories import ServiceWithGroupDbAdapters
 from src.service.service_db_factories import any_addresses_db_service_factory
 from src.service.service_db_factories import groups_db_service_factory
+from src.service.usage_stream_service import UsageStreamAddService
 from src.tasks.celery_tasks import celery_update_history_task
 from src.tasks.celery_tasks import celery_update_usage_info_task
 from src.tasks.history_update_bg_task import update_history_bg_task_ns
 from src.tasks.usage_update_bg_task import update_usage_bg_task_ns
+from src.utils.bulk_parse_utils import BODY_FORMATS_BY_CONTENT_TYPE
+from src.utils.bulk_parse_utils import body_format_from_content_type
+from src.utils.ip_array_utils import addresses_array
+from src.utils.ip_array_utils import render_addresses
 
 # TODO exclude direct usage of Redis DB provider
 addresses_auth_check = get_proc_auth_checker(need_admin_permission=False)
@@ -68,12 +84,13 @@ class AddressHandler:
         self, db_service_adapter: ServiceWithGroupDbAdapters, group_name: Optional[str]
     ) -> tuple[GroupsDbService, AbstractSetDBEntityService, UUID]:
         groups_service_obj = groups_db_service_factory(
-            self.__address_category, db_service_adapter.db_hash_service_adapter
+            self.__address_category, db_service_adapter.db_hash_service_adapter, db_service_adapter.version_db
         )
         group_set_id = await self.get_group_id(group_name, groups_service_obj)
         service_obj = any_addresses_db_service_factory(
             group_set_id,
             db_service_adapter.db_service_adapter,
+            db_service_adapter.version_db,
         )
         return groups_service_obj, service_obj, group_set_id
 
@@ -92,47 +109,69 @@ class AddressHandler:
             )
         ]
 
-    async def save_addresses(
+    async def record_changes(
         self,
         agent_info: AgentAddressesInfoWithGroup,
-        db_service_adapter: Annotated[ServiceWithGroupDbAdapters, Depends(address_with_groups_db_service_adapter)],
+        action_type: ActionType,
         background_tasks: BackgroundTasks,
-        auth: Optional[HTTPAuthorizationCredentials] = Depends(addresses_auth_check),  # noqa: B008
+        background_records: int,
+        usage_add_service: Optional[UsageStreamAddService],
     ):
-        _hash_service_obj, service_obj, _group_set_id = await self.get_service_and_set(
-            db_service_adapter, agent_info.address_group
-        )
-
-        added_count = await service_obj.write_records(agent_info.addresses)
-        if len(agent_info.addresses) <= BACKGROUND_ADD_RECORDS:
-            # run fast tasks in background
-            # Update usage information
+        """Update usage and history with changed addresses: in background for small count of addresses,
+        with celery tasks otherwise. With history_stream_enabled set usage record is written before response
+        (history is updated from usage stream by history workers, so change is not lost after response)
+        """
+        if app_settings.history_stream_enabled:
+            assert usage_add_service is not None, 'Expected usage stream service with history stream enabled'
+            await usage_add_service.add(action_type, agent_info, self.__address_category)
+        elif len(agent_info.addresses) <= background_records:
             background_tasks.add_task(
-                update_usage_bg_task_ns, STREAM_USAGE_INFO, ActionType.add_action, agent_info, self.__address_category
+                update_usage_bg_task_ns, STREAM_USAGE_INFO, action_type, agent_info, self.__address_category
             )
-            # Update history information
             background_tasks.add_task(
-                update_history_bg_task_ns,
-                HISTORY_USAGE_INFO,
-                agent_info,
-                ActionType.add_action,
-                self.__address_category,
+                update_history_bg_task_ns, HISTORY_USAGE_INFO, agent_info, action_type, self.__address_category
             )
         else:
-            # invoke celery task for update usage and history
             agent_info_dict = agent_info.encode()
             celery_update_usage_info_task.apply_async(
-                (STREAM_USAGE_INFO, ActionType.add_action, agent_info_dict, self.__address_category)
+                (STREAM_USAGE_INFO, action_type, agent_info_dict, self.__address_category)
+            )
+            celery_update_history_task.apply_async((agent_info_dict, action_type, self.__address_category))
+
+    async def save_addresses(
+        self,
+        agent_info: AgentAddressesAddInfo,
+        db_service_adapter: Annotated[ServiceWithGroupDbAdapters, Depends(address_with_groups_db_service_adapter)],
+        background_tasks: BackgroundTasks,
+        auth: Optional[HTTPAuthorizationCredentials] = Depends(addresses_auth_check),  # noqa: B008
+    ):
+        _hash_service_obj, service_obj, group_set_id = await self.get_service_and_set(
+            db_service_adapter, agent_info.address_group
+        )
+
+        if db_service_adapter.expiry_db is not None:
+            # addresses added without TTL are kept forever even if they were added with TTL before (expiration is
+            # renewed before addition, so addresses are not removed by reaper of previous expiration)
+            await AddressExpiryService(db_service_adapter.expiry_db, group_set_id).set_ttl(
+                agent_info.addresses, agent_info.ttl_seconds
             )
-            celery_update_history_task.apply_async(
-                (
-                    agent_info_dict,
-                    ActionType.add_action,
-                    self.__address_category,
+        added_addresses = await service_obj.write_changed_records(agent_info.addresses)
+        if app_settings.record_reseen_addresses and db_service_adapter.time_index_db is not None:
+            reseen_addresses = set(agent_info.addresses).difference(added_addresses)
+            if reseen_addresses:
+                await SeenAddressesService(db_service_adapter.time_index_db).mark_seen(
+                    reseen_addresses, agent_info.action_time
                 )
+        if added_addresses:
+            # only actually added addresses are recorded in usage and history
+            await self.record_changes(
+                agent_info.with_addresses(added_addresses),
+                ActionType.add_action,
+                background_tasks,
+                BACKGROUND_ADD_RECORDS,
+                db_service_adapter.usage_add_service,
             )
-
-        return AddResponseSchema(added=added_count)
+        return AddResponseSchema(added=len(added_addresses))
 
     async def delete_addresses(
         self,
@@ -141,34 +180,88 @@ class AddressHandler:
         background_tasks: BackgroundTasks,
         auth: Optional[HTTPAuthorizationCredentials] = Depends(addresses_auth_check),  # noqa: B008
     ):
-        _hash_service_obj, service_obj, _group_set_id = await self.get_service_and_set(
+        _hash_service_obj, service_obj, group_set_id = await self.get_service_and_set(
             db_service_adapter, agent_info.address_group
         )
-        deleted_count = await service_obj.del_records(agent_info.addresses)
-        if len(agent_info.addresses) <= BACKGROUND_DELETE_RECORDS:
-            background_tasks.add_task(
-                update_usage_bg_task_ns,
-                STREAM_USAGE_INFO,
-                ActionType.remove_action,
-                agent_info,
-                self.__address_category,
-            )
-            background_tasks.add_task(
-                update_history_bg_task_ns,
-                HISTORY_USAGE_INFO,
-                agent_info,
+        deleted_addresses = await service_obj.del_changed_records(agent_info.addresses)
+        if db_service_adapter.expiry_db is not None:
+            await AddressExpiryService(db_service_adapter.expiry_db, group_set_id).persist(agent_info.addresses)
+        if deleted_addresses:
+            # only actually deleted addresses are recorded in usage and history
+            await self.record_changes(
+                agent_info.with_addresses(deleted_addresses),
                 ActionType.remove_action,
-                self.__address_category,
+                background_tasks,
+                BACKGROUND_DELETE_RECORDS,
+                db_service_adapter.usage_add_service,
             )
-        else:
-            # invoke celery task for update usage
-            agent_info_dict = agent_info.encode()
-            celery_update_usage_info_task.apply_async(
-                (STREAM_USAGE_INFO, ActionType.remove_action, agent_info_dict, self.__address_category)
-            )
-            celery_update_history_task.apply_async(agent_info_dict, ActionType.remove_action, self.__address_category)
+        return DeleteResponseSchema(deleted=len(deleted_addresses))
+
+    async def apply_bulk_usage(
+        self,
+        agent_info_dict: dict[str, Any],
+        action: ActionType,
+        usage_add_service: Optional[UsageStreamAddService],
+        addresses: list[int],
+    ):
+        """Update usage and history with applied portion of bulk addresses: in celery tasks, or directly in usage
+        stream with history_stream_enabled set (history is updated from usage stream by history workers)
+        """
+        agent_info_dict = dict(agent_info_dict, addresses=render_addresses(addresses_array(addresses)).split())
+        if app_settings.history_stream_enabled:
+            assert usage_add_service is not None, 'Expected usage stream service with history stream enabled'
+            await usage_add_service.add(action, AgentAddressesInfoWithGroup(**agent_info_dict), self.__address_category)
+            return
+        celery_update_usage_info_task.apply_async((STREAM_USAGE_INFO, action, agent_info_dict, self.__address_category))
+        celery_update_history_task.apply_async((agent_info_dict, action, self.__address_category))
 
-        return DeleteResponseSchema(deleted=deleted_count)
+    async def bulk_addresses(
+        self,
+        request: Request,
+        query_params: Annotated[BulkAddressesQueryParams, Depends()],
+        db_service_adapter: Annotated[ServiceWithGroupDbAdapters, Depends(address_with_groups_db_service_adapter)],
+        auth: Optional[HTTPAuthorizationCredentials] = Depends(addresses_auth_check),  # noqa: B008
+    ):
+        """Add or remove addresses from body: one address per line (text/plain), NDJSON records with address as
+        string or integer (application/x-ndjson) or packed big-endian 32 bit integers (application/octet-stream).
+        Body is processed while it arrives, incorrect records are rejected
+        """
+        body_format = body_format_from_content_type(request.headers.get('content-type'))
+        if body_format is None:
+            raise HTTPException(
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                detail='Supported content types: {}'.format(', '.join(BODY_FORMATS_BY_CONTENT_TYPE)),
+            )
+        _hash_service_obj, _service_obj, group_set_id = await self.get_service_and_set(
+            db_service_adapter, query_params.address_group
+        )
+        assert db_service_adapter.db_int_service_adapter is not None, 'Expected adapter for addresses as integers'
+        service_obj = any_addresses_db_service_factory(
+            group_set_id, db_service_adapter.db_int_service_adapter, db_service_adapter.version_db
+        )
+        action_time = now_cur_tz()
+        agent_info_dict: dict[str, Any] = {
+            'source_agent': query_params.source_agent,
+            'action_time': action_time.isoformat(),
+            'address_group': query_params.address_group,
+        }
+        bulk_service_obj = BulkAddressesService(
+            service_obj,
+            query_params.action,
+            partial(self.apply_bulk_usage, agent_info_dict, query_params.action, db_service_adapter.usage_add_service),
+            expiry_service=(
+                None
+                if db_service_adapter.expiry_db is None
+                else AddressExpiryService(db_service_adapter.expiry_db, group_set_id)
+            ),
+            seen_service=(
+                SeenAddressesService(db_service_adapter.time_index_db)
+                if app_settings.record_reseen_addresses and db_service_adapter.time_index_db is not None
+                else None
+            ),
+            seen_time=action_time,
+        )
+        return await bulk_service_obj.process(request.stream(), body_format)
 
     async def count_banned_addresses(
         self,
@@ -196,6 +289,11 @@ class AddressHandler:
             summary=f'Delete {self.__address_category_description} from storage',
             response_model=DeleteResponseSchema,
         )(self.delete_addresses)
+        self.__router.post(
+            '/bulk',
+            summary=f'Add or delete {self.__address_category_description} from streamed body (text, NDJSON, binary)',
+            response_model=BulkResponseSchema,
+        )(self.bulk_addresses)
         self.__router.get(
             '/count',
             summary=f'Count {self.__address_category_description} in storage',
@@ -2,23 +2,49 @@
 
 import datetime
 import logging
+from array import array
 from ipaddress import IPv4Address
 from typing import Annotated
+from typing import AsyncGenerator
+from typing import Optional
 from uuid import UUID
 
 from fastapi import Depends
+from fastapi import Query
 from fastapi import status
+from fastapi.encoders import jsonable_encoder
 from fastapi.exceptions import HTTPException
+from fastapi.responses import ORJSONResponse
+from fastapi.responses import StreamingResponse
 from fastapi.routing import APIRouter
 
+from src.api.di.db_di_routines import change_index_service
 from src.api.di.db_di_routines import get_history_db_service
 from src.api.di.db_di_routines import get_stream_db_adapter
+from src.api.di.db_di_routines import time_index_db_adapter
+from src.core.settings import ALLOWED_ADDRESSES_CATEGORY_NAME
+from src.core.settings import BANNED_ADDRESSES_CATEGORY_NAME
+from src.core.settings import NDJSON_MEDIA_TYPE
+from src.core.settings import NEXT_CURSOR_HEADER
 from src.db.base_stream_db import IStreamDb
+from src.db.base_time_index_db import ITimeIndexDb
+from src.db.storages.redis_db import context_async_redis_client
+from src.models.query_params_models import ChangeIndexQueryParams
+from src.models.query_params_models import HistoryPageQueryParams
 from src.models.query_params_models import HistoryQueryParams
 from src.schemas.base_input_schema import now_cur_tz
+from src.schemas.usage_schemas import AddressChangeRecord
 from src.schemas.usage_schemas import AddressHistoryRecord
+from src.schemas.usage_schemas import AddressHistoryRecordWithSeen
 from src.schemas.usage_schemas import StreamUsageRecord
+from src.service.change_index_service import AddressChangeIndexService
 from src.service.history_db_service import HistoryDBService
+from src.service.history_read_service import AddressesPage
+from src.service.history_read_service import HistoryReadService
+from src.service.history_read_service import addresses_page
+from src.service.history_read_service import stream_addresses
+from src.service.seen_addresses_service import SeenAddressesService
+from src.service.usage_retention_service import get_usage_archive_storage
 from src.service.usage_stream_service import UsageStreamReadService
 from src.service.usage_stream_service import get_usage_read_service
 from src.utils.time_utils import get_current_time_with_tz
@@ -27,54 +53,166 @@ from src.utils.time_utils import get_timedelta_for_history_query
 api_router = APIRouter()
 
 
+def history_start_time(query_params: HistoryQueryParams) -> Optional[datetime.datetime]:
+    """Start of history period from query params (None for all records)"""
+    if query_params.all_records:
+        return None
+    offset_timedelta = get_timedelta_for_history_query(query_params.time_offset)
+    if offset_timedelta is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Wrong value for "time_offset" parameter')
+    return now_cur_tz() - offset_timedelta
+
+
+async def read_changed_addresses(
+    change_index: Optional[AddressChangeIndexService],
+    usage_read_db_service: IStreamDb[UUID, str, StreamUsageRecord],
+    start_time: Optional[datetime.datetime],
+) -> array:
+    """Sorted addresses changed after start_time: from index of last changes if it is enabled, otherwise from usage
+    stream (and archive)
+    """
+    if change_index is not None:
+        return await change_index.changed_addresses_sorted(start_time)
+    read_service_obj: UsageStreamReadService = get_usage_read_service(
+        usage_read_db_service, archive_storage=get_usage_archive_storage()
+    )
+    return await read_service_obj.read_sorted(start_timestamp=start_time)
+
+
+def change_index_filter(
+    change_index: Optional[AddressChangeIndexService], change_params: ChangeIndexQueryParams
+) -> tuple[AddressChangeIndexService, Optional[str]]:
+    """Check queries of index of last changes, returns index and address category of query"""
+    if change_index is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Index of last changes is disabled')
+    if change_params.address_category is None:
+        if change_params.address_group is not None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail='Parameter "address_group" requires "address_category"'
+            )
+        return change_index, None
+    if not change_index.by_group:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail='Index of last changes per group is disabled'
+        )
+    if change_params.address_category == 'banned':
+        return change_index, BANNED_ADDRESSES_CATEGORY_NAME
+    return change_index, ALLOWED_ADDRESSES_CATEGORY_NAME
+
+
+def page_headers(page: AddressesPage) -> dict[str, str]:
+    return {NEXT_CURSOR_HEADER: str(page.next_cursor)} if page.next_cursor is not None else {}
+
+
+async def stream_history_ndjson(addresses: array) -> AsyncGenerator[str, None]:
+    # resources of dependencies are released before response streaming, so own connection is used
+    async with context_async_redis_client('history stream') as client_obj:
+        async for records in HistoryReadService(HistoryDBService(client_obj)).stream_ndjson(addresses):
+            yield records
+
+
 @api_router.get('', response_model=list[AddressHistoryRecord])
 async def get_history(
     history_db_srv_obj: Annotated[HistoryDBService, Depends(get_history_db_service)],
     usage_read_db_service: Annotated[IStreamDb[UUID, str, StreamUsageRecord], Depends(get_stream_db_adapter)],
+    change_index: Annotated[Optional[AddressChangeIndexService], Depends(change_index_service)],
     query_params: Annotated[HistoryQueryParams, Depends()],
+    page_params: Annotated[HistoryPageQueryParams, Depends()],
 ):
-    result: list[AddressHistoryRecord] = []
-    current_time = now_cur_tz()
-    all_records = query_params.all_records
-    offset_timedelta = get_timedelta_for_history_query(query_params.time_offset)
-    if not all_records and offset_timedelta is None:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Wrong value for "time_offset" parameter')
-    board_time: datetime.datetime = current_time - (
-        offset_timedelta if offset_timedelta is not None else datetime.timedelta(seconds=0)
-    )
+    """History of addresses changed in period. Without pagination JSON records are sorted by last update time,
+    pages and NDJSON stream are sorted by address
+    """
     # first of all we get all changed addresses
-    read_service_obj: UsageStreamReadService = get_usage_read_service(usage_read_db_service)
-    changed_addresses = await read_service_obj.read(start_timestamp=board_time if not all_records else None)
-    if len(changed_addresses):
-        logging.debug('Get history for %d addresses', len(changed_addresses))
-        for address in changed_addresses:
-            record = await history_db_srv_obj.read_record(str(address))
-            if record is not None:
-                result.append(record)
-    return sorted(result, key=lambda x: x.last_update_time)
+    changed_addresses = await read_changed_addresses(
+        change_index, usage_read_db_service, history_start_time(query_params)
+    )
+    logging.debug('Get history for %d addresses', len(changed_addresses))
+    page = addresses_page(changed_addresses, page_params.after, page_params.limit)
+    if page_params.output_format == 'ndjson':
+        return StreamingResponse(
+            stream_history_ndjson(page.addresses), media_type=NDJSON_MEDIA_TYPE, headers=page_headers(page)
+        )
+    history_read_service = HistoryReadService(history_db_srv_obj)
+    if page_params.paginated:
+        records: list[AddressHistoryRecord] = list()
+        async for batch in history_read_service.fetch_records(page.addresses):
+            records.extend(batch)
+    else:
+        records = await history_read_service.read_sorted_by_update_time(page.addresses)
+    return ORJSONResponse(jsonable_encoder(records), headers=page_headers(page))
 
 
 @api_router.get('/addresses', response_model=list[IPv4Address])
 async def get_usage_addresses(
     usage_read_db_service: Annotated[IStreamDb[UUID, str, StreamUsageRecord], Depends(get_stream_db_adapter)],
+    change_index: Annotated[Optional[AddressChangeIndexService], Depends(change_index_service)],
     query_params: Annotated[HistoryQueryParams, Depends()],
+    page_params: Annotated[HistoryPageQueryParams, Depends()],
 ):
-    """Getting list of changed addresses in time period"""
-    read_service_obj: UsageStreamReadService = get_usage_read_service(usage_read_db_service)
+    """Getting sorted list of changed addresses in time period (streamed by blocks)"""
     all_records = query_params.all_records
     offset_timedelta = get_timedelta_for_history_query(query_params.time_offset)
     start_time = (
         (get_current_time_with_tz() - offset_timedelta) if (offset_timedelta is not None and not all_records) else None
     )
-    result = await read_service_obj.read(start_timestamp=start_time)
-    return sorted(list(result))
+    page = addresses_page(
+        await read_changed_addresses(change_index, usage_read_db_service, start_time),
+        page_params.after,
+        page_params.limit,
+    )
+    ndjson = page_params.output_format == 'ndjson'
+    return StreamingResponse(
+        stream_addresses(page.addresses, ndjson),
+        media_type=NDJSON_MEDIA_TYPE if ndjson else 'application/json',
+        headers=page_headers(page),
+    )
 
 
-@api_router.get('/{ip_address}', response_model=AddressHistoryRecord)
+@api_router.get('/changed', response_model=list[AddressChangeRecord])
+async def get_changed_addresses(
+    change_index: Annotated[Optional[AddressChangeIndexService], Depends(change_index_service)],
+    query_params: Annotated[HistoryQueryParams, Depends()],
+    change_params: Annotated[ChangeIndexQueryParams, Depends()],
+):
+    """Addresses with the latest change in time period sorted by change time (from index of last changes)"""
+    change_index_obj, address_category = change_index_filter(change_index, change_params)
+    return await change_index_obj.changes(
+        history_start_time(query_params),
+        None,
+        change_params.offset,
+        change_params.limit,
+        address_category,
+        change_params.address_group,
+    )
+
+
+@api_router.get('/stale', response_model=list[AddressChangeRecord])
+async def get_stale_addresses(
+    change_index: Annotated[Optional[AddressChangeIndexService], Depends(change_index_service)],
+    change_params: Annotated[ChangeIndexQueryParams, Depends()],
+    days: Annotated[float, Query(gt=0, description='Return addresses without changes for this count of days')],
+):
+    """Addresses not changed for period sorted by change time, the longest untouched first (for cleanup jobs)"""
+    change_index_obj, address_category = change_index_filter(change_index, change_params)
+    return await change_index_obj.not_changed_since(
+        now_cur_tz() - datetime.timedelta(days=days),
+        change_params.offset,
+        change_params.limit,
+        address_category,
+        change_params.address_group,
+    )
+
+
+@api_router.get('/{ip_address}', response_model=AddressHistoryRecordWithSeen)
 async def get_history_by_address(
-    history_db_srv_obj: Annotated[HistoryDBService, Depends(get_history_db_service)], ip_address: IPv4Address
+    history_db_srv_obj: Annotated[HistoryDBService, Depends(get_history_db_service)],
+    time_index_db: Annotated[ITimeIndexDb[UUID, IPv4Address], Depends(time_index_db_adapter)],
+    ip_address: IPv4Address,
 ):
     history_record_obj = await history_db_srv_obj.read_record(str(ip_address))
     if history_record_obj is None:
         raise HTTPException(status.HTTP_404_NOT_FOUND, f'History for address {ip_address} is not found')
-    return AddressHistoryRecord(**(history_record_obj.model_dump(mode='json') | {'address': ip_address}))
+    return AddressHistoryRecordWithSeen(
+        **(history_record_obj.model_dump(mode='json') | {'address': ip_address}),
+        last_seen_time=await SeenAddressesService(time_index_db).last_seen(ip_address),
+    )
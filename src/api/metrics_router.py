@@ -0,0 +1,12 @@
+# Metrics router
+from fastapi.routing import APIRouter
+
+from src.schemas.metrics_schemas import DownloadMetrics
+from src.service.download_flights_service import get_download_metrics
+
+api_router = APIRouter()
+
+
+@api_router.get('/downloads', response_model=DownloadMetrics, summary='Get coalescing and cache metrics of downloads')
+async def download_metrics():
+    return get_download_metrics()
@@ -0,0 +1,57 @@
+import logging
+from datetime import datetime as dt_datetime
+from ipaddress import IPv4Network
+from typing import AsyncGenerator
+from typing import Callable
+
+from src.api.di.db_di_routines import get_memory_download_adapters
+from src.core.settings import BANNED_ADDRESSES_SET_ID
+from src.service.blacklist_service import BlacklistService
+from src.utils.ip_utils import random_ip_addresses
+
+BENCHMARK_NETWORKS_PREFIX_LEN = 16
+
+BannedAddressesGetter = Callable[..., AsyncGenerator[str, None]]
+
+
+async def measure_blacklist_engine(engine_name: str, get_banned_addresses: BannedAddressesGetter, *args) -> set[str]:
+    """Consume banned addresses generator, log elapsed time and return produced records"""
+    start_moment = dt_datetime.now()
+    result: set[str] = set()
+    async for addresses in get_banned_addresses(*args):
+        result.update(addresses.split())
+    duration = dt_datetime.now() - start_moment
+    logging.info(
+        'Engine "%s": produced %d records, elapsed %s milliseconds',
+        engine_name,
+        len(result),
+        duration.seconds * 1000 + duration.microseconds / 1000,
+    )
+    return result
+
+
+async def blacklist_benchmark(banned_count: int, allowed_count: int, networks_count: int):
+    """Compare per-object and array engines of blacklist generation on memory storage
+    Storage is filled with random addresses, so only processing of records is measured
+    """
+    service_adapter_obj = get_memory_download_adapters()
+    await service_adapter_obj.address_set_db_entity.add_to_set(
+        BANNED_ADDRESSES_SET_ID, random_ip_addresses(banned_count)
+    )
+    allowed_addresses = set(random_ip_addresses(allowed_count))
+    allowed_networks = {
+        IPv4Network(address).supernet(new_prefix=BENCHMARK_NETWORKS_PREFIX_LEN)
+        for address in random_ip_addresses(networks_count)
+    }
+    logging.info(
+        'Benchmark data: %d banned addresses, %d allowed addresses, %d allowed networks',
+        banned_count,
+        len(allowed_addresses),
+        len(allowed_networks),
+    )
+    blacklist_service_obj = BlacklistService(service_adapter_obj)
+    args = (BANNED_ADDRESSES_SET_ID, allowed_addresses, allowed_networks, 0)
+    per_object_result = await measure_blacklist_engine('per-object', blacklist_service_obj.get_banned_addresses, *args)
+    array_result = await measure_blacklist_engine('array', blacklist_service_obj.get_banned_addresses_bulk, *args)
+    if per_object_result != array_result:
+        raise ValueError('Engines produced different results')
@@ -0,0 +1,113 @@
+import logging
+from datetime import timedelta
+from time import perf_counter
+from typing import Any
+from typing import Callable
+from typing import Sequence
+
+from src.core.settings import BANNED_ADDRESSES_CATEGORY_NAME
+from src.models.history_transformation import AHRBinaryStrTransformation
+from src.models.history_transformation import AHRJsonStrTransformation
+from src.models.usage_transformation import SURBinaryDictTransformation
+from src.models.usage_transformation import SURDictTransformation
+from src.schemas.base_input_schema import now_cur_tz
+from src.schemas.usage_schemas import ActionType
+from src.schemas.usage_schemas import AddressHistoryRecord
+from src.schemas.usage_schemas import HistoryRecordInfo
+from src.schemas.usage_schemas import StreamUsageRecord
+from src.utils.ip_utils import random_ip_addresses
+
+BENCHMARK_HISTORY_DEPTH = 5
+BENCHMARK_USAGE_ADDRESSES = 10
+
+
+def measure_decoding(codec_name: str, decode: Callable[[Any], Any], records: Sequence[Any], size: int) -> float:
+    """Decode records, log throughput and average size of record, return decoded records per second"""
+    start_moment = perf_counter()
+    for record in records:
+        decode(record)
+    throughput = len(records) / (perf_counter() - start_moment)
+    logging.info(
+        'Codec "%s": decoded %d records per second, average record size %d bytes',
+        codec_name,
+        throughput,
+        size // len(records),
+    )
+    return throughput
+
+
+def benchmark_history_records(addresses: list) -> tuple[float, float]:
+    moment = now_cur_tz()
+    records = [
+        AddressHistoryRecord(
+            address=address,
+            last_update_time=moment,
+            history_records=[
+                HistoryRecordInfo(
+                    source=f'agent_{position % 3}',
+                    action_time=moment - timedelta(hours=position),
+                    action_type=ActionType.add_action if position % 2 else ActionType.remove_action,
+                    address_category=BANNED_ADDRESSES_CATEGORY_NAME,
+                    address_group='group',
+                )
+                for position in range(BENCHMARK_HISTORY_DEPTH)
+            ],
+        )
+        for address in addresses
+    ]
+    json_records = [AHRJsonStrTransformation.transform_to_storage(x) for x in records]
+    binary_records = [AHRBinaryStrTransformation.transform_to_storage(x) for x in records]
+    return (
+        measure_decoding(
+            'history json',
+            AHRJsonStrTransformation.transform_from_storage,
+            json_records,
+            sum(len(x) for x in json_records),
+        ),
+        measure_decoding(
+            'history binary',
+            AHRBinaryStrTransformation.transform_from_storage,
+            binary_records,
+            sum(len(x) for x in binary_records),
+        ),
+    )
+
+
+def benchmark_usage_records(addresses: list) -> tuple[float, float]:
+    moment = now_cur_tz()
+    records = [
+        StreamUsageRecord(
+            action_type=ActionType.add_action,
+            action_time=moment,
+            addresses=set(addresses[position : position + BENCHMARK_USAGE_ADDRESSES]),
+            address_category=BANNED_ADDRESSES_CATEGORY_NAME,
+            address_group='group',
+        )
+        for position in range(0, len(addresses), BENCHMARK_USAGE_ADDRESSES)
+    ]
+    json_records = [SURDictTransformation.transform_to_storage(x) for x in records]
+    binary_records = [SURBinaryDictTransformation.transform_to_storage(x) for x in records]
+    return (
+        measure_decoding(
+            'usage strings',
+            SURDictTransformation.transform_from_storage,
+            json_records,
+            sum(len(key) + len(value) for x in json_records for key, value in x.items()),
+        ),
+        measure_decoding(
+            'usage binary',
+            SURBinaryDictTransformation.transform_from_storage,
+            binary_records,
+            sum(len(key) + len(value) for x in binary_records for key, value in x.items()),
+        ),
+    )
+
+
+def record_codecs_benchmark(records_count: int):
+    """Compare decoding throughput of JSON (strings) and binary encodings of history and usage stream records"""
+    addresses = random_ip_addresses(records_count)
+    for name, (json_throughput, binary_throughput) in (
+        ('history', benchmark_history_records(addresses)),
+        ('usage', benchmark_usage_records(addresses)),
+    ):
+        logging.info('Binary decoding of %s records is %.1f times faster', name, binary_throughput / json_throughput)
@@ -1,6 +1,7 @@
 from logging import config as logging_config
 from os import path as os_path
 from pathlib import Path
+from typing import Literal
 from typing import Optional
 
 from pydantic_settings import BaseSettings
@@ -25,6 +26,61 @@ class AppSettings(BaseSettings, RedisConfig):
     use_authorization: bool = False  # set True to use method authorization with tokens
     # Max entries in address change history. <None> for no limits in history depth, 0 - no history at all
     history_depth: Optional[int] = None
+    # Size of in-process cache for rendered blacklist downloads (in megabytes), 0 - no cache at all
+    download_cache_size_mb: int = 64
+    # Max total records count of cached union (and difference) sets registered by process (evicted sets are deleted
+    # unless other processes read them), 0 - no caching of these sets
+    derived_sets_cache_max_records: int = 5000000
+    # Encoding of addresses in Redis sets: "text" (dotted decimal) or "int" (compact), see migrate address_encoding
+    address_encoding: Literal['text', 'int'] = 'text'
+    # Encoding of written history and usage stream records: "json" or "binary" (compact), records of both encodings
+    # are read, see migrate record_encoding
+    record_encoding: Literal['json', 'binary'] = 'json'
+    # Period of checks of groups versions for in-process cache of groups (in seconds), 0 - check on every request.
+    # Groups changes made by other application processes are visible after the check
+    groups_cache_check_seconds: float = 1
+    # Lifetime of in-process cache of address check results (in seconds), 0 - no cache at all
+    check_cache_ttl_seconds: float = 0
+    # Max count of addresses in in-process cache of address check results
+    check_cache_max_entries: int = 100000
+    # In-process membership index of groups (roaring bitmaps) for address checks and blacklist downloads
+    membership_index_enabled: bool = False
+    # Period of membership index refresh from usage stream and period of its full rebuild (in seconds)
+    membership_index_refresh_seconds: float = 1
+    membership_index_rebuild_seconds: float = 3600
+    # Record moments of re-reporting of addresses already present in sets (only changed addresses are recorded in
+    # usage stream and history)
+    record_reseen_addresses: bool = False
+    # History retention: max age of history records (in days), max history records per address and period without
+    # changes (in days) after which history of address is dropped, <None> - no limit
+    history_max_age_days: Optional[float] = None
+    history_max_records: Optional[int] = None
+    history_idle_days: Optional[float] = None
+    # Period of history compaction runs enforcing retention (in seconds), 0 - history is not compacted
+    history_compaction_seconds: float = 0
+    # Usage stream retention: max age of records (in days) and max count of records, <None> - no limit
+    usage_max_age_days: Optional[float] = None
+    usage_max_records: Optional[int] = None
+    # Period of usage stream trimming enforcing retention (in seconds), 0 - stream is not trimmed
+    usage_retention_seconds: float = 0
+    # Directory of archive of trimmed usage records (<None> - trimmed records are dropped), size of archive segment
+    # (in megabytes) and max count of kept segments (0 - segments are never deleted)
+    usage_archive_dir: Optional[str] = None
+    usage_archive_segment_mb: int = 64
+    usage_archive_max_segments: int = 0
+    # Index of last changes of addresses maintained on usage stream writes (one more index per address category and
+    # group with usage_change_index_by_group set)
+    usage_change_index_enabled: bool = False
+    usage_change_index_by_group: bool = False
+    # History derived from usage stream by workers of consumer group (request handlers only append usage records),
+    # workers are started in application processes with history_stream_worker_in_app set (see manage.py worker)
+    history_stream_enabled: bool = False
+    history_stream_worker_in_app: bool = True
+    # Period of claims of usage records pending on failed history workers and their min idle time (in seconds)
+    history_stream_claim_seconds: float = 30
+    history_stream_min_idle_seconds: float = 60
+    # Period of removal of expired addresses (added with ttl_seconds) in seconds, 0 - expired addresses are not removed
+    expiry_reap_seconds: float = 10
 
     class Config:
         env_file = '.env'
@@ -22,9 +22,32 @@ ALLOWED_ADDRESSES_SET_ID = UUID('7ee4e862-6932-41cf-8ef1-09bd80b04a69')
 # Network Set Identifier
 ALLOWED_NETWORKS_SET_ID = UUID('f35f7ce4-da01-4d82-8e43-5059aa30bfa8')
 
+# Versions of data sets (hash with data set ID as key and version counter as value)
+SETS_VERSIONS_HASH_ID = UUID('789bfbdb-58a6-4d04-92af-832d322319c5')
+
+# Last moments of re-reporting of addresses already present in sets (sorted set: address -> epoch seconds)
+SEEN_ADDRESSES_SET_ID = UUID('c367412a-25ca-4c09-a2f8-c813b5b275bb')
+
+# Index of last changes of addresses recorded in usage stream (sorted set: address -> epoch seconds) and namespace
+# for identities of the same indexes per address category and group
+LAST_CHANGE_SET_ID = UUID('5d0c3e9a-7f41-4b2e-9c6d-2a8e1f3b4c57')
+LAST_CHANGE_NAMESPACE = UUID('e4a1b7c2-93d8-4f06-a5e2-7c1d9b0f6a38')
+
+# Encoding of addresses stored in sets (absent for sets written before encodings were introduced, i.e. text
+# encoding) or marker of running conversion of sets (see migrate address_encoding)
+ADDRESS_ENCODING_ID = UUID('d2f6c1a8-4b7e-4e3a-9f05-6c8b2e1d7a94')
+
+# Namespace for identities of expiry indexes of addresses sets (sorted sets with expiration moments of addresses)
+ADDRESS_EXPIRY_NAMESPACE = UUID('a37a6279-2721-4519-adfc-ef4fb0134cd7')
+
+# Namespace for identities of cached derived sets (unions and differences of sets)
+DERIVED_SETS_NAMESPACE = UUID('447e2a0f-787b-4d6c-9dca-08a9553199ed')
+
 # Usage Set Identifiers (For HKEY DB services)
 ACTIVE_USAGE_INFO = UUID('9cb46e89-8e7b-43e8-82a3-e7f3248c13a5')
 HISTORY_USAGE_INFO = UUID('67f01230-365b-420f-9a09-8c01faf8193f')
+# HSCAN cursor of history compaction (kept between compaction runs)
+HISTORY_COMPACTION_CURSOR_ID = UUID('0b0f5a4e-3a4c-4f57-9d55-5b7f0e6c2d19')
 
 # Usage Set Identifiers (For Stream services)
 STREAM_USAGE_INFO = UUID('587bd3a3-53b9-42fc-a763-831c6ac4d215')
@@ -41,20 +64,40 @@ SET_EXPIRE_SECONDS = 600
 # Sets Constants
 BATCH_SIZE = 1000
 REDIS_FETCH_SIZE = 2000
+# Batches of set changes sent in one Redis pipeline and max count of concurrently executed pipelines
+PIPELINE_BATCHES = 20
+PIPELINE_CONCURRENCY = 4
+# Bulk addresses import: records count applied to set at once and max count of rejected lines in response
+BULK_FLUSH_RECORDS = BATCH_SIZE * PIPELINE_BATCHES
+BULK_MAX_REJECTED_LINES = 100
 BACKGROUND_ADD_RECORDS = 50
 BACKGROUND_DELETE_RECORDS = 50
 # Size of addresses storages implemented as lists (otherwise frozen set is used)
 MAX_STORAGE_LIST_SIZE = 10
-# size of allowed network (addresses count) for caching in allowed addresses set.
-# If size of network is greater than ALLOWED_NETWORKS_CACHE_SIZE it will be cached only for first
-# ALLOWED_NETWORKS_CACHE_SIZE network members
-ALLOWED_NETWORKS_CACHE_SIZE = 1000
+# Banned sets with records count greater or equal than this value are processed with array engine on downloads
+ARRAY_ENGINE_MIN_RECORDS = 100000
+
+# Max count of history records scanned by one run of history compaction (HSCAN step size is BATCH_SIZE)
+HISTORY_COMPACTION_RECORDS = 10000
+# Consumer group of usage stream deriving history, max count of usage records read by worker at once and max wait
+# for new records (in milliseconds)
+HISTORY_CONSUMER_GROUP = 'history'
+HISTORY_WORKER_RECORDS = 1000
+HISTORY_WORKER_BLOCK_MS = 1000
 
 # History param detection mask
 HISTORY_TIMEDELTA_MASK = r'^([0-9]+)([smhd]{1})$'
 
 # Redis streams settings
 MAX_BUNDLE_SIZE = 1000
+# Max count of usage records archived and trimmed by one run of usage stream retention
+USAGE_RETENTION_RECORDS = 100000
+# Prefix of names of usage archive files
+USAGE_ARCHIVE_PREFIX = 'usage'
+# Stream record ID mask ({unix epoch time in millis}-{sequence number})
+STREAM_ID_MASK = r'^[0-9]+-[0-9]+$'
+# Max count of changed addresses in blacklist delta. If exceeded full download is required
+DELTA_MAX_ADDRESSES = 10000
 
 # Redis container name with tag
 REDIS_DOCKER_IMAGE_NAME = 'redis:7.2.3-alpine3.18'
@@ -62,10 +105,39 @@ REDIS_DOCKER_IMAGE_NAME = 'redis:7.2.3-alpine3.18'
 # Addresses constants
 ALLOWED_ADDRESSES_CATEGORY_NAME = 'allowed addresses'
 BANNED_ADDRESSES_CATEGORY_NAME = 'banned addresses'
+# category of usage records for allowed networks changes (no addresses in records)
+ALLOWED_NETWORKS_CATEGORY_NAME = 'allowed networks'
+
+# Max count of addresses checked in one request
+CHECK_MAX_ADDRESSES = 1000
+# Max count of changed addresses of set applied to membership index one by one (otherwise set is reloaded)
+INDEX_RELOAD_ADDRESSES = 100000
+# Source agent of usage and history records for removals of expired addresses
+EXPIRY_SOURCE_AGENT = 'expiry'
+
+# Encodings of addresses in storage: dotted decimal strings or integers (see address_encoding setting)
+ADDRESS_ENCODING_TEXT = 'text'
+ADDRESS_ENCODING_INT = 'int'
+ADDRESS_ENCODING_CONVERSION = 'conversion'
+
+# Encodings of history and usage stream records in storage: JSON (strings) or compact binary (see record_encoding
+# setting)
+RECORD_ENCODING_JSON = 'json'
+RECORD_ENCODING_BINARY = 'binary'
+
+# History responses: media type of streamed newline delimited JSON and header with cursor of the next page
+NDJSON_MEDIA_TYPE = 'application/x-ndjson'
+NEXT_CURSOR_HEADER = 'X-Next-Cursor'
 
 # Download constants
 # Size of piece for StreamingResponse
 CHUNK_SIZE_BYTES = 10000
+# Max count of pieces of shared download stream replayed to joining identical requests (see StreamFlights)
+STREAM_FLIGHT_REPLAY_PIECES = 100
+
+# Compression levels for compressed downloads
+GZIP_COMPRESSION_LEVEL = 6
+ZSTD_COMPRESSION_LEVEL = 3
 
 # Default group consts
 DEFAULT_GROUP_NAME = 'default'
@@ -0,0 +1,35 @@
+from typing import Generic
+from typing import Iterable
+from typing import Optional
+from typing import Type
+
+from src.db.base_diff_set_db import IDiffSetDb
+from src.models.transformation import Transformation
+from src.schemas.abstract_types import K
+from src.schemas.abstract_types import KInternal
+
+
+class BaseDiffSetDbTransformAdapter(IDiffSetDb[K], Generic[K, KInternal]):
+    """Class for adopt difference operations with transformation to internal storage format"""
+
+    key_transformer: Type[Transformation[K, KInternal]]
+
+    def __init__(self, diff_set_db_adapter: IDiffSetDb[KInternal]):
+        self.__diff_set_db_adapter: IDiffSetDb[KInternal] = diff_set_db_adapter
+
+    async def diff_set(
+        self,
+        set_identities: Iterable[K],
+        excluded_set_identities: Iterable[K],
+        ttl: int,
+        target_set_id: Optional[K] = None,
+    ) -> K:
+        """Difference of sets with new set identity. Call to super class with transformation"""
+        return self.key_transformer.transform_from_storage(
+            await self.__diff_set_db_adapter.diff_set(
+                map(self.key_transformer.transform_to_storage, set_identities),
+                map(self.key_transformer.transform_to_storage, excluded_set_identities),
+                ttl,
+                self.key_transformer.transform_to_storage(target_set_id) if target_set_id is not None else None,
+            )
+        )
@@ -0,0 +1,44 @@
+from typing import Generic
+from typing import Iterable
+from typing import Type
+
+from src.db.base_expiry_db import IExpiryDb
+from src.models.transformation import Transformation
+from src.schemas.abstract_types import K
+from src.schemas.abstract_types import KInternal
+from src.schemas.abstract_types import V
+from src.schemas.abstract_types import VInternal
+
+
+class BaseExpiryDbTransformAdapter(IExpiryDb[K, V], Generic[K, V, KInternal, VInternal]):
+    """Wrapper for expiry index storage with transformation of keys and values to internal storage format"""
+
+    key_transformer: Type[Transformation[K, KInternal]]
+    value_transformer: Type[Transformation[V, VInternal]]
+
+    def __init__(self, expiry_db_adapter: IExpiryDb[KInternal, VInternal]):
+        self.__expiry_db_adapter: IExpiryDb[KInternal, VInternal] = expiry_db_adapter
+
+    async def set_expiry(self, set_id: K, values: Iterable[V], expire_at: float) -> int:
+        return await self.__expiry_db_adapter.set_expiry(
+            self.key_transformer.transform_to_storage(set_id),
+            map(self.value_transformer.transform_to_storage, values),
+            expire_at,
+        )
+
+    async def clear_expiry(self, set_id: K, values: Iterable[V]) -> int:
+        return await self.__expiry_db_adapter.clear_expiry(
+            self.key_transformer.transform_to_storage(set_id), map(self.value_transformer.transform_to_storage, values)
+        )
+
+    async def count(self, set_id: K) -> int:
+        return await self.__expiry_db_adapter.count(self.key_transformer.transform_to_storage(set_id))
+
+    async def pop_expired(self, set_id: K, data_set_id: K, moment: float, count: int) -> list[tuple[V, bool]]:
+        values = await self.__expiry_db_adapter.pop_expired(
+            self.key_transformer.transform_to_storage(set_id),
+            self.key_transformer.transform_to_storage(data_set_id),
+            moment,
+            count,
+        )
+        return [(self.value_transformer.transform_from_storage(value), removed) for value, removed in values]
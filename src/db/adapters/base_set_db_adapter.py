@@ -42,3 +42,12 @@ class BaseSetDbAdapter(ISetDbAdapter[K], Generic[K, KInternal]):
 
     async def set_ttl(self, set_id: K, timeout: int):
         await self.__storage.set_ttl(self.key_transform.transform_to_storage(set_id), timeout)
+
+    async def acquire_set(self, set_id: K, timeout: int) -> bool:
+        return await self.__storage.acquire_set(self.key_transform.transform_to_storage(set_id), timeout)
+
+    async def release_set(self, set_id: K):
+        await self.__storage.release_set(self.key_transform.transform_to_storage(set_id))
+
+    async def del_unused_set(self, set_id: K) -> bool:
+        return await self.__storage.del_unused_set(self.key_transform.transform_to_storage(set_id))
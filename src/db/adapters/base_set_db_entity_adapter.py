@@ -1,6 +1,7 @@
 from typing import AsyncGenerator
 from typing import Generic
 from typing import Iterable
+from typing import Sequence
 from typing import Type
 
 from src.db.base_set_db_entity import ISetDbEntity
@@ -34,6 +35,20 @@ class BaseSetDbEntityAdapter(ISetDbEntity[K, V], Generic[K, V, KInternal, VInter
             map(self.value_transformer.transform_to_storage, deleted_data),
         )
 
+    async def add_batches_to_set(self, set_id: K, batches: Iterable[Iterable[V]]) -> int:
+        """Add batches of data to set"""
+        return await self.__set_db_entity_a.add_batches_to_set(
+            self.key_transformer.transform_to_storage(set_id),
+            [map(self.value_transformer.transform_to_storage, batch) for batch in batches],
+        )
+
+    async def del_batches_from_set(self, set_id: K, batches: Iterable[Iterable[V]]) -> int:
+        """Remove batches of data from set"""
+        return await self.__set_db_entity_a.del_batches_from_set(
+            self.key_transformer.transform_to_storage(set_id),
+            [map(self.value_transformer.transform_to_storage, batch) for batch in batches],
+        )
+
     async def fetch_records(self, set_id: K) -> AsyncGenerator[V, None]:
         """Fetch data from set"""
         async for value in self.__set_db_entity_a.fetch_records(self.key_transformer.transform_to_storage(set_id)):
@@ -49,6 +64,34 @@ class BaseSetDbEntityAdapter(ISetDbEntity[K, V], Generic[K, V, KInternal, VInter
             self.key_transformer.transform_to_storage(set_id), self.value_transformer.transform_to_storage(value)
         )
 
+    async def contains_many(self, set_id: K, values: Sequence[V]) -> list[bool]:
+        """Check whether set contains values"""
+        return await self.__set_db_entity_a.contains_many(
+            self.key_transformer.transform_to_storage(set_id),
+            [self.value_transformer.transform_to_storage(value) for value in values],
+        )
+
+    async def add_to_set_changed(self, set_id: K, values: Sequence[V]) -> list[bool]:
+        """Add values to set, return flags of actually added values"""
+        return await self.__set_db_entity_a.add_to_set_changed(
+            self.key_transformer.transform_to_storage(set_id),
+            [self.value_transformer.transform_to_storage(value) for value in values],
+        )
+
+    async def del_from_set_changed(self, set_id: K, values: Sequence[V]) -> list[bool]:
+        """Remove values from set, return flags of actually removed values"""
+        return await self.__set_db_entity_a.del_from_set_changed(
+            self.key_transformer.transform_to_storage(set_id),
+            [self.value_transformer.transform_to_storage(value) for value in values],
+        )
+
+    async def contains_in_sets(self, set_ids: Sequence[K], values: Sequence[V]) -> list[list[bool]]:
+        """Check values in several sets"""
+        return await self.__set_db_entity_a.contains_in_sets(
+            [self.key_transformer.transform_to_storage(set_id) for set_id in set_ids],
+            [self.value_transformer.transform_to_storage(value) for value in values],
+        )
+
 
 class BaseSetDbEntityStrAdapter(BaseSetDbEntityAdapter[K, V, str, str], Generic[K, V]):
     """Base Entity for storages with str keys and str values"""
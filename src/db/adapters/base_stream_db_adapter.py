@@ -11,6 +11,7 @@ from src.db.base_stream_db import SK
 from src.db.base_stream_db import IKInternal
 from src.db.base_stream_db import IStreamDb
 from src.db.base_stream_db import SKInternal
+from src.db.base_stream_db import StreamBounds
 from src.models.transformation import Transformation
 from src.schemas.abstract_types import Internal
 from src.schemas.abstract_types import T
@@ -56,6 +57,12 @@ class BaseStreamDbAdapter(IStreamDbAdapter[SK, IK, T], Generic[SK, IK, T, SKInte
             map(self.ts_transformer.transform_to_storage, ids),
         )
 
+    async def trim(self, stream_id: SK, max_id: IK) -> int:
+        return await self.__stream_db_a.trim(
+            self.stream_key_transformer.transform_to_storage(stream_id),
+            self.ts_transformer.transform_to_storage(max_id),
+        )
+
     async def read(self, stream_id: SK, timestamp_id: IK) -> Optional[T]:
         value = await self.__stream_db_a.read(
             self.stream_key_transformer.transform_to_storage(stream_id),
@@ -76,3 +83,13 @@ class BaseStreamDbAdapter(IStreamDbAdapter[SK, IK, T], Generic[SK, IK, T, SKInte
     async def count(self, stream_id: SK) -> int:
         """Counting the size of stream"""
         return await self.__stream_db_a.count(self.stream_key_transformer.transform_to_storage(stream_id))
+
+    async def bounds(self, stream_id: SK) -> StreamBounds[IK]:
+        """Getting bounds of stream (all values are None for empty stream)"""
+        bounds = await self.__stream_db_a.bounds(self.stream_key_transformer.transform_to_storage(stream_id))
+        return StreamBounds[IK](
+            *(
+                self.ts_transformer.transform_from_storage(value) if value is not None else None
+                for value in (bounds.first_id, bounds.last_id, bounds.max_deleted_id)
+            )
+        )
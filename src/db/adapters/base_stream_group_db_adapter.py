@@ -0,0 +1,99 @@
+from typing import Generic
+from typing import Iterable
+from typing import Optional
+from typing import Type
+
+from src.db.base_stream_db import IK
+from src.db.base_stream_db import SK
+from src.db.base_stream_db import IKInternal
+from src.db.base_stream_db import SKInternal
+from src.db.base_stream_group_db import IStreamGroupDb
+from src.db.base_stream_group_db import StreamGroupInfo
+from src.models.transformation import Transformation
+from src.schemas.abstract_types import Internal
+from src.schemas.abstract_types import T
+
+
+class BaseStreamGroupDbAdapter(IStreamGroupDb[SK, IK, T], Generic[SK, IK, T, SKInternal, IKInternal, Internal]):
+    """Wrapper for consumer groups storage with transformation of keys, IDs and values to internal storage format"""
+
+    stream_key_transformer: Type[Transformation[SK, SKInternal]]  # transformer for streams
+    ts_transformer: Type[Transformation[IK, IKInternal]]  # transformer for timestamp identity
+    value_transformer: Type[Transformation[T, Internal]]  # transformer for value
+
+    def __init__(self, stream_group_db_adapter: IStreamGroupDb[SKInternal, IKInternal, Internal]):
+        self.__stream_group_db_a = stream_group_db_adapter
+
+    def transform_records(self, records: list[tuple[IKInternal, Internal]]) -> list[tuple[IK, T]]:
+        return [
+            (
+                self.ts_transformer.transform_from_storage(record_id),
+                self.value_transformer.transform_from_storage(value),
+            )
+            for record_id, value in records
+        ]
+
+    async def create_group(self, stream_id: SK, group_name: str, start_id: Optional[IK] = None) -> bool:
+        return await self.__stream_group_db_a.create_group(
+            self.stream_key_transformer.transform_to_storage(stream_id),
+            group_name,
+            self.ts_transformer.transform_to_storage(start_id) if start_id is not None else None,
+        )
+
+    async def read_group(
+        self, stream_id: SK, group_name: str, consumer_name: str, count: int, block_ms: Optional[int] = None
+    ) -> list[tuple[IK, T]]:
+        return self.transform_records(
+            await self.__stream_group_db_a.read_group(
+                self.stream_key_transformer.transform_to_storage(stream_id), group_name, consumer_name, count, block_ms
+            )
+        )
+
+    async def ack(self, stream_id: SK, group_name: str, ids: Iterable[IK]) -> int:
+        return await self.__stream_group_db_a.ack(
+            self.stream_key_transformer.transform_to_storage(stream_id),
+            group_name,
+            map(self.ts_transformer.transform_to_storage, ids),
+        )
+
+    async def claim_pending(
+        self,
+        stream_id: SK,
+        group_name: str,
+        consumer_name: str,
+        min_idle_ms: int,
+        start_id: Optional[IK],
+        count: int,
+    ) -> tuple[Optional[IK], list[tuple[IK, T]]]:
+        next_id, records = await self.__stream_group_db_a.claim_pending(
+            self.stream_key_transformer.transform_to_storage(stream_id),
+            group_name,
+            consumer_name,
+            min_idle_ms,
+            self.ts_transformer.transform_to_storage(start_id) if start_id is not None else None,
+            count,
+        )
+        return (
+            self.ts_transformer.transform_from_storage(next_id) if next_id is not None else None,
+            self.transform_records(records),
+        )
+
+    async def group_info(self, stream_id: SK, group_name: str) -> Optional[StreamGroupInfo[IK]]:
+        info = await self.__stream_group_db_a.group_info(
+            self.stream_key_transformer.transform_to_storage(stream_id), group_name
+        )
+        if info is None:
+            return None
+        return StreamGroupInfo[IK](
+            last_delivered_id=(
+                self.ts_transformer.transform_from_storage(info.last_delivered_id)
+                if info.last_delivered_id is not None
+                else None
+            ),
+            pending_count=info.pending_count,
+            min_pending_id=(
+                self.ts_transformer.transform_from_storage(info.min_pending_id)
+                if info.min_pending_id is not None
+                else None
+            ),
+        )
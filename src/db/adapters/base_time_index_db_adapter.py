@@ -0,0 +1,55 @@
+from typing import Generic
+from typing import Iterable
+from typing import Optional
+from typing import Sequence
+from typing import Type
+
+from src.db.base_time_index_db import ITimeIndexDb
+from src.models.transformation import Transformation
+from src.schemas.abstract_types import K
+from src.schemas.abstract_types import KInternal
+from src.schemas.abstract_types import V
+from src.schemas.abstract_types import VInternal
+
+
+class BaseTimeIndexDbTransformAdapter(ITimeIndexDb[K, V], Generic[K, V, KInternal, VInternal]):
+    """Wrapper for time index storage with transformation of keys and values to internal storage format"""
+
+    key_transformer: Type[Transformation[K, KInternal]]
+    value_transformer: Type[Transformation[V, VInternal]]
+
+    def __init__(self, time_index_db_adapter: ITimeIndexDb[KInternal, VInternal]):
+        self.__time_index_db_adapter: ITimeIndexDb[KInternal, VInternal] = time_index_db_adapter
+
+    async def set_moments(self, set_id: K, values: Iterable[V], moment: float) -> int:
+        return await self.__time_index_db_adapter.set_moments(
+            self.key_transformer.transform_to_storage(set_id),
+            map(self.value_transformer.transform_to_storage, values),
+            moment,
+        )
+
+    async def moments(self, set_id: K, values: Sequence[V]) -> list[Optional[float]]:
+        return await self.__time_index_db_adapter.moments(
+            self.key_transformer.transform_to_storage(set_id),
+            [self.value_transformer.transform_to_storage(value) for value in values],
+        )
+
+    async def values_in_range(
+        self, set_id: K, min_moment: Optional[float], max_moment: Optional[float], offset: int = 0, count: int = 0
+    ) -> list[tuple[V, float]]:
+        return [
+            (self.value_transformer.transform_from_storage(value), moment)
+            for value, moment in await self.__time_index_db_adapter.values_in_range(
+                self.key_transformer.transform_to_storage(set_id), min_moment, max_moment, offset, count
+            )
+        ]
+
+    async def remove(self, set_id: K, values: Iterable[V]) -> int:
+        return await self.__time_index_db_adapter.remove(
+            self.key_transformer.transform_to_storage(set_id), map(self.value_transformer.transform_to_storage, values)
+        )
+
+    async def remove_before(self, set_id: K, moment: float) -> int:
+        return await self.__time_index_db_adapter.remove_before(
+            self.key_transformer.transform_to_storage(set_id), moment
+        )
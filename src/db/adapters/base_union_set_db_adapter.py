@@ -1,5 +1,6 @@
 from typing import Generic
 from typing import Iterable
+from typing import Optional
 from typing import Type
 
 from src.db.base_union_set_db import IUnionSetDb
@@ -16,8 +17,11 @@ class BaseUnionSetDbTransformAdapter(IUnionSetDb[K], Generic[K, KInternal]):
     def __init__(self, set_db_adapter: IUnionSetDb[KInternal]):
         self.__union_set_db_adapter: IUnionSetDb[KInternal] = set_db_adapter
 
-    async def union_set(self, set_identities: Iterable[K]) -> K:
+    async def union_set(self, set_identities: Iterable[K], target_set_id: Optional[K] = None) -> K:
         """Union sets and return new set identity. Call to super class with transformation"""
         return self.key_transformer.transform_from_storage(
-            await self.__union_set_db_adapter.union_set(map(self.key_transformer.transform_to_storage, set_identities))
+            await self.__union_set_db_adapter.union_set(
+                map(self.key_transformer.transform_to_storage, set_identities),
+                self.key_transformer.transform_to_storage(target_set_id) if target_set_id is not None else None,
+            )
         )
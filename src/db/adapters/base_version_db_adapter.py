@@ -0,0 +1,23 @@
+from typing import Generic
+from typing import Iterable
+from typing import Type
+
+from src.db.base_version_db import IVersionDb
+from src.models.transformation import Transformation
+from src.schemas.abstract_types import K
+from src.schemas.abstract_types import KInternal
+
+
+class BaseVersionDbTransformAdapter(IVersionDb[K], Generic[K, KInternal]):
+    """Wrapper for versions storage with transformation of keys to internal storage format"""
+
+    key_transformer: Type[Transformation[K, KInternal]]
+
+    def __init__(self, version_db_adapter: IVersionDb[KInternal]):
+        self.__version_db_adapter: IVersionDb[KInternal] = version_db_adapter
+
+    async def bump(self, set_id: K) -> int:
+        return await self.__version_db_adapter.bump(self.key_transformer.transform_to_storage(set_id))
+
+    async def versions(self, set_ids: Iterable[K]) -> list[int]:
+        return await self.__version_db_adapter.versions(map(self.key_transformer.transform_to_storage, set_ids))
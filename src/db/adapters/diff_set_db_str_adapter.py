@@ -0,0 +1,9 @@
+from uuid import UUID
+
+from src.models.uuid_transformation import UUIDStrTransformer
+
+from .base_diff_set_db_adapter import BaseDiffSetDbTransformAdapter
+
+
+class DiffSetDbTransformUUIDAdapter(BaseDiffSetDbTransformAdapter[UUID, str]):
+    key_transformer = UUIDStrTransformer
@@ -0,0 +1,34 @@
+from ipaddress import IPv4Address
+from uuid import UUID
+
+from src.core.settings import ADDRESS_ENCODING_INT
+from src.core.settings import ADDRESS_ENCODING_TEXT
+from src.db.base_expiry_db import IExpiryDb
+from src.models.ip_address_transformation import IPv4AddressDecimalStrTransformer
+from src.models.ip_address_transformation import IPv4AddressStrTransformer
+from src.models.uuid_transformation import UUIDStrTransformer
+
+from .base_expiry_db_adapter import BaseExpiryDbTransformAdapter
+
+
+class ExpiryDbStrAdapterIpAddress(BaseExpiryDbTransformAdapter[UUID, IPv4Address, str, str]):
+    """Expiry index adapter with UUID -> str and IPv4Address -> str transformers"""
+
+    key_transformer = UUIDStrTransformer
+    value_transformer = IPv4AddressStrTransformer
+
+
+class ExpiryDbDecimalAdapterIpAddress(BaseExpiryDbTransformAdapter[UUID, IPv4Address, str, str]):
+    """Expiry index adapter with UUID -> str and IPv4Address -> str transformers (addresses stored as integers)"""
+
+    key_transformer = UUIDStrTransformer
+    value_transformer = IPv4AddressDecimalStrTransformer
+
+
+def address_expiry_db_adapter(
+    expiry_db_adapter: IExpiryDb[str, str], address_encoding: str = ADDRESS_ENCODING_TEXT
+) -> IExpiryDb[UUID, IPv4Address]:
+    """Expiry index adapter for addresses sets (addresses are stored in the same encoding as in sets)"""
+    if address_encoding == ADDRESS_ENCODING_INT:
+        return ExpiryDbDecimalAdapterIpAddress(expiry_db_adapter)
+    return ExpiryDbStrAdapterIpAddress(expiry_db_adapter)
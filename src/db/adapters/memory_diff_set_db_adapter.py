@@ -0,0 +1,26 @@
+from typing import Any
+from typing import Callable
+from typing import Iterable
+from typing import Optional
+
+from src.db.base_diff_set_db import IDiffSetDb
+from src.db.storages.memory_set_storage import MemorySetStorage
+from src.schemas.abstract_types import K
+
+
+class MemoryDiffSetDbAdapter(IDiffSetDb[K]):
+    def __init__(self, storage: MemorySetStorage[K, Any], key_generator: Callable[[], K]):
+        self.__storage = storage
+        self.__key_generator = key_generator
+
+    async def diff_set(
+        self,
+        set_identities: Iterable[K],
+        excluded_set_identities: Iterable[K],
+        ttl: int,
+        target_set_id: Optional[K] = None,
+    ) -> K:
+        new_set_id: K = target_set_id if target_set_id is not None else self.__key_generator()
+        self.__storage.diff_sets(new_set_id, set_identities, excluded_set_identities)
+        await self.__storage.set_db_adapter().set_ttl(new_set_id, ttl)
+        return new_set_id
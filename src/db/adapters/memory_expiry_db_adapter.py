@@ -0,0 +1,38 @@
+from typing import Generic
+from typing import Iterable
+
+from src.db.base_expiry_db import IExpiryDb
+from src.db.base_set_db_entity import ISetDbEntity
+from src.schemas.abstract_types import K
+from src.schemas.abstract_types import V
+
+
+class MemoryExpiryDbAdapter(IExpiryDb[K, V], Generic[K, V]):
+    """Expiry index adapter for memory storage (expired values are removed from data sets of set entity adapter)"""
+
+    def __init__(self, set_db_entity: ISetDbEntity[K, V]):
+        self.__expiry: dict[K, dict[V, float]] = dict()
+        self.__set_db_entity = set_db_entity
+
+    async def set_expiry(self, set_id: K, values: Iterable[V], expire_at: float) -> int:
+        set_expiry = self.__expiry.setdefault(set_id, dict())
+        added_count = 0
+        for value in values:
+            added_count += value not in set_expiry
+            set_expiry[value] = expire_at
+        return added_count
+
+    async def clear_expiry(self, set_id: K, values: Iterable[V]) -> int:
+        set_expiry = self.__expiry.get(set_id, dict())
+        return sum(set_expiry.pop(value, None) is not None for value in values)
+
+    async def count(self, set_id: K) -> int:
+        return len(self.__expiry.get(set_id, dict()))
+
+    async def pop_expired(self, set_id: K, data_set_id: K, moment: float, count: int) -> list[tuple[V, bool]]:
+        set_expiry = self.__expiry.get(set_id, dict())
+        expired = sorted((x for x in set_expiry.items() if x[1] <= moment), key=lambda x: x[1])[:count]
+        for value, _ in expired:
+            del set_expiry[value]
+        values = [value for value, _ in expired]
+        return list(zip(values, await self.__set_db_entity.del_from_set_changed(data_set_id, values)))
@@ -16,6 +16,7 @@ class MemorySetDbAdapter(ISetDbAdapter[K], Generic[K]):
 
     def __init__(self, storage: MemorySetStorage[K, Any]):
         self.__storage: MemorySetStorage[K, Any] = storage
+        self.__references: dict[K, int] = dict()
 
     async def del_set(self, set_id: K) -> int:
         return self.__storage.remove_set(set_id)
@@ -35,3 +36,20 @@ class MemorySetDbAdapter(ISetDbAdapter[K], Generic[K]):
 
         asyncio.get_event_loop().call_later(timeout, del_set_on_ttl, self, set_id)
         logging.debug('Schedule to delete set %s at %s', str(set_id), dt_datetime.now() + timedelta(seconds=timeout))
+
+    async def acquire_set(self, set_id: K, timeout: int) -> bool:
+        self.__references[set_id] = self.__references.get(set_id, 0) + 1
+        if not self.__storage.exists(set_id):
+            return False
+        await self.set_ttl(set_id, timeout)
+        return True
+
+    async def release_set(self, set_id: K):
+        references = self.__references.pop(set_id, 0) - 1
+        if references > 0:
+            self.__references[set_id] = references
+
+    async def del_unused_set(self, set_id: K) -> bool:
+        if self.__references.get(set_id, 0) > 0:
+            return False
+        return self.__storage.remove_set(set_id) == 1
@@ -1,7 +1,9 @@
 import logging
+from itertools import chain
 from typing import AsyncGenerator
 from typing import Generic
 from typing import Iterable
+from typing import Sequence
 
 from src.db.base_set_db_entity import ISetDbEntity
 from src.db.storages.memory_set_storage import MemorySetStorage
@@ -27,6 +29,18 @@ class MemorySetDbEntityAdapter(ISetDbEntity[K, V], Generic[K, V]):
         logging.debug('Deleting %d records from Memory database, set ID: %s', len(deleted_data_t), set_id)
         return await self.__storage.del_from_set(set_id, deleted_data_t)
 
+    async def add_batches_to_set(self, set_id: K, batches: Iterable[Iterable[V]]) -> int:
+        """Add batches of data to set at once (as pipelined commands in Redis)"""
+        changed_data_t = tuple(chain.from_iterable(batches))
+        logging.debug('Saving %d records to Memory database in batches, set ID: %s', len(changed_data_t), set_id)
+        return await self.__storage.write_to_set(set_id, changed_data_t)
+
+    async def del_batches_from_set(self, set_id: K, batches: Iterable[Iterable[V]]) -> int:
+        """Remove batches of data from set at once (as pipelined commands in Redis)"""
+        deleted_data_t = tuple(chain.from_iterable(batches))
+        logging.debug('Deleting %d records from Memory database in batches, set ID: %s', len(deleted_data_t), set_id)
+        return await self.__storage.del_from_set(set_id, deleted_data_t)
+
     async def fetch_records(self, set_id: K) -> AsyncGenerator[V, None]:
         """Fetch data from set"""
         async for record in self.__storage.fetch_records(set_id):
@@ -40,3 +54,7 @@ class MemorySetDbEntityAdapter(ISetDbEntity[K, V], Generic[K, V]):
     async def contains(self, set_id: K, value: V) -> bool:
         """Check whether set contains value from set"""
         return self.__storage.contains(set_id, value)
+
+    async def contains_many(self, set_id: K, values: Sequence[V]) -> list[bool]:
+        """Check whether set contains values"""
+        return [self.__storage.contains(set_id, value) for value in values]
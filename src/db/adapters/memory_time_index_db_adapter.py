@@ -0,0 +1,53 @@
+from typing import Generic
+from typing import Iterable
+from typing import Optional
+from typing import Sequence
+
+from src.db.base_time_index_db import ITimeIndexDb
+from src.schemas.abstract_types import K
+from src.schemas.abstract_types import V
+
+
+class MemoryTimeIndexDbAdapter(ITimeIndexDb[K, V], Generic[K, V]):
+    """Time index adapter for memory storage"""
+
+    def __init__(self):
+        self.__moments: dict[K, dict[V, float]] = dict()
+
+    async def set_moments(self, set_id: K, values: Iterable[V], moment: float) -> int:
+        set_moments = self.__moments.setdefault(set_id, dict())
+        added_count = 0
+        for value in values:
+            previous_moment = set_moments.get(value)
+            added_count += previous_moment is None
+            if previous_moment is None or previous_moment < moment:
+                set_moments[value] = moment
+        return added_count
+
+    async def moments(self, set_id: K, values: Sequence[V]) -> list[Optional[float]]:
+        set_moments = self.__moments.get(set_id, dict())
+        return [set_moments.get(value) for value in values]
+
+    async def values_in_range(
+        self, set_id: K, min_moment: Optional[float], max_moment: Optional[float], offset: int = 0, count: int = 0
+    ) -> list[tuple[V, float]]:
+        values = sorted(
+            (
+                (value, moment)
+                for value, moment in self.__moments.get(set_id, dict()).items()
+                if (min_moment is None or moment >= min_moment) and (max_moment is None or moment <= max_moment)
+            ),
+            key=lambda x: x[1],
+        )
+        return values[offset : offset + count] if count > 0 else values[offset:]
+
+    async def remove(self, set_id: K, values: Iterable[V]) -> int:
+        set_moments = self.__moments.get(set_id, dict())
+        return sum(set_moments.pop(value, None) is not None for value in values)
+
+    async def remove_before(self, set_id: K, moment: float) -> int:
+        set_moments = self.__moments.get(set_id, dict())
+        removed_values = [value for value, value_moment in set_moments.items() if value_moment < moment]
+        for value in removed_values:
+            del set_moments[value]
+        return len(removed_values)
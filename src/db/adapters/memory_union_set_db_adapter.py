@@ -1,6 +1,7 @@
 from typing import Any
 from typing import Callable
 from typing import Iterable
+from typing import Optional
 
 from src.db.base_union_set_db import IUnionSetDb
 from src.db.storages.memory_set_storage import MemorySetStorage
@@ -12,7 +13,7 @@ class MemoryUnionSetDbAdapter(IUnionSetDb[K]):
         self.__storage = storage
         self.__key_generator = key_generator
 
-    async def union_set(self, set_identities: Iterable[K]) -> K:
-        new_set_id: K = self.__key_generator()
+    async def union_set(self, set_identities: Iterable[K], target_set_id: Optional[K] = None) -> K:
+        new_set_id: K = target_set_id if target_set_id is not None else self.__key_generator()
         self.__storage.union_sets(new_set_id, set_identities)
         return new_set_id
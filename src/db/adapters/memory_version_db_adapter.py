@@ -0,0 +1,19 @@
+from typing import Generic
+from typing import Iterable
+
+from src.db.base_version_db import IVersionDb
+from src.schemas.abstract_types import K
+
+
+class MemoryVersionDbAdapter(IVersionDb[K], Generic[K]):
+    """Versions storage adapter for memory storage"""
+
+    def __init__(self):
+        self.__versions: dict[K, int] = dict()
+
+    async def bump(self, set_id: K) -> int:
+        self.__versions[set_id] = self.__versions.get(set_id, 0) + 1
+        return self.__versions[set_id]
+
+    async def versions(self, set_ids: Iterable[K]) -> list[int]:
+        return [self.__versions.get(set_id, 0) for set_id in set_ids]
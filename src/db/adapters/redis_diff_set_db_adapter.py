@@ -0,0 +1,34 @@
+from typing import Callable
+from typing import Iterable
+from typing import Optional
+
+from redis.asyncio import Redis as RedisAsyncio
+
+from src.db.base_diff_set_db import IDiffSetDb
+
+
+class RedisDiffSetDbAdapter(IDiffSetDb[str]):
+    def __init__(self, db: RedisAsyncio, key_generator: Callable[[], str]):
+        self.__db: RedisAsyncio = db
+        self.__key_generator = key_generator
+
+    async def diff_set(
+        self,
+        set_identities: Iterable[str],
+        excluded_set_identities: Iterable[str],
+        ttl: int,
+        target_set_id: Optional[str] = None,
+    ) -> str:
+        """Union sets and subtract excluded sets in one transaction (one round trip to redis)"""
+        new_set_id: str = target_set_id if target_set_id is not None else self.__key_generator()
+        source_set_ids = list(set_identities)
+        assert len(source_set_ids) > 0, 'Sets list should have one or more values'
+        async with self.__db.pipeline(transaction=True) as pipe:
+            if len(source_set_ids) > 1:
+                pipe.sunionstore(new_set_id, source_set_ids)
+                pipe.sdiffstore(new_set_id, [new_set_id, *excluded_set_identities])
+            else:
+                pipe.sdiffstore(new_set_id, [source_set_ids[0], *excluded_set_identities])
+            pipe.expire(new_set_id, ttl)
+            await pipe.execute()
+        return new_set_id
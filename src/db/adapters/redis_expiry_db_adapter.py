@@ -0,0 +1,65 @@
+import logging
+from typing import Iterable
+
+from redis.asyncio import Redis as RedisAsyncio
+from redis.asyncio import RedisError
+
+from src.core.settings import BATCH_SIZE
+from src.db.base_expiry_db import ExpiryDbError
+from src.db.base_expiry_db import IExpiryDb
+from src.utils.misc_utils import split_to_batches
+
+# Remove expired members from index (KEYS[1]) and data set (KEYS[2]) at once: members are read and removed within one
+# script, so members added again (index is updated before data set) are not removed. ARGV: moment and count
+POP_EXPIRED_SCRIPT = '''
+local expired = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+local removed = {}
+for i, member in ipairs(expired) do
+    redis.call('ZREM', KEYS[1], member)
+    removed[i] = redis.call('SREM', KEYS[2], member)
+end
+return {expired, removed}
+'''
+
+
+class RedisExpiryDbAdapter(IExpiryDb[str, str]):
+    """Expiry index adapter for Redis. Index of data set is a sorted set (member -> expiration moment)"""
+
+    def __init__(self, db: RedisAsyncio):
+        self.__db = db
+        self.__pop_expired_script = db.register_script(POP_EXPIRED_SCRIPT)
+
+    async def set_expiry(self, set_id: str, values: Iterable[str], expire_at: float) -> int:
+        try:
+            async with self.__db.pipeline(transaction=False) as pipe:
+                for batch in split_to_batches(list(values), BATCH_SIZE):
+                    pipe.zadd(set_id, dict.fromkeys(batch, expire_at))
+                return sum(await pipe.execute())
+        except RedisError as e:
+            logging.error('On redis expiry write operation error occurred, details: %s', str(e))
+            raise ExpiryDbError('Redis DB Error, details: {}'.format(str(e))) from None
+
+    async def clear_expiry(self, set_id: str, values: Iterable[str]) -> int:
+        try:
+            async with self.__db.pipeline(transaction=False) as pipe:
+                for batch in split_to_batches(list(values), BATCH_SIZE):
+                    pipe.zrem(set_id, *batch)
+                return sum(await pipe.execute())
+        except RedisError as e:
+            logging.error('On redis expiry deletion operation error occurred, details: %s', str(e))
+            raise ExpiryDbError('Redis DB Error, details: {}'.format(str(e))) from None
+
+    async def count(self, set_id: str) -> int:
+        try:
+            return await self.__db.zcard(set_id)
+        except RedisError as e:
+            logging.error('On redis expiry count operation error occurred, details: %s', str(e))
+            raise ExpiryDbError('Redis DB Error, details: {}'.format(str(e))) from None
+
+    async def pop_expired(self, set_id: str, data_set_id: str, moment: float, count: int) -> list[tuple[str, bool]]:
+        try:
+            expired, removed = await self.__pop_expired_script(keys=[set_id, data_set_id], args=[moment, count])
+        except RedisError as e:
+            logging.error('On redis expiry removal operation error occurred, details: %s', str(e))
+            raise ExpiryDbError('Redis DB Error, details: {}'.format(str(e))) from None
+        return [(value, bool(removed_count)) for value, removed_count in zip(expired, removed)]
@@ -6,12 +6,41 @@ from redis.asyncio import RedisError
 from src.db.adapters.base_set_db_adapter import ISetDbAdapter
 from src.db.adapters.base_set_db_adapter import SetDbAdapterError
 
+# References of processes to shared set are counted in key with suffix (it expires with the set, so references of
+# failed processes are dropped after timeout)
+REFERENCES_KEY_SUFFIX = ':references'
+
+# Take reference (KEYS[2]) and renew TTL of set (KEYS[1]). ARGV: timeout. Return 0 for absent set
+ACQUIRE_SET_SCRIPT = '''
+redis.call('INCR', KEYS[2])
+redis.call('EXPIRE', KEYS[2], ARGV[1])
+return redis.call('EXPIRE', KEYS[1], ARGV[1])
+'''
+
+# Release reference to set (KEYS[1]), counter is removed with the last reference
+RELEASE_SET_SCRIPT = '''
+if redis.call('DECR', KEYS[1]) <= 0 then
+    redis.call('DEL', KEYS[1])
+end
+'''
+
+# Delete set (KEYS[1]) without references (KEYS[2]). Return count of deleted keys
+DEL_UNUSED_SET_SCRIPT = '''
+if tonumber(redis.call('GET', KEYS[2]) or '0') > 0 then
+    return 0
+end
+return redis.call('DEL', KEYS[1], KEYS[2])
+'''
+
 
 class RedisSetDbAdapter(ISetDbAdapter[str]):
     """Set management adapter for Redis with keys as str"""
 
     def __init__(self, db: RedisAsyncio):
         self.__db = db
+        self.__acquire_set_script = db.register_script(ACQUIRE_SET_SCRIPT)
+        self.__release_set_script = db.register_script(RELEASE_SET_SCRIPT)
+        self.__del_unused_set_script = db.register_script(DEL_UNUSED_SET_SCRIPT)
 
     async def add_set(self, set_id: str) -> int:
         """Return 1 on empty set (in terms of Redis NO SET)"""
@@ -40,3 +69,24 @@ class RedisSetDbAdapter(ISetDbAdapter[str]):
 
     async def set_ttl(self, set_id: str, timeout: int):
         await self.__db.expire(set_id, timeout)
+
+    async def acquire_set(self, set_id: str, timeout: int) -> bool:
+        try:
+            return await self.__acquire_set_script(keys=[set_id, set_id + REFERENCES_KEY_SUFFIX], args=[timeout]) == 1
+        except RedisError as e:
+            logging.error('On redis acquire set operation error occurred, details: %s', str(e))
+            raise SetDbAdapterError('Redis DB Error, details: {}'.format(str(e))) from None
+
+    async def release_set(self, set_id: str):
+        try:
+            await self.__release_set_script(keys=[set_id + REFERENCES_KEY_SUFFIX])
+        except RedisError as e:
+            logging.error('On redis release set operation error occurred, details: %s', str(e))
+            raise SetDbAdapterError('Redis DB Error, details: {}'.format(str(e))) from None
+
+    async def del_unused_set(self, set_id: str) -> bool:
+        try:
+            return await self.__del_unused_set_script(keys=[set_id, set_id + REFERENCES_KEY_SUFFIX]) > 0
+        except RedisError as e:
+            logging.error('On redis delete unused set operation error occurred, details: %s', str(e))
+            raise SetDbAdapterError('Redis DB Error, details: {}'.format(str(e))) from None
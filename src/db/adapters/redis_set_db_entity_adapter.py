@@ -1,16 +1,25 @@
 import logging
+from asyncio import Semaphore
+from asyncio import gather
 from typing import Any
 from typing import AsyncGenerator
 from typing import Awaitable
+from typing import Callable
 from typing import Iterable
+from typing import Sequence
 from typing import cast
 
 from redis.asyncio import Redis as RedisAsyncio
 from redis.asyncio import RedisError
+from redis.asyncio.client import Pipeline
 
+from src.core.settings import BATCH_SIZE
+from src.core.settings import PIPELINE_BATCHES
+from src.core.settings import PIPELINE_CONCURRENCY
 from src.core.settings import REDIS_FETCH_SIZE
 from src.db.base_set_db_entity import ISetDbEntity
 from src.db.base_set_db_entity import SetDbIdentityError
+from src.utils.misc_utils import split_to_batches
 
 
 class RedisSetDbEntityAdapter(ISetDbEntity[str, str]):
@@ -39,6 +48,98 @@ class RedisSetDbEntityAdapter(ISetDbEntity[str, str]):
             logging.error('On redis set deletion operation error occurred, details: %s', str(e))
             raise SetDbIdentityError('Redis DB Error, details: {}'.format(str(e))) from None
 
+    async def __execute_batches(
+        self, batches: Iterable[Iterable[str]], queue_command: Callable[[Pipeline, tuple[str, ...]], Any]
+    ) -> int:
+        """Send batches in pipelines (PIPELINE_BATCHES commands in each), up to PIPELINE_CONCURRENCY pipelines
+        are executed concurrently. Return sum of commands results
+        """
+        batches_t = [batch_t for batch_t in (tuple(x for x in batch) for batch in batches) if batch_t]
+        semaphore = Semaphore(PIPELINE_CONCURRENCY)
+
+        async def execute_pipeline(pipeline_batches: Sequence[tuple[str, ...]]) -> int:
+            async with semaphore:
+                async with self.__db.pipeline(transaction=False) as pipe:
+                    for batch_t in pipeline_batches:
+                        queue_command(pipe, batch_t)
+                    return sum(await pipe.execute())
+
+        return sum(
+            await gather(
+                *[
+                    execute_pipeline(pipeline_batches)
+                    for pipeline_batches in split_to_batches(batches_t, PIPELINE_BATCHES)
+                ]
+            )
+        )
+
+    async def add_batches_to_set(self, set_id: str, batches: Iterable[Iterable[str]]) -> int:
+        """Add batches of data to set with pipelined SADD commands"""
+        logging.debug('Saving records to Redis database in batches, set ID: %s', set_id)
+        try:
+            return await self.__execute_batches(batches, lambda pipe, batch_t: pipe.sadd(set_id, *batch_t))
+        except RedisError as e:
+            logging.error('On redis set write operation error occurred, details: %s', str(e))
+            raise SetDbIdentityError('Redis DB Error, details: {}'.format(str(e))) from None
+
+    async def del_batches_from_set(self, set_id: str, batches: Iterable[Iterable[str]]) -> int:
+        """Remove batches of data from set with pipelined SREM commands"""
+        logging.debug('Deleting records from Redis database in batches, set ID: %s', set_id)
+        try:
+            return await self.__execute_batches(batches, lambda pipe, batch_t: pipe.srem(set_id, *batch_t))
+        except RedisError as e:
+            logging.error('On redis set deletion operation error occurred, details: %s', str(e))
+            raise SetDbIdentityError('Redis DB Error, details: {}'.format(str(e))) from None
+
+    async def replace_in_set(self, set_id: str, replaced_data: dict[str, str]) -> int:
+        """Replace records of set (key - old record, value - new one) atomically. Return count of added records"""
+        logging.debug('Replacing %d records in Redis database, set ID: %s', len(replaced_data), set_id)
+        if not replaced_data:
+            return 0
+        try:
+            async with self.__db.pipeline(transaction=True) as pipe:
+                pipe.srem(set_id, *replaced_data.keys())
+                pipe.sadd(set_id, *replaced_data.values())
+                _deleted_count, added_count = await pipe.execute()
+                return added_count
+        except RedisError as e:
+            logging.error('On redis set replace operation error occurred, details: %s', str(e))
+            raise SetDbIdentityError('Redis DB Error, details: {}'.format(str(e))) from None
+
+    async def __change_set_checked(
+        self, set_id: str, values: Sequence[str], queue_command: Callable[[Pipeline, tuple[str, ...]], Any]
+    ) -> list[bool]:
+        """Check membership of values and change set in one transaction (SMISMEMBER and change command per batch),
+        return memberships of values before change
+        """
+        if not values:
+            return []
+        async with self.__db.pipeline(transaction=True) as pipe:
+            for batch in split_to_batches(list(values), BATCH_SIZE):
+                pipe.smismember(set_id, list(batch))
+                queue_command(pipe, tuple(batch))
+            results = await pipe.execute()
+        return [x == 1 for memberships in results[::2] for x in memberships]
+
+    async def add_to_set_changed(self, set_id: str, values: Sequence[str]) -> list[bool]:
+        """Add values to set, return flags of actually added values (membership is checked in transaction)"""
+        try:
+            memberships = await self.__change_set_checked(
+                set_id, values, lambda pipe, batch_t: pipe.sadd(set_id, *batch_t)
+            )
+        except RedisError as e:
+            logging.error('On redis set write operation error occurred, details: %s', str(e))
+            raise SetDbIdentityError('Redis DB Error, details: {}'.format(str(e))) from None
+        return [not member for member in memberships]
+
+    async def del_from_set_changed(self, set_id: str, values: Sequence[str]) -> list[bool]:
+        """Remove values from set, return flags of actually removed values (membership is checked in transaction)"""
+        try:
+            return await self.__change_set_checked(set_id, values, lambda pipe, batch_t: pipe.srem(set_id, *batch_t))
+        except RedisError as e:
+            logging.error('On redis set deletion operation error occurred, details: %s', str(e))
+            raise SetDbIdentityError('Redis DB Error, details: {}'.format(str(e))) from None
+
     async def fetch_records(self, set_id: str) -> AsyncGenerator[str, None]:
         """Fetch data from set with buckets"""
         try:
@@ -82,3 +183,27 @@ class RedisSetDbEntityAdapter(ISetDbEntity[str, str]):
         except RedisError as e:
             logging.error('On redis "sismember" routine execution got an error, details: %s', str(e))
             raise SetDbIdentityError('Redis DB Error, details: {}'.format(str(e))) from None
+
+    async def contains_many(self, set_id: str, values: Sequence[str]) -> list[bool]:
+        """Check whether set contains values with one SMISMEMBER command"""
+        if not values:
+            return []
+        try:
+            return [x == 1 for x in await cast(Awaitable[Any], self.__db.smismember(set_id, list(values)))]
+        except RedisError as e:
+            logging.error('On redis "smismember" routine execution got an error, details: %s', str(e))
+            raise SetDbIdentityError('Redis DB Error, details: {}'.format(str(e))) from None
+
+    async def contains_in_sets(self, set_ids: Sequence[str], values: Sequence[str]) -> list[list[bool]]:
+        """Check values in several sets with SMISMEMBER command per set sent in one pipeline"""
+        if not set_ids or not values:
+            return [[False] * len(values) for _ in set_ids]
+        values_l = list(values)
+        try:
+            async with self.__db.pipeline(transaction=False) as pipe:
+                for set_id in set_ids:
+                    pipe.smismember(set_id, values_l)
+                return [[x == 1 for x in set_result] for set_result in await pipe.execute()]
+        except RedisError as e:
+            logging.error('On redis "smismember" routine execution got an error, details: %s', str(e))
+            raise SetDbIdentityError('Redis DB Error, details: {}'.format(str(e))) from None
@@ -10,10 +10,15 @@ from redis.asyncio import RedisError
 
 from src.core.settings import MAX_BUNDLE_SIZE
 from src.db.base_stream_db import IStreamDbError
+from src.db.base_stream_db import StreamBounds
 from src.utils.time_utils import get_epoch_time
+from src.utils.time_utils import parse_stream_id
 
 from .base_stream_db_adapter import IStreamDbAdapter
 
+# ID returned by redis in stream info if nothing has been deleted from stream
+NO_DELETED_STREAM_ID = '0-0'
+
 
 class RedisStreamDbAdapter(IStreamDbAdapter[str, str, dict[str, str]]):
     """Adapter for redis storing keys as str, values as str (because responses are decoded)
@@ -58,6 +63,15 @@ class RedisStreamDbAdapter(IStreamDbAdapter[str, str, dict[str, str]]):
             logging.error(f'Error while deleting from stream, stream ID: {stream_id}, details: {str(e)}')
             raise IStreamDbError from None
 
+    async def trim(self, stream_id: str, max_id: str) -> int:
+        # XTRIM MINID keeps records with IDs greater or equal to passed one, so the next ID after max_id is passed
+        timestamp, sequence = parse_stream_id(max_id)
+        try:
+            return await self.__db.xtrim(stream_id, minid=f'{timestamp}-{sequence + 1}', approximate=False)
+        except RedisError as e:
+            logging.error(f'Error while trimming stream, stream ID: {stream_id}, details: {str(e)}')
+            raise IStreamDbError from None
+
     async def read(self, stream_id: str, timestamp_id: str) -> dict[str, str]:
         try:
             values = await self.__db.xrange(stream_id, timestamp_id, timestamp_id, count=1)
@@ -94,3 +108,21 @@ class RedisStreamDbAdapter(IStreamDbAdapter[str, str, dict[str, str]]):
     async def count(self, stream_id: str) -> int:
         """Counting the size of stream"""
         return await self.__db.xlen(stream_id)
+
+    async def bounds(self, stream_id: str) -> StreamBounds[str]:
+        """Getting bounds of stream (all values are None for empty stream)"""
+        try:
+            if not await self.__db.exists(stream_id):
+                return StreamBounds[str]()
+            info = await self.__db.xinfo_stream(stream_id)
+        except RedisError as e:
+            logging.error(f'Error while reading stream info, stream ID: {stream_id}, details: {str(e)}')
+            raise IStreamDbError from None
+        first_entry = info.get('first-entry')
+        # max-deleted-entry-id is available since redis 7.0
+        max_deleted_id = info.get('max-deleted-entry-id')
+        return StreamBounds[str](
+            first_id=first_entry[0] if first_entry else None,
+            last_id=info.get('last-generated-id'),
+            max_deleted_id=max_deleted_id if max_deleted_id != NO_DELETED_STREAM_ID else None,
+        )
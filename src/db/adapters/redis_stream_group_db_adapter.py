@@ -0,0 +1,98 @@
+import logging
+from typing import Any
+from typing import Awaitable
+from typing import Iterable
+from typing import Optional
+from typing import cast
+
+from redis.asyncio import Redis as RedisAsyncio
+from redis.asyncio import RedisError
+from redis.exceptions import ResponseError
+
+from src.db.base_stream_group_db import IStreamGroupDb
+from src.db.base_stream_group_db import IStreamGroupDbError
+from src.db.base_stream_group_db import StreamGroupInfo
+
+# ID returned by XAUTOCLAIM after the last pending record (and ID of group start from the first record of stream)
+START_STREAM_ID = '0-0'
+# Error prefix returned by XGROUP CREATE for existing group
+BUSY_GROUP_ERROR = 'BUSYGROUP'
+
+
+class RedisStreamGroupDbAdapter(IStreamGroupDb[str, str, dict[str, str]]):
+    """Consumer groups adapter for redis streams (keys, IDs and values are str because responses are decoded)"""
+
+    def __init__(self, db: RedisAsyncio):
+        self.__db = db
+
+    async def create_group(self, stream_id: str, group_name: str, start_id: Optional[str] = None) -> bool:
+        try:
+            await self.__db.xgroup_create(stream_id, group_name, id=start_id or '$', mkstream=True)
+        except ResponseError as e:
+            if str(e).startswith(BUSY_GROUP_ERROR):
+                return False
+            logging.error(f'Error while creating consumer group, stream ID: {stream_id}, details: {str(e)}')
+            raise IStreamGroupDbError from None
+        except RedisError as e:
+            logging.error(f'Error while creating consumer group, stream ID: {stream_id}, details: {str(e)}')
+            raise IStreamGroupDbError from None
+        return True
+
+    async def read_group(
+        self, stream_id: str, group_name: str, consumer_name: str, count: int, block_ms: Optional[int] = None
+    ) -> list[tuple[str, dict[str, str]]]:
+        try:
+            response = await self.__db.xreadgroup(group_name, consumer_name, {stream_id: '>'}, count, block_ms)
+        except RedisError as e:
+            logging.error(f'Error while reading consumer group, stream ID: {stream_id}, details: {str(e)}')
+            raise IStreamGroupDbError from None
+        # response is a list of streams with their records (empty or None if nothing has been read)
+        return [(record_id, values) for _, records in response or [] for record_id, values in records]
+
+    async def ack(self, stream_id: str, group_name: str, ids: Iterable[str]) -> int:
+        ack_ids = list(ids)
+        if not ack_ids:
+            return 0
+        try:
+            return await self.__db.xack(stream_id, group_name, *ack_ids)
+        except RedisError as e:
+            logging.error(f'Error while acknowledging records, stream ID: {stream_id}, details: {str(e)}')
+            raise IStreamGroupDbError from None
+
+    async def claim_pending(
+        self,
+        stream_id: str,
+        group_name: str,
+        consumer_name: str,
+        min_idle_ms: int,
+        start_id: Optional[str],
+        count: int,
+    ) -> tuple[Optional[str], list[tuple[str, dict[str, str]]]]:
+        try:
+            response = await self.__db.xautoclaim(
+                stream_id, group_name, consumer_name, min_idle_ms, start_id or START_STREAM_ID, count
+            )
+        except RedisError as e:
+            logging.error(f'Error while claiming pending records, stream ID: {stream_id}, details: {str(e)}')
+            raise IStreamGroupDbError from None
+        next_id = response[0] if response[0] != START_STREAM_ID else None
+        # pending records deleted from stream are dropped by redis 7.0 (returned without values before)
+        return next_id, [(record_id, values) for record_id, values in response[1] if values is not None]
+
+    async def group_info(self, stream_id: str, group_name: str) -> Optional[StreamGroupInfo[str]]:
+        try:
+            if not await self.__db.exists(stream_id):
+                return None
+            groups = await cast(Awaitable[Any], self.__db.xinfo_groups(stream_id))
+            group = next((x for x in groups if x['name'] == group_name), None)
+            if group is None:
+                return None
+            pending = await cast(Awaitable[Any], self.__db.xpending(stream_id, group_name))
+        except RedisError as e:
+            logging.error(f'Error while reading consumer group info, stream ID: {stream_id}, details: {str(e)}')
+            raise IStreamGroupDbError from None
+        return StreamGroupInfo[str](
+            last_delivered_id=group['last-delivered-id'] if group['last-delivered-id'] != START_STREAM_ID else None,
+            pending_count=pending['pending'],
+            min_pending_id=pending['min'] if pending['pending'] else None,
+        )
@@ -0,0 +1,78 @@
+import logging
+from typing import Any
+from typing import Awaitable
+from typing import Iterable
+from typing import Optional
+from typing import Sequence
+from typing import cast
+
+from redis.asyncio import Redis as RedisAsyncio
+from redis.asyncio import RedisError
+
+from src.core.settings import BATCH_SIZE
+from src.db.base_time_index_db import ITimeIndexDb
+from src.db.base_time_index_db import TimeIndexDbError
+from src.utils.misc_utils import split_to_batches
+
+
+class RedisTimeIndexDbAdapter(ITimeIndexDb[str, str]):
+    """Time index adapter for Redis. Index of data set is a sorted set (member -> moment)"""
+
+    def __init__(self, db: RedisAsyncio):
+        self.__db = db
+
+    async def set_moments(self, set_id: str, values: Iterable[str], moment: float) -> int:
+        try:
+            async with self.__db.pipeline(transaction=False) as pipe:
+                for batch in split_to_batches(list(values), BATCH_SIZE):
+                    # earlier moments are not set over later ones
+                    pipe.zadd(set_id, dict.fromkeys(batch, moment), gt=True)
+                return sum(await pipe.execute())
+        except RedisError as e:
+            logging.error('On redis time index write operation error occurred, details: %s', str(e))
+            raise TimeIndexDbError('Redis DB Error, details: {}'.format(str(e))) from None
+
+    async def moments(self, set_id: str, values: Sequence[str]) -> list[Optional[float]]:
+        if not values:
+            return []
+        try:
+            return await cast(Awaitable[Any], self.__db.zmscore(set_id, list(values)))
+        except RedisError as e:
+            logging.error('On redis time index read operation error occurred, details: %s', str(e))
+            raise TimeIndexDbError('Redis DB Error, details: {}'.format(str(e))) from None
+
+    async def values_in_range(
+        self, set_id: str, min_moment: Optional[float], max_moment: Optional[float], offset: int = 0, count: int = 0
+    ) -> list[tuple[str, float]]:
+        try:
+            return await cast(
+                Awaitable[Any],
+                self.__db.zrangebyscore(
+                    set_id,
+                    '-inf' if min_moment is None else min_moment,
+                    '+inf' if max_moment is None else max_moment,
+                    start=offset if offset or count else None,
+                    num=(count if count > 0 else -1) if offset or count else None,
+                    withscores=True,
+                ),
+            )
+        except RedisError as e:
+            logging.error('On redis time index read operation error occurred, details: %s', str(e))
+            raise TimeIndexDbError('Redis DB Error, details: {}'.format(str(e))) from None
+
+    async def remove(self, set_id: str, values: Iterable[str]) -> int:
+        try:
+            async with self.__db.pipeline(transaction=False) as pipe:
+                for batch in split_to_batches(list(values), BATCH_SIZE):
+                    pipe.zrem(set_id, *batch)
+                return sum(await pipe.execute())
+        except RedisError as e:
+            logging.error('On redis time index write operation error occurred, details: %s', str(e))
+            raise TimeIndexDbError('Redis DB Error, details: {}'.format(str(e))) from None
+
+    async def remove_before(self, set_id: str, moment: float) -> int:
+        try:
+            return await self.__db.zremrangebyscore(set_id, '-inf', f'({moment}')
+        except RedisError as e:
+            logging.error('On redis time index write operation error occurred, details: %s', str(e))
+            raise TimeIndexDbError('Redis DB Error, details: {}'.format(str(e))) from None
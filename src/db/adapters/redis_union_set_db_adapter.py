@@ -2,6 +2,7 @@ from typing import Any
 from typing import Awaitable
 from typing import Callable
 from typing import Iterable
+from typing import Optional
 from typing import cast
 
 from redis.asyncio import Redis as RedisAsyncio
@@ -14,8 +15,8 @@ class RedisUnionSetDbAdapter(IUnionSetDb[str]):
         self.__db: RedisAsyncio = db
         self.__key_generator = key_generator
 
-    async def union_set(self, set_identities: Iterable[str]) -> str:
+    async def union_set(self, set_identities: Iterable[str], target_set_id: Optional[str] = None) -> str:
         """Union sets and return new set identity"""
-        new_set_id: str = self.__key_generator()
+        new_set_id: str = target_set_id if target_set_id is not None else self.__key_generator()
         await cast(Awaitable[Any], self.__db.sunionstore(new_set_id, [set_id for set_id in set_identities]))
         return new_set_id
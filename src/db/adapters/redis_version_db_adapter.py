@@ -0,0 +1,37 @@
+import logging
+from typing import Any
+from typing import Awaitable
+from typing import Iterable
+from typing import cast
+
+from redis.asyncio import Redis as RedisAsyncio
+from redis.asyncio import RedisError
+
+from src.db.base_version_db import IVersionDb
+from src.db.base_version_db import VersionDbError
+
+
+class RedisVersionDbAdapter(IVersionDb[str]):
+    """Versions storage adapter for Redis. All versions are stored in one hash (data set ID -> version)"""
+
+    def __init__(self, db: RedisAsyncio, versions_hash_id: str):
+        self.__db = db
+        self.__versions_hash_id = versions_hash_id
+
+    async def bump(self, set_id: str) -> int:
+        try:
+            return await cast(Awaitable[Any], self.__db.hincrby(self.__versions_hash_id, set_id, 1))
+        except RedisError as e:
+            logging.error('On redis version increment error occurred, details: %s', str(e))
+            raise VersionDbError('Redis DB Error, details: {}'.format(str(e))) from None
+
+    async def versions(self, set_ids: Iterable[str]) -> list[int]:
+        set_ids_l: list[str] = list(set_ids)
+        if not set_ids_l:
+            return []
+        try:
+            values = await cast(Awaitable[Any], self.__db.hmget(self.__versions_hash_id, set_ids_l))
+        except RedisError as e:
+            logging.error('On redis versions read error occurred, details: %s', str(e))
+            raise VersionDbError('Redis DB Error, details: {}'.format(str(e))) from None
+        return [0 if value is None else int(value) for value in values]
@@ -4,8 +4,13 @@ from ipaddress import IPv4Address
 from ipaddress import IPv4Network
 from uuid import UUID
 
+from src.core.settings import ADDRESS_ENCODING_INT
+from src.core.settings import ADDRESS_ENCODING_TEXT
 from src.db.adapters.base_set_db_entity_adapter import BaseSetDbEntityStrAdapter
 from src.db.base_set_db_entity import ISetDbEntity
+from src.models.ip_address_transformation import IPv4AddressDecimalStrTransformer
+from src.models.ip_address_transformation import IPv4AddressIntDecimalStrTransformer
+from src.models.ip_address_transformation import IPv4AddressIntStrTransformer
 from src.models.ip_address_transformation import IPv4AddressStrTransformer
 from src.models.ip_network_transformation import IPv4NetworkStrTransformer
 from src.models.uuid_transformation import UUIDStrTransformer
@@ -25,8 +30,47 @@ class SetDbEntityStrAdapterIpAddress(BaseSetDbEntityStrAdapter[UUID, IPv4Address
     value_transformer = IPv4AddressStrTransformer
 
 
+class SetDbEntityStrAdapterIntAddress(BaseSetDbEntityStrAdapter[UUID, int]):
+    """Entity for sets with UUID as keys and IPv4 addresses (as integers) as values"""
+
+    key_transformer = UUIDStrTransformer
+    value_transformer = IPv4AddressIntStrTransformer
+
+
+class SetDbEntityDecimalAdapterIpAddress(BaseSetDbEntityStrAdapter[UUID, IPv4Address]):
+    """Entity for sets with UUID as keys and IPv4Address as values (stored as integers)"""
+
+    key_transformer = UUIDStrTransformer
+    value_transformer = IPv4AddressDecimalStrTransformer
+
+
+class SetDbEntityDecimalAdapterIntAddress(BaseSetDbEntityStrAdapter[UUID, int]):
+    """Entity for sets with UUID as keys and IPv4 addresses (as integers) as values (stored as integers)"""
+
+    key_transformer = UUIDStrTransformer
+    value_transformer = IPv4AddressIntDecimalStrTransformer
+
+
 class SetDbEntityStrAdapterIpNetwork(BaseSetDbEntityStrAdapter[UUID, IPv4Network]):
     """Entity for sets with UUID as keys and IPv4Network as values"""
 
     key_transformer = UUIDStrTransformer
     value_transformer = IPv4NetworkStrTransformer
+
+
+def address_set_db_entity_adapter(
+    set_db_entity_adapter: ISetDbEntity[str, str], address_encoding: str = ADDRESS_ENCODING_TEXT
+) -> ISetDbEntity[UUID, IPv4Address]:
+    """Entity for addresses sets with encoding of addresses in storage"""
+    if address_encoding == ADDRESS_ENCODING_INT:
+        return SetDbEntityDecimalAdapterIpAddress(set_db_entity_adapter)
+    return SetDbEntityStrAdapterIpAddress(set_db_entity_adapter)
+
+
+def address_int_set_db_entity_adapter(
+    set_db_entity_adapter: ISetDbEntity[str, str], address_encoding: str = ADDRESS_ENCODING_TEXT
+) -> ISetDbEntity[UUID, int]:
+    """Entity for addresses (as integers) sets with encoding of addresses in storage"""
+    if address_encoding == ADDRESS_ENCODING_INT:
+        return SetDbEntityDecimalAdapterIntAddress(set_db_entity_adapter)
+    return SetDbEntityStrAdapterIntAddress(set_db_entity_adapter)
@@ -0,0 +1,14 @@
+from ipaddress import IPv4Address
+from uuid import UUID
+
+from src.models.ip_address_transformation import IPv4AddressStrTransformer
+from src.models.uuid_transformation import UUIDStrTransformer
+
+from .base_time_index_db_adapter import BaseTimeIndexDbTransformAdapter
+
+
+class TimeIndexDbStrAdapterIpAddress(BaseTimeIndexDbTransformAdapter[UUID, IPv4Address, str, str]):
+    """Time index adapter with UUID -> str and IPv4Address -> str transformers"""
+
+    key_transformer = UUIDStrTransformer
+    value_transformer = IPv4AddressStrTransformer
@@ -2,16 +2,19 @@ from typing import Generic
 from typing import Type
 from uuid import UUID
 
+from src.core.config import app_settings
 from src.db.base_stream_db import IKInternal
 from src.db.base_stream_db import SKInternal
 from src.models.transformation import Transformation
 from src.models.transformation import TransformOneToOne
 from src.models.usage_transformation import SURDictTransformation
+from src.models.usage_transformation import usage_record_transformation
 from src.models.uuid_transformation import UUIDStrTransformer
 from src.schemas.abstract_types import Internal
 from src.schemas.usage_schemas import StreamUsageRecord
 
 from .base_stream_db_adapter import BaseStreamDbAdapter
+from .base_stream_group_db_adapter import BaseStreamGroupDbAdapter
 
 
 class UsageStreamDbAdapter(
@@ -27,4 +30,15 @@ class UsageStreamDbAdapter(
 class UsageStreamRedisAdapter(UsageStreamDbAdapter[str, str, dict[str, str]]):
     stream_key_transformer = UUIDStrTransformer
     ts_transformer = TransformOneToOne[str]
-    value_transformer: Type[Transformation[StreamUsageRecord, dict[str, str]]] = SURDictTransformation
+    # stream entries are written in encoding of records, entries of both encodings are read
+    value_transformer: Type[Transformation[StreamUsageRecord, dict[str, str]]] = usage_record_transformation(
+        app_settings.record_encoding
+    )
+
+
+class UsageStreamGroupRedisAdapter(BaseStreamGroupDbAdapter[UUID, str, StreamUsageRecord, str, str, dict[str, str]]):
+    """Consumer groups of usage stream in redis (entries of both encodings are read)"""
+
+    stream_key_transformer = UUIDStrTransformer
+    ts_transformer = TransformOneToOne[str]
+    value_transformer = SURDictTransformation
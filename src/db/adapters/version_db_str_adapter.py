@@ -0,0 +1,11 @@
+from uuid import UUID
+
+from src.models.uuid_transformation import UUIDStrTransformer
+
+from .base_version_db_adapter import BaseVersionDbTransformAdapter
+
+
+class VersionDbStrAdapterUUID(BaseVersionDbTransformAdapter[UUID, str]):
+    """Versions storage adapter with UUID -> str transformer"""
+
+    key_transformer = UUIDStrTransformer
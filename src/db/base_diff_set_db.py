@@ -0,0 +1,24 @@
+from abc import ABC
+from abc import abstractmethod
+from typing import Generic
+from typing import Iterable
+from typing import Optional
+
+from src.schemas.abstract_types import K
+
+
+class IDiffSetDb(ABC, Generic[K]):
+    """Interface for work with difference of sets. Operations are performed in storage without data transfer"""
+
+    @abstractmethod
+    async def diff_set(
+        self,
+        set_identities: Iterable[K],
+        excluded_set_identities: Iterable[K],
+        ttl: int,
+        target_set_id: Optional[K] = None,
+    ) -> K:
+        """Union sets, subtract all excluded sets from the union and store result in new set expiring in ttl seconds
+        (or in target set replacing its content). Return identity of set with result
+        """
+        pass
@@ -0,0 +1,42 @@
+# Base interface for expiry of data sets members (expiration moments of members stored by data set)
+from abc import ABC
+from abc import abstractmethod
+from typing import Generic
+from typing import Iterable
+
+from src.schemas.abstract_types import K
+from src.schemas.abstract_types import V
+
+
+class ExpiryDbError(Exception):
+    pass
+
+
+class IExpiryDb(ABC, Generic[K, V]):
+    """Interface for expiry index management. Expiration moments (epoch seconds) of members are kept apart from
+    data sets (members of index are stored as members of data set), expired members are removed from index and data
+    set together. Index should be updated before data set on additions of members
+    """
+
+    @abstractmethod
+    async def set_expiry(self, set_id: K, values: Iterable[V], expire_at: float) -> int:
+        """Set expiration moment of values (previous moments are replaced), return count of new values in index"""
+        pass
+
+    @abstractmethod
+    async def clear_expiry(self, set_id: K, values: Iterable[V]) -> int:
+        """Remove values from index (values do not expire), return count of removed values"""
+        pass
+
+    @abstractmethod
+    async def count(self, set_id: K) -> int:
+        """Count of values in index"""
+        pass
+
+    @abstractmethod
+    async def pop_expired(self, set_id: K, data_set_id: K, moment: float, count: int) -> list[tuple[V, bool]]:
+        """Remove up to count values expired at moment from index and the same values from data set (atomically, so
+        value added again with new expiration moment or without it is kept). Return values removed from index with
+        flags of their removal from data set. Concurrent calls return different values
+        """
+        pass
@@ -28,3 +28,20 @@ class ISetDb(ABC, Generic[K]):
     async def set_ttl(self, set_id: K, timeout: int):
         """Set TTL for specified set. After timeout expiration it will be eliminated"""
         pass
+
+    @abstractmethod
+    async def acquire_set(self, set_id: K, timeout: int) -> bool:
+        """Take reference to set shared by processes and renew its TTL (reference expires with the same timeout).
+        Return False if set does not exist (reference is taken anyway, so set built after it is not deleted as unused)
+        """
+        pass
+
+    @abstractmethod
+    async def release_set(self, set_id: K):
+        """Release reference to set shared by processes"""
+        pass
+
+    @abstractmethod
+    async def del_unused_set(self, set_id: K) -> bool:
+        """Delete set shared by processes if it is not referenced. Return True if set is deleted"""
+        pass
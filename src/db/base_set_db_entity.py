@@ -6,6 +6,7 @@ from asyncio import sleep as asleep
 from typing import AsyncGenerator
 from typing import Generic
 from typing import Iterable
+from typing import Sequence
 from typing import cast
 
 from src.db.adapters.base_set_db_adapter import SetDbError
@@ -30,6 +31,22 @@ class ISetDbEntity(ABC, Generic[K, V]):
         """Remove data from set"""
         pass
 
+    async def add_batches_to_set(self, set_id: K, batches: Iterable[Iterable[V]]) -> int:
+        """Add batches of data to set. Batches are added one by one here, storages with pipelining of commands
+        send them together
+        """
+        added_count = 0
+        for batch in batches:
+            added_count += await self.add_to_set(set_id, batch)
+        return added_count
+
+    async def del_batches_from_set(self, set_id: K, batches: Iterable[Iterable[V]]) -> int:
+        """Remove batches of data from set (see add_batches_to_set)"""
+        deleted_count = 0
+        for batch in batches:
+            deleted_count += await self.del_from_set(set_id, batch)
+        return deleted_count
+
     @abstractmethod
     async def fetch_records(self, set_id: K) -> AsyncGenerator[V, None]:
         """Fetch data from set"""
@@ -45,3 +62,31 @@ class ISetDbEntity(ABC, Generic[K, V]):
     async def contains(self, set_id: K, value: V) -> bool:
         """Check whether set contains value from set"""
         pass
+
+    async def contains_many(self, set_id: K, values: Sequence[V]) -> list[bool]:
+        """Check whether set contains values (result in order of values). Values are checked one by one here,
+        storages with bulk membership check do it at once
+        """
+        return [await self.contains(set_id, value) for value in values]
+
+    async def contains_in_sets(self, set_ids: Sequence[K], values: Sequence[V]) -> list[list[bool]]:
+        """Check values in several sets (result in order of sets, see contains_many)"""
+        return [await self.contains_many(set_id, values) for set_id in set_ids]
+
+    async def add_to_set_changed(self, set_id: K, values: Sequence[V]) -> list[bool]:
+        """Add unique values to set, return flags of actually added values (in order of values).
+        Membership is checked before addition here, storages with transactions do it atomically
+        """
+        memberships = await self.contains_many(set_id, values)
+        added_data = [value for value, member in zip(values, memberships) if not member]
+        if added_data:
+            await self.add_to_set(set_id, added_data)
+        return [not member for member in memberships]
+
+    async def del_from_set_changed(self, set_id: K, values: Sequence[V]) -> list[bool]:
+        """Remove unique values from set, return flags of actually removed values (see add_to_set_changed)"""
+        memberships = await self.contains_many(set_id, values)
+        deleted_data = [value for value, member in zip(values, memberships) if member]
+        if deleted_data:
+            await self.del_from_set(set_id, deleted_data)
+        return memberships
@@ -1,6 +1,7 @@
 # Interface to work with streams
 from abc import ABC
 from abc import abstractmethod
+from dataclasses import dataclass
 from datetime import datetime as dt_datetime
 from typing import AsyncGenerator
 from typing import Generic
@@ -27,6 +28,15 @@ class IStreamDbError(Exception):
     pass
 
 
+@dataclass
+class StreamBounds(Generic[IK]):
+    """Stream bounds: first record ID, last generated ID and max ID of deleted (or trimmed) records"""
+
+    first_id: Optional[IK] = None
+    last_id: Optional[IK] = None
+    max_deleted_id: Optional[IK] = None
+
+
 class IStreamDb(ABC, Generic[SK, IK, T]):
     """Abstract interface to operate with streams
     SK are key values for streams (time-series storages)
@@ -53,6 +63,11 @@ class IStreamDb(ABC, Generic[SK, IK, T]):
         """Deleting series of keys"""
         pass
 
+    @abstractmethod
+    async def trim(self, stream_id: SK, max_id: IK) -> int:
+        """Deleting records with IDs less than or equal to max_id (the oldest records)"""
+        pass
+
     @abstractmethod
     async def read(self, stream_id: SK, timestamp_id: IK) -> Optional[T]:
         """Reading one record"""
@@ -69,3 +84,8 @@ class IStreamDb(ABC, Generic[SK, IK, T]):
     async def count(self, stream_id: SK) -> int:
         """Counting the size of stream"""
         pass
+
+    @abstractmethod
+    async def bounds(self, stream_id: SK) -> StreamBounds[IK]:
+        """Getting bounds of stream (all values are None for empty stream)"""
+        pass
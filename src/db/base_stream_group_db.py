@@ -0,0 +1,77 @@
+# Interface to work with consumer groups of streams
+from abc import ABC
+from abc import abstractmethod
+from dataclasses import dataclass
+from typing import Generic
+from typing import Iterable
+from typing import Optional
+
+from src.schemas.abstract_types import T
+
+from .base_stream_db import IK
+from .base_stream_db import SK
+
+
+class IStreamGroupDbError(Exception):
+    pass
+
+
+@dataclass
+class StreamGroupInfo(Generic[IK]):
+    """State of consumer group: ID of the last delivered record, count and min ID of pending (delivered and not
+    acknowledged) records
+    """
+
+    last_delivered_id: Optional[IK] = None
+    pending_count: int = 0
+    min_pending_id: Optional[IK] = None
+
+
+class IStreamGroupDb(ABC, Generic[SK, IK, T]):
+    """Abstract interface to read streams with consumer groups
+    Every record of stream is delivered to one consumer of group and stays pending till acknowledgement,
+    records pending too long (consumer has failed) are claimed by other consumers
+    SK are key values for streams, IK are timestamp based keys, T is an entity stored in stream
+    """
+
+    @abstractmethod
+    async def create_group(self, stream_id: SK, group_name: str, start_id: Optional[IK] = None) -> bool:
+        """Create consumer group delivering records after start_id (only new records for None), stream is created
+        if absent. Returns False if group already exists
+        """
+        pass
+
+    @abstractmethod
+    async def read_group(
+        self, stream_id: SK, group_name: str, consumer_name: str, count: int, block_ms: Optional[int] = None
+    ) -> list[tuple[IK, T]]:
+        """Read up to count new records of group for consumer (waiting up to block_ms for new records if set),
+        read records are pending till acknowledgement
+        """
+        pass
+
+    @abstractmethod
+    async def ack(self, stream_id: SK, group_name: str, ids: Iterable[IK]) -> int:
+        """Acknowledge processing of pending records, returns count of acknowledged records"""
+        pass
+
+    @abstractmethod
+    async def claim_pending(
+        self,
+        stream_id: SK,
+        group_name: str,
+        consumer_name: str,
+        min_idle_ms: int,
+        start_id: Optional[IK],
+        count: int,
+    ) -> tuple[Optional[IK], list[tuple[IK, T]]]:
+        """Claim for consumer up to count records pending longer than min_idle_ms with IDs starting from start_id
+        (from the first pending record for None). Returns ID to continue claiming from (None after the last pending
+        record) and claimed records (pending records deleted from stream are acknowledged)
+        """
+        pass
+
+    @abstractmethod
+    async def group_info(self, stream_id: SK, group_name: str) -> Optional[StreamGroupInfo[IK]]:
+        """State of consumer group (None if group is absent)"""
+        pass
@@ -0,0 +1,47 @@
+# Base interface for time indexes (moments of values by data set, sorted by moment)
+from abc import ABC
+from abc import abstractmethod
+from typing import Generic
+from typing import Iterable
+from typing import Optional
+from typing import Sequence
+
+from src.schemas.abstract_types import K
+from src.schemas.abstract_types import V
+
+
+class TimeIndexDbError(Exception):
+    pass
+
+
+class ITimeIndexDb(ABC, Generic[K, V]):
+    """Interface for time indexes management. Index keeps the latest moment (epoch seconds) of every value"""
+
+    @abstractmethod
+    async def set_moments(self, set_id: K, values: Iterable[V], moment: float) -> int:
+        """Set moment of values (earlier moments are replaced, later ones are kept), return count of new values"""
+        pass
+
+    @abstractmethod
+    async def moments(self, set_id: K, values: Sequence[V]) -> list[Optional[float]]:
+        """Get moments of values (None for values absent in index)"""
+        pass
+
+    @abstractmethod
+    async def values_in_range(
+        self, set_id: K, min_moment: Optional[float], max_moment: Optional[float], offset: int = 0, count: int = 0
+    ) -> list[tuple[V, float]]:
+        """Get values with moments in range (bounds included, None for unbounded) in ascending order of moments.
+        Page of values is selected with offset and count (0 - all values after offset)
+        """
+        pass
+
+    @abstractmethod
+    async def remove(self, set_id: K, values: Iterable[V]) -> int:
+        """Remove values from index, return count of removed values"""
+        pass
+
+    @abstractmethod
+    async def remove_before(self, set_id: K, moment: float) -> int:
+        """Remove values with moments before moment (moment is excluded), return count of removed values"""
+        pass
@@ -2,6 +2,7 @@ from abc import ABC
 from abc import abstractmethod
 from typing import Generic
 from typing import Iterable
+from typing import Optional
 
 from src.schemas.abstract_types import K
 
@@ -10,6 +11,6 @@ class IUnionSetDb(ABC, Generic[K]):
     """Interface for work with united sets. Only perform operations for joining sets"""
 
     @abstractmethod
-    async def union_set(self, set_identities: Iterable[K]) -> K:
-        """Union sets and return new set identity"""
+    async def union_set(self, set_identities: Iterable[K], target_set_id: Optional[K] = None) -> K:
+        """Union sets and return new set identity (or store union in target set replacing its content)"""
         pass
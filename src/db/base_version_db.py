@@ -0,0 +1,25 @@
+# Base interface for versions of data sets (counters incremented on every data change)
+from abc import ABC
+from abc import abstractmethod
+from typing import Generic
+from typing import Iterable
+
+from src.schemas.abstract_types import K
+
+
+class VersionDbError(Exception):
+    pass
+
+
+class IVersionDb(ABC, Generic[K]):
+    """Interface for data versions management"""
+
+    @abstractmethod
+    async def bump(self, set_id: K) -> int:
+        """Increment version of data set, return new version"""
+        pass
+
+    @abstractmethod
+    async def versions(self, set_ids: Iterable[K]) -> list[int]:
+        """Get versions of data sets (0 for never changed data sets)"""
+        pass
@@ -0,0 +1,136 @@
+# Archive of stream records in compressed newline delimited JSON segment files on local disk
+import fcntl
+import gzip
+import json
+import logging
+from asyncio import to_thread
+from contextlib import contextmanager
+from datetime import datetime as dt_datetime
+from pathlib import Path
+from typing import AsyncGenerator
+from typing import Generator
+from typing import Optional
+
+from src.utils.time_utils import get_epoch_time
+from src.utils.time_utils import parse_stream_id
+
+SEGMENT_SUFFIX = '.ndjson.gz'
+
+
+class FileSegmentStorageError(Exception):
+    pass
+
+
+class FileSegmentStorage:
+    """Records of stream (ID and values dict) appended to gzip compressed NDJSON segments in ascending order of IDs.
+    Segment is named by ID of its first record ({prefix}-{epoch millis}-{sequence}.ndjson.gz), so segment covers
+    records till the first record of the next segment. Records are appended to the last segment till it exceeds
+    segment_max_bytes (every append is a separate gzip member), the oldest segments over max_segments are deleted.
+    ID of the last appended record is kept in {prefix}.last file, records are never appended twice
+    """
+
+    def __init__(self, directory: Path, prefix: str, segment_max_bytes: int, max_segments: int = 0):
+        self.__directory = directory
+        self.__prefix = prefix
+        self.__segment_max_bytes = segment_max_bytes
+        self.__max_segments = max_segments  # 0 - segments are not deleted
+        self.__last_id_path = directory / f'{prefix}.last'
+
+    def segment_id(self, path: Path) -> tuple[int, int]:
+        return parse_stream_id(path.name[len(self.__prefix) + 1 : -len(SEGMENT_SUFFIX)])
+
+    def segments(self) -> list[Path]:
+        """Segment files sorted by IDs of their first records"""
+        return sorted(self.__directory.glob(f'{self.__prefix}-*{SEGMENT_SUFFIX}'), key=self.segment_id)
+
+    def read_last_id(self) -> Optional[str]:
+        if not self.__last_id_path.is_file():
+            return None
+        return self.__last_id_path.read_text().strip() or None
+
+    async def last_id(self) -> Optional[str]:
+        """ID of the last archived record (None for empty archive)"""
+        return await to_thread(self.read_last_id)
+
+    @contextmanager
+    def lock(self) -> Generator[bool, None, None]:
+        """Exclusive lock of archive for appending processes of host (False is yielded if archive is locked)"""
+        self.__directory.mkdir(parents=True, exist_ok=True)
+        with open(self.__directory / f'{self.__prefix}.lock', 'w') as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def append_records(self, records: list[tuple[str, dict[str, str]]]) -> int:
+        last_id = self.read_last_id()
+        if last_id is not None:
+            last_id_key = parse_stream_id(last_id)
+            records = [record for record in records if parse_stream_id(record[0]) > last_id_key]
+        if not records:
+            return 0
+        self.__directory.mkdir(parents=True, exist_ok=True)
+        segments = self.segments()
+        if segments and segments[-1].stat().st_size < self.__segment_max_bytes:
+            segment_path = segments[-1]
+        else:
+            segment_path = self.__directory / f'{self.__prefix}-{records[0][0]}{SEGMENT_SUFFIX}'
+            segments.append(segment_path)
+            logging.info('New archive segment is started: %s', segment_path)
+        data = ''.join(json.dumps({'id': record_id, 'values': values}) + '\n' for record_id, values in records)
+        with gzip.open(segment_path, 'at', encoding='utf-8') as segment_file:
+            segment_file.write(data)
+        self.__last_id_path.write_text(records[-1][0])
+        if self.__max_segments > 0:
+            for obsolete_path in segments[: -self.__max_segments]:
+                logging.info('Archive segment is deleted: %s', obsolete_path)
+                obsolete_path.unlink()
+        return len(records)
+
+    async def append(self, records: list[tuple[str, dict[str, str]]]) -> int:
+        """Append records (in ascending order of IDs) to archive, returns count of appended records"""
+        try:
+            return await to_thread(self.append_records, records)
+        except OSError as e:
+            logging.error('Error while appending to archive %s, details: %s', self.__directory, str(e))
+            raise FileSegmentStorageError(str(e)) from None
+
+    @staticmethod
+    def read_segment(
+        path: Path, start_time: Optional[int], end_time: Optional[int]
+    ) -> list[tuple[str, dict[str, str]]]:
+        """Read records of segment with epoch time (millis) of IDs in range (bounds included)"""
+        result: list[tuple[str, dict[str, str]]] = list()
+        with gzip.open(path, 'rt', encoding='utf-8') as segment_file:
+            for line in segment_file:
+                data = json.loads(line)
+                record_time = parse_stream_id(data['id'])[0]
+                if (start_time is None or record_time >= start_time) and (end_time is None or record_time <= end_time):
+                    result.append((data['id'], data['values']))
+        return result
+
+    async def fetch_records(
+        self, start_ts: Optional[dt_datetime] = None, end_ts: Optional[dt_datetime] = None
+    ) -> AsyncGenerator[tuple[str, dict[str, str]], None]:
+        """Fetch archived records in time range (bounds included), segments are read one by one in thread"""
+        start_time = get_epoch_time(start_ts) if start_ts is not None else None
+        end_time = get_epoch_time(end_ts) if end_ts is not None else None
+        try:
+            segments = await to_thread(self.segments)
+            for position, segment_path in enumerate(segments):
+                if end_time is not None and self.segment_id(segment_path)[0] > end_time:
+                    return
+                if start_time is not None and position + 1 < len(segments):
+                    if self.segment_id(segments[position + 1])[0] < start_time:
+                        # all records of segment are older than range
+                        continue
+                for record in await to_thread(self.read_segment, segment_path, start_time, end_time):
+                    yield record
+        except OSError as e:
+            logging.error('Error while reading archive %s, details: %s', self.__directory, str(e))
+            raise FileSegmentStorageError(str(e)) from None
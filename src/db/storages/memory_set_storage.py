@@ -5,6 +5,7 @@ from typing import Generic
 from typing import Iterable
 
 from src.db.adapters.base_set_db_adapter import ISetDbAdapter
+from src.db.base_diff_set_db import IDiffSetDb
 from src.db.base_set_db_entity import ISetDbEntity
 from src.db.base_union_set_db import IUnionSetDb
 from src.schemas.abstract_types import K
@@ -85,11 +86,20 @@ class MemorySetStorage(Generic[K, V]):
         return value in set_data
 
     def union_sets(self, new_set_id: K, set_identities: Iterable[K]):
-        set_data = self.get_set(new_set_id)
+        """Store union of sets in new set (content of existing set is replaced)"""
+        set_data: set[V] = set()
         for merged_set_id in set_identities:
             if self.exists(merged_set_id):
                 merged_set_data = self.get_set(merged_set_id)
                 set_data |= merged_set_data
+        self.__data[new_set_id] = set_data
+
+    def diff_sets(self, new_set_id: K, set_identities: Iterable[K], excluded_set_identities: Iterable[K]):
+        self.union_sets(new_set_id, set_identities)
+        set_data = self.get_set(new_set_id)
+        for excluded_set_id in excluded_set_identities:
+            if self.exists(excluded_set_id):
+                set_data -= self.get_set(excluded_set_id)
 
     def set_db_adapter(self) -> ISetDbAdapter[K]:
         from src.db.adapters.memory_set_db_adapter import MemorySetDbAdapter
@@ -106,3 +116,9 @@ class MemorySetStorage(Generic[K, V]):
         from src.db.adapters.memory_union_set_db_adapter import MemoryUnionSetDbAdapter
 
         return MemoryUnionSetDbAdapter[K](self, key_generator)
+
+    def diff_set_db_adapter(self, key_generator: Callable[[], K]) -> IDiffSetDb[K]:
+        """Need key generator here for storing difference of sets"""
+        from src.db.adapters.memory_diff_set_db_adapter import MemoryDiffSetDbAdapter
+
+        return MemoryDiffSetDbAdapter[K](self, key_generator)
@@ -0,0 +1,108 @@
+from dataclasses import dataclass
+from dataclasses import field
+from time import monotonic
+from typing import Any
+from typing import Generic
+from typing import Iterable
+from typing import Optional
+
+from src.db.base_stream_db import IK
+from src.db.base_stream_db import SK
+from src.db.base_stream_db import IStreamDb
+from src.db.base_stream_group_db import IStreamGroupDb
+from src.db.base_stream_group_db import IStreamGroupDbError
+from src.db.base_stream_group_db import StreamGroupInfo
+from src.schemas.abstract_types import T
+
+
+@dataclass
+class MemoryPendingItem:
+    consumer_name: str
+    delivery_time: float  # monotonic time of the last delivery (in seconds)
+
+
+@dataclass
+class MemoryGroupState:
+    last_delivered_id: Any = None  # IK values should be comparable
+    pending: dict[Any, MemoryPendingItem] = field(default_factory=dict)
+
+
+class MemoryStreamGroupStorage(IStreamGroupDb[SK, IK, T], Generic[SK, IK, T]):
+    """Consumer groups of stream storage kept in memory (records are read from stream storage, reads never block)"""
+
+    def __init__(self, stream_storage: IStreamDb[SK, IK, T]):
+        self.__stream_storage = stream_storage
+        self.__groups: dict[tuple[SK, str], MemoryGroupState] = dict()
+
+    def group_state(self, stream_id: SK, group_name: str) -> MemoryGroupState:
+        state = self.__groups.get((stream_id, group_name))
+        if state is None:
+            raise IStreamGroupDbError(f'No consumer group {group_name}')
+        return state
+
+    async def create_group(self, stream_id: SK, group_name: str, start_id: Optional[IK] = None) -> bool:
+        if (stream_id, group_name) in self.__groups:
+            return False
+        if start_id is None:
+            start_id = (await self.__stream_storage.bounds(stream_id)).last_id
+        self.__groups[(stream_id, group_name)] = MemoryGroupState(start_id)
+        return True
+
+    async def read_group(
+        self, stream_id: SK, group_name: str, consumer_name: str, count: int, block_ms: Optional[int] = None
+    ) -> list[tuple[IK, T]]:
+        state = self.group_state(stream_id, group_name)
+        result: list[tuple[IK, T]] = list()
+        async for record_id, value in self.__stream_storage.fetch_records(stream_id):
+            if len(result) >= count:
+                break
+            if state.last_delivered_id is None or record_id > state.last_delivered_id:
+                result.append((record_id, value))
+        delivery_time = monotonic()
+        for record_id, _ in result:
+            state.pending[record_id] = MemoryPendingItem(consumer_name, delivery_time)
+        if result:
+            state.last_delivered_id = result[-1][0]
+        return result
+
+    async def ack(self, stream_id: SK, group_name: str, ids: Iterable[IK]) -> int:
+        state = self.group_state(stream_id, group_name)
+        return sum(state.pending.pop(record_id, None) is not None for record_id in ids)
+
+    async def claim_pending(
+        self,
+        stream_id: SK,
+        group_name: str,
+        consumer_name: str,
+        min_idle_ms: int,
+        start_id: Optional[IK],
+        count: int,
+    ) -> tuple[Optional[IK], list[tuple[IK, T]]]:
+        state = self.group_state(stream_id, group_name)
+        pending_ids = sorted(x for x in state.pending if start_id is None or x >= start_id)
+        claim_time = monotonic()
+        result: list[tuple[IK, T]] = list()
+        for record_id in pending_ids:
+            if len(result) >= count:
+                return record_id, result
+            item = state.pending[record_id]
+            if (claim_time - item.delivery_time) * 1000 < min_idle_ms:
+                continue
+            value = await self.__stream_storage.read(stream_id, record_id)
+            if value is None:
+                # record has been deleted from stream
+                del state.pending[record_id]
+                continue
+            state.pending[record_id] = MemoryPendingItem(consumer_name, claim_time)
+            result.append((record_id, value))
+        return None, result
+
+    async def group_info(self, stream_id: SK, group_name: str) -> Optional[StreamGroupInfo[IK]]:
+        state = self.__groups.get((stream_id, group_name))
+        if state is None:
+            return None
+        return StreamGroupInfo[IK](
+            last_delivered_id=state.last_delivered_id,
+            pending_count=len(state.pending),
+            min_pending_id=min(state.pending) if state.pending else None,
+        )
@@ -1,6 +1,7 @@
 from collections import defaultdict
 from dataclasses import dataclass
 from datetime import datetime as dt_datetime
+from typing import Any
 from typing import AsyncGenerator
 from typing import Callable
 from typing import Generic
@@ -10,6 +11,7 @@ from typing import Optional
 from src.db.base_stream_db import IK
 from src.db.base_stream_db import SK
 from src.db.base_stream_db import IStreamDb
+from src.db.base_stream_db import StreamBounds
 from src.schemas.abstract_types import T
 from src.utils.time_utils import get_current_epoch_time
 from src.utils.time_utils import get_epoch_time
@@ -29,6 +31,7 @@ class MemoryStreamStorage(IStreamDb[SK, IK, T], Generic[SK, IK, T]):
 
     def __init__(self):
         self.__storage: dict[SK, list[MemoryStorageItem]] = defaultdict(list)
+        self.__max_deleted_ids: dict[SK, Any] = dict()  # IK values should be comparable
 
     async def save(self, stream_id: SK, new_value: T, timestamp_id: Optional[IK]) -> IK:
         """Save by timestamp key (add and possibly update)"""
@@ -64,9 +67,16 @@ class MemoryStreamStorage(IStreamDb[SK, IK, T], Generic[SK, IK, T]):
                 if timestamp_id == item.timestamp:
                     stream_data.remove(item)
                     deleted_count += 1
+                    if stream_id not in self.__max_deleted_ids or self.__max_deleted_ids[stream_id] < timestamp_id:
+                        self.__max_deleted_ids[stream_id] = timestamp_id
                     break
         return deleted_count
 
+    async def trim(self, stream_id: SK, max_id: IK) -> int:
+        return await self.delete(
+            stream_id, [item.timestamp for item in self.__storage[stream_id] if item.timestamp <= max_id]
+        )
+
     async def read(self, stream_id: SK, timestamp_id: IK) -> Optional[T]:
         stream_data: list[MemoryStorageItem] = self.__storage[stream_id]
         for item in stream_data:
@@ -91,6 +101,17 @@ class MemoryStreamStorage(IStreamDb[SK, IK, T], Generic[SK, IK, T]):
         """Counting the size of stream"""
         return len(self.__storage[stream_id])
 
+    async def bounds(self, stream_id: SK) -> StreamBounds[IK]:
+        """Getting bounds of stream (all values are None for empty stream)"""
+        timestamps = sorted(item.timestamp for item in self.__storage[stream_id])
+        max_deleted_id = self.__max_deleted_ids.get(stream_id)
+        last_ids = timestamps[-1:] + ([max_deleted_id] if max_deleted_id is not None else [])
+        return StreamBounds[IK](
+            first_id=timestamps[0] if timestamps else None,
+            last_id=sorted(last_ids)[-1] if last_ids else None,
+            max_deleted_id=max_deleted_id,
+        )
+
 
 class MemoryStreamTsStorage(MemoryStreamStorage[SK, str, T], Generic[SK, T]):
     """Storage with timestamp likely in redis storage (epoch in millis with unique counter)"""
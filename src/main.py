@@ -1,10 +1,16 @@
 import logging
+from asyncio import CancelledError
+from asyncio import Task
+from asyncio import create_task
+from contextlib import asynccontextmanager
+from contextlib import suppress
 from typing import Any
 
 import uvicorn  # type: ignore[import-untyped]
 from fastapi import FastAPI
 from fastapi.responses import ORJSONResponse
 
+from src.api.address_check_router import api_router as address_check_router
 from src.api.address_routers import allowed_addresses_router as allowed_ip_router
 from src.api.address_routers import banned_addresses_router as banned_ip_router
 from src.api.addresses_groups_router import allowed_addresses_api_router as allowed_ip_groups_router
@@ -12,11 +18,54 @@ from src.api.addresses_groups_router import banned_addresses_api_router as banne
 from src.api.allowed_networks_router import api_router as allowed_network_router
 from src.api.blacklist_router import api_router as blacklist_router
 from src.api.history_router import api_router as history_router
+from src.api.metrics_router import api_router as metrics_router
 from src.api.ping_router import api_router as ping_router
 from src.api.whitelist_router import api_router as whitelist_router
 from src.core.config import app_settings
+from src.db.storages.redis_db import context_async_redis_client
+from src.service.address_encoding_service import check_address_encoding
+from src.service.history_compaction_service import HistoryRetentionPolicy
+from src.service.usage_retention_service import usage_retention_active
+from src.tasks.expiry_reaper_task import reap_expired_addresses_task
+from src.tasks.history_compaction_task import compact_history_task
+from src.tasks.history_stream_task import create_history_group_task
+from src.tasks.history_stream_task import history_stream_worker_task
+from src.tasks.membership_index_task import refresh_membership_index_task
+from src.tasks.usage_retention_task import trim_usage_stream_task
 from version import get_version
 
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    """Check encoding of addresses stored in sets on startup (see migrate address_encoding), create consumer group
+    of history workers (if history is derived from usage stream).
+    Start background tasks on startup: refresh of membership index (if enabled), removal of expired
+    addresses, history compaction and usage stream retention (if periods are set), history worker of usage stream
+    (if enabled). Stop them on shutdown
+    """
+    async with context_async_redis_client('address encoding check') as redis_client_obj:
+        await check_address_encoding(redis_client_obj)
+    if app_settings.history_stream_enabled:
+        # consumer group is created before requests are served (handlers do not write history then)
+        await create_history_group_task()
+    tasks: list[Task] = list()
+    if app_settings.membership_index_enabled:
+        tasks.append(create_task(refresh_membership_index_task()))
+    if app_settings.expiry_reap_seconds > 0:
+        tasks.append(create_task(reap_expired_addresses_task()))
+    if app_settings.history_compaction_seconds > 0 and HistoryRetentionPolicy.from_settings().active:
+        tasks.append(create_task(compact_history_task()))
+    if app_settings.usage_retention_seconds > 0 and usage_retention_active():
+        tasks.append(create_task(trim_usage_stream_task()))
+    if app_settings.history_stream_enabled and app_settings.history_stream_worker_in_app:
+        tasks.append(create_task(history_stream_worker_task()))
+    yield
+    for task in tasks:
+        task.cancel()
+        with suppress(CancelledError):
+            await task
+
+
 app_configs: dict[str, Any] = dict(
     {
         # Project name configuration (for OPENAPI visualization)
@@ -24,6 +73,7 @@ app_configs: dict[str, Any] = dict(
         # Rust based JSON serializer
         'default_response_class': ORJSONResponse,
         'version': get_version(),
+        'lifespan': lifespan,
     }
 )
 
@@ -43,9 +93,11 @@ app.include_router(banned_ip_router, prefix='/addresses/banned')
 app.include_router(banned_ip_groups_router, prefix='/addresses/banned/groups')
 app.include_router(allowed_ip_router, prefix='/addresses/allowed')
 app.include_router(allowed_ip_groups_router, prefix='/addresses/allowed/groups')
+app.include_router(address_check_router, prefix='/addresses/check')
 app.include_router(allowed_network_router, prefix='/networks/allowed')
 app.include_router(history_router, prefix='/history')
 app.include_router(ping_router, prefix='/ping')
+app.include_router(metrics_router, prefix='/metrics')
 app.include_router(blacklist_router, prefix='/download/blacklist')
 app.include_router(whitelist_router, prefix='/download/whitelist')
 
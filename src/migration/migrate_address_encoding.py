@@ -0,0 +1,110 @@
+import logging
+from typing import Type
+from uuid import UUID
+
+from src.api.di.db_di_routines import get_version_db
+from src.core.config import app_settings
+from src.core.settings import ADDRESS_ENCODING_CONVERSION
+from src.core.settings import ADDRESS_ENCODING_ID
+from src.core.settings import ADDRESS_ENCODING_INT
+from src.core.settings import ALLOWED_ADDRESSES_GROUP_NAME
+from src.core.settings import BANNED_ADDRESSES_GROUP_NAME
+from src.core.settings import BATCH_SIZE
+from src.core.settings import REDIS_FETCH_SIZE
+from src.db.adapters.hash_db_entity_str_adapter import HashDbEntityGroupDataStrAdapter
+from src.db.adapters.redis_hash_db_entity_adapter import RedisDBEntityAdapter
+from src.db.adapters.redis_set_db_entity_adapter import RedisSetDbEntityAdapter
+from src.db.storages.redis_db import RedisAsyncio
+from src.db.storages.redis_db import context_async_redis_client
+from src.models.ip_address_transformation import IPv4AddressIntDecimalStrTransformer
+from src.models.ip_address_transformation import IPv4AddressIntStrTransformer
+from src.models.ip_address_transformation import address_from_storage
+from src.models.transformation import Transformation
+from src.models.uuid_transformation import UUIDStrTransformer
+from src.service.address_expiry_service import expiry_set_id
+from src.service.service_db_factories import groups_db_service_factory
+
+
+async def migrate_set_encoding(
+    set_db_entity_obj: RedisSetDbEntityAdapter, set_id: UUID, transformer: Type[Transformation[int, str]]
+) -> int:
+    """Convert addresses of set to encoding of transformer by batches of records. Return count of converted records"""
+    converted_count = 0
+    replaced_records: dict[str, str] = dict()
+    storage_set_id = UUIDStrTransformer.transform_to_storage(set_id)
+    async for record in set_db_entity_obj.fetch_records(storage_set_id):
+        converted_record = transformer.transform_to_storage(address_from_storage(record))
+        if converted_record != record:
+            replaced_records[record] = converted_record
+        if len(replaced_records) >= BATCH_SIZE:
+            await set_db_entity_obj.replace_in_set(storage_set_id, replaced_records)
+            converted_count += len(replaced_records)
+            replaced_records = dict()
+    if replaced_records:
+        await set_db_entity_obj.replace_in_set(storage_set_id, replaced_records)
+        converted_count += len(replaced_records)
+    return converted_count
+
+
+async def migrate_expiry_encoding(
+    redis_client_obj: RedisAsyncio, index_id: UUID, transformer: Type[Transformation[int, str]]
+) -> int:
+    """Convert addresses of expiry index (sorted set) to encoding of transformer by batches of records (expiration
+    moments are kept). Return count of converted records
+    """
+    converted_count = 0
+    replaced_records: dict[str, tuple[str, float]] = dict()
+    storage_index_id = UUIDStrTransformer.transform_to_storage(index_id)
+
+    async def replace_records():
+        async with redis_client_obj.pipeline(transaction=True) as pipe:
+            pipe.zrem(storage_index_id, *replaced_records)
+            pipe.zadd(storage_index_id, dict(replaced_records.values()))
+            await pipe.execute()
+
+    async for record, score in redis_client_obj.zscan_iter(storage_index_id, count=REDIS_FETCH_SIZE):
+        converted_record = transformer.transform_to_storage(address_from_storage(record))
+        if converted_record != record:
+            replaced_records[record] = (converted_record, score)
+        if len(replaced_records) >= BATCH_SIZE:
+            await replace_records()
+            converted_count += len(replaced_records)
+            replaced_records = dict()
+    if replaced_records:
+        await replace_records()
+        converted_count += len(replaced_records)
+    return converted_count
+
+
+async def migrate_address_encoding(address_encoding: str = app_settings.address_encoding):
+    """Convert addresses in sets of all banned and allowed groups to address encoding (from application settings).
+    Migration is offline: application instances and workers must be stopped, they refuse to start while conversion is
+    in progress and with encoding other than the stored one after it (see check_address_encoding).
+    Versions of converted sets are bumped, so cached downloads and derived sets are renewed
+    """
+    transformer = (
+        IPv4AddressIntDecimalStrTransformer
+        if address_encoding == ADDRESS_ENCODING_INT
+        else IPv4AddressIntStrTransformer
+    )
+    async with context_async_redis_client('address encoding migration') as redis_client_obj:
+        set_db_entity_obj = RedisSetDbEntityAdapter(redis_client_obj)
+        version_db = get_version_db(redis_client_obj)
+        groups_db_adapter = HashDbEntityGroupDataStrAdapter(RedisDBEntityAdapter(redis_client_obj))
+        await redis_client_obj.set(str(ADDRESS_ENCODING_ID), ADDRESS_ENCODING_CONVERSION)
+        for group_name in (BANNED_ADDRESSES_GROUP_NAME, ALLOWED_ADDRESSES_GROUP_NAME):
+            for group in await groups_db_service_factory(group_name, groups_db_adapter).list_groups():
+                converted_count = await migrate_set_encoding(set_db_entity_obj, group.group_set_id, transformer)
+                # members of expiry index are removed from set as is, so they are kept in encoding of set
+                await migrate_expiry_encoding(redis_client_obj, expiry_set_id(group.group_set_id), transformer)
+                if converted_count > 0:
+                    await version_db.bump(group.group_set_id)
+                logging.info(
+                    'Converted %d records to %s encoding, group: %s (%s)',
+                    converted_count,
+                    address_encoding,
+                    group.group_name,
+                    group_name,
+                )
+        await redis_client_obj.set(str(ADDRESS_ENCODING_ID), address_encoding)
+        logging.info('Addresses are stored in %s encoding', address_encoding)
@@ -0,0 +1,38 @@
+import logging
+from typing import AsyncGenerator
+
+from src.core.config import app_settings
+from src.core.settings import STREAM_USAGE_INFO
+from src.db.adapters.redis_stream_db_adapter import RedisStreamDbAdapter
+from src.db.adapters.redis_time_index_db_adapter import RedisTimeIndexDbAdapter
+from src.db.adapters.time_index_db_str_adapter import TimeIndexDbStrAdapterIpAddress
+from src.db.adapters.usage_stream_db_adapter import UsageStreamRedisAdapter
+from src.db.storages.redis_db import context_async_redis_client
+from src.models.usage_transformation import SURDictTransformation
+from src.schemas.usage_schemas import StreamUsageRecord
+from src.service.change_index_service import AddressChangeIndexService
+from src.service.usage_retention_service import get_usage_archive_storage
+
+
+async def migrate_change_index():
+    """Build index of last changes of addresses from archived usage records and usage stream
+    (run it after enabling of index, records written concurrently are indexed on writing)
+    """
+    if not app_settings.usage_change_index_enabled:
+        logging.warning('Index of last changes is disabled, it will not be maintained on usage stream writes')
+    async with context_async_redis_client('change index migration') as client_obj:
+        stream_db_obj = UsageStreamRedisAdapter(RedisStreamDbAdapter(client_obj))
+        archive_storage = get_usage_archive_storage()
+
+        async def usage_records() -> AsyncGenerator[tuple[str, StreamUsageRecord], None]:
+            if archive_storage is not None:
+                async for record_id, values in archive_storage.fetch_records():
+                    yield record_id, SURDictTransformation.transform_from_storage(values)
+            async for record in stream_db_obj.fetch_records(STREAM_USAGE_INFO):
+                yield record
+
+        change_index = AddressChangeIndexService(
+            TimeIndexDbStrAdapterIpAddress(RedisTimeIndexDbAdapter(client_obj)),
+            app_settings.usage_change_index_by_group,
+        )
+        logging.info('Indexed %d addresses', await change_index.backfill(usage_records()))
@@ -0,0 +1,38 @@
+import logging
+
+from src.core.config import app_settings
+from src.core.settings import BATCH_SIZE
+from src.core.settings import RECORD_ENCODING_BINARY
+from src.db.storages.redis_db import context_async_redis_client
+from src.models.record_codecs import is_binary_history_record
+from src.schemas.usage_schemas import AddressHistoryRecord
+from src.service.history_db_service import HistoryDBService
+
+
+async def migrate_history_encoding(history_db_service: HistoryDBService, record_encoding: str) -> int:
+    """Convert histories of addresses to record encoding. Batches are replaced atomically (histories changed while
+    converting are skipped, they are written in encoding of application settings). Return count of converted records
+    """
+    converted_count = 0
+    cursor = 0
+    while True:
+        cursor, raw_records = await history_db_service.scan_raw_records(cursor, BATCH_SIZE)
+        converted_records: dict[str, AddressHistoryRecord] = {
+            key: history_db_service.deserialize(data)
+            for key, data in raw_records.items()
+            if is_binary_history_record(data) != (record_encoding == RECORD_ENCODING_BINARY)
+        }
+        converted_count += len(await history_db_service.replace_raw_records(raw_records, converted_records, []))
+        if cursor == 0:
+            return converted_count
+
+
+async def migrate_record_encoding(record_encoding: str = app_settings.record_encoding):
+    """Convert stored histories of addresses to record encoding (from application settings).
+    Usage stream entries are never rewritten: entries of both encodings are read
+    """
+    async with context_async_redis_client('record encoding migration') as redis_client_obj:
+        converted_count = await migrate_history_encoding(
+            HistoryDBService(redis_client_obj, record_encoding=record_encoding), record_encoding
+        )
+        logging.info('Converted %d history records to %s encoding', converted_count, record_encoding)
@@ -0,0 +1,40 @@
+import json
+from typing import Type
+
+from src.core.settings import RECORD_ENCODING_BINARY
+from src.schemas.usage_schemas import AddressHistoryRecord
+
+from .record_codecs import decode_history_record
+from .record_codecs import encode_history_record
+from .record_codecs import is_binary_history_record
+from .transformation import Transformation
+from .usage_encoders import UsageClassesEncoder
+
+
+class AHRJsonStrTransformation(Transformation[AddressHistoryRecord, str]):
+    """Transformation of address history to JSON record (binary records are read too)"""
+
+    @classmethod
+    def transform_to_storage(cls, value: AddressHistoryRecord) -> str:
+        return json.dumps(value, cls=UsageClassesEncoder)
+
+    @classmethod
+    def transform_from_storage(cls, value: str) -> AddressHistoryRecord:
+        if is_binary_history_record(value):
+            return decode_history_record(value)
+        return AddressHistoryRecord(**json.loads(value))
+
+
+class AHRBinaryStrTransformation(AHRJsonStrTransformation):
+    """Transformation of address history to compact binary record (JSON records are read too)"""
+
+    @classmethod
+    def transform_to_storage(cls, value: AddressHistoryRecord) -> str:
+        return encode_history_record(value)
+
+
+def history_record_transformation(record_encoding: str) -> Type[Transformation[AddressHistoryRecord, str]]:
+    """Transformation of address history to hash record in encoding of records"""
+    if record_encoding == RECORD_ENCODING_BINARY:
+        return AHRBinaryStrTransformation
+    return AHRJsonStrTransformation
@@ -1,8 +1,22 @@
 from ipaddress import IPv4Address
+from socket import AF_INET
+from socket import inet_ntoa
+from socket import inet_pton
+
+from src.utils.ip_array_utils import ADDRESS_STRUCT
 
 from .transformation import Transformation
 
 
+def address_from_storage(value: str) -> int:
+    """Address stored in any encoding (dotted decimal or integer) as integer.
+    Both encodings are read, so sets are read while they are converted from one encoding to another
+    """
+    if '.' in value:
+        return ADDRESS_STRUCT.unpack(inet_pton(AF_INET, value))[0]
+    return int(value)
+
+
 class IPv4AddressStrTransformer(Transformation[IPv4Address, str]):
     """Transformation from IPv4Address to internal str for Redis"""
 
@@ -12,7 +26,47 @@ class IPv4AddressStrTransformer(Transformation[IPv4Address, str]):
 
     @classmethod
     def transform_from_storage(cls, value: str) -> IPv4Address:
-        return IPv4Address(value)
+        return IPv4Address(value) if '.' in value else IPv4Address(int(value))
+
+
+class IPv4AddressIntStrTransformer(Transformation[int, str]):
+    """Transformation from IPv4 address as integer to internal str for Redis
+    Works without creation of IPv4Address objects (used in bulk processing of addresses)
+    """
+
+    @classmethod
+    def transform_to_storage(cls, value: int) -> str:
+        return inet_ntoa(ADDRESS_STRUCT.pack(value))
+
+    @classmethod
+    def transform_from_storage(cls, value: str) -> int:
+        return address_from_storage(value)
+
+
+class IPv4AddressDecimalStrTransformer(Transformation[IPv4Address, str]):
+    """Transformation from IPv4Address to internal integer str for Redis (compact encoding)
+    Sets of integers are stored by Redis in intset (small sets) or with less memory than dotted decimal strings
+    """
+
+    @classmethod
+    def transform_to_storage(cls, value: IPv4Address) -> str:
+        return str(int(value))
+
+    @classmethod
+    def transform_from_storage(cls, value: str) -> IPv4Address:
+        return IPv4Address(address_from_storage(value))
+
+
+class IPv4AddressIntDecimalStrTransformer(Transformation[int, str]):
+    """Transformation from IPv4 address as integer to internal integer str for Redis (compact encoding)"""
+
+    @classmethod
+    def transform_to_storage(cls, value: int) -> str:
+        return str(value)
+
+    @classmethod
+    def transform_from_storage(cls, value: str) -> int:
+        return address_from_storage(value)
 
 
 class IPv4AddressListStrTransformer(Transformation[list[IPv4Address], str]):
@@ -1,8 +1,12 @@
 from dataclasses import dataclass
+from ipaddress import IPv4Address
+from typing import Literal
 from typing import Optional
 
 from fastapi import Query
 
+from src.schemas.usage_schemas import ActionType
+
 
 @dataclass
 class CommonQueryParams:
@@ -16,10 +20,18 @@ class DownloadListQueryParams:
     records_count: int = Query(10, description='Number of records to return. Omitted if all_records == true')
     all_records: bool = Query(True, description='Return all records')
     filename: str = Query('', description='Set filename to download as file', example='text.txt')
+    aggregate: bool = Query(False, description='Collapse records to the minimal list of networks (CIDR notation)')
+    aggregate_prefix: int = Query(
+        32,
+        ge=8,
+        le=32,
+        description='Lossy aggregation with "aggregate" option: networks with this prefix length containing records '
+        'are returned entirely. Default value (32) means exact aggregation',
+    )
 
 
 @dataclass
-class DownloadBlackListQueryParams(DownloadListQueryParams):
+class BlackListFilterQueryParams:
     filter_records: bool = Query(True, description='Filter records with allowed addresses and networks')
     banned_address_groups: str = Query(
         '',
@@ -53,6 +65,20 @@ class DownloadBlackListQueryParams(DownloadListQueryParams):
     )
 
 
+@dataclass
+class DownloadBlackListQueryParams(DownloadListQueryParams, BlackListFilterQueryParams):
+    pass
+
+
+@dataclass
+class DownloadBlackListDeltaQueryParams(BlackListFilterQueryParams):
+    since: str = Query(
+        description='Return changes after this point: usage stream record ID (cursor from previous delta request) '
+        'or datetime in ISO format',
+        examples=['1700000000000-0', '2024-01-01T00:00:00+03:00'],
+    )
+
+
 @dataclass
 class DownloadWhitelistQueryParams(DownloadListQueryParams):
     with_networks: bool = Query(False, description='Add allowed networks in download set')
@@ -82,3 +108,40 @@ class HistoryQueryParams:
 @dataclass
 class CountAddress:
     address_group: Optional[str] = Query(None, description='Group of address, if not specified - default group')
+
+
+@dataclass
+class BulkAddressesQueryParams:
+    source_agent: str = Query(description='Name of agent sent addresses')
+    action: ActionType = Query(ActionType.add_action, description='Add addresses to set or remove them from set')
+    address_group: Optional[str] = Query(None, description='Group of address, if not specified - default group')
+
+
+@dataclass
+class HistoryPageQueryParams:
+    limit: int = Query(
+        0,
+        ge=0,
+        description='Page size. Pages are sorted by address, cursor for the next page is returned in X-Next-Cursor '
+        'header. 0 - all records (sorted by last update time for JSON output of history)',
+    )
+    after: Optional[IPv4Address] = Query(
+        None, description='Cursor: return records of addresses greater than this one (X-Next-Cursor of previous page)'
+    )
+    output_format: Literal['json', 'ndjson'] = Query(
+        'json', alias='format', description='Response format: JSON array or streamed newline delimited JSON'
+    )
+
+    @property
+    def paginated(self) -> bool:
+        return self.limit > 0 or self.after is not None
+
+
+@dataclass
+class ChangeIndexQueryParams:
+    address_category: Optional[Literal['banned', 'allowed']] = Query(
+        None, description='Category of addresses (requires index per group), if not specified - all addresses'
+    )
+    address_group: Optional[str] = Query(None, description='Group of address, if not specified - default group')
+    offset: int = Query(0, ge=0, description='Count of skipped records (records are sorted by last change time)')
+    limit: int = Query(0, ge=0, description='Page size, 0 - all records after offset')
@@ -0,0 +1,237 @@
+# Compact binary encoding of history and usage stream records. Redis client decodes responses to str, so binary
+# records are kept as base64 text: history records with BINARY_RECORD_PREFIX, stream records in BINARY_RECORD_FIELD
+from base64 import b64decode
+from base64 import b64encode
+from datetime import datetime as dt_datetime
+from datetime import timedelta
+from datetime import timezone
+from ipaddress import IPv4Address
+from struct import Struct
+from typing import Any
+from typing import Optional
+from typing import Type
+from typing import TypeVar
+
+from pydantic import BaseModel
+
+from src.core.settings import ALLOWED_ADDRESSES_CATEGORY_NAME
+from src.core.settings import BANNED_ADDRESSES_CATEGORY_NAME
+from src.core.settings import EXPIRY_SOURCE_AGENT
+from src.schemas.usage_schemas import ActionType
+from src.schemas.usage_schemas import AddressHistoryRecord
+from src.schemas.usage_schemas import HistoryRecordInfo
+from src.schemas.usage_schemas import StreamUsageRecord
+
+M = TypeVar('M', bound=BaseModel)
+
+BINARY_RECORD_PREFIX = '~'  # absent in base64 alphabet and JSON records start with '{'
+BINARY_RECORD_FIELD = 'b'
+BINARY_CODEC_VERSION = 1
+# version of binary usage records: version 2 records keep source agent (version 1 records are read without it)
+USAGE_CODEC_VERSION = 2
+
+# Strings interned by index in every record. Append only: indexes of stored records refer to this order
+WELL_KNOWN_STRINGS = (BANNED_ADDRESSES_CATEGORY_NAME, ALLOWED_ADDRESSES_CATEGORY_NAME, EXPIRY_SOURCE_AGENT)
+NO_STRING = 0xFFFF
+ACTION_TYPES = (ActionType.add_action, ActionType.remove_action)
+ACTION_CODES = {action_type: code for code, action_type in enumerate(ACTION_TYPES)}
+# UTC offset (in seconds) of naive datetimes: they are stored as milliseconds of wall clock since epoch
+NAIVE_OFFSET = -(2**31)
+
+UTC_EPOCH = dt_datetime(1970, 1, 1, tzinfo=timezone.utc)
+NAIVE_EPOCH = dt_datetime(1970, 1, 1)
+ONE_MILLISECOND = timedelta(milliseconds=1)
+
+STRING_LENGTH_STRUCT = Struct('<H')
+# version, address, last update time (millis and UTC offset), strings count, records count
+HISTORY_HEADER_STRUCT = Struct('<BIqiHI')
+# action time (millis and UTC offset), action type, indexes of source, address category and address group
+HISTORY_ITEM_STRUCT = Struct('<qiBHHH')
+# version, action type, action time (millis and UTC offset), strings count, indexes of category, group and source,
+# addresses count (packed addresses follow strings)
+USAGE_HEADER_STRUCT = Struct('<BBqiHHHHI')
+# header of version 1 usage records (no source index)
+USAGE_HEADER_V1_STRUCT = Struct('<BBqiHHHI')
+
+# epochs in fixed offset timezones of decoded datetimes by UTC offset (naive epoch for naive datetimes)
+OFFSET_EPOCHS: dict[int, dt_datetime] = {0: UTC_EPOCH, NAIVE_OFFSET: NAIVE_EPOCH}
+
+
+def offset_epoch(offset: int) -> dt_datetime:
+    result = OFFSET_EPOCHS.get(offset)
+    if result is None:
+        result = OFFSET_EPOCHS.setdefault(offset, UTC_EPOCH.astimezone(timezone(timedelta(seconds=offset))))
+    return result
+
+
+def encode_moment(value: dt_datetime) -> tuple[int, int]:
+    """Datetime as epoch milliseconds and UTC offset in seconds (NAIVE_OFFSET for naive datetime)"""
+    utc_offset = value.utcoffset()
+    if utc_offset is None:
+        return (value - NAIVE_EPOCH) // ONE_MILLISECOND, NAIVE_OFFSET
+    return (value - UTC_EPOCH) // ONE_MILLISECOND, int(utc_offset.total_seconds())
+
+
+def decode_moment(millis: int, offset: int) -> dt_datetime:
+    # fixed offset timezone is kept on addition, so datetime is not converted
+    return (OFFSET_EPOCHS.get(offset) or offset_epoch(offset)) + timedelta(milliseconds=millis)
+
+
+class StringsInterning:
+    """Strings of record interned by index (well-known strings are not stored in record)"""
+
+    def __init__(self):
+        self.strings: list[str] = list()
+        self.__indexes: dict[str, int] = {value: index for index, value in enumerate(WELL_KNOWN_STRINGS)}
+
+    def index(self, value: Optional[str]) -> int:
+        if value is None:
+            return NO_STRING
+        result = self.__indexes.get(value)
+        if result is None:
+            result = self.__indexes[value] = len(WELL_KNOWN_STRINGS) + len(self.strings)
+            self.strings.append(value)
+        return result
+
+    def pack(self) -> bytes:
+        return b''.join(STRING_LENGTH_STRUCT.pack(len(data)) + data for data in (x.encode() for x in self.strings))
+
+
+def unpack_strings(data: bytes, position: int, count: int) -> tuple[list[str], int]:
+    """Interned strings of record (with well-known strings ahead) and position after strings"""
+    result = list(WELL_KNOWN_STRINGS)
+    for _ in range(count):
+        (length,) = STRING_LENGTH_STRUCT.unpack_from(data, position)
+        position += STRING_LENGTH_STRUCT.size
+        result.append(data[position : position + length].decode())
+        position += length
+    return result, position
+
+
+set_attribute = object.__setattr__  # attributes of models are set bypassing validation
+
+
+def construct_model(model_type: Type[M], values: dict[str, Any]) -> M:
+    """Model from complete values of field types without validation: the same as model_construct without
+    processing of defaults and aliases (several times faster for small models)
+    """
+    result = model_type.__new__(model_type)
+    set_attribute(result, '__dict__', values)
+    set_attribute(result, '__pydantic_fields_set__', set(values))
+    set_attribute(result, '__pydantic_extra__', None)
+    set_attribute(result, '__pydantic_private__', None)
+    return result
+
+
+def check_version(version: int, expected_version: int = BINARY_CODEC_VERSION):
+    if version != expected_version:
+        raise ValueError(f'Unknown version of binary record: {version}')
+
+
+def addresses_struct(count: int) -> Struct:
+    return Struct(f'<{count}I')
+
+
+def encode_history_record(value: AddressHistoryRecord) -> str:
+    strings = StringsInterning()
+    items = b''.join(
+        HISTORY_ITEM_STRUCT.pack(
+            *encode_moment(x.action_time),
+            ACTION_CODES[x.action_type],
+            strings.index(x.source),
+            strings.index(x.address_category),
+            strings.index(x.address_group),
+        )
+        for x in value.history_records
+    )
+    header = HISTORY_HEADER_STRUCT.pack(
+        BINARY_CODEC_VERSION,
+        int(value.address),
+        *encode_moment(value.last_update_time),
+        len(strings.strings),
+        len(value.history_records),
+    )
+    return BINARY_RECORD_PREFIX + b64encode(header + strings.pack() + items).decode('ascii')
+
+
+def decode_history_record(value: str) -> AddressHistoryRecord:
+    """Decode binary history record (models are constructed without validation, see construct_model)"""
+    data = b64decode(value[len(BINARY_RECORD_PREFIX) :])
+    version, address, update_millis, update_offset, strings_count, items_count = HISTORY_HEADER_STRUCT.unpack_from(data)
+    check_version(version)
+    strings, position = unpack_strings(data, HISTORY_HEADER_STRUCT.size, strings_count)
+    history_records: list[HistoryRecordInfo] = list()
+    for millis, offset, action_code, source, category, group in HISTORY_ITEM_STRUCT.iter_unpack(
+        data[position : position + items_count * HISTORY_ITEM_STRUCT.size]
+    ):
+        history_records.append(
+            construct_model(
+                HistoryRecordInfo,
+                {
+                    'source': strings[source],
+                    'action_time': decode_moment(millis, offset),
+                    'action_type': ACTION_TYPES[action_code],
+                    'address_category': None if category == NO_STRING else strings[category],
+                    'address_group': None if group == NO_STRING else strings[group],
+                },
+            )
+        )
+    return construct_model(
+        AddressHistoryRecord,
+        {
+            'last_update_time': decode_moment(update_millis, update_offset),
+            'history_records': history_records,
+            'address': IPv4Address(address),
+        },
+    )
+
+
+def is_binary_history_record(value: str) -> bool:
+    return value.startswith(BINARY_RECORD_PREFIX)
+
+
+def encode_usage_record(value: StreamUsageRecord) -> str:
+    strings = StringsInterning()
+    category = strings.index(value.address_category)
+    group = strings.index(value.address_group)
+    source = strings.index(value.source_agent)
+    addresses = [int(x) for x in value.addresses]
+    header = USAGE_HEADER_STRUCT.pack(
+        USAGE_CODEC_VERSION,
+        ACTION_CODES[value.action_type],
+        *encode_moment(value.action_time),
+        len(strings.strings),
+        category,
+        group,
+        source,
+        len(addresses),
+    )
+    return b64encode(header + strings.pack() + addresses_struct(len(addresses)).pack(*addresses)).decode('ascii')
+
+
+def decode_usage_record(value: str) -> StreamUsageRecord:
+    """Decode binary usage record (model is constructed without validation, see construct_model)"""
+    data = b64decode(value)
+    if data[:1] == bytes((1,)):
+        _, action_code, millis, offset, strings_count, category, group, addresses_count = (
+            USAGE_HEADER_V1_STRUCT.unpack_from(data)
+        )
+        source, header_size = NO_STRING, USAGE_HEADER_V1_STRUCT.size
+    else:
+        version, action_code, millis, offset, strings_count, category, group, source, addresses_count = (
+            USAGE_HEADER_STRUCT.unpack_from(data)
+        )
+        check_version(version, USAGE_CODEC_VERSION)
+        header_size = USAGE_HEADER_STRUCT.size
+    strings, position = unpack_strings(data, header_size, strings_count)
+    return construct_model(
+        StreamUsageRecord,
+        {
+            'action_type': ACTION_TYPES[action_code],
+            'action_time': decode_moment(millis, offset),
+            'addresses': set(map(IPv4Address, addresses_struct(addresses_count).unpack_from(data, position))),
+            'address_category': None if category == NO_STRING else strings[category],
+            'address_group': None if group == NO_STRING else strings[group],
+            'source_agent': None if source == NO_STRING else strings[source],
+        },
+    )
@@ -1,11 +1,16 @@
 from ipaddress import IPv4Address
 from typing import Optional
+from typing import Type
 
+from src.core.settings import RECORD_ENCODING_BINARY
 from src.schemas.usage_schemas import ActionType
 from src.schemas.usage_schemas import StreamUsageRecord
 from src.utils.time_utils import decode_datetime
 from src.utils.time_utils import encode_datetime
 
+from .record_codecs import BINARY_RECORD_FIELD
+from .record_codecs import decode_usage_record
+from .record_codecs import encode_usage_record
 from .transformation import Transformation
 
 
@@ -23,16 +28,38 @@ class SURDictTransformation(Transformation[StreamUsageRecord, dict[str, str]]):
             }
             | ({'address_category': value.address_category} if value.address_category is not None else {})
             | ({'address_group': value.address_group} if value.address_group is not None else {})
+            | ({'source_agent': value.source_agent} if value.source_agent is not None else {})
         )
 
     @classmethod
     def transform_from_storage(cls, value: dict[str, str]) -> StreamUsageRecord:
+        binary_record = value.get(BINARY_RECORD_FIELD)
+        if binary_record is not None:
+            return decode_usage_record(binary_record)
         address_category: Optional[str] = value.get('address_category', None)
         address_group: Optional[str] = value.get('address_group', None)
         return StreamUsageRecord(
             action_type=ActionType(value['action_type']),
             action_time=decode_datetime(value['action_time']),
-            addresses=set(map(lambda x: IPv4Address(x), value['addresses'].split(':'))),
+            addresses=(
+                set(map(lambda x: IPv4Address(x), value['addresses'].split(':'))) if value['addresses'] else set()
+            ),
             address_category=address_category,
             address_group=address_group,
+            source_agent=value.get('source_agent', None),
         )
+
+
+class SURBinaryDictTransformation(SURDictTransformation):
+    """Transformation to compact binary record (records of both encodings are read)"""
+
+    @classmethod
+    def transform_to_storage(cls, value: StreamUsageRecord) -> dict[str, str]:
+        return {BINARY_RECORD_FIELD: encode_usage_record(value)}
+
+
+def usage_record_transformation(record_encoding: str) -> Type[Transformation[StreamUsageRecord, dict[str, str]]]:
+    """Transformation of usage records to stream entries in encoding of records"""
+    if record_encoding == RECORD_ENCODING_BINARY:
+        return SURBinaryDictTransformation
+    return SURDictTransformation
@@ -3,6 +3,11 @@
 from ipaddress import IPv4Address
 from typing import Optional
 
+from pydantic import BaseModel
+from pydantic import Field
+
+from src.core.settings import CHECK_MAX_ADDRESSES
+
 from .base_input_schema import BaseInputSchema
 
 IpV4AddressList = list[IPv4Address]
@@ -21,3 +26,37 @@ class AgentAddressesInfoWithGroup(AgentAddressesInfo):
     """Adopted information with addresses group included. If not specified - it is treated as default"""
 
     address_group: Optional[str] = None
+
+    def with_addresses(self, addresses: IpV4AddressList) -> 'AgentAddressesInfoWithGroup':
+        """The same agent information for other addresses (fields of derived schemas are dropped)"""
+        return AgentAddressesInfoWithGroup(
+            source_agent=self.source_agent,
+            action_time=self.action_time,
+            addresses=addresses,
+            address_group=self.address_group,
+        )
+
+
+class AgentAddressesAddInfo(AgentAddressesInfoWithGroup):
+    """Added addresses. With ttl_seconds addresses are removed after expiration, otherwise they are kept forever"""
+
+    ttl_seconds: Optional[int] = Field(default=None, gt=0)
+
+
+class AddressesCheckRequest(BaseModel):
+    """Addresses for check against banned and allowed groups and allowed networks"""
+
+    addresses: IpV4AddressList = Field(min_length=1, max_length=CHECK_MAX_ADDRESSES)
+
+
+class AddressCheckResult(BaseModel):
+    """Result of address check. Address is banned if it is in banned groups and is not allowed
+    (the same rule as for filtered blacklist download)
+    """
+
+    address: IPv4Address
+    banned: bool
+    allowed: bool
+    banned_groups: list[str]  # names of banned groups containing address
+    allowed_groups: list[str]  # names of allowed groups containing address
+    in_allowed_networks: bool  # address is in one of allowed networks
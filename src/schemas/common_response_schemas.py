@@ -11,3 +11,15 @@ class DeleteResponseSchema(BaseModel):
 
 class CountResponseSchema(BaseModel):
     count: int
+
+
+class RejectedLineSchema(BaseModel):
+    line: int
+    value: str
+
+
+class BulkResponseSchema(BaseModel):
+    received: int
+    changed: int
+    rejected: int
+    rejected_lines: list[RejectedLineSchema]
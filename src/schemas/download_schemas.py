@@ -0,0 +1,17 @@
+"""Schemas for downloads"""
+
+from typing import Optional
+
+from pydantic import BaseModel
+from pydantic import Field
+
+from .addresses_schemas import IpV4AddressList
+
+
+class BlacklistDelta(BaseModel):
+    """Changes of blacklist since cursor (usage stream record ID)"""
+
+    cursor: Optional[str] = None  # pass it as "since" value in next delta request
+    full_download_required: bool = False  # changes can't be calculated, use full download
+    added: IpV4AddressList = Field(default_factory=list)
+    removed: IpV4AddressList = Field(default_factory=list)
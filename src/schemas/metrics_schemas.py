@@ -0,0 +1,22 @@
+from pydantic import BaseModel
+
+
+class FlightMetrics(BaseModel):
+    calls: int
+    executions: int
+    coalesced: int
+    coalescing_ratio: float
+
+
+class CacheMetrics(BaseModel):
+    entries: int
+    size: int
+
+
+class DownloadMetrics(BaseModel):
+    blacklist_snapshots: FlightMetrics
+    blacklist_streams: FlightMetrics
+    whitelist_streams: FlightMetrics
+    snapshot_encodings: FlightMetrics
+    snapshot_cache: CacheMetrics
+    derived_sets_cache: CacheMetrics
@@ -35,6 +35,7 @@ class StreamUsageRecord(BaseModel):
     addresses: set[IPv4Address]
     address_category: Optional[str] = None
     address_group: Optional[str] = None
+    source_agent: Optional[str] = None  # agent of changes (history is derived from stream records with it set)
 
 
 class HistoryRecordInfo(BaseModel):
@@ -60,3 +61,15 @@ class HistoryAddressData(BaseModel):
 
 class AddressHistoryRecord(HistoryRecord, HistoryAddressData):
     pass
+
+
+class AddressHistoryRecordWithSeen(AddressHistoryRecord):
+    """History of address with the last moment of its re-reporting without changes (if it is recorded)"""
+
+    last_seen_time: Optional[dt_datetime] = None
+
+
+class AddressChangeRecord(HistoryAddressData):
+    """Address with the moment of its latest change (see index of last changes)"""
+
+    last_change_time: dt_datetime
@@ -1,15 +1,20 @@
 import json
+from asyncio import to_thread
 from typing import Any
 from typing import AsyncGenerator
 from typing import Awaitable
 from typing import Generic
+from typing import Mapping
 from typing import Optional
+from typing import Sequence
 from typing import Type
 from typing import TypeVar
 from typing import cast
 from uuid import UUID
 
+from src.core.settings import BATCH_SIZE
 from src.db.storages.redis_db import RedisAsyncio
+from src.utils.misc_utils import split_to_batches
 
 T = TypeVar('T')
 TypeT = Type[T]
@@ -17,6 +22,26 @@ TypeT = Type[T]
 JE = TypeVar('JE', bound=json.JSONEncoder)
 TypeJE = Type[JE]
 
+# Compare and set of hash fields (KEYS[1]): ARGV holds triples of field, expected value and new value. Values are
+# prefixed with "=" (empty string for absent expected value and for deletion of field). Every field is compared and
+# replaced atomically, returns fields which were replaced
+REPLACE_FIELDS_SCRIPT = '''
+local applied = {}
+for i = 1, #ARGV, 3 do
+    local current = redis.call('HGET', KEYS[1], ARGV[i])
+    local expected = ARGV[i + 1]
+    if (current == false and expected == '') or (current ~= false and expected == '=' .. current) then
+        if ARGV[i + 2] == '' then
+            redis.call('HDEL', KEYS[1], ARGV[i])
+        else
+            redis.call('HSET', KEYS[1], ARGV[i], string.sub(ARGV[i + 2], 2))
+        end
+        applied[#applied + 1] = ARGV[i]
+    end
+end
+return applied
+'''
+
 
 class AbstractHkeyDBService(Generic[T, JE]):
     set_id: UUID
@@ -26,18 +51,83 @@ class AbstractHkeyDBService(Generic[T, JE]):
     def __init__(self, db: RedisAsyncio, set_id: Optional[UUID] = None):
         self.db: RedisAsyncio = db
         self.set_id: UUID = set_id if set_id is not None else self.set_id
+        self.__replace_fields_script = db.register_script(REPLACE_FIELDS_SCRIPT)
+
+    def serialize(self, data: T) -> str:
+        return json.dumps(data, cls=self.json_encoder)
+
+    def deserialize(self, data: str) -> T:
+        return self.service_type(**json.loads(data))
 
     async def write_record(self, record_id: str, data: T) -> int:
-        return await cast(
-            Awaitable[Any], self.db.hset(str(self.set_id), record_id, json.dumps(data, cls=self.json_encoder))
-        )
+        return await cast(Awaitable[Any], self.db.hset(str(self.set_id), record_id, self.serialize(data)))
 
     async def read_record(self, record_id: str) -> Optional[T]:
         data: Optional[str] = await cast(Awaitable[Any], self.db.hget(str(self.set_id), record_id))
         if data is not None:
-            return self.service_type(**json.loads(data))
+            return self.deserialize(data)
         return None
 
+    async def read_raw_records(self, record_ids: Sequence[str]) -> list[Optional[str]]:
+        """Read serialized records with HMGET by batches of BATCH_SIZE keys (None for absent records)"""
+        result: list[Optional[str]] = list()
+        for batch in split_to_batches(list(record_ids), BATCH_SIZE):
+            result.extend(await cast(Awaitable[Any], self.db.hmget(str(self.set_id), list(batch))))
+        return result
+
+    async def read_records(self, record_ids: Sequence[str]) -> list[Optional[T]]:
+        """Read records with HMGET by batches of BATCH_SIZE keys (None for absent records, in order of keys)"""
+        return [None if x is None else self.deserialize(x) for x in await self.read_raw_records(record_ids)]
+
+    def deserialize_present(self, raw_records: list[Optional[str]]) -> list[T]:
+        return [self.deserialize(x) for x in raw_records if x is not None]
+
+    async def fetch_records_by_ids(
+        self, record_ids: Sequence[str], batch_size: int = BATCH_SIZE
+    ) -> AsyncGenerator[list[T], None]:
+        """Read records by batches with one HMGET per batch (absent records are skipped).
+        Batches are decoded in thread, so event loop is not blocked with parsing of large batches
+        """
+        for batch in split_to_batches(record_ids, batch_size):
+            raw_records = await self.read_raw_records(batch)
+            yield await to_thread(self.deserialize_present, raw_records)
+
+    async def write_records(self, records: dict[str, T]) -> int:
+        """Write records with HSET mapping by batches of BATCH_SIZE keys in one pipeline, returns count of new keys"""
+        if not records:
+            return 0
+        async with self.db.pipeline(transaction=False) as pipe:
+            for batch in split_to_batches(list(records.items()), BATCH_SIZE):
+                pipe.hset(
+                    str(self.set_id),
+                    mapping={key: self.serialize(data) for key, data in batch},
+                )
+            return sum(await pipe.execute())
+
+    async def scan_raw_records(self, cursor: int, count: int) -> tuple[int, dict[str, str]]:
+        """One HSCAN step from cursor: next cursor (0 after the last step) and serialized records"""
+        return await cast(Awaitable[Any], self.db.hscan(str(self.set_id), cursor, count=count))
+
+    async def replace_raw_records(
+        self, expected: Mapping[str, Optional[str]], records: dict[str, T], deleted: list[str]
+    ) -> list[str]:
+        """Rewrite and delete records if their serialized values are still equal to expected ones (None for absent
+        records). Every record is compared and replaced atomically (by batches of BATCH_SIZE records with redis
+        script), so records changed concurrently are skipped and the others are applied. Returns IDs of applied records
+        """
+        replaced_fields = [
+            *((key, '=' + self.serialize(data)) for key, data in records.items()),
+            *((key, '') for key in deleted),
+        ]
+        applied_ids: list[str] = list()
+        for batch in split_to_batches(replaced_fields, BATCH_SIZE):
+            args: list[str] = list()
+            for key, value in batch:
+                expected_value = expected[key]
+                args.extend((key, '' if expected_value is None else '=' + expected_value, value))
+            applied_ids.extend(await self.__replace_fields_script(keys=[str(self.set_id)], args=args))
+        return applied_ids
+
     async def delete_record(self, record_id: str) -> int:
         return await self.delete_records([record_id])
 
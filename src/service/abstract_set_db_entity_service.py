@@ -7,18 +7,9 @@ from uuid import UUID
 
 from src.core.settings import BATCH_SIZE
 from src.db.base_set_db_entity import ISetDbEntity
+from src.db.base_version_db import IVersionDb
 from src.schemas.abstract_types import T
-
-
-async def iter_over_records(iter_records: list[T]) -> AsyncGenerator[tuple[int, T], None]:
-    """Iterate over recordset"""
-    flush_counter = 0
-    board_value = BATCH_SIZE
-    for value in iter_records:
-        flush_counter += 1
-        yield board_value == flush_counter, value
-        if board_value == flush_counter:
-            flush_counter = 0
+from src.utils.misc_utils import split_to_batches
 
 
 class AbstractSetDBEntityService(Generic[T]):
@@ -26,9 +17,21 @@ class AbstractSetDBEntityService(Generic[T]):
 
     class_set_id: UUID
 
-    def __init__(self, db_entity: ISetDbEntity[UUID, T], set_id: Optional[UUID] = None):
+    def __init__(
+        self,
+        db_entity: ISetDbEntity[UUID, T],
+        set_id: Optional[UUID] = None,
+        version_db: Optional[IVersionDb[UUID]] = None,
+    ):
         self.__db_entity: ISetDbEntity[UUID, T] = db_entity
         self.__set_id: UUID = set_id if set_id is not None else self.class_set_id
+        self.__version_db: Optional[IVersionDb[UUID]] = version_db
+
+    async def bump_version(self, changed_records: int):
+        """Increment version of set if records were actually changed (and versions storage is set)"""
+        if changed_records > 0 and self.__version_db is not None:
+            version = await self.__version_db.bump(self.__set_id)
+            logging.debug('Set version changed to %d, set ID: %s', version, self.__set_id)
 
     async def fetch_records(self, records_count: int = 0, all_records: bool = True) -> AsyncGenerator[T, None]:
         """Generator function for fetching records"""
@@ -54,38 +57,41 @@ class AbstractSetDBEntityService(Generic[T]):
 
     async def write_records(self, records: list[T]) -> int:
         """Saving records to database
-        Split data into pieces and write these chunks to Redis DB
+        Split data into pieces and write these chunks to Redis DB (in pipelines, see ISetDbEntity.add_batches_to_set)
         """
-        saved_records = 0
-        records_to_add: list[T] = []
-        async for need_flush, record in iter_over_records(records):
-            records_to_add.append(record)
-            if need_flush:
-                iter_written = await self.__db_entity.add_to_set(self.__set_id, records_to_add)
-                saved_records += iter_written
-                records_to_add = []
-        if len(records_to_add):
-            iter_written = await self.__db_entity.add_to_set(self.__set_id, records_to_add)
-            saved_records += iter_written
+        saved_records = await self.__db_entity.add_batches_to_set(self.__set_id, split_to_batches(records, BATCH_SIZE))
         logging.debug('Actually wrote %d records to database', saved_records)
+        await self.bump_version(saved_records)
         return saved_records
 
     async def del_records(self, records: list[T]) -> int:
         """Delete records from database
         Split data into pieces and delete these chunks from Redis DB
+        (in pipelines, see ISetDbEntity.del_batches_from_set)
         """
-        deleted_records = 0
-        records_to_delete: list[T] = []
-        async for need_flush, record in iter_over_records(records):
-            records_to_delete.append(record)
-            if need_flush:
-                iter_deleted = await self.__db_entity.del_from_set(self.__set_id, records_to_delete)
-                deleted_records += iter_deleted
-                records_to_delete = []
-        if len(records_to_delete):
-            iter_deleted = await self.__db_entity.del_from_set(self.__set_id, records_to_delete)
-            deleted_records += iter_deleted
+        deleted_records = await self.__db_entity.del_batches_from_set(
+            self.__set_id, split_to_batches(records, BATCH_SIZE)
+        )
         logging.debug('Total deleted %d records from database', deleted_records)
+        await self.bump_version(deleted_records)
+        return deleted_records
+
+    async def write_changed_records(self, records: list[T]) -> list[T]:
+        """Saving records to database, return records which were actually added (without duplicates)"""
+        unique_records = list(dict.fromkeys(records))
+        added_flags = await self.__db_entity.add_to_set_changed(self.__set_id, unique_records)
+        added_records = [record for record, added in zip(unique_records, added_flags) if added]
+        logging.debug('Actually wrote %d records to database', len(added_records))
+        await self.bump_version(len(added_records))
+        return added_records
+
+    async def del_changed_records(self, records: list[T]) -> list[T]:
+        """Delete records from database, return records which were actually deleted (without duplicates)"""
+        unique_records = list(dict.fromkeys(records))
+        deleted_flags = await self.__db_entity.del_from_set_changed(self.__set_id, unique_records)
+        deleted_records = [record for record, deleted in zip(unique_records, deleted_flags) if deleted]
+        logging.debug('Total deleted %d records from database', len(deleted_records))
+        await self.bump_version(len(deleted_records))
         return deleted_records
 
     async def count(self) -> int:
@@ -0,0 +1,82 @@
+# Checks of addresses against banned and allowed groups and allowed networks
+import logging
+from ipaddress import IPv4Address
+from typing import Sequence
+
+from src.core.config import app_settings
+from src.schemas.addresses_schemas import AddressCheckResult
+from src.utils.cache_utils import SizeLimitedLRUCache
+from src.utils.cache_utils import TTLLRUCache
+from src.utils.single_flight_utils import SingleFlight
+
+from .check_sources_service import CHECK_SOURCES_VERSIONED_IDS
+from .check_sources_service import CheckSources
+from .check_sources_service import compose_check_result
+from .check_sources_service import load_check_sources
+from .membership_index_service import membership_index
+from .service_db_factories import ServiceAdapters
+
+# the latest check sources (with versions of groups hashes and allowed networks set as a key)
+check_sources_cache = SizeLimitedLRUCache[tuple[int, ...], CheckSources](1, lambda _: 1)
+check_sources_flights = SingleFlight[tuple[int, ...], CheckSources]()
+# results of checks for hot addresses (with address as integer as a key), changes are visible after TTL expiration
+address_check_cache = TTLLRUCache[int, AddressCheckResult](
+    app_settings.check_cache_max_entries, app_settings.check_cache_ttl_seconds
+)
+
+
+class AddressCheckService:
+    def __init__(self, service_adapter_obj: ServiceAdapters):
+        self.__service_adapter_obj: ServiceAdapters = service_adapter_obj
+
+    async def load_sources(self) -> CheckSources:
+        return await load_check_sources(self.__service_adapter_obj)
+
+    async def get_sources(self) -> CheckSources:
+        """Get groups and compiled allowed networks. They are reloaded only after changes of groups or networks
+        (concurrent requests await the same loading)
+        """
+        versions = tuple(await self.__service_adapter_obj.version_db.versions(CHECK_SOURCES_VERSIONED_IDS))
+        sources = check_sources_cache.get(versions)
+        if sources is None:
+            sources = await check_sources_flights.do(versions, self.load_sources)
+            check_sources_cache.put(versions, sources)
+        return sources
+
+    async def check_addresses(self, addresses: Sequence[int]) -> list[AddressCheckResult]:
+        """Check addresses (as integers) in all groups: one bulk membership check per group set"""
+        sources = await self.get_sources()
+        memberships = await self.__service_adapter_obj.address_int_set_db_entity.contains_in_sets(
+            sources.group_set_ids(), addresses
+        )
+        banned_count = len(sources.banned_groups)
+        return [
+            compose_check_result(
+                address,
+                sources,
+                [group_memberships[position] for group_memberships in memberships[:banned_count]],
+                [group_memberships[position] for group_memberships in memberships[banned_count:]],
+            )
+            for position, address in enumerate(addresses)
+        ]
+
+    async def check(self, addresses: Sequence[IPv4Address]) -> list[AddressCheckResult]:
+        """Check addresses, results are returned in order of addresses. With membership index enabled addresses are
+        checked in process without storage. Otherwise hot addresses are answered from cache
+        """
+        if app_settings.membership_index_enabled and membership_index.ready:
+            return membership_index.check(list(map(int, addresses)))
+        results: dict[int, AddressCheckResult] = dict()
+        missed: list[int] = list()
+        for address in dict.fromkeys(map(int, addresses)):
+            cached_result = address_check_cache.get(address)
+            if cached_result is None:
+                missed.append(address)
+            else:
+                results[address] = cached_result
+        logging.debug('Checking addresses, requested: %d, not cached: %d', len(addresses), len(missed))
+        if missed:
+            for result in await self.check_addresses(missed):
+                address_check_cache.put(int(result.address), result)
+                results[int(result.address)] = result
+        return [results[int(address)] for address in addresses]
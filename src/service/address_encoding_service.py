@@ -0,0 +1,40 @@
+# Encoding of addresses in sets is switched offline: sets operations (SREM, SISMEMBER, SDIFFSTORE, SUNIONSTORE)
+# compare stored members as is, so sets must not hold addresses in both encodings while application is running
+import logging
+from typing import Optional
+
+from redis.asyncio import Redis as RedisAsyncio
+
+from src.core.config import app_settings
+from src.core.settings import ADDRESS_ENCODING_CONVERSION
+from src.core.settings import ADDRESS_ENCODING_ID
+from src.core.settings import ADDRESS_ENCODING_TEXT
+
+
+class AddressEncodingError(Exception):
+    pass
+
+
+def address_encoding_error(stored_encoding: Optional[str], address_encoding: str) -> Optional[str]:
+    """Reason why application with address encoding could not work with sets in stored encoding (None if it could).
+    Sets written before encodings were introduced (no stored encoding) are in text encoding
+    """
+    if stored_encoding == ADDRESS_ENCODING_CONVERSION:
+        return 'conversion of addresses encoding is in progress (or has failed), run migrate address_encoding'
+    if (stored_encoding or ADDRESS_ENCODING_TEXT) != address_encoding:
+        return (
+            f'addresses are stored in {stored_encoding or ADDRESS_ENCODING_TEXT} encoding, {address_encoding} '
+            'encoding is set, stop all instances and run migrate address_encoding'
+        )
+    return None
+
+
+async def check_address_encoding(redis_client_obj: RedisAsyncio, address_encoding: str = app_settings.address_encoding):
+    """Check on application startup that addresses in sets are stored in encoding set in application settings"""
+    stored_encoding: Optional[str] = await redis_client_obj.get(str(ADDRESS_ENCODING_ID))
+    error = address_encoding_error(stored_encoding, address_encoding)
+    if error is not None:
+        logging.error('Application could not be started: %s', error)
+        raise AddressEncodingError(error)
+    if stored_encoding is None:
+        await redis_client_obj.set(str(ADDRESS_ENCODING_ID), address_encoding, nx=True)
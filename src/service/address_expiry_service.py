@@ -0,0 +1,96 @@
+# Expiration of addresses added with TTL (expiry indexes of addresses sets and removal of expired addresses)
+import logging
+from ipaddress import IPv4Address
+from time import time
+from typing import Awaitable
+from typing import Callable
+from typing import Iterable
+from typing import Optional
+from uuid import UUID
+from uuid import uuid5
+
+from src.core.settings import ADDRESS_EXPIRY_NAMESPACE
+from src.core.settings import BATCH_SIZE
+from src.db.base_expiry_db import IExpiryDb
+from src.schemas.set_group_schemas import GroupSet
+
+from .service_db_factories import ADDRESS_CATEGORIES_GROUPS
+from .service_db_factories import ServiceAdapters
+from .service_db_factories import any_addresses_db_service_factory
+from .service_db_factories import groups_db_service_factory
+
+
+def expiry_set_id(set_id: UUID) -> UUID:
+    """ID of expiry index of addresses set"""
+    return uuid5(ADDRESS_EXPIRY_NAMESPACE, str(set_id))
+
+
+class AddressExpiryService:
+    """Expiration moments of addresses of one set. Addresses added without TTL are removed from expiry index,
+    so they are never expired. Expiration is set before addresses are added to set (see IExpiryDb)
+    """
+
+    def __init__(self, expiry_db: IExpiryDb[UUID, IPv4Address], set_id: UUID):
+        self.__expiry_db = expiry_db
+        self.__expiry_set_id = expiry_set_id(set_id)
+
+    async def set_ttl(self, addresses: Iterable[IPv4Address], ttl_seconds: Optional[int]):
+        """Set expiration of added addresses (or make them permanent if TTL is not passed)"""
+        if ttl_seconds is None:
+            await self.persist(addresses)
+        else:
+            await self.__expiry_db.set_expiry(self.__expiry_set_id, addresses, time() + ttl_seconds)
+
+    async def persist(self, addresses: Iterable[IPv4Address]):
+        """Remove addresses from expiry index (on additions without TTL and on deletions). Addresses are not iterated
+        when index is empty (TTL is not used for set)
+        """
+        if await self.__expiry_db.count(self.__expiry_set_id) > 0:
+            await self.__expiry_db.clear_expiry(self.__expiry_set_id, addresses)
+
+
+# callback for removed expired addresses: address category, group and removed addresses
+ExpiredCallback = Callable[[str, GroupSet, list[IPv4Address]], Awaitable[None]]
+
+
+class AddressExpiryReaper:
+    """Remove expired addresses from sets of all groups by batches of BATCH_SIZE addresses (together with removal from
+    expiry index). Actually removed addresses are passed to on_expired callback (for usage and history records)
+    """
+
+    def __init__(self, service_adapter_obj: ServiceAdapters, on_expired: Optional[ExpiredCallback] = None):
+        assert service_adapter_obj.expiry_db is not None, 'Expected expiry index adapter'
+        self.__service_adapter_obj = service_adapter_obj
+        self.__expiry_db: IExpiryDb[UUID, IPv4Address] = service_adapter_obj.expiry_db
+        self.__on_expired = on_expired
+
+    async def reap_group(self, address_category: str, group: GroupSet, moment: float) -> int:
+        addresses_service = any_addresses_db_service_factory(
+            group.group_set_id, self.__service_adapter_obj.address_set_db_entity, self.__service_adapter_obj.version_db
+        )
+        removed_count = 0
+        while True:
+            expired = await self.__expiry_db.pop_expired(
+                expiry_set_id(group.group_set_id), group.group_set_id, moment, BATCH_SIZE
+            )
+            if not expired:
+                return removed_count
+            removed = [address for address, removed_flag in expired if removed_flag]
+            removed_count += len(removed)
+            await addresses_service.bump_version(len(removed))
+            if removed and self.__on_expired is not None:
+                await self.__on_expired(address_category, group, removed)
+
+    async def reap(self, moment: Optional[float] = None) -> int:
+        """Remove addresses expired at moment (current time by default), return count of removed addresses"""
+        moment = time() if moment is None else moment
+        removed_count = 0
+        for address_category, group_name in ADDRESS_CATEGORIES_GROUPS:
+            groups = await groups_db_service_factory(
+                group_name, self.__service_adapter_obj.hash_db_service, self.__service_adapter_obj.version_db
+            ).list_groups()
+            for group in groups:
+                removed_count += await self.reap_group(address_category, group, moment)
+        if removed_count:
+            logging.info('Removed expired addresses, count: %d', removed_count)
+        return removed_count
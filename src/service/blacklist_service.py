@@ -1,25 +1,84 @@
 import logging
+import re
+from array import array
 from asyncio import sleep as a_sleep
+from asyncio import to_thread
+from dataclasses import dataclass
+from dataclasses import field
+from datetime import datetime as dt_datetime
+from hashlib import sha1
 from ipaddress import IPv4Address
 from ipaddress import IPv4Network
 from typing import AsyncGenerator
+from typing import Optional
+from typing import cast
 from uuid import UUID
 
 from fastapi import status
 
-from src.core.settings import ALLOWED_NETWORKS_CACHE_SIZE
+from src.core.settings import ALLOWED_ADDRESSES_CATEGORY_NAME
+from src.core.settings import ALLOWED_ADDRESSES_GROUPS_HASH_ID
+from src.core.settings import ALLOWED_NETWORKS_CATEGORY_NAME
+from src.core.settings import ALLOWED_NETWORKS_SET_ID
+from src.core.settings import ARRAY_ENGINE_MIN_RECORDS
+from src.core.settings import BANNED_ADDRESSES_CATEGORY_NAME
+from src.core.settings import BANNED_ADDRESSES_GROUPS_HASH_ID
+from src.core.settings import BATCH_SIZE
+from src.core.settings import DELTA_MAX_ADDRESSES
+from src.core.settings import STREAM_ID_MASK
+from src.db.base_stream_db import StreamBounds
+from src.schemas.download_schemas import BlacklistDelta
 from src.utils.address_list_utils import AddressListServiceError
 from src.utils.address_list_utils import retrieve_sets_from_params
+from src.utils.ip_array_utils import ADDRESS_BITS
+from src.utils.ip_array_utils import addresses_array
+from src.utils.ip_array_utils import aggregate_addresses
+from src.utils.ip_array_utils import filter_addresses
+from src.utils.ip_array_utils import render_addresses
+from src.utils.ip_array_utils import render_networks
+from src.utils.ip_utils import IPv4NetworksMatcher
+from src.utils.ip_utils import merge_intervals
+from src.utils.ip_utils import merge_networks_to_intervals
+from src.utils.misc_utils import split_to_batches
+from src.utils.time_utils import get_epoch_time
+from src.utils.time_utils import parse_stream_id
 
 from .abstract_set_db_entity_service import AbstractSetDBEntityService
+from .derived_sets_cache_service import SetsTeardown
+from .derived_sets_cache_service import prepare_diff_set
+from .derived_sets_cache_service import prepare_union_set
 from .networks_db_service import AllowedNetworksSetDBEntityService
 from .service_db_factories import ServiceAdapters
+from .usage_stream_service import UsageStreamReadService
+
+DELTA_ADDRESS_CATEGORIES = (BANNED_ADDRESSES_CATEGORY_NAME, ALLOWED_ADDRESSES_CATEGORY_NAME)
 
 
 class BlackListServiceError(AddressListServiceError):
     pass
 
 
+@dataclass(frozen=True)
+class BlacklistQuery:
+    """Normalized parameters of blacklist download"""
+
+    banned_group_sets: tuple[UUID, ...]
+    allowed_group_sets: tuple[UUID, ...]
+    filter_records: bool
+    records_count: int
+    aggregate_prefix: Optional[int] = None
+
+
+@dataclass
+class BlacklistSource:
+    """Prepared data for blacklist download: set of banned addresses with data for filtering of it"""
+
+    banned_set_id: UUID
+    allowed_addresses: set[IPv4Address] = field(default_factory=set)
+    allowed_networks: set[IPv4Network] = field(default_factory=set)
+    use_array_engine: bool = False
+
+
 class BlacklistService:
     def __init__(self, service_adapter_obj: ServiceAdapters):
         self.__service_adapter_obj: ServiceAdapters = service_adapter_obj
@@ -27,7 +86,10 @@ class BlacklistService:
     async def retrieve_sets_from_params(self, groups_category_name: str, groups_in_param_query: str) -> list[UUID]:
         try:
             return await retrieve_sets_from_params(
-                self.__service_adapter_obj.hash_db_service, groups_category_name, groups_in_param_query
+                self.__service_adapter_obj.hash_db_service,
+                groups_category_name,
+                groups_in_param_query,
+                self.__service_adapter_obj.version_db,
             )
         except ValueError as e:
             # catch data validation errors here
@@ -36,6 +98,58 @@ class BlacklistService:
                 status=status.HTTP_400_BAD_REQUEST,
             ) from None
 
+    async def prepare_set(self, group_sets: list[UUID], teardown: SetsTeardown) -> UUID:
+        """Get set ID for processing of group sets. For several sets union set is used (see prepare_union_set)"""
+        return await prepare_union_set(self.__service_adapter_obj, group_sets, teardown)
+
+    async def prepare_filtered_set(
+        self, banned_group_sets: list[UUID], allowed_group_sets: list[UUID], teardown: SetsTeardown
+    ) -> UUID:
+        """Get set ID of banned addresses without allowed addresses. Union of banned sets and subtraction of allowed
+        sets are performed in storage (see prepare_diff_set)
+        """
+        return await prepare_diff_set(self.__service_adapter_obj, banned_group_sets, allowed_group_sets, teardown)
+
+    async def prepare_download(self, query: BlacklistQuery, teardown: SetsTeardown) -> BlacklistSource:
+        """Prepare sets for blacklist download. Allowed addresses are subtracted in storage, they are read only
+        for lossy aggregation (for checking of widened networks)
+        """
+        banned_group_sets, allowed_group_sets = list(query.banned_group_sets), list(query.allowed_group_sets)
+        if not query.filter_records:
+            source = BlacklistSource(await self.prepare_set(banned_group_sets, teardown))
+        elif query.aggregate_prefix is not None and query.aggregate_prefix < ADDRESS_BITS:
+            source = BlacklistSource(await self.prepare_set(banned_group_sets, teardown))
+            allowed_set_id = await self.prepare_set(allowed_group_sets, teardown)
+            source.allowed_addresses, source.allowed_networks = await self.retrieve_exclude_data(allowed_set_id)
+        else:
+            source = BlacklistSource(await self.prepare_filtered_set(banned_group_sets, allowed_group_sets, teardown))
+            source.allowed_networks = await self.retrieve_allowed_networks()
+        # large sets are processed with array engine
+        source.use_array_engine = await self.use_array_engine(source.banned_set_id)
+        logging.debug('Use array engine for blacklist query: %s', source.use_array_engine)
+        return source
+
+    async def snapshot_etag(
+        self,
+        banned_group_sets: list[UUID],
+        allowed_group_sets: list[UUID],
+        filter_records: bool,
+        records_count: int,
+        aggregate_prefix: Optional[int] = None,
+    ) -> str:
+        """Strong ETag of download. It is calculated from versions of source sets and groups (without reading sets)"""
+        versioned_ids: list[UUID] = [BANNED_ADDRESSES_GROUPS_HASH_ID, *sorted(banned_group_sets)]
+        if filter_records:
+            versioned_ids.extend(
+                [ALLOWED_ADDRESSES_GROUPS_HASH_ID, ALLOWED_NETWORKS_SET_ID, *sorted(allowed_group_sets)]
+            )
+        versions = await self.__service_adapter_obj.version_db.versions(versioned_ids)
+        version_key = ';'.join(f'{set_id}={version}' for set_id, version in zip(versioned_ids, versions))
+        version_key += f';filter_records={filter_records};records_count={records_count}'
+        if aggregate_prefix is not None:
+            version_key += f';aggregate_prefix={aggregate_prefix}'
+        return '"{}"'.format(sha1(version_key.encode()).hexdigest())
+
     async def retrieve_exclude_data(self, allowed_set_id: UUID) -> tuple[set[IPv4Address], set[IPv4Network]]:
         # fill data with allowed addresses
         allowed_addresses_service_obj = AbstractSetDBEntityService[IPv4Address](
@@ -44,33 +158,16 @@ class BlacklistService:
         allowed_addresses_set: set[IPv4Address] = set()
         async for allowed_address in allowed_addresses_service_obj.fetch_records():
             allowed_addresses_set.add(allowed_address)
-        # fill data with allowed networks
+        return allowed_addresses_set, await self.retrieve_allowed_networks()
+
+    async def retrieve_allowed_networks(self) -> set[IPv4Network]:
         allowed_networks_service_obj = AllowedNetworksSetDBEntityService(
             self.__service_adapter_obj.network_set_db_entity
         )
         allowed_networks_set: set[IPv4Network] = set()
         async for allowed_network in allowed_networks_service_obj.fetch_records():
             allowed_networks_set.add(allowed_network)
-
-        return allowed_addresses_set, allowed_networks_set
-
-    @staticmethod
-    async def optimize_allowed_networks(
-        allowed_networks: set[IPv4Network], allowed_addresses: set[IPv4Address]
-    ) -> list[IPv4Network]:
-        checked_allowed_networks: list[IPv4Network] = list()
-        for allowed_network in allowed_networks:
-            addresses_counter = 0
-            for allowed_address in allowed_network.hosts():
-                allowed_addresses.add(allowed_address)
-                addresses_counter += 1
-                if addresses_counter == ALLOWED_NETWORKS_CACHE_SIZE:
-                    break
-            if addresses_counter == ALLOWED_NETWORKS_CACHE_SIZE:
-                # we have more address elements in allowed network, so we need to perform checks
-                checked_allowed_networks.append(allowed_network)
-            await a_sleep(0)
-        return checked_allowed_networks
+        return allowed_networks_set
 
     async def get_banned_addresses(
         self,
@@ -79,24 +176,241 @@ class BlacklistService:
         allowed_networks: set[IPv4Network],
         stop_records_count: int,
     ) -> AsyncGenerator[str, None]:
-        allowed_addresses_local = allowed_addresses.copy()
-
         service_obj = AbstractSetDBEntityService(self.__service_adapter_obj.address_set_db_entity, banned_set_id)
         counter = 0
-        # some optimization for networks,
-        checked_allowed_networks: list[IPv4Network] = await self.optimize_allowed_networks(
-            allowed_networks, allowed_addresses_local
+        # allowed networks are compiled to sorted intervals once per request
+        allowed_networks_matcher = IPv4NetworksMatcher(allowed_networks)
+        logging.debug('Allowed networks intervals count %d', len(allowed_networks_matcher))
+        async for address_record in service_obj.fetch_records():
+            if address_record in allowed_addresses or address_record in allowed_networks_matcher:
+                continue
+            yield str(address_record) + '\n'
+            counter += 1
+            if counter >= stop_records_count > 0:
+                break
+
+    async def use_array_engine(self, banned_set_id: UUID) -> bool:
+        """Check whether banned set is large enough for processing with array engine"""
+        return await self.__service_adapter_obj.address_set_db_entity.count(banned_set_id) >= ARRAY_ENGINE_MIN_RECORDS
+
+    async def load_filtered_addresses(
+        self, banned_set_id: UUID, allowed_addresses: set[IPv4Address], allowed_networks: set[IPv4Network]
+    ) -> array:
+        """Load banned addresses as packed integers (without IPv4Address objects), sort and filter them in bulk
+        in separate thread
+        """
+        service_obj = AbstractSetDBEntityService[int](
+            self.__service_adapter_obj.address_int_set_db_entity, banned_set_id
         )
-        logging.debug('Allowed networks size %d', len(checked_allowed_networks))
+        banned_addresses = addresses_array()
         async for address_record in service_obj.fetch_records():
-            if address_record not in allowed_addresses_local:
-                address_is_in_allowed_network = False
-                for allowed_network in checked_allowed_networks:
-                    if address_record in allowed_network:
-                        address_is_in_allowed_network = True
-                        logging.debug('Found banned %s in allowed network %s', address_record, allowed_network)
-                if not address_is_in_allowed_network:
-                    yield str(address_record) + '\n'
-                    counter += 1
-                    if counter >= stop_records_count > 0:
-                        break
+            banned_addresses.append(address_record)
+        filtered_addresses = await to_thread(
+            filter_addresses,
+            banned_addresses,
+            set(map(int, allowed_addresses)),
+            merge_networks_to_intervals(allowed_networks),
+        )
+        logging.debug('Array engine filtered banned addresses, records count %d', len(filtered_addresses))
+        return filtered_addresses
+
+    async def get_banned_addresses_bulk(
+        self,
+        banned_set_id: UUID,
+        allowed_addresses: set[IPv4Address],
+        allowed_networks: set[IPv4Network],
+        stop_records_count: int,
+    ) -> AsyncGenerator[str, None]:
+        """Array engine for large sets. Produces the same records as get_banned_addresses (sorted by address).
+        Records are rendered by blocks of BATCH_SIZE addresses
+        """
+        filtered_addresses = await self.load_filtered_addresses(banned_set_id, allowed_addresses, allowed_networks)
+        if stop_records_count > 0:
+            filtered_addresses = filtered_addresses[:stop_records_count]
+        for position in range(0, len(filtered_addresses), BATCH_SIZE):
+            yield render_addresses(filtered_addresses[position : position + BATCH_SIZE])
+            await a_sleep(0)
+
+    async def get_banned_networks(
+        self,
+        banned_set_id: UUID,
+        allowed_addresses: set[IPv4Address],
+        allowed_networks: set[IPv4Network],
+        stop_records_count: int,
+        aggregate_prefix: int,
+    ) -> AsyncGenerator[str, None]:
+        """Banned addresses aggregated to the minimal list of networks (array engine is always used).
+        On lossy aggregation (aggregate_prefix < 32) networks with allowed addresses are not widened
+        """
+        filtered_addresses = await self.load_filtered_addresses(banned_set_id, allowed_addresses, allowed_networks)
+        excluded_intervals = merge_intervals(
+            [(address, address) for address in map(int, allowed_addresses)]
+            + merge_networks_to_intervals(allowed_networks)
+        )
+        networks = await to_thread(aggregate_addresses, filtered_addresses, aggregate_prefix, excluded_intervals)
+        del filtered_addresses
+        logging.debug('Banned addresses aggregated to %d networks', len(networks))
+        if stop_records_count > 0:
+            networks = networks[:stop_records_count]
+        for position in range(0, len(networks), BATCH_SIZE):
+            yield render_networks(networks[position : position + BATCH_SIZE])
+            await a_sleep(0)
+
+    def fetch_banned_addresses(
+        self,
+        banned_set_id: UUID,
+        allowed_addresses: set[IPv4Address],
+        allowed_networks: set[IPv4Network],
+        stop_records_count: int,
+        use_array_engine: bool,
+        aggregate_prefix: Optional[int] = None,
+    ) -> AsyncGenerator[str, None]:
+        """Get banned addresses with selected engine (or networks if aggregate_prefix is passed)"""
+        if aggregate_prefix is not None:
+            return self.get_banned_networks(
+                banned_set_id, allowed_addresses, allowed_networks, stop_records_count, aggregate_prefix
+            )
+        get_banned_addresses = self.get_banned_addresses_bulk if use_array_engine else self.get_banned_addresses
+        return get_banned_addresses(banned_set_id, allowed_addresses, allowed_networks, stop_records_count)
+
+    async def render_banned_addresses(
+        self,
+        banned_set_id: UUID,
+        allowed_addresses: set[IPv4Address],
+        allowed_networks: set[IPv4Network],
+        stop_records_count: int,
+        use_array_engine: bool,
+        aggregate_prefix: Optional[int] = None,
+    ) -> bytes:
+        """Render banned addresses at once (for caching)"""
+        parts = [
+            part
+            async for part in self.fetch_banned_addresses(
+                banned_set_id,
+                allowed_addresses,
+                allowed_networks,
+                stop_records_count,
+                use_array_engine,
+                aggregate_prefix,
+            )
+        ]
+        return ''.join(parts).encode()
+
+    @staticmethod
+    def parse_since(since: str) -> tuple[Optional[str], Optional[dt_datetime]]:
+        """Parse cursor of delta request: usage stream record ID or datetime in ISO format"""
+        if re.match(STREAM_ID_MASK, since):
+            return since, None
+        try:
+            return None, dt_datetime.fromisoformat(since)
+        except ValueError:
+            raise BlackListServiceError(
+                f'Wrong value for "since" parameter: {since}, expected stream ID or datetime',
+                status=status.HTTP_400_BAD_REQUEST,
+            ) from None
+
+    @staticmethod
+    def cursor_is_lost(since_key: tuple[int, int], bounds: StreamBounds[str], stream_cursor: bool = True) -> bool:
+        """Check whether records after cursor might be deleted from stream (or cursor is from another stream).
+        Cursor of stream (not a moment of time, stream_cursor unset) could not be after the last record of stream
+        """
+        if bounds.max_deleted_id is not None and parse_stream_id(bounds.max_deleted_id) >= since_key:
+            return True
+        return stream_cursor and bounds.last_id is not None and parse_stream_id(bounds.last_id) < since_key
+
+    @staticmethod
+    async def read_changed_addresses(
+        usage_read_service: UsageStreamReadService, since_id: Optional[str], since_time: Optional[dt_datetime]
+    ) -> tuple[Optional[str], Optional[set[IPv4Address]]]:
+        """Read addresses changed after cursor. Return ID of last read record and changed addresses.
+        If changes can't be expressed with addresses (allowed networks changed or too many addresses changed)
+        then None is returned instead of addresses
+        """
+        last_id: Optional[str] = None
+        changed_addresses: set[IPv4Address] = set()
+        async for record_id, record in usage_read_service.fetch_since(since_id, since_time):
+            last_id = record_id
+            if record.address_category == ALLOWED_NETWORKS_CATEGORY_NAME:
+                logging.debug('Allowed networks changed in usage record %s', record_id)
+                return last_id, None
+            if record.address_category in DELTA_ADDRESS_CATEGORIES:
+                changed_addresses |= record.addresses
+                if len(changed_addresses) > DELTA_MAX_ADDRESSES:
+                    return last_id, None
+        return last_id, changed_addresses
+
+    async def listed_addresses(
+        self,
+        addresses: list[IPv4Address],
+        banned_group_sets: list[UUID],
+        allowed_group_sets: list[UUID],
+        allowed_networks_matcher: Optional[IPv4NetworksMatcher],
+    ) -> list[bool]:
+        """Check whether addresses are in blacklist now (pass None as networks matcher for no filtering).
+        Addresses are checked in all sets at once by batches of BATCH_SIZE addresses
+        """
+        set_db_entity = self.__service_adapter_obj.address_set_db_entity
+        result: list[bool] = list()
+        for batch in split_to_batches(addresses, BATCH_SIZE):
+            banned_memberships = await set_db_entity.contains_in_sets(banned_group_sets, batch)
+            allowed_memberships: list[list[bool]] = list()
+            if allowed_networks_matcher is not None:
+                allowed_memberships = await set_db_entity.contains_in_sets(allowed_group_sets, batch)
+            for position, address in enumerate(batch):
+                if not any(memberships[position] for memberships in banned_memberships):
+                    result.append(False)
+                elif allowed_networks_matcher is None:
+                    result.append(True)
+                else:
+                    result.append(
+                        address not in allowed_networks_matcher
+                        and not any(memberships[position] for memberships in allowed_memberships)
+                    )
+        return result
+
+    async def get_delta(
+        self,
+        usage_read_service: UsageStreamReadService,
+        since: str,
+        banned_group_sets: list[UUID],
+        allowed_group_sets: list[UUID],
+        filter_records: bool,
+    ) -> BlacklistDelta:
+        """Get changes of blacklist since cursor.
+        Changed addresses are collected from usage stream, then every address is checked against current state
+        of blacklist: it is either added (is in blacklist now) or removed (is not in blacklist now)
+        """
+        since_id, since_time = self.parse_since(since)
+        since_key = (
+            parse_stream_id(since_id) if since_id is not None else (get_epoch_time(cast(dt_datetime, since_time)), 0)
+        )
+        # bounds are read before records, so cursor for full download points before any further changes
+        bounds = await usage_read_service.bounds()
+        if self.cursor_is_lost(since_key, bounds, since_id is not None):
+            logging.debug('Usage stream is trimmed past cursor %s, full download is required', since)
+            return BlacklistDelta(cursor=bounds.last_id, full_download_required=True)
+        last_id, changed_addresses = await self.read_changed_addresses(usage_read_service, since_id, since_time)
+        if changed_addresses is None:
+            return BlacklistDelta(cursor=last_id, full_download_required=True)
+        allowed_networks_matcher: Optional[IPv4NetworksMatcher] = None
+        if filter_records:
+            allowed_networks_matcher = IPv4NetworksMatcher(
+                [
+                    x
+                    async for x in AllowedNetworksSetDBEntityService(
+                        self.__service_adapter_obj.network_set_db_entity
+                    ).fetch_records()
+                ]
+            )
+        # moment after the last record gives empty delta with the last record as cursor
+        result = BlacklistDelta(cursor=last_id if last_id is not None else (since_id or bounds.last_id))
+        sorted_addresses = sorted(changed_addresses)
+        listed_flags = await self.listed_addresses(
+            sorted_addresses, banned_group_sets, allowed_group_sets, allowed_networks_matcher
+        )
+        for address, listed in zip(sorted_addresses, listed_flags):
+            if listed:
+                result.added.append(address)
+            else:
+                result.removed.append(address)
+        return result
@@ -0,0 +1,98 @@
+# Bulk import of addresses (request body is applied to set as it arrives)
+import logging
+from asyncio import Task
+from asyncio import create_task
+from datetime import datetime as dt_datetime
+from ipaddress import IPv4Address
+from typing import AsyncIterator
+from typing import Awaitable
+from typing import Callable
+from typing import Optional
+
+from src.core.settings import BULK_FLUSH_RECORDS
+from src.core.settings import BULK_MAX_REJECTED_LINES
+from src.schemas.base_input_schema import now_cur_tz
+from src.schemas.common_response_schemas import BulkResponseSchema
+from src.schemas.common_response_schemas import RejectedLineSchema
+from src.schemas.usage_schemas import ActionType
+from src.utils.bulk_parse_utils import parse_bulk_body
+
+from .abstract_set_db_entity_service import AbstractSetDBEntityService
+from .address_expiry_service import AddressExpiryService
+from .seen_addresses_service import SeenAddressesService
+
+
+class BulkAddressesService:
+    """Parse addresses from body chunks and apply them to set by portions of flush_records records.
+    Portion is written while next one is parsed. Actually changed addresses of portions are passed to on_apply
+    callback, added addresses already present in set are marked as re-seen with seen service (if it is passed).
+    Applied addresses are removed from expiry index with expiry service (bulk additions are permanent)
+    """
+
+    def __init__(
+        self,
+        addresses_service: AbstractSetDBEntityService[int],
+        action: ActionType,
+        on_apply: Optional[Callable[[list[int]], Awaitable[None]]] = None,
+        flush_records: int = BULK_FLUSH_RECORDS,
+        expiry_service: Optional[AddressExpiryService] = None,
+        seen_service: Optional[SeenAddressesService] = None,
+        seen_time: Optional[dt_datetime] = None,
+    ):
+        self.__addresses_service = addresses_service
+        self.__action = action
+        self.__on_apply = on_apply
+        self.__flush_records = flush_records
+        self.__expiry_service = expiry_service
+        self.__seen_service = seen_service
+        self.__seen_time = now_cur_tz() if seen_time is None else seen_time
+
+    async def apply(self, addresses: list[int]) -> int:
+        """Add addresses to set or remove them from set, return count of changed records"""
+        if self.__expiry_service is not None:
+            # expiration is cleared before addition, so added addresses are not removed by reaper
+            await self.__expiry_service.persist(map(IPv4Address, addresses))
+        if self.__action == ActionType.add_action:
+            changed_addresses = await self.__addresses_service.write_changed_records(addresses)
+            if self.__seen_service is not None:
+                reseen_addresses = set(addresses).difference(changed_addresses)
+                if reseen_addresses:
+                    await self.__seen_service.mark_seen(map(IPv4Address, reseen_addresses), self.__seen_time)
+        else:
+            changed_addresses = await self.__addresses_service.del_changed_records(addresses)
+        if changed_addresses and self.__on_apply is not None:
+            # only actually changed addresses are recorded in usage and history
+            await self.__on_apply(changed_addresses)
+        return len(changed_addresses)
+
+    async def process(self, chunks: AsyncIterator[bytes], body_format: str) -> BulkResponseSchema:
+        result = BulkResponseSchema(received=0, changed=0, rejected=0, rejected_lines=[])
+        addresses: list[int] = list()
+        pending_apply: Optional[Task[int]] = None
+        try:
+            async for piece in parse_bulk_body(chunks, body_format):
+                result.received += len(piece.addresses) + len(piece.rejected)
+                result.rejected += len(piece.rejected)
+                for line_number, line in piece.rejected[: BULK_MAX_REJECTED_LINES - len(result.rejected_lines)]:
+                    result.rejected_lines.append(RejectedLineSchema(line=line_number, value=line))
+                addresses.extend(piece.addresses)
+                if len(addresses) >= self.__flush_records:
+                    if pending_apply is not None:
+                        result.changed += await pending_apply
+                    pending_apply = create_task(self.apply(addresses))
+                    addresses = list()
+            if pending_apply is not None:
+                result.changed += await pending_apply
+            if addresses:
+                result.changed += await self.apply(addresses)
+        finally:
+            if pending_apply is not None and not pending_apply.done():
+                # body reading is interrupted, do not apply the rest of records
+                pending_apply.cancel()
+        logging.debug(
+            'Processed bulk addresses, received: %d, changed: %d, rejected: %d',
+            result.received,
+            result.changed,
+            result.rejected,
+        )
+        return result
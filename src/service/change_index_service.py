@@ -0,0 +1,116 @@
+# Index of last changes of addresses (sorted sets: address -> epoch seconds of the latest usage record)
+from array import array
+from asyncio import to_thread
+from datetime import datetime as dt_datetime
+from ipaddress import IPv4Address
+from typing import AsyncIterable
+from typing import Iterable
+from typing import Optional
+from uuid import UUID
+from uuid import uuid5
+
+from src.core.settings import BANNED_ADDRESSES_CATEGORY_NAME
+from src.core.settings import CUR_TZ
+from src.core.settings import LAST_CHANGE_NAMESPACE
+from src.core.settings import LAST_CHANGE_SET_ID
+from src.db.base_time_index_db import ITimeIndexDb
+from src.schemas.usage_schemas import AddressChangeRecord
+from src.schemas.usage_schemas import StreamUsageRecord
+from src.utils.ip_array_utils import addresses_array
+from src.utils.time_utils import parse_stream_id
+
+
+def change_index_set_id(address_category: Optional[str] = None, address_group: Optional[str] = None) -> UUID:
+    """ID of index of last changes: index of all addresses without category, otherwise index of category and group
+    (default group for None, usage records without category are blacklist records)
+    """
+    if address_category is None and address_group is None:
+        return LAST_CHANGE_SET_ID
+    return uuid5(LAST_CHANGE_NAMESPACE, f'{address_category or BANNED_ADDRESSES_CATEGORY_NAME}/{address_group or ""}')
+
+
+def record_moment(record_id: str) -> float:
+    """Moment of usage record (epoch seconds of record ID), the same moment is used for time ranges of stream"""
+    return parse_stream_id(record_id)[0] / 1000
+
+
+class AddressChangeIndexService:
+    """Moments of the latest usage records of addresses: one index for all addresses and (with by_group set) one
+    index per address category and group. Time windows are read by ranges of moments without reading of usage stream
+    """
+
+    def __init__(self, time_index_db: ITimeIndexDb[UUID, IPv4Address], by_group: bool = False):
+        self.__time_index_db = time_index_db
+        self.__by_group = by_group
+
+    @property
+    def by_group(self) -> bool:
+        return self.__by_group
+
+    async def record(self, record_id: str, record: StreamUsageRecord) -> int:
+        """Record change of addresses of usage record, return count of addresses new in index of all addresses"""
+        moment = record_moment(record_id)
+        if self.__by_group:
+            await self.__time_index_db.set_moments(
+                change_index_set_id(record.address_category or BANNED_ADDRESSES_CATEGORY_NAME, record.address_group),
+                record.addresses,
+                moment,
+            )
+        return await self.__time_index_db.set_moments(LAST_CHANGE_SET_ID, record.addresses, moment)
+
+    async def backfill(self, records: AsyncIterable[tuple[str, StreamUsageRecord]]) -> int:
+        """Record changes of already written usage records (later moments in index are kept)"""
+        added_count = 0
+        async for record_id, record in records:
+            added_count += await self.record(record_id, record)
+        return added_count
+
+    async def changes(
+        self,
+        start_time: Optional[dt_datetime],
+        end_time: Optional[dt_datetime],
+        offset: int = 0,
+        count: int = 0,
+        address_category: Optional[str] = None,
+        address_group: Optional[str] = None,
+    ) -> list[AddressChangeRecord]:
+        """Addresses with the latest change in time range (bounds included) in ascending order of change time"""
+        return [
+            AddressChangeRecord(address=address, last_change_time=dt_datetime.fromtimestamp(moment, tz=CUR_TZ))
+            for address, moment in await self.__time_index_db.values_in_range(
+                change_index_set_id(address_category, address_group),
+                None if start_time is None else start_time.timestamp(),
+                None if end_time is None else end_time.timestamp(),
+                offset,
+                count,
+            )
+        ]
+
+    async def not_changed_since(
+        self,
+        moment: dt_datetime,
+        offset: int = 0,
+        count: int = 0,
+        address_category: Optional[str] = None,
+        address_group: Optional[str] = None,
+    ) -> list[AddressChangeRecord]:
+        """Addresses without changes after moment (the longest untouched first)"""
+        return await self.changes(None, moment, offset, count, address_category, address_group)
+
+    async def changed_addresses_sorted(self, start_time: Optional[dt_datetime]) -> array:
+        """Addresses changed after start_time as sorted array of addresses (see ip_array_utils)"""
+        values = await self.__time_index_db.values_in_range(
+            LAST_CHANGE_SET_ID, None if start_time is None else start_time.timestamp(), None
+        )
+        return await to_thread(lambda: addresses_array(sorted(int(address) for address, _ in values)))
+
+    async def prune(self, record_id: str, address_groups: Iterable[tuple[str, Optional[str]]] = ()) -> int:
+        """Remove changes recorded before usage record (after records are trimmed from usage stream). Indexes of
+        passed address categories and groups (None for default group) are pruned with by_group set.
+        Return count of addresses removed from index of all addresses
+        """
+        moment = record_moment(record_id)
+        if self.__by_group:
+            for address_category, address_group in address_groups:
+                await self.__time_index_db.remove_before(change_index_set_id(address_category, address_group), moment)
+        return await self.__time_index_db.remove_before(LAST_CHANGE_SET_ID, moment)
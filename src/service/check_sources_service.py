@@ -0,0 +1,93 @@
+# Sources of address checks: groups lists and compiled allowed networks
+import logging
+from dataclasses import dataclass
+from dataclasses import field
+from ipaddress import IPv4Address
+from typing import Optional
+from uuid import UUID
+
+from src.core.settings import ALLOWED_ADDRESSES_CATEGORY_NAME
+from src.core.settings import ALLOWED_ADDRESSES_GROUP_NAME
+from src.core.settings import ALLOWED_ADDRESSES_GROUPS_HASH_ID
+from src.core.settings import ALLOWED_NETWORKS_SET_ID
+from src.core.settings import BANNED_ADDRESSES_CATEGORY_NAME
+from src.core.settings import BANNED_ADDRESSES_GROUP_NAME
+from src.core.settings import BANNED_ADDRESSES_GROUPS_HASH_ID
+from src.schemas.addresses_schemas import AddressCheckResult
+from src.schemas.set_group_schemas import GroupSet
+from src.utils.ip_utils import IPv4NetworksMatcher
+from src.utils.ip_utils import merge_networks_to_intervals
+
+from .networks_db_service import AllowedNetworksSetDBEntityService
+from .service_db_factories import ServiceAdapters
+from .service_db_factories import groups_db_service_factory
+
+# data sets with versions identifying check sources (groups lists and allowed networks)
+CHECK_SOURCES_VERSIONED_IDS = (
+    BANNED_ADDRESSES_GROUPS_HASH_ID,
+    ALLOWED_ADDRESSES_GROUPS_HASH_ID,
+    ALLOWED_NETWORKS_SET_ID,
+)
+
+
+@dataclass
+class CheckSources:
+    """Groups and compiled allowed networks for address checks"""
+
+    banned_groups: list[GroupSet]
+    allowed_groups: list[GroupSet]
+    allowed_networks_matcher: IPv4NetworksMatcher
+    # sorted non-overlapping intervals of allowed networks (bounds included)
+    allowed_network_intervals: list[tuple[int, int]] = field(default_factory=list)
+
+    def group_set_ids(self) -> list[UUID]:
+        """Set IDs of banned groups followed by set IDs of allowed groups"""
+        return [group.group_set_id for group in (*self.banned_groups, *self.allowed_groups)]
+
+    def group_set_id(self, address_category: Optional[str], group_name: Optional[str]) -> Optional[UUID]:
+        """Set ID of group by address category and group name (default group for None as in usage records)"""
+        if address_category == BANNED_ADDRESSES_CATEGORY_NAME:
+            groups = self.banned_groups
+        elif address_category == ALLOWED_ADDRESSES_CATEGORY_NAME:
+            groups = self.allowed_groups
+        else:
+            return None
+        for group in groups:
+            if group.default if group_name is None else group.group_name == group_name:
+                return group.group_set_id
+        return None
+
+
+async def load_check_sources(service_adapter_obj: ServiceAdapters) -> CheckSources:
+    # groups are read from storage: sources are loaded for versions of groups hashes (see CHECK_SOURCES_VERSIONED_IDS)
+    banned_groups = await groups_db_service_factory(
+        BANNED_ADDRESSES_GROUP_NAME, service_adapter_obj.hash_db_service
+    ).read_groups()
+    allowed_groups = await groups_db_service_factory(
+        ALLOWED_ADDRESSES_GROUP_NAME, service_adapter_obj.hash_db_service
+    ).read_groups()
+    allowed_networks = [
+        x async for x in AllowedNetworksSetDBEntityService(service_adapter_obj.network_set_db_entity).fetch_records()
+    ]
+    allowed_networks_matcher = IPv4NetworksMatcher(allowed_networks)
+    logging.debug('Loaded check sources, allowed networks intervals count %d', len(allowed_networks_matcher))
+    return CheckSources(
+        banned_groups, allowed_groups, allowed_networks_matcher, merge_networks_to_intervals(allowed_networks)
+    )
+
+
+def compose_check_result(
+    address: int, sources: CheckSources, banned_memberships: list[bool], allowed_memberships: list[bool]
+) -> AddressCheckResult:
+    banned_groups = [group.group_name for group, member in zip(sources.banned_groups, banned_memberships) if member]
+    allowed_groups = [group.group_name for group, member in zip(sources.allowed_groups, allowed_memberships) if member]
+    in_allowed_networks = sources.allowed_networks_matcher.contains_int(address)
+    allowed = bool(allowed_groups) or in_allowed_networks
+    return AddressCheckResult(
+        address=IPv4Address(address),
+        banned=bool(banned_groups) and not allowed,
+        allowed=allowed,
+        banned_groups=banned_groups,
+        allowed_groups=allowed_groups,
+        in_allowed_networks=in_allowed_networks,
+    )
@@ -0,0 +1,184 @@
+# Registry of derived sets (unions and differences of address sets) reused by requests
+import logging
+from asyncio import Lock
+from collections import OrderedDict
+from dataclasses import dataclass
+from dataclasses import field
+from typing import Awaitable
+from typing import Callable
+from uuid import UUID
+from uuid import uuid5
+
+from src.core.config import app_settings
+from src.core.settings import DERIVED_SETS_NAMESPACE
+from src.core.settings import SET_EXPIRE_SECONDS
+from src.db.base_set_db import ISetDb
+
+from .service_db_factories import ServiceAdapters
+
+
+@dataclass
+class SetsTeardown:
+    """Sets used while processing of request: temporarily sets are deleted, cached sets are released after it
+    (cached sets are shared by processes, they are deleted only when evicted and not referenced by any process)
+    """
+
+    deleted: list[UUID] = field(default_factory=list)
+    released: list[UUID] = field(default_factory=list)
+
+
+@dataclass
+class DerivedSetInfo:
+    records_count: int
+    references: int = 0
+
+
+class DerivedSetsCache:
+    """Registry of derived sets stored in storage.
+    Identity of derived set is composed from operation, identities and versions of source sets, so concurrent and
+    subsequent requests reuse the same set until any source set is changed (new versions produce new identity).
+    Sets in use are reference counted. Unused sets are evicted from registry (least recently used first) when total
+    records count of registered sets exceeds the limit. Registry works within one process while sets are shared by
+    all processes, so references are counted in storage as well: evicted set is deleted from storage unless another
+    process reads it (then it expires in SET_EXPIRE_SECONDS after the last use). Zero max_records disables caching
+    """
+
+    def __init__(self, max_records: int):
+        self.__max_records = max_records
+        self.__sets: OrderedDict[UUID, DerivedSetInfo] = OrderedDict()
+        self.__records_count = 0
+        self.__locks: dict[UUID, Lock] = dict()
+
+    @property
+    def enabled(self) -> bool:
+        return self.__max_records > 0
+
+    @property
+    def records_count(self) -> int:
+        return self.__records_count
+
+    def __len__(self) -> int:
+        return len(self.__sets)
+
+    @staticmethod
+    def derived_set_id(operation: str, set_ids: list[UUID], versions: list[int]) -> UUID:
+        return uuid5(
+            DERIVED_SETS_NAMESPACE,
+            operation + ':' + ';'.join(f'{set_id}={version}' for set_id, version in zip(set_ids, versions)),
+        )
+
+    async def acquire(
+        self, adapters: ServiceAdapters, derived_set_id: UUID, build: Callable[[UUID], Awaitable[None]]
+    ) -> list[UUID]:
+        """Take reference to derived set, build it in storage with passed routine if it is absent.
+        Return sets evicted from registry (unused ones are deleted from storage)
+        """
+        lock = self.__locks.setdefault(derived_set_id, Lock())
+        try:
+            async with lock:
+                # set could be built by another process or expired in storage, its TTL is renewed at once with check
+                # (reference in storage is taken before build, so set is not deleted by evictions of other processes)
+                if not await adapters.set_db.acquire_set(derived_set_id, SET_EXPIRE_SECONDS):
+                    try:
+                        await build(derived_set_id)
+                    except Exception:
+                        await adapters.set_db.release_set(derived_set_id)
+                        raise
+                    await adapters.set_db.set_ttl(derived_set_id, SET_EXPIRE_SECONDS)
+                    logging.debug('Built derived set, set ID: %s', derived_set_id)
+                set_info = self.__sets.get(derived_set_id)
+                if set_info is None:
+                    set_info = DerivedSetInfo(await adapters.address_set_db_entity.count(derived_set_id))
+                    self.__sets[derived_set_id] = set_info
+                    self.__records_count += set_info.records_count
+                self.__sets.move_to_end(derived_set_id)
+                set_info.references += 1
+        finally:
+            if not lock.locked():
+                self.__locks.pop(derived_set_id, None)
+        return await self.__evict(adapters.set_db)
+
+    async def release(self, set_db: ISetDb[UUID], derived_set_ids: list[UUID]) -> list[UUID]:
+        """Release references to derived sets. Return sets evicted from registry (unused ones are deleted from
+        storage)
+        """
+        for derived_set_id in derived_set_ids:
+            set_info = self.__sets.get(derived_set_id)
+            if set_info is not None and set_info.references > 0:
+                set_info.references -= 1
+            await set_db.release_set(derived_set_id)
+        return await self.__evict(set_db)
+
+    async def __evict(self, set_db: ISetDb[UUID]) -> list[UUID]:
+        evicted: list[UUID] = list()
+        for derived_set_id in list(self.__sets):
+            if self.__records_count <= self.__max_records:
+                break
+            set_info = self.__sets[derived_set_id]
+            if set_info.references == 0:
+                del self.__sets[derived_set_id]
+                self.__records_count -= set_info.records_count
+                evicted.append(derived_set_id)
+        if evicted:
+            logging.debug('Evicted derived sets: %s', evicted)
+        for derived_set_id in evicted:
+            if not await set_db.del_unused_set(derived_set_id):
+                logging.debug(
+                    'Evicted derived set is used by another process, left to expire, set ID: %s', derived_set_id
+                )
+        return evicted
+
+
+derived_sets_cache = DerivedSetsCache(app_settings.derived_sets_cache_max_records)
+
+
+async def prepare_union_set(adapters: ServiceAdapters, set_ids: list[UUID], teardown: SetsTeardown) -> UUID:
+    """Get set ID with union of sets. For one set no union is made.
+    Union is reused from cache of derived sets or temporarily union set is created (if cache is disabled)
+    """
+    assert len(set_ids) > 0, 'Sets list should have one or more values'
+    if len(set_ids) == 1:
+        return set_ids[0]
+    if not derived_sets_cache.enabled:
+        union_set_id = await adapters.union_set_db.union_set(set_ids)
+        await adapters.set_db.set_ttl(union_set_id, SET_EXPIRE_SECONDS)
+        logging.debug('Created temporarily set, set ID: %s', union_set_id)
+        teardown.deleted.append(union_set_id)
+        return union_set_id
+    source_set_ids = sorted(set_ids)
+    union_set_id = derived_sets_cache.derived_set_id(
+        'union', source_set_ids, await adapters.version_db.versions(source_set_ids)
+    )
+
+    async def build(target_set_id: UUID):
+        await adapters.union_set_db.union_set(source_set_ids, target_set_id)
+
+    await derived_sets_cache.acquire(adapters, union_set_id, build)
+    teardown.released.append(union_set_id)
+    return union_set_id
+
+
+async def prepare_diff_set(
+    adapters: ServiceAdapters, set_ids: list[UUID], excluded_set_ids: list[UUID], teardown: SetsTeardown
+) -> UUID:
+    """Get set ID with union of sets without excluded sets (operation is performed in storage).
+    Result is reused from cache of derived sets or temporarily set is created (if cache is disabled)
+    """
+    assert len(set_ids) > 0, 'Sets list should have one or more values'
+    if not derived_sets_cache.enabled:
+        diff_set_id = await adapters.diff_set_db.diff_set(set_ids, excluded_set_ids, SET_EXPIRE_SECONDS)
+        logging.debug('Created temporarily set with difference of sets, set ID: %s', diff_set_id)
+        teardown.deleted.append(diff_set_id)
+        return diff_set_id
+    source_set_ids, source_excluded_set_ids = sorted(set_ids), sorted(excluded_set_ids)
+    versioned_ids = source_set_ids + source_excluded_set_ids
+    diff_set_id = derived_sets_cache.derived_set_id(
+        f'diff{len(source_set_ids)}', versioned_ids, await adapters.version_db.versions(versioned_ids)
+    )
+
+    async def build(target_set_id: UUID):
+        await adapters.diff_set_db.diff_set(source_set_ids, source_excluded_set_ids, SET_EXPIRE_SECONDS, target_set_id)
+
+    await derived_sets_cache.acquire(adapters, diff_set_id, build)
+    teardown.released.append(diff_set_id)
+    return diff_set_id
@@ -0,0 +1,45 @@
+# Coalescing of identical concurrent downloads (single flight)
+from typing import Optional
+from typing import Union
+
+from src.core.settings import STREAM_FLIGHT_REPLAY_PIECES
+from src.schemas.metrics_schemas import CacheMetrics
+from src.schemas.metrics_schemas import DownloadMetrics
+from src.schemas.metrics_schemas import FlightMetrics
+from src.utils.single_flight_utils import FlightStats
+from src.utils.single_flight_utils import SingleFlight
+from src.utils.single_flight_utils import StreamFlights
+
+from .derived_sets_cache_service import derived_sets_cache
+from .snapshot_cache_service import DownloadSnapshot
+from .snapshot_cache_service import download_snapshot_cache
+from .snapshot_cache_service import snapshot_encoding_flights
+from .whitelist_service import WhitelistQuery
+
+# renders of blacklist snapshots (with ETag as a key)
+blacklist_snapshot_flights = SingleFlight[str, DownloadSnapshot]()
+# streamed downloads (with ETag or normalized query and content encoding as a key)
+blacklist_stream_flights = StreamFlights[tuple[str, Optional[str]], Union[str, bytes]](STREAM_FLIGHT_REPLAY_PIECES)
+whitelist_stream_flights = StreamFlights[tuple[WhitelistQuery, Optional[str]], Union[str, bytes]](
+    STREAM_FLIGHT_REPLAY_PIECES
+)
+
+
+def flight_metrics(stats: FlightStats) -> FlightMetrics:
+    return FlightMetrics(
+        calls=stats.calls,
+        executions=stats.executions,
+        coalesced=stats.coalesced,
+        coalescing_ratio=stats.coalescing_ratio,
+    )
+
+
+def get_download_metrics() -> DownloadMetrics:
+    return DownloadMetrics(
+        blacklist_snapshots=flight_metrics(blacklist_snapshot_flights.stats),
+        blacklist_streams=flight_metrics(blacklist_stream_flights.stats),
+        whitelist_streams=flight_metrics(whitelist_stream_flights.stats),
+        snapshot_encodings=flight_metrics(snapshot_encoding_flights.stats),
+        snapshot_cache=CacheMetrics(entries=len(download_snapshot_cache), size=download_snapshot_cache.size),
+        derived_sets_cache=CacheMetrics(entries=len(derived_sets_cache), size=derived_sets_cache.records_count),
+    )
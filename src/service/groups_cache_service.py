@@ -0,0 +1,76 @@
+# In-process cache of groups lists with index of groups by names
+import logging
+from dataclasses import dataclass
+from dataclasses import field
+from time import monotonic
+from typing import Awaitable
+from typing import Callable
+from typing import Optional
+from uuid import UUID
+
+from src.core.config import app_settings
+from src.db.base_version_db import IVersionDb
+from src.schemas.set_group_schemas import GroupSet
+from src.utils.single_flight_utils import SingleFlight
+
+
+@dataclass
+class GroupsIndex:
+    """Groups of category (default group is the last one) indexed by names"""
+
+    groups: list[GroupSet]
+    by_name: dict[str, GroupSet] = field(init=False)
+
+    def __post_init__(self):
+        self.by_name = {group.group_name: group for group in self.groups}
+
+
+@dataclass
+class GroupsCacheEntry:
+    index: GroupsIndex
+    version: int  # version of groups hash the index is loaded for
+    checked_at: float  # moment of the last check of version
+
+
+class GroupsCache:
+    """Groups indexes by groups hash IDs. Index is valid while version of groups hash is unchanged. Version is checked
+    not more often than once in check_seconds, so groups are resolved without storage calls in between (changes made
+    by other processes are visible after check). Changes made by this process drop index at once (see invalidate)
+    """
+
+    def __init__(self, check_seconds: float, clock: Callable[[], float] = monotonic):
+        self.__check_seconds = check_seconds
+        self.__clock = clock
+        self.__entries: dict[UUID, GroupsCacheEntry] = dict()
+        self.__flights = SingleFlight[tuple[UUID, int], GroupsIndex]()
+
+    async def get(
+        self, group_hash_id: UUID, version_db: IVersionDb[UUID], load: Callable[[], Awaitable[list[GroupSet]]]
+    ) -> GroupsIndex:
+        """Get groups index (groups are loaded on changes of groups hash, concurrent calls await the same loading)"""
+        moment = self.__clock()
+        entry: Optional[GroupsCacheEntry] = self.__entries.get(group_hash_id)
+        if entry is not None and moment - entry.checked_at < self.__check_seconds:
+            return entry.index
+        version = (await version_db.versions([group_hash_id]))[0]
+        entry = self.__entries.get(group_hash_id)
+        if entry is None or entry.version != version:
+
+            async def load_index() -> GroupsIndex:
+                logging.debug('Loading groups to cache, groups hash ID: %s, version: %d', group_hash_id, version)
+                return GroupsIndex(await load())
+
+            entry = GroupsCacheEntry(await self.__flights.do((group_hash_id, version), load_index), version, moment)
+            self.__entries[group_hash_id] = entry
+        else:
+            entry.checked_at = moment
+        return entry.index
+
+    def invalidate(self, group_hash_id: UUID):
+        self.__entries.pop(group_hash_id, None)
+
+    def clear(self):
+        self.__entries.clear()
+
+
+groups_cache = GroupsCache(app_settings.groups_cache_check_seconds)
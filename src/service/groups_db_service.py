@@ -8,11 +8,15 @@ from fastapi.exceptions import HTTPException
 from src.core.settings import DEFAULT_GROUP_DESCRIPTION
 from src.core.settings import DEFAULT_GROUP_NAME
 from src.db.base_hash_db_entity import IHashDbEntity
+from src.db.base_version_db import IVersionDb
 from src.schemas.set_group_schemas import AddGroupSet
 from src.schemas.set_group_schemas import GroupData
 from src.schemas.set_group_schemas import GroupSet
 from src.schemas.set_group_schemas import UpdateGroupSet
 
+from .groups_cache_service import GroupsIndex
+from .groups_cache_service import groups_cache
+
 
 class GroupsDataDbService:
     """Service for interaction with Db Entity with business logic
@@ -59,9 +63,23 @@ class GroupsDbService:
     Wraps GroupsDataDbService for some extra business logic (default group)
     """
 
-    def __init__(self, db_entity: IHashDbEntity[UUID, UUID, GroupData], group_hash_id: UUID, default_group_id: UUID):
+    def __init__(
+        self,
+        db_entity: IHashDbEntity[UUID, UUID, GroupData],
+        group_hash_id: UUID,
+        default_group_id: UUID,
+        version_db: Optional[IVersionDb[UUID]] = None,
+    ):
         self.__groups_data_db_srv = GroupsDataDbService(db_entity, group_hash_id)
+        self.__group_hash_id = group_hash_id
         self.__default_group_id = default_group_id
+        self.__version_db = version_db
+
+    async def __bump_version(self):
+        """Increment version of groups hash on groups changes (if versions storage is set), drop cached groups"""
+        if self.__version_db is not None:
+            await self.__version_db.bump(self.__group_hash_id)
+        groups_cache.invalidate(self.__group_hash_id)
 
     def __get_default_group(self) -> GroupSet:
         return GroupSet(
@@ -71,7 +89,18 @@ class GroupsDbService:
             default=True,
         )
 
+    async def groups_index(self) -> GroupsIndex:
+        """Groups indexed by names. With versions storage set groups are taken from in-process cache
+        (see GroupsCache), otherwise they are read from storage
+        """
+        if self.__version_db is None:
+            return GroupsIndex(await self.read_groups())
+        return await groups_cache.get(self.__group_hash_id, self.__version_db, self.read_groups)
+
     async def list_groups(self) -> list[GroupSet]:
+        return list((await self.groups_index()).groups)
+
+    async def read_groups(self) -> list[GroupSet]:
         groups_data: list[tuple[UUID, GroupData]] = await self.__groups_data_db_srv.read_groups()
         default_group_value: GroupSet = self.__get_default_group()
         result: list[GroupSet] = list()
@@ -136,6 +165,7 @@ class GroupsDbService:
         await self.__groups_data_db_srv.write_group(
             added_group_id, GroupData(group_data.group_name, group_data.group_description)
         )
+        await self.__bump_version()
         # read from db
 
         result: Optional[GroupSet] = await self.get_group(added_group_id)
@@ -143,8 +173,8 @@ class GroupsDbService:
         return result
 
     async def group_name_exists(self, group_name: str) -> bool:
-        groups_data = await self.list_groups()
-        return group_name in map(lambda x: x.group_name, groups_data)
+        # groups are read from storage for checks before changes
+        return group_name in map(lambda x: x.group_name, await self.read_groups())
 
     async def update_group(self, updated_group_id: UUID, group_data: UpdateGroupSet) -> GroupSet:
         existing_group_data: Optional[GroupSet] = await self.get_group(updated_group_id)
@@ -157,6 +187,7 @@ class GroupsDbService:
         await self.__groups_data_db_srv.write_group(
             updated_group_id, GroupData(group_data.group_name, group_data.group_description)
         )
+        await self.__bump_version()
         result: Optional[GroupSet] = await self.get_group(updated_group_id)
         assert result is not None, 'Expected updated data in storage'
         return result
@@ -167,7 +198,9 @@ class GroupsDbService:
         group_data: Optional[GroupSet] = await self.get_group(group_id)
         if group_data is None:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Wrong group id specified in request')
-        return await self.__groups_data_db_srv.delete_group(group_id)
+        deleted_count = await self.__groups_data_db_srv.delete_group(group_id)
+        await self.__bump_version()
+        return deleted_count
 
     def default_group_id(self):
         """Get default group ID for service"""
@@ -175,8 +208,4 @@ class GroupsDbService:
 
     async def get_group_by_name(self, group_name: str) -> Optional[GroupSet]:
         """Find group data by group name"""
-        groups = await self.list_groups()
-        for group in groups:
-            if group.group_name == group_name:
-                return group
-        return None
+        return (await self.groups_index()).by_name.get(group_name)
@@ -0,0 +1,141 @@
+# Retention of addresses history: cropping of old records and removal of histories of idle addresses
+import logging
+from dataclasses import dataclass
+from datetime import datetime as dt_datetime
+from datetime import timedelta
+from typing import Any
+from typing import Awaitable
+from typing import Optional
+from typing import cast
+from uuid import UUID
+
+from src.core.config import app_settings
+from src.core.settings import BATCH_SIZE
+from src.core.settings import HISTORY_COMPACTION_CURSOR_ID
+from src.schemas.usage_schemas import AddressHistoryRecord
+from src.utils import crop_list_tail
+from src.utils.time_utils import with_cur_tz
+
+from .history_db_service import HistoryDBService
+
+
+@dataclass(frozen=True)
+class HistoryRetentionPolicy:
+    max_age: Optional[timedelta] = None  # history records older than max age are removed
+    max_records: Optional[int] = None  # only the latest max records are kept for address
+    idle: Optional[timedelta] = None  # history of address without changes for idle period is removed
+
+    @classmethod
+    def from_settings(cls) -> 'HistoryRetentionPolicy':
+        return cls(
+            None if app_settings.history_max_age_days is None else timedelta(days=app_settings.history_max_age_days),
+            app_settings.history_max_records,
+            None if app_settings.history_idle_days is None else timedelta(days=app_settings.history_idle_days),
+        )
+
+    @property
+    def active(self) -> bool:
+        return self.max_age is not None or self.max_records is not None or self.idle is not None
+
+    def apply(self, history_record_obj: AddressHistoryRecord, moment: dt_datetime) -> Optional[AddressHistoryRecord]:
+        """Apply policy to history of address: None if history should be removed, the same object if it is kept
+        unchanged, otherwise history with cropped records. Naive datetimes are treated as ones in current timezone
+        """
+        moment = with_cur_tz(moment)
+        if self.idle is not None and with_cur_tz(history_record_obj.last_update_time) < moment - self.idle:
+            return None
+        history_records = history_record_obj.history_records
+        if self.max_age is not None:
+            min_action_time = moment - self.max_age
+            history_records = [x for x in history_records if with_cur_tz(x.action_time) >= min_action_time]
+        if self.max_records is not None:
+            history_records = crop_list_tail(
+                sorted(history_records, key=lambda x: with_cur_tz(x.action_time)), self.max_records
+            )
+        if len(history_records) == len(history_record_obj.history_records):
+            return history_record_obj
+        return history_record_obj.model_copy(update={'history_records': history_records})
+
+
+@dataclass
+class HistoryCompactionReport:
+    scanned: int = 0
+    rewritten: int = 0
+    removed: int = 0
+    reclaimed_bytes: int = 0  # size decrease of serialized histories (with keys of removed ones)
+    completed: bool = False  # whole hash is walked (cursor is returned to start)
+
+
+class HistoryCompactionService:
+    """Incremental enforcement of retention policy: every run walks the next part of history hash with HSCAN
+    (cursor is kept in storage between runs, so runs of different processes continue the same walk).
+    Changed histories are compared with scanned ones and replaced atomically one by one, so concurrent changes of
+    other histories do not abort batch. Only histories changed concurrently are skipped till the next walk
+    """
+
+    def __init__(
+        self,
+        history_db_service: HistoryDBService,
+        policy: HistoryRetentionPolicy,
+        cursor_id: UUID = HISTORY_COMPACTION_CURSOR_ID,
+    ):
+        self.__history_db_service = history_db_service
+        self.__policy = policy
+        self.__cursor_key = str(cursor_id)
+
+    async def read_cursor(self) -> int:
+        cursor = await cast(Awaitable[Any], self.__history_db_service.db.get(self.__cursor_key))
+        return 0 if cursor is None else int(cursor)
+
+    async def write_cursor(self, cursor: int):
+        await cast(Awaitable[Any], self.__history_db_service.db.set(self.__cursor_key, cursor))
+
+    async def compact_batch(self, raw_records: dict[str, str], moment: dt_datetime) -> HistoryCompactionReport:
+        rewritten: dict[str, AddressHistoryRecord] = dict()
+        removed: list[str] = list()
+        reclaimed_bytes: dict[str, int] = dict()
+        for key, data in raw_records.items():
+            try:
+                history_record_obj = self.__history_db_service.deserialize(data)
+                compacted_record_obj = self.__policy.apply(history_record_obj, moment)
+            except Exception as e:
+                # broken history should not stall the walk, it is skipped and left as is
+                logging.warning('History of %s could not be compacted, skipped: %s', key, e)
+                continue
+            if compacted_record_obj is None:
+                removed.append(key)
+                reclaimed_bytes[key] = len(key.encode()) + len(data.encode())
+            elif compacted_record_obj is not history_record_obj:
+                rewritten[key] = compacted_record_obj
+                compacted_data = self.__history_db_service.serialize(compacted_record_obj)
+                reclaimed_bytes[key] = len(data.encode()) - len(compacted_data.encode())
+        applied_keys = set(await self.__history_db_service.replace_raw_records(raw_records, rewritten, removed))
+        if len(applied_keys) < len(reclaimed_bytes):
+            logging.debug(
+                'Histories were changed while compacting, skipped: %d', len(reclaimed_bytes) - len(applied_keys)
+            )
+        return HistoryCompactionReport(
+            scanned=len(raw_records),
+            rewritten=len(applied_keys.intersection(rewritten)),
+            removed=len(applied_keys.intersection(removed)),
+            reclaimed_bytes=sum(reclaimed_bytes[key] for key in applied_keys),
+        )
+
+    async def compact(self, max_records: int, moment: dt_datetime) -> HistoryCompactionReport:
+        """Compact histories from stored cursor till max_records are scanned or the end of hash is reached.
+        Cursor is saved after every batch, so interrupted run is continued from the last compacted batch
+        """
+        report = HistoryCompactionReport()
+        cursor = await self.read_cursor()
+        while report.scanned < max_records:
+            cursor, raw_records = await self.__history_db_service.scan_raw_records(cursor, BATCH_SIZE)
+            batch_report = await self.compact_batch(raw_records, moment)
+            report.scanned += batch_report.scanned
+            report.rewritten += batch_report.rewritten
+            report.removed += batch_report.removed
+            report.reclaimed_bytes += batch_report.reclaimed_bytes
+            await self.write_cursor(cursor)
+            if cursor == 0:
+                report.completed = True
+                break
+        return report
@@ -1,12 +1,32 @@
+from typing import Optional
+from uuid import UUID
+
+from src.core.config import app_settings
 from src.core.settings import HISTORY_USAGE_INFO
+from src.db.storages.redis_db import RedisAsyncio
+from src.models.history_transformation import history_record_transformation
 from src.models.usage_encoders import UsageClassesEncoder
 from src.schemas.usage_schemas import AddressHistoryRecord
 from src.service.abstract_hkey_db_service import AbstractHkeyDBService
 
 
 class HistoryDBService(AbstractHkeyDBService[AddressHistoryRecord, UsageClassesEncoder]):
-    """Service for current banned addresses usage information"""
+    """Service for current banned addresses usage information.
+    Histories are written in encoding of records (JSON or binary), histories of both encodings are read
+    """
 
     service_type = AddressHistoryRecord
     set_id = HISTORY_USAGE_INFO
     json_encoder = UsageClassesEncoder
+
+    def __init__(self, db: RedisAsyncio, set_id: Optional[UUID] = None, record_encoding: Optional[str] = None):
+        super().__init__(db, set_id)
+        self.record_transformer = history_record_transformation(
+            app_settings.record_encoding if record_encoding is None else record_encoding
+        )
+
+    def serialize(self, data: AddressHistoryRecord) -> str:
+        return self.record_transformer.transform_to_storage(data)
+
+    def deserialize(self, data: str) -> AddressHistoryRecord:
+        return self.record_transformer.transform_from_storage(data)
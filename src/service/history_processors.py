@@ -1,12 +1,16 @@
 import logging
+from typing import Any
 from typing import Optional
 
 from src.core.config import app_settings
+from src.core.settings import BATCH_SIZE
+from src.models.record_codecs import encode_moment
 from src.schemas.addresses_schemas import AgentAddressesInfoWithGroup
 from src.schemas.usage_schemas import ActionType
 from src.schemas.usage_schemas import AddressHistoryRecord
 from src.schemas.usage_schemas import HistoryRecordInfo
 from src.utils import crop_list_tail
+from src.utils.misc_utils import split_to_batches
 
 from .history_db_service import HistoryDBService
 
@@ -19,52 +23,101 @@ class HistoryProcessor:
     def __init__(self, history_db_service: HistoryDBService):
         self.history_db_service = history_db_service
 
+    @staticmethod
+    def update_record(
+        history_record_obj: Optional[AddressHistoryRecord], address_str: str, history_record_info_obj: HistoryRecordInfo
+    ) -> AddressHistoryRecord:
+        """Append history record info to address history (new history is created for absent record)"""
+        action_time = history_record_info_obj.action_time
+        if history_record_obj is None:
+            logging.debug('Create history statistics for address %s', address_str)
+            return AddressHistoryRecord(
+                address=address_str,
+                last_update_time=action_time,
+                history_records=crop_list_tail([history_record_info_obj], app_settings.history_depth),
+            )
+        logging.debug('Update existing history statistics for address %s', address_str)
+        if action_time > history_record_obj.last_update_time:
+            history_record_obj.last_update_time = action_time
+        if app_settings.history_depth is not None:
+            # append record in history_records
+            history_record_obj.history_records.append(history_record_info_obj)
+            history_record_obj.sort()
+            history_record_obj.history_records = crop_list_tail(
+                history_record_obj.history_records, app_settings.history_depth
+            )
+            logging.debug(
+                'History statistics for address %s consists now of %d records',
+                address_str,
+                len(history_record_obj.history_records),
+            )
+        else:
+            history_record_obj.history_records = []
+        return history_record_obj
+
+    @staticmethod
+    def action_key(history_record_info_obj: HistoryRecordInfo) -> tuple[Any, ...]:
+        """Identity of recorded action (time is compared in millis as kept in binary records)"""
+        return (
+            history_record_info_obj.source,
+            history_record_info_obj.action_type,
+            history_record_info_obj.address_category,
+            history_record_info_obj.address_group,
+            encode_moment(history_record_info_obj.action_time)[0],
+        )
+
+    async def apply_updates(self, updates: dict[str, list[HistoryRecordInfo]], skip_applied: bool = False) -> int:
+        """Append history record infos to histories of addresses by chunks of BATCH_SIZE addresses: records of chunk
+        are read with one HMGET and written only if they are unchanged since reading (see replace_raw_records), so
+        concurrent writers of processes and workers do not lose records. Histories changed concurrently are read and
+        updated again. With skip_applied set infos already present in history are not appended again (updates are
+        applied repeatedly after failures). Returns count of created histories
+        """
+        created_records = 0
+        for chunk in split_to_batches(list(updates), BATCH_SIZE):
+            pending_keys: list[str] = list(chunk)
+            while pending_keys:
+                raw_records = dict(zip(pending_keys, await self.history_db_service.read_raw_records(pending_keys)))
+                chunk_records: dict[str, AddressHistoryRecord] = dict()
+                for address_str, raw_record in raw_records.items():
+                    history_record_obj = None if raw_record is None else self.history_db_service.deserialize(raw_record)
+                    applied_keys = (
+                        {self.action_key(x) for x in history_record_obj.history_records}
+                        if skip_applied and history_record_obj is not None
+                        else set()
+                    )
+                    for history_record_info_obj in updates[address_str]:
+                        if self.action_key(history_record_info_obj) in applied_keys:
+                            continue
+                        history_record_obj = chunk_records[address_str] = self.update_record(
+                            history_record_obj, address_str, history_record_info_obj.model_copy()
+                        )
+                # commit changes to history db
+                written_keys = set(await self.history_db_service.replace_raw_records(raw_records, chunk_records, []))
+                created_records += sum(raw_records[key] is None for key in written_keys)
+                pending_keys = [key for key in chunk_records if key not in written_keys]
+                if pending_keys:
+                    logging.debug('Histories were changed concurrently, updated again: %d', len(pending_keys))
+        return created_records
+
     async def update_history(
         self, agent_action_info: AgentAddressesInfoWithGroup, action_type: ActionType, address_category: str
     ) -> int:
-        updated_records = 0
+        """Update history of addresses (repeated addresses get the action recorded repeatedly)"""
         logging.debug(
             'Update history statistics for %s agent, records count: %d, action type: %s',
             agent_action_info.source_agent,
             len(agent_action_info.addresses),
             action_type,
         )
+        history_record_info_obj = HistoryRecordInfo(
+            source=agent_action_info.source_agent,
+            action_time=agent_action_info.action_time,
+            action_type=action_type,
+            address_category=address_category,
+            address_group=agent_action_info.address_group,
+        )
+        updates: dict[str, list[HistoryRecordInfo]] = dict()
         for address in agent_action_info.addresses:
-            address_str = str(address)
-            history_record_obj: Optional[AddressHistoryRecord] = await self.history_db_service.read_record(address_str)
-            action_time = agent_action_info.action_time
-            history_record_info_obj = HistoryRecordInfo(
-                source=agent_action_info.source_agent,
-                action_time=action_time,
-                action_type=action_type,
-                address_category=address_category,
-                address_group=agent_action_info.address_group,
-            )
-            if history_record_obj is None:
-                logging.debug('Create history statistics for address %s', address)
-                history_record_obj = AddressHistoryRecord(
-                    address=address_str,
-                    last_update_time=action_time,
-                    history_records=crop_list_tail([history_record_info_obj], app_settings.history_depth),
-                )
-            else:
-                logging.debug('Update existing history statistics for address %s', address)
-                if action_time > history_record_obj.last_update_time:
-                    history_record_obj.last_update_time = action_time
-                if app_settings.history_depth is not None:
-                    # append record in history_records
-                    history_record_obj.history_records.append(history_record_info_obj)
-                    history_record_obj.sort()
-                    history_record_obj.history_records = crop_list_tail(
-                        history_record_obj.history_records, app_settings.history_depth
-                    )
-                    logging.debug(
-                        'History statistics for address %s consists now of %d records',
-                        address,
-                        len(history_record_obj.history_records),
-                    )
-                else:
-                    history_record_obj.history_records = []
-            # commit changes to history db
-            updated_records += await self.history_db_service.write_record(address_str, history_record_obj)
-        return updated_records
+            updates.setdefault(str(address), []).append(history_record_info_obj)
+        return await self.apply_updates(updates)
@@ -0,0 +1,75 @@
+# Reading of addresses history by pages and streaming of history records
+import json
+from array import array
+from asyncio import to_thread
+from bisect import bisect_right
+from dataclasses import dataclass
+from ipaddress import IPv4Address
+from typing import AsyncGenerator
+from typing import Optional
+
+from src.core.settings import BATCH_SIZE
+from src.schemas.usage_schemas import AddressHistoryRecord
+from src.utils.ip_array_utils import render_addresses
+
+from .history_db_service import HistoryDBService
+
+
+@dataclass
+class AddressesPage:
+    addresses: array  # sorted addresses of page
+    next_cursor: Optional[IPv4Address]  # last address of page if there are more addresses
+
+
+def addresses_page(sorted_addresses: array, after: Optional[IPv4Address], limit: int) -> AddressesPage:
+    """Page of sorted addresses after cursor address (limit 0 means all addresses after cursor)"""
+    start = bisect_right(sorted_addresses, int(after)) if after is not None else 0
+    end = start + limit if limit > 0 else len(sorted_addresses)
+    page = sorted_addresses[start:end]
+    return AddressesPage(page, IPv4Address(page[-1]) if page and end < len(sorted_addresses) else None)
+
+
+def render_addresses_json(addresses: array) -> list[str]:
+    return [json.dumps(x) for x in render_addresses(addresses).split()]
+
+
+async def stream_addresses(addresses: array, ndjson: bool) -> AsyncGenerator[str, None]:
+    """Render sorted addresses as JSON array or as NDJSON (one JSON string per line) by blocks of BATCH_SIZE"""
+    if not ndjson:
+        yield '['
+    for position in range(0, len(addresses), BATCH_SIZE):
+        rendered = render_addresses_json(addresses[position : position + BATCH_SIZE])
+        if ndjson:
+            yield '\n'.join(rendered) + '\n'
+        else:
+            yield (',' if position else '') + ','.join(rendered)
+    if not ndjson:
+        yield ']'
+
+
+class HistoryReadService:
+    """History records of addresses read by batches of BATCH_SIZE addresses (one HMGET per batch)"""
+
+    def __init__(self, history_db_service: HistoryDBService):
+        self.__history_db_service = history_db_service
+
+    async def fetch_records(self, addresses: array) -> AsyncGenerator[list[AddressHistoryRecord], None]:
+        """Fetch history records of addresses by batches (addresses without history are skipped)"""
+        async for batch in self.__history_db_service.fetch_records_by_ids(render_addresses(addresses).split()):
+            yield batch
+
+    async def read_sorted_by_update_time(self, addresses: array) -> list[AddressHistoryRecord]:
+        result: list[AddressHistoryRecord] = list()
+        async for batch in self.fetch_records(addresses):
+            result.extend(batch)
+        return sorted(result, key=lambda x: x.last_update_time)
+
+    @staticmethod
+    def render_ndjson(records: list[AddressHistoryRecord]) -> str:
+        return ''.join(x.model_dump_json() + '\n' for x in records)
+
+    async def stream_ndjson(self, addresses: array) -> AsyncGenerator[str, None]:
+        """Render history records as NDJSON (in order of addresses), batches are rendered in thread"""
+        async for batch in self.fetch_records(addresses):
+            if batch:
+                yield await to_thread(self.render_ndjson, batch)
@@ -0,0 +1,115 @@
+# History derived from usage stream by workers of consumer group: every usage record is delivered to one worker,
+# applied to history and acknowledged, records pending on failed workers are claimed by other workers
+import logging
+from typing import Iterable
+from typing import Optional
+from uuid import UUID
+
+from src.core.settings import HISTORY_CONSUMER_GROUP
+from src.core.settings import STREAM_USAGE_INFO
+from src.db.base_stream_group_db import IStreamGroupDb
+from src.db.base_stream_group_db import StreamGroupInfo
+from src.schemas.usage_schemas import HistoryRecordInfo
+from src.schemas.usage_schemas import StreamUsageRecord
+from src.utils.time_utils import parse_stream_id
+
+from .history_processors import HistoryProcessor
+
+
+def history_updates(records: Iterable[tuple[str, StreamUsageRecord]]) -> dict[str, list[HistoryRecordInfo]]:
+    """History record infos of usage records by addresses (records without source agent are written before history
+    has been derived from stream and are skipped)
+    """
+    result: dict[str, list[HistoryRecordInfo]] = dict()
+    for _, record in records:
+        if record.source_agent is None:
+            continue
+        history_record_info_obj = HistoryRecordInfo(
+            source=record.source_agent,
+            action_time=record.action_time,
+            action_type=record.action_type,
+            address_category=record.address_category,
+            address_group=record.address_group,
+        )
+        for address in record.addresses:
+            result.setdefault(str(address), []).append(history_record_info_obj)
+    return result
+
+
+def record_acknowledged(group_info: StreamGroupInfo[str], record_id: str) -> bool:
+    """Whether record has been delivered to consumer group and acknowledged"""
+    if group_info.last_delivered_id is None or parse_stream_id(record_id) > parse_stream_id(
+        group_info.last_delivered_id
+    ):
+        return False
+    return group_info.min_pending_id is None or parse_stream_id(record_id) < parse_stream_id(group_info.min_pending_id)
+
+
+async def create_history_group(
+    stream_group_db: IStreamGroupDb[UUID, str, StreamUsageRecord],
+    stream_id: UUID = STREAM_USAGE_INFO,
+    group_name: str = HISTORY_CONSUMER_GROUP,
+) -> bool:
+    """Create consumer group at the tail of usage stream if absent (records written before are not delivered),
+    True for created group. Group is created on application startup before requests are served, so records of
+    handlers (history is not written by them with history_stream_enabled set) are kept for workers started later
+    """
+    created = await stream_group_db.create_group(stream_id, group_name)
+    if created:
+        logging.info('Consumer group %s of usage stream is created', group_name)
+    return created
+
+
+class HistoryStreamWorker:
+    """Consumer of usage stream applying usage records to history by batches (one HMGET and one compare and set
+    script per BATCH_SIZE addresses, see HistoryProcessor.apply_updates), so workers of any processes update the same
+    histories concurrently. Records are acknowledged after history is written, so records of failed batch are applied
+    again: actions already present in history are skipped
+    """
+
+    def __init__(
+        self,
+        stream_group_db: IStreamGroupDb[UUID, str, StreamUsageRecord],
+        history_processor: HistoryProcessor,
+        consumer_name: str,
+        stream_id: UUID = STREAM_USAGE_INFO,
+        group_name: str = HISTORY_CONSUMER_GROUP,
+    ):
+        self.__stream_group_db = stream_group_db
+        self.__history_processor = history_processor
+        self.__consumer_name = consumer_name
+        self.__stream_id = stream_id
+        self.__group_name = group_name
+
+    async def start(self) -> bool:
+        """Create consumer group if absent (see create_history_group), True for created group"""
+        return await create_history_group(self.__stream_group_db, self.__stream_id, self.__group_name)
+
+    async def apply(self, records: list[tuple[str, StreamUsageRecord]]) -> int:
+        """Apply usage records to history and acknowledge them, returns count of acknowledged records"""
+        if not records:
+            return 0
+        await self.__history_processor.apply_updates(history_updates(records), skip_applied=True)
+        return await self.__stream_group_db.ack(self.__stream_id, self.__group_name, (x[0] for x in records))
+
+    async def process_new(self, count: int, block_ms: Optional[int] = None) -> int:
+        """Read and apply up to count new records (waiting up to block_ms for records), returns count of records"""
+        records = await self.__stream_group_db.read_group(
+            self.__stream_id, self.__group_name, self.__consumer_name, count, block_ms
+        )
+        await self.apply(records)
+        return len(records)
+
+    async def recover(self, min_idle_ms: int, count: int) -> int:
+        """Claim and apply all records pending longer than min_idle_ms (by batches of count records), returns count
+        of recovered records
+        """
+        recovered_count = 0
+        start_id: Optional[str] = None
+        while True:
+            start_id, records = await self.__stream_group_db.claim_pending(
+                self.__stream_id, self.__group_name, self.__consumer_name, min_idle_ms, start_id, count
+            )
+            recovered_count += await self.apply(records)
+            if start_id is None:
+                return recovered_count
@@ -0,0 +1,242 @@
+# In-process membership index: address sets of groups mirrored as roaring bitmaps
+import logging
+from array import array
+from asyncio import sleep as a_sleep
+from asyncio import to_thread
+from collections import defaultdict
+from dataclasses import dataclass
+from dataclasses import field
+from hashlib import sha1
+from time import monotonic
+from typing import AsyncGenerator
+from typing import Iterable
+from typing import Optional
+from uuid import UUID
+
+from src.core.settings import BATCH_SIZE
+from src.core.settings import INDEX_RELOAD_ADDRESSES
+from src.schemas.addresses_schemas import AddressCheckResult
+from src.utils.ip_array_utils import ADDRESS_BITS
+from src.utils.ip_array_utils import aggregate_addresses
+from src.utils.ip_array_utils import render_addresses
+from src.utils.ip_array_utils import render_networks
+from src.utils.ip_array_utils import without_intervals
+from src.utils.ip_utils import merge_intervals
+from src.utils.misc_utils import split_to_batches
+from src.utils.roaring_utils import RoaringBitmap
+from src.utils.time_utils import parse_stream_id
+
+from .blacklist_service import BlacklistQuery
+from .blacklist_service import BlacklistService
+from .check_sources_service import CHECK_SOURCES_VERSIONED_IDS
+from .check_sources_service import CheckSources
+from .check_sources_service import compose_check_result
+from .check_sources_service import load_check_sources
+from .service_db_factories import ServiceAdapters
+from .usage_stream_service import UsageStreamReadService
+
+
+@dataclass(frozen=True)
+class MembershipIndexView:
+    """Immutable state of membership index for downloads (bitmaps are copies, so they could be processed in
+    separate thread while index is refreshed)
+    """
+
+    sources: CheckSources
+    sets: dict[UUID, RoaringBitmap]
+    # digests of contents of sets (calculated on demand)
+    digests: dict[UUID, str] = field(default_factory=dict)
+
+    def covers(self, set_ids: Iterable[UUID]) -> bool:
+        return all(set_id in self.sets for set_id in set_ids)
+
+    def union(self, set_ids: Iterable[UUID]) -> RoaringBitmap:
+        return RoaringBitmap.union(self.sets[set_id] for set_id in set_ids)
+
+    def digest(self, set_id: UUID) -> str:
+        """Digest of sorted addresses of set (the same for the same contents in any process)"""
+        set_digest = self.digests.get(set_id)
+        if set_digest is None:
+            set_digest = sha1(self.sets[set_id].to_array().tobytes()).hexdigest()
+            self.digests[set_id] = set_digest
+        return set_digest
+
+
+class MembershipIndex:
+    """Address sets of all banned and allowed groups mirrored in process as roaring bitmaps.
+    Index is built from storage and kept current from usage stream: addresses of records after the cursor are
+    checked against storage (so order of records does not matter) and bitmaps of their groups are corrected.
+    Index is rebuilt when usage stream is trimmed past the cursor and periodically, groups and allowed networks
+    are reloaded on their changes. Index lags behind storage for time of usage recording and refresh period
+    """
+
+    def __init__(self):
+        self.__sources: Optional[CheckSources] = None
+        self.__sources_versions: Optional[tuple[int, ...]] = None
+        self.__sets: dict[UUID, RoaringBitmap] = dict()
+        self.__cursor: Optional[str] = None
+        self.__built_at = 0.0
+        self.__view: Optional[MembershipIndexView] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.__sources is not None
+
+    def __changed(self):
+        self.__view = None
+
+    @staticmethod
+    async def load_set(service_adapter_obj: ServiceAdapters, set_id: UUID) -> RoaringBitmap:
+        addresses = [x async for x in service_adapter_obj.address_int_set_db_entity.fetch_records(set_id)]
+        return await to_thread(RoaringBitmap, addresses)
+
+    async def load_sets(self, service_adapter_obj: ServiceAdapters, sources: CheckSources, reload_all: bool):
+        """Load sets of groups missing in index (all sets if reload_all is passed), drop sets of deleted groups"""
+        sets: dict[UUID, RoaringBitmap] = dict()
+        for set_id in sources.group_set_ids():
+            bitmap = None if reload_all else self.__sets.get(set_id)
+            sets[set_id] = bitmap if bitmap is not None else await self.load_set(service_adapter_obj, set_id)
+        self.__sets = sets
+
+    async def build(self, service_adapter_obj: ServiceAdapters, usage_read_service: UsageStreamReadService):
+        # cursor is taken before reading of sets, so changes made while reading are checked on the next refresh
+        bounds = await usage_read_service.bounds()
+        self.__sources_versions = tuple(await service_adapter_obj.version_db.versions(CHECK_SOURCES_VERSIONED_IDS))
+        sources = await load_check_sources(service_adapter_obj)
+        await self.load_sets(service_adapter_obj, sources, True)
+        self.__sources = sources
+        self.__cursor = bounds.last_id
+        self.__built_at = monotonic()
+        self.__changed()
+        logging.info(
+            'Membership index is built, sets: %d, addresses: %d', len(self.__sets), sum(map(len, self.__sets.values()))
+        )
+
+    async def read_changes(self, usage_read_service: UsageStreamReadService) -> dict[UUID, set[int]]:
+        """Read addresses changed after cursor (by set IDs of groups), move cursor to the last read record"""
+        assert self.__sources is not None, 'Expected built index'
+        changes: defaultdict[UUID, set[int]] = defaultdict(set)
+        async for record_id, record in usage_read_service.fetch_since(self.__cursor):
+            self.__cursor = record_id
+            set_id = self.__sources.group_set_id(record.address_category, record.address_group)
+            if set_id is not None and set_id in self.__sets:
+                changes[set_id].update(map(int, record.addresses))
+        return changes
+
+    async def apply_changes(self, service_adapter_obj: ServiceAdapters, changes: dict[UUID, set[int]]):
+        """Correct bitmaps with current membership of changed addresses in storage"""
+        for set_id, addresses in changes.items():
+            if len(addresses) > INDEX_RELOAD_ADDRESSES:
+                self.__sets[set_id] = await self.load_set(service_adapter_obj, set_id)
+                continue
+            bitmap = self.__sets[set_id]
+            for batch in split_to_batches(list(addresses), BATCH_SIZE):
+                memberships = await service_adapter_obj.address_int_set_db_entity.contains_many(set_id, batch)
+                bitmap.update(address for address, member in zip(batch, memberships) if member)
+                bitmap.difference_update(address for address, member in zip(batch, memberships) if not member)
+
+    async def refresh(
+        self,
+        service_adapter_obj: ServiceAdapters,
+        usage_read_service: UsageStreamReadService,
+        rebuild_seconds: float,
+    ):
+        """Apply changes made after the last refresh (or build index if it is not built or outdated)"""
+        if not self.ready or monotonic() - self.__built_at >= rebuild_seconds:
+            return await self.build(service_adapter_obj, usage_read_service)
+        if self.__cursor is not None and BlacklistService.cursor_is_lost(
+            parse_stream_id(self.__cursor), await usage_read_service.bounds()
+        ):
+            logging.info('Usage stream is trimmed past cursor of membership index, index is rebuilt')
+            return await self.build(service_adapter_obj, usage_read_service)
+        sources_versions = tuple(await service_adapter_obj.version_db.versions(CHECK_SOURCES_VERSIONED_IDS))
+        if sources_versions != self.__sources_versions:
+            sources = await load_check_sources(service_adapter_obj)
+            await self.load_sets(service_adapter_obj, sources, False)
+            self.__sources, self.__sources_versions = sources, sources_versions
+            self.__changed()
+        changes = await self.read_changes(usage_read_service)
+        if changes:
+            await self.apply_changes(service_adapter_obj, changes)
+            self.__changed()
+            logging.debug('Membership index is refreshed, changed sets: %d', len(changes))
+
+    def check(self, addresses: list[int]) -> list[AddressCheckResult]:
+        """Check addresses in all groups (index should be built)"""
+        assert self.__sources is not None, 'Expected built index'
+        banned_sets = [self.__sets[group.group_set_id] for group in self.__sources.banned_groups]
+        allowed_sets = [self.__sets[group.group_set_id] for group in self.__sources.allowed_groups]
+        return [
+            compose_check_result(
+                address,
+                self.__sources,
+                [address in bitmap for bitmap in banned_sets],
+                [address in bitmap for bitmap in allowed_sets],
+            )
+            for address in addresses
+        ]
+
+    def view(self) -> Optional[MembershipIndexView]:
+        """Current state of index (None if index is not built). View is made once per change of index"""
+        if self.__sources is None:
+            return None
+        if self.__view is None:
+            self.__view = MembershipIndexView(
+                self.__sources,
+                {set_id: bitmap.copy() for set_id, bitmap in self.__sets.items()},
+            )
+        return self.__view
+
+
+def indexed_etag_key(view: MembershipIndexView, query: BlacklistQuery) -> str:
+    set_ids = [*query.banned_group_sets, *(query.allowed_group_sets if query.filter_records else ())]
+    etag_key = ';'.join(f'{set_id}={view.digest(set_id)}' for set_id in set_ids)
+    if query.filter_records:
+        etag_key += ';networks=' + ','.join(f'{start}-{end}' for start, end in view.sources.allowed_network_intervals)
+    return f'index;{etag_key};{query}'
+
+
+async def indexed_blacklist_etag(view: MembershipIndexView, query: BlacklistQuery) -> str:
+    """Strong ETag of blacklist download from index state (see snapshot_etag for download from storage).
+    It is calculated from contents of sets used by query, so processes with the same index state give the same ETag
+    """
+    etag_key = await to_thread(indexed_etag_key, view, query)
+    return '"{}"'.format(sha1(etag_key.encode()).hexdigest())
+
+
+def filter_indexed_blacklist(view: MembershipIndexView, query: BlacklistQuery) -> tuple[array, list[tuple[int, int]]]:
+    """Sorted banned addresses: banned groups are united and allowed groups are subtracted with bitmaps,
+    allowed networks are removed from sorted addresses. Intervals excluded from lossy aggregation are returned too
+    """
+    banned_bitmap = view.union(query.banned_group_sets)
+    if not query.filter_records:
+        return banned_bitmap.to_array(), []
+    allowed_bitmap = view.union(query.allowed_group_sets)
+    network_intervals = view.sources.allowed_network_intervals
+    excluded_intervals: list[tuple[int, int]] = list()
+    if query.aggregate_prefix is not None and query.aggregate_prefix < ADDRESS_BITS:
+        excluded_intervals = merge_intervals([(address, address) for address in allowed_bitmap] + network_intervals)
+    return without_intervals((banned_bitmap - allowed_bitmap).to_array(), network_intervals), excluded_intervals
+
+
+async def fetch_indexed_blacklist(view: MembershipIndexView, query: BlacklistQuery) -> AsyncGenerator[str, None]:
+    """Blacklist download from membership index (storage is not touched). Records are rendered by blocks of
+    BATCH_SIZE records as in array engine of BlacklistService
+    """
+    filtered_addresses, excluded_intervals = await to_thread(filter_indexed_blacklist, view, query)
+    if query.aggregate_prefix is not None:
+        networks = await to_thread(aggregate_addresses, filtered_addresses, query.aggregate_prefix, excluded_intervals)
+        if query.records_count > 0:
+            networks = networks[: query.records_count]
+        for position in range(0, len(networks), BATCH_SIZE):
+            yield render_networks(networks[position : position + BATCH_SIZE])
+            await a_sleep(0)
+        return
+    if query.records_count > 0:
+        filtered_addresses = filtered_addresses[: query.records_count]
+    for position in range(0, len(filtered_addresses), BATCH_SIZE):
+        yield render_addresses(filtered_addresses[position : position + BATCH_SIZE])
+        await a_sleep(0)
+
+
+membership_index = MembershipIndex()
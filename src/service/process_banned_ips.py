@@ -7,6 +7,7 @@ from typing import Union
 from src.core.settings import MAX_STORAGE_LIST_SIZE
 from src.schemas.addresses_schemas import IpV4AddressList
 from src.schemas.network_schemas import IPv4NetworkList
+from src.utils.ip_utils import IPv4NetworksMatcher
 
 
 def adopt_address_storage(addresses: IpV4AddressList) -> Union[frozenset[IPv4Address], IpV4AddressList]:
@@ -20,13 +21,11 @@ async def without_allowed_ips(
 ) -> AsyncGenerator[IPv4Address, None]:
     """Filter banned IPs"""
     allowed_ips_adopted = adopt_address_storage(allowed_ips)
+    allowed_networks_matcher = IPv4NetworksMatcher(allowed_networks)
     for address in banned_ips:
         if address not in allowed_ips_adopted:
-            address_is_in_allowed_network = False
-            for allowed_network in allowed_networks:
-                if address in allowed_network:
-                    address_is_in_allowed_network = True
-                    logging.warning('Found banned %s in allowed network %s', address, allowed_network)
-            if not address_is_in_allowed_network:
+            if address in allowed_networks_matcher:
+                logging.warning('Found banned %s in allowed networks', address)
+            else:
                 yield address
         await sleep(0)
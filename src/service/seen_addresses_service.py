@@ -0,0 +1,27 @@
+# Moments of re-reporting of addresses already present in sets (re-seen addresses)
+from datetime import datetime as dt_datetime
+from ipaddress import IPv4Address
+from typing import Iterable
+from typing import Optional
+from uuid import UUID
+
+from src.core.settings import CUR_TZ
+from src.core.settings import SEEN_ADDRESSES_SET_ID
+from src.db.base_time_index_db import ITimeIndexDb
+
+
+class SeenAddressesService:
+    """Re-seen addresses are not recorded in usage stream and history, only the latest moment of re-reporting
+    is kept for every address (one sorted set for all addresses categories and groups)
+    """
+
+    def __init__(self, time_index_db: ITimeIndexDb[UUID, IPv4Address], set_id: UUID = SEEN_ADDRESSES_SET_ID):
+        self.__time_index_db = time_index_db
+        self.__set_id = set_id
+
+    async def mark_seen(self, addresses: Iterable[IPv4Address], seen_time: dt_datetime):
+        await self.__time_index_db.set_moments(self.__set_id, addresses, seen_time.timestamp())
+
+    async def last_seen(self, address: IPv4Address) -> Optional[dt_datetime]:
+        moment = (await self.__time_index_db.moments(self.__set_id, [address]))[0]
+        return None if moment is None else dt_datetime.fromtimestamp(moment, tz=CUR_TZ)
@@ -1,6 +1,7 @@
 from dataclasses import dataclass
 from ipaddress import IPv4Address
 from ipaddress import IPv4Network
+from typing import Optional
 from uuid import UUID
 
 from src.core.settings import ALLOWED_ADDRESSES_CATEGORY_NAME
@@ -11,10 +12,14 @@ from src.core.settings import BANNED_ADDRESSES_CATEGORY_NAME
 from src.core.settings import BANNED_ADDRESSES_GROUP_NAME
 from src.core.settings import BANNED_ADDRESSES_GROUPS_HASH_ID
 from src.core.settings import BANNED_ADDRESSES_SET_ID
+from src.db.base_diff_set_db import IDiffSetDb
+from src.db.base_expiry_db import IExpiryDb
 from src.db.base_hash_db_entity import IHashDbEntity
 from src.db.base_set_db import ISetDb
 from src.db.base_set_db_entity import ISetDbEntity
+from src.db.base_time_index_db import ITimeIndexDb
 from src.db.base_union_set_db import IUnionSetDb
+from src.db.base_version_db import IVersionDb
 from src.schemas.set_group_schemas import GroupData
 from src.service.abstract_set_db_entity_service import AbstractSetDBEntityService
 from src.service.abstract_set_db_service import AbstractSetDBService
@@ -24,32 +29,47 @@ from src.service.addresses_db_service import AnyAddressesSetDBEntityService
 from src.service.addresses_db_service import BlackListAddressesSetDBEntityService
 from src.service.addresses_db_service import BlackListAddressesSetDBService
 from src.service.groups_db_service import GroupsDbService
+from src.service.usage_stream_service import UsageStreamAddService
+
+# groups names of addresses categories
+ADDRESS_CATEGORIES_GROUPS = (
+    (BANNED_ADDRESSES_CATEGORY_NAME, BANNED_ADDRESSES_GROUP_NAME),
+    (ALLOWED_ADDRESSES_CATEGORY_NAME, ALLOWED_ADDRESSES_GROUP_NAME),
+)
 
 
 # Groups DB services factory utilities
-def banned_groups_db_service(db_service_adapter: IHashDbEntity) -> GroupsDbService:
+def banned_groups_db_service(
+    db_service_adapter: IHashDbEntity, version_db: Optional[IVersionDb[UUID]] = None
+) -> GroupsDbService:
     """Return service of certain type"""
     return GroupsDbService(
         db_service_adapter,
         BANNED_ADDRESSES_GROUPS_HASH_ID,
         BANNED_ADDRESSES_SET_ID,
+        version_db,
     )
 
 
-def allowed_groups_db_service(db_service_adapter: IHashDbEntity) -> GroupsDbService:
+def allowed_groups_db_service(
+    db_service_adapter: IHashDbEntity, version_db: Optional[IVersionDb[UUID]] = None
+) -> GroupsDbService:
     """Return service of certain type"""
     return GroupsDbService(
         db_service_adapter,
         ALLOWED_ADDRESSES_GROUPS_HASH_ID,
         ALLOWED_ADDRESSES_SET_ID,
+        version_db,
     )
 
 
-def groups_db_service_factory(group_name: str, db_service_adapter: IHashDbEntity) -> GroupsDbService:
+def groups_db_service_factory(
+    group_name: str, db_service_adapter: IHashDbEntity, version_db: Optional[IVersionDb[UUID]] = None
+) -> GroupsDbService:
     if group_name == ALLOWED_ADDRESSES_GROUP_NAME:
-        return allowed_groups_db_service(db_service_adapter)
+        return allowed_groups_db_service(db_service_adapter, version_db)
     elif group_name == BANNED_ADDRESSES_GROUP_NAME:
-        return banned_groups_db_service(db_service_adapter)
+        return banned_groups_db_service(db_service_adapter, version_db)
     else:
         raise ValueError('Incorrect value of group name passed to groups_db_service_factory')
 
@@ -65,8 +85,10 @@ def addresses_db_service_factory(
         raise ValueError('Incorrect value of address category name passed to addresses_db_service_factory')
 
 
-def any_addresses_db_service_factory(set_id: UUID, db_service_adapter: ISetDbEntity) -> AbstractSetDBEntityService:
-    return AnyAddressesSetDBEntityService(db_service_adapter, set_id=set_id)
+def any_addresses_db_service_factory(
+    set_id: UUID, db_service_adapter: ISetDbEntity, version_db: Optional[IVersionDb[UUID]] = None
+) -> AbstractSetDBEntityService:
+    return AnyAddressesSetDBEntityService(db_service_adapter, set_id=set_id, version_db=version_db)
 
 
 def addresses_db_manage_service_factory(address_category_name: str, db_service_adapter: ISetDb) -> AbstractSetDBService:
@@ -82,6 +104,15 @@ def addresses_db_manage_service_factory(address_category_name: str, db_service_a
 class ServiceWithGroupDbAdapters:
     db_service_adapter: ISetDbEntity
     db_hash_service_adapter: IHashDbEntity
+    version_db: Optional[IVersionDb[UUID]] = None
+    # adapter for addresses as integers (bulk operations)
+    db_int_service_adapter: Optional[ISetDbEntity[UUID, int]] = None
+    # adapter for expiry indexes of addresses sets (addresses added with TTL)
+    expiry_db: Optional[IExpiryDb[UUID, IPv4Address]] = None
+    # adapter for time index of re-seen addresses
+    time_index_db: Optional[ITimeIndexDb[UUID, IPv4Address]] = None
+    # service of usage stream written in handlers (with history_stream_enabled set)
+    usage_add_service: Optional[UsageStreamAddService] = None
 
 
 @dataclass
@@ -98,12 +129,16 @@ def addresses_with_groups_db_service_factory(
     )
     if address_category_name == ALLOWED_ADDRESSES_CATEGORY_NAME:
         return ServiceWithGroups(
-            addresses_db_service=AllowedAddressesSetDBEntityService(adapters.db_service_adapter),
+            addresses_db_service=AllowedAddressesSetDBEntityService(
+                adapters.db_service_adapter, version_db=adapters.version_db
+            ),
             groups_db_service=groups_db_service,
         )
     elif address_category_name == BANNED_ADDRESSES_CATEGORY_NAME:
         return ServiceWithGroups(
-            addresses_db_service=BlackListAddressesSetDBEntityService(adapters.db_service_adapter),
+            addresses_db_service=BlackListAddressesSetDBEntityService(
+                adapters.db_service_adapter, version_db=adapters.version_db
+            ),
             groups_db_service=groups_db_service,
         )
     else:
@@ -115,7 +150,11 @@ class ServiceAdapters:
     """AllInOne storage adapters"""
 
     address_set_db_entity: ISetDbEntity[UUID, IPv4Address]
+    address_int_set_db_entity: ISetDbEntity[UUID, int]
     network_set_db_entity: ISetDbEntity[UUID, IPv4Network]
     hash_db_service: IHashDbEntity[UUID, UUID, GroupData]
     set_db: ISetDb[UUID]
     union_set_db: IUnionSetDb[UUID]
+    diff_set_db: IDiffSetDb[UUID]
+    version_db: IVersionDb[UUID]
+    expiry_db: Optional[IExpiryDb[UUID, IPv4Address]] = None
@@ -0,0 +1,53 @@
+# In-process cache of rendered downloads
+from asyncio import to_thread
+from dataclasses import dataclass
+from dataclasses import field
+from typing import Optional
+
+from src.core.config import app_settings
+from src.utils.cache_utils import SizeLimitedLRUCache
+from src.utils.compression_utils import compress
+from src.utils.single_flight_utils import SingleFlight
+
+
+@dataclass
+class DownloadSnapshot:
+    """Rendered download content with compressed variants of it (by content encoding)"""
+
+    body: bytes
+    encoded_bodies: dict[str, bytes] = field(default_factory=dict)
+
+    def size(self) -> int:
+        return len(self.body) + sum(len(x) for x in self.encoded_bodies.values())
+
+
+# cache of rendered blacklist downloads with ETag as a key
+download_snapshot_cache = SizeLimitedLRUCache[str, DownloadSnapshot](
+    app_settings.download_cache_size_mb * 1024 * 1024, DownloadSnapshot.size
+)
+# compressions of snapshots (with ETag and content encoding as a key)
+snapshot_encoding_flights = SingleFlight[tuple[str, str], bytes]()
+
+
+async def get_snapshot_body(etag: str, snapshot: DownloadSnapshot, encoding: Optional[str]) -> bytes:
+    """Get body of snapshot in requested content encoding (None for identity).
+    Compressed variant is made once (in separate thread, concurrent requests await the same compression)
+    and kept in cached snapshot
+    """
+    if encoding is None:
+        return snapshot.body
+    encoded_body = snapshot.encoded_bodies.get(encoding)
+    if encoded_body is None:
+        encoded_body = await snapshot_encoding_flights.do(
+            (etag, encoding), lambda: encode_snapshot(etag, snapshot, encoding)
+        )
+    return encoded_body
+
+
+async def encode_snapshot(etag: str, snapshot: DownloadSnapshot, encoding: str) -> bytes:
+    encoded_body = await to_thread(compress, snapshot.body, encoding)
+    # snapshot is taken out of cache before change and stored again for accounting of its new size
+    download_snapshot_cache.pop(etag)
+    snapshot.encoded_bodies[encoding] = encoded_body
+    download_snapshot_cache.put(etag, snapshot)
+    return encoded_body
@@ -0,0 +1,146 @@
+# Retention of usage stream: the oldest records are archived to segment files and trimmed from stream
+import logging
+from dataclasses import dataclass
+from datetime import datetime as dt_datetime
+from datetime import timedelta
+from pathlib import Path
+from typing import Optional
+from uuid import UUID
+
+from src.core.config import app_settings
+from src.core.settings import MAX_BUNDLE_SIZE
+from src.core.settings import STREAM_USAGE_INFO
+from src.core.settings import USAGE_ARCHIVE_PREFIX
+from src.db.base_stream_db import IStreamDb
+from src.db.base_stream_group_db import StreamGroupInfo
+from src.db.storages.file_segment_storage import FileSegmentStorage
+from src.models.usage_transformation import SURDictTransformation
+from src.schemas.usage_schemas import StreamUsageRecord
+from src.utils.time_utils import get_epoch_time
+from src.utils.time_utils import parse_stream_id
+
+from .change_index_service import AddressChangeIndexService
+from .history_stream_service import record_acknowledged
+from .service_db_factories import ADDRESS_CATEGORIES_GROUPS
+from .service_db_factories import ServiceAdapters
+from .service_db_factories import groups_db_service_factory
+
+
+def get_usage_archive_storage() -> Optional[FileSegmentStorage]:
+    """Archive of trimmed usage records (None if archive directory is not set)"""
+    if app_settings.usage_archive_dir is None:
+        return None
+    return FileSegmentStorage(
+        Path(app_settings.usage_archive_dir),
+        USAGE_ARCHIVE_PREFIX,
+        app_settings.usage_archive_segment_mb * 1024 * 1024,
+        app_settings.usage_archive_max_segments,
+    )
+
+
+@dataclass
+class UsageRetentionReport:
+    archived: int = 0
+    trimmed: int = 0
+    last_trimmed_id: Optional[str] = None
+
+
+class UsageStreamRetentionService:
+    """The oldest records of usage stream (older than max_age or over max_records) are appended to archive
+    by bundles of MAX_BUNDLE_SIZE records, every bundle is trimmed from stream after appending
+    """
+
+    def __init__(
+        self,
+        stream_db_obj: IStreamDb[UUID, str, StreamUsageRecord],
+        archive_storage: Optional[FileSegmentStorage],
+        stream_id: UUID = STREAM_USAGE_INFO,
+    ):
+        self.__stream_db_obj = stream_db_obj
+        self.__archive_storage = archive_storage
+        self.__stream_id = stream_id
+
+    async def flush(self, records: list[tuple[str, StreamUsageRecord]], report: UsageRetentionReport):
+        if not records:
+            return
+        if self.__archive_storage is not None:
+            report.archived += await self.__archive_storage.append(
+                [(record_id, SURDictTransformation.transform_to_storage(record)) for record_id, record in records]
+            )
+        report.trimmed += await self.__stream_db_obj.trim(self.__stream_id, records[-1][0])
+        report.last_trimmed_id = records[-1][0]
+        records.clear()
+
+    async def trim(
+        self,
+        moment: dt_datetime,
+        max_age: Optional[timedelta],
+        max_records: Optional[int],
+        max_run_records: int,
+        group_info: Optional[StreamGroupInfo[str]] = None,
+    ) -> UsageRetentionReport:
+        """Archive and trim records older than max_age and the oldest records over max_records
+        (up to max_run_records records). Records not acknowledged by consumer group of group_info are kept
+        """
+        report = UsageRetentionReport()
+        excess_count = 0
+        if max_records is not None:
+            excess_count = max(0, await self.__stream_db_obj.count(self.__stream_id) - max_records)
+        min_time = get_epoch_time(moment - max_age) if max_age is not None else None
+        records: list[tuple[str, StreamUsageRecord]] = list()
+        processed_count = 0
+        async for record_id, record in self.__stream_db_obj.fetch_records(self.__stream_id):
+            expired = min_time is not None and parse_stream_id(record_id)[0] < min_time
+            if processed_count >= max_run_records or not (expired or processed_count < excess_count):
+                break
+            if group_info is not None and not record_acknowledged(group_info, record_id):
+                break
+            records.append((record_id, record))
+            processed_count += 1
+            if len(records) >= MAX_BUNDLE_SIZE:
+                await self.flush(records, report)
+        await self.flush(records, report)
+        return report
+
+
+async def prune_change_index(
+    change_index: AddressChangeIndexService, adapters: ServiceAdapters, last_trimmed_id: str
+) -> int:
+    """Remove changes of trimmed usage records from index of last changes (indexes of all groups are pruned with
+    index by groups), return count of addresses removed from index of all addresses
+    """
+    address_groups: list[tuple[str, Optional[str]]] = list()
+    if change_index.by_group:
+        for address_category, group_name in ADDRESS_CATEGORIES_GROUPS:
+            groups = await groups_db_service_factory(group_name, adapters.hash_db_service).list_groups()
+            address_groups.extend((address_category, None if x.default else x.group_name) for x in groups)
+    return await change_index.prune(last_trimmed_id, address_groups)
+
+
+def usage_retention_active() -> bool:
+    return app_settings.usage_max_age_days is not None or app_settings.usage_max_records is not None
+
+
+async def trim_usage_stream(
+    stream_db_obj: IStreamDb[UUID, str, StreamUsageRecord],
+    moment: dt_datetime,
+    max_run_records: int,
+    group_info: Optional[StreamGroupInfo[str]] = None,
+) -> UsageRetentionReport:
+    """Enforce usage stream retention settings (records are archived if archive directory is set), records not yet
+    acknowledged by consumer group of group_info are not trimmed
+    """
+    archive_storage = get_usage_archive_storage()
+    retention_service = UsageStreamRetentionService(stream_db_obj, archive_storage)
+    max_age = timedelta(days=app_settings.usage_max_age_days) if app_settings.usage_max_age_days is not None else None
+    if archive_storage is None:
+        return await retention_service.trim(
+            moment, max_age, app_settings.usage_max_records, max_run_records, group_info
+        )
+    with archive_storage.lock() as locked:
+        if not locked:
+            logging.debug('Usage archive is locked by another process, trimming is skipped')
+            return UsageRetentionReport()
+        return await retention_service.trim(
+            moment, max_age, app_settings.usage_max_records, max_run_records, group_info
+        )
@@ -1,21 +1,39 @@
+from array import array
+from asyncio import to_thread
 from datetime import datetime as dt_datetime
 from ipaddress import IPv4Address
+from typing import AsyncGenerator
 from typing import Optional
 from uuid import UUID
 
 from src.core.settings import STREAM_USAGE_INFO
 from src.db.base_stream_db import IStreamDb
+from src.db.base_stream_db import StreamBounds
+from src.db.storages.file_segment_storage import FileSegmentStorage
+from src.models.usage_transformation import SURDictTransformation
 from src.schemas.addresses_schemas import AgentAddressesInfoWithGroup
 from src.schemas.usage_schemas import ActionType
 from src.schemas.usage_schemas import StreamUsageRecord
+from src.utils.ip_array_utils import addresses_array
+from src.utils.time_utils import datetime_from_epoch_time
+from src.utils.time_utils import get_epoch_time
+from src.utils.time_utils import parse_stream_id
+
+from .change_index_service import AddressChangeIndexService
 
 
 class UsageStreamAddService:
-    """Service for adding records to usage stream"""
+    """Service for adding records to usage stream (changes of addresses are recorded in change index if passed)"""
 
-    def __init__(self, stream_id: UUID, stream_db_obj: IStreamDb[UUID, str, StreamUsageRecord]):
+    def __init__(
+        self,
+        stream_id: UUID,
+        stream_db_obj: IStreamDb[UUID, str, StreamUsageRecord],
+        change_index: Optional[AddressChangeIndexService] = None,
+    ):
         self.__stream_id = stream_id
         self.__stream_db_obj = stream_db_obj
+        self.__change_index = change_index
 
     async def add(
         self,
@@ -33,38 +51,96 @@ class UsageStreamAddService:
             addresses=set(usage_info.addresses),
             address_category=address_category,
             address_group=usage_info.address_group,
+            source_agent=usage_info.source_agent,
         )
-        return await self.__stream_db_obj.save_by_timestamp(self.__stream_id, saved_data, timestamp=timestamp)
+        record_id = await self.__stream_db_obj.save_by_timestamp(self.__stream_id, saved_data, timestamp=timestamp)
+        if self.__change_index is not None:
+            await self.__change_index.record(record_id, saved_data)
+        return record_id
 
 
 class UsageStreamReadService:
-    """Service for reading records from usage stream"""
+    """Service for reading records from usage stream (and from archive of trimmed records if passed)"""
 
-    def __init__(self, stream_id: UUID, stream_db_obj: IStreamDb[UUID, str, StreamUsageRecord]):
+    def __init__(
+        self,
+        stream_id: UUID,
+        stream_db_obj: IStreamDb[UUID, str, StreamUsageRecord],
+        archive_storage: Optional[FileSegmentStorage] = None,
+    ):
         self.__stream_id = stream_id
         self.__stream_db_obj = stream_db_obj
+        self.__archive_storage = archive_storage
+
+    @staticmethod
+    async def archive_covers(archive_storage: FileSegmentStorage, start_timestamp: Optional[dt_datetime]) -> bool:
+        """Whether archive has records after start_timestamp (records of whole stream for None)"""
+        last_archived_id = await archive_storage.last_id()
+        if last_archived_id is None:
+            return False
+        return start_timestamp is None or get_epoch_time(start_timestamp) <= parse_stream_id(last_archived_id)[0]
+
+    async def fetch_addresses(
+        self, start_timestamp: Optional[dt_datetime] = None, end_timestamp: Optional[dt_datetime] = None
+    ) -> AsyncGenerator[set[IPv4Address], None]:
+        """Fetching addresses of usage records in time range.
+        Archived records are read too if time range starts before the last archived record
+        """
+        if self.__archive_storage is not None and await self.archive_covers(self.__archive_storage, start_timestamp):
+            async for _, values in self.__archive_storage.fetch_records(start_timestamp, end_timestamp):
+                yield SURDictTransformation.transform_from_storage(values).addresses
+        async for record in self.__stream_db_obj.fetch_records(self.__stream_id, start_timestamp, end_timestamp):
+            yield record[1].addresses
 
     async def read(
         self, start_timestamp: Optional[dt_datetime] = None, end_timestamp: Optional[dt_datetime] = None
     ) -> set[IPv4Address]:
         """Reading data about address usages. Form set with unique data"""
         result: set[IPv4Address] = set()
-        async for record in self.__stream_db_obj.fetch_records(self.__stream_id, start_timestamp, end_timestamp):
-            result |= record[1].addresses
+        async for addresses in self.fetch_addresses(start_timestamp, end_timestamp):
+            result |= addresses
         return result
 
+    async def read_sorted(
+        self, start_timestamp: Optional[dt_datetime] = None, end_timestamp: Optional[dt_datetime] = None
+    ) -> array:
+        """Reading unique addresses of usages as sorted array of addresses (see ip_array_utils)"""
+        result: set[int] = set()
+        async for addresses in self.fetch_addresses(start_timestamp, end_timestamp):
+            result.update(map(int, addresses))
+        return await to_thread(lambda: addresses_array(sorted(result)))
+
+    async def fetch_since(
+        self, after_id: Optional[str] = None, start_timestamp: Optional[dt_datetime] = None
+    ) -> AsyncGenerator[tuple[str, StreamUsageRecord], None]:
+        """Fetching records with ID greater than after_id (if passed) or starting from start_timestamp"""
+        after_id_key = parse_stream_id(after_id) if after_id is not None else None
+        if after_id_key is not None:
+            start_timestamp = datetime_from_epoch_time(after_id_key[0])
+        async for record_id, record in self.__stream_db_obj.fetch_records(self.__stream_id, start_timestamp):
+            if after_id_key is None or parse_stream_id(record_id) > after_id_key:
+                yield record_id, record
+
     async def count(self) -> int:
         """Counting records in usage stream"""
         return await self.__stream_db_obj.count(self.__stream_id)
 
+    async def bounds(self) -> StreamBounds[str]:
+        """Getting bounds of usage stream"""
+        return await self.__stream_db_obj.bounds(self.__stream_id)
+
 
 def get_usage_add_service(
-    stream_db_obj: IStreamDb[UUID, str, StreamUsageRecord], stream_id: Optional[UUID] = None
+    stream_db_obj: IStreamDb[UUID, str, StreamUsageRecord],
+    stream_id: Optional[UUID] = None,
+    change_index: Optional[AddressChangeIndexService] = None,
 ) -> UsageStreamAddService:
-    return UsageStreamAddService(STREAM_USAGE_INFO if stream_id is None else stream_id, stream_db_obj)
+    return UsageStreamAddService(STREAM_USAGE_INFO if stream_id is None else stream_id, stream_db_obj, change_index)
 
 
 def get_usage_read_service(
-    stream_db_obj: IStreamDb[UUID, str, StreamUsageRecord], stream_id: Optional[UUID] = None
+    stream_db_obj: IStreamDb[UUID, str, StreamUsageRecord],
+    stream_id: Optional[UUID] = None,
+    archive_storage: Optional[FileSegmentStorage] = None,
 ) -> UsageStreamReadService:
-    return UsageStreamReadService(STREAM_USAGE_INFO if stream_id is None else stream_id, stream_db_obj)
+    return UsageStreamReadService(STREAM_USAGE_INFO if stream_id is None else stream_id, stream_db_obj, archive_storage)
@@ -1,11 +1,20 @@
+from asyncio import sleep as a_sleep
+from asyncio import to_thread
+from dataclasses import dataclass
 from ipaddress import IPv4Address
 from typing import AsyncGenerator
+from typing import Optional
 from uuid import UUID
 
 from fastapi import status
 
+from src.core.settings import BATCH_SIZE
 from src.utils.address_list_utils import AddressListServiceError
 from src.utils.address_list_utils import retrieve_sets_from_params
+from src.utils.ip_array_utils import addresses_array
+from src.utils.ip_array_utils import aggregate_addresses
+from src.utils.ip_array_utils import render_networks
+from src.utils.ip_utils import merge_networks_to_intervals
 
 from .abstract_set_db_entity_service import AbstractSetDBEntityService
 from .networks_db_service import AllowedNetworksSetDBEntityService
@@ -16,6 +25,16 @@ class WhiteListServiceError(AddressListServiceError):
     pass
 
 
+@dataclass(frozen=True)
+class WhitelistQuery:
+    """Normalized parameters of whitelist download"""
+
+    allowed_group_sets: tuple[UUID, ...]
+    with_networks: bool
+    records_count: int
+    aggregate_prefix: Optional[int] = None
+
+
 class WhitelistService:
     def __init__(self, service_adapter_obj: ServiceAdapters):
         self.__service_adapter_obj: ServiceAdapters = service_adapter_obj
@@ -23,7 +42,10 @@ class WhitelistService:
     async def retrieve_sets_from_params(self, groups_category_name: str, groups_in_param_query: str) -> list[UUID]:
         try:
             return await retrieve_sets_from_params(
-                self.__service_adapter_obj.hash_db_service, groups_category_name, groups_in_param_query
+                self.__service_adapter_obj.hash_db_service,
+                groups_category_name,
+                groups_in_param_query,
+                self.__service_adapter_obj.version_db,
             )
         except ValueError as e:
             # catch data validation errors here
@@ -58,3 +80,42 @@ class WhitelistService:
             records_count += 1
             if records_count == stop_records_count:
                 return
+
+    async def get_allowed_networks(
+        self,
+        allowed_set_id: UUID,
+        with_networks: bool,
+        stop_records_count: int,
+        aggregate_prefix: int,
+    ) -> AsyncGenerator[str, None]:
+        """Allowed addresses (and networks) aggregated to the minimal list of networks"""
+        network_intervals: list[tuple[int, int]] = list()
+        if with_networks:
+            allowed_networks_service_obj = AllowedNetworksSetDBEntityService(
+                self.__service_adapter_obj.network_set_db_entity
+            )
+            network_intervals = merge_networks_to_intervals(
+                [x async for x in allowed_networks_service_obj.fetch_records()]
+            )
+        allowed_addresses_service_obj = AbstractSetDBEntityService[int](
+            self.__service_adapter_obj.address_int_set_db_entity, allowed_set_id
+        )
+        allowed_addresses = addresses_array(sorted([x async for x in allowed_addresses_service_obj.fetch_records()]))
+        networks = await to_thread(aggregate_addresses, allowed_addresses, aggregate_prefix, (), network_intervals)
+        if stop_records_count > 0:
+            networks = networks[:stop_records_count]
+        for position in range(0, len(networks), BATCH_SIZE):
+            yield render_networks(networks[position : position + BATCH_SIZE])
+            await a_sleep(0)
+
+    def fetch_allowed_addresses(
+        self,
+        allowed_set_id: UUID,
+        with_networks: bool,
+        stop_records_count: int,
+        aggregate_prefix: Optional[int] = None,
+    ) -> AsyncGenerator[str, None]:
+        """Get allowed addresses (or networks if aggregate_prefix is passed)"""
+        if aggregate_prefix is not None:
+            return self.get_allowed_networks(allowed_set_id, with_networks, stop_records_count, aggregate_prefix)
+        return self.get_allowed_addresses(allowed_set_id, with_networks, stop_records_count)
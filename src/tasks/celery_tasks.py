@@ -5,14 +5,16 @@ from typing import Any
 from typing import Optional
 from uuid import UUID
 
-from src.api.di.db_di_routines import get_stream_db_adapter_job
+from src.api.di.db_di_routines import get_change_index
 from src.celery_app import app as celery_app
+from src.db.adapters.redis_stream_db_adapter import RedisStreamDbAdapter
+from src.db.adapters.usage_stream_db_adapter import UsageStreamRedisAdapter
 from src.db.storages.redis_db import context_async_redis_client
 from src.schemas.addresses_schemas import AgentAddressesInfoWithGroup
 from src.schemas.usage_schemas import ActionType
 from src.service.history_db_service import HistoryDBService
 from src.service.history_processors import HistoryProcessor
-from src.service.usage_stream_service import UsageStreamAddService
+from src.service.usage_stream_service import get_usage_add_service
 
 
 async def celery_update_history_task_exec(
@@ -39,8 +41,12 @@ async def celery_update_usage_info_task_exec(
     usage_stream_id: UUID, action: ActionType, usage_info: AgentAddressesInfoWithGroup, address_category: Optional[str]
 ):
     """Async version for celery execution"""
-    async for stream_db_obj in get_stream_db_adapter_job('Stream usage celery task'):
-        usage_add_service = UsageStreamAddService(usage_stream_id, stream_db_obj)
+    async with context_async_redis_client('Stream usage celery task') as redis_client_obj:
+        usage_add_service = get_usage_add_service(
+            UsageStreamRedisAdapter(RedisStreamDbAdapter(redis_client_obj)),
+            usage_stream_id,
+            get_change_index(redis_client_obj),
+        )
         await usage_add_service.add(action, usage_info, address_category)
         await a_sleep(0)
 
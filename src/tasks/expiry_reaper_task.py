@@ -0,0 +1,59 @@
+import logging
+from asyncio import CancelledError
+from asyncio import sleep as a_sleep
+from ipaddress import IPv4Address
+
+from src.api.di.db_di_routines import get_change_index
+from src.api.di.db_di_routines import get_download_adapters
+from src.core.config import app_settings
+from src.core.settings import EXPIRY_SOURCE_AGENT
+from src.db.adapters.redis_stream_db_adapter import RedisStreamDbAdapter
+from src.db.adapters.usage_stream_db_adapter import UsageStreamRedisAdapter
+from src.db.storages.redis_db import RedisAsyncio
+from src.db.storages.redis_db import context_async_redis_client
+from src.schemas.addresses_schemas import AgentAddressesInfoWithGroup
+from src.schemas.base_input_schema import now_cur_tz
+from src.schemas.set_group_schemas import GroupSet
+from src.schemas.usage_schemas import ActionType
+from src.service.address_expiry_service import AddressExpiryReaper
+from src.service.history_db_service import HistoryDBService
+from src.service.history_processors import HistoryProcessor
+from src.service.usage_stream_service import get_usage_add_service
+
+
+async def reap_expired_addresses(client_obj: RedisAsyncio) -> int:
+    """Remove expired addresses, record removals in usage stream and history as deletions (history is updated by
+    history workers with history_stream_enabled set)
+    """
+
+    async def record_expired(address_category: str, group: GroupSet, addresses: list[IPv4Address]):
+        agent_info = AgentAddressesInfoWithGroup(
+            source_agent=EXPIRY_SOURCE_AGENT,
+            action_time=now_cur_tz(),
+            addresses=addresses,
+            address_group=None if group.default else group.group_name,
+        )
+        usage_add_service = get_usage_add_service(
+            UsageStreamRedisAdapter(RedisStreamDbAdapter(client_obj)), change_index=get_change_index(client_obj)
+        )
+        await usage_add_service.add(ActionType.remove_action, agent_info, address_category)
+        if not app_settings.history_stream_enabled:
+            history_processor_obj = HistoryProcessor(HistoryDBService(client_obj))
+            await history_processor_obj.update_history(agent_info, ActionType.remove_action, address_category)
+
+    return await AddressExpiryReaper(get_download_adapters(client_obj), record_expired).reap()
+
+
+async def reap_expired_addresses_task():
+    """Task started on application startup (with expiry_reap_seconds set).
+    Remove addresses added with TTL after expiration
+    """
+    while True:
+        try:
+            async with context_async_redis_client('expiry reaper') as client_obj:
+                await reap_expired_addresses(client_obj)
+        except CancelledError:
+            raise
+        except Exception as e:
+            logging.error('Error on removal of expired addresses: %s', e)
+        await a_sleep(app_settings.expiry_reap_seconds)
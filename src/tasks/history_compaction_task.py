@@ -0,0 +1,45 @@
+import logging
+from asyncio import CancelledError
+from asyncio import sleep as a_sleep
+
+from src.core.config import app_settings
+from src.core.settings import HISTORY_COMPACTION_RECORDS
+from src.db.storages.redis_db import RedisAsyncio
+from src.db.storages.redis_db import context_async_redis_client
+from src.schemas.base_input_schema import now_cur_tz
+from src.service.history_compaction_service import HistoryCompactionReport
+from src.service.history_compaction_service import HistoryCompactionService
+from src.service.history_compaction_service import HistoryRetentionPolicy
+from src.service.history_db_service import HistoryDBService
+
+
+async def compact_history(client_obj: RedisAsyncio) -> HistoryCompactionReport:
+    """Enforce history retention policy on the next part of history hash"""
+    report = await HistoryCompactionService(
+        HistoryDBService(client_obj), HistoryRetentionPolicy.from_settings()
+    ).compact(HISTORY_COMPACTION_RECORDS, now_cur_tz())
+    logging.log(
+        logging.INFO if report.rewritten or report.removed else logging.DEBUG,
+        'History compaction: scanned %d, rewritten %d, removed %d, reclaimed bytes %d%s',
+        report.scanned,
+        report.rewritten,
+        report.removed,
+        report.reclaimed_bytes,
+        ', walk of history is completed' if report.completed else '',
+    )
+    return report
+
+
+async def compact_history_task():
+    """Task started on application startup (with history_compaction_seconds and retention settings set).
+    Crop and remove histories of addresses according to retention policy
+    """
+    while True:
+        try:
+            async with context_async_redis_client('history compaction') as client_obj:
+                await compact_history(client_obj)
+        except CancelledError:
+            raise
+        except Exception as e:
+            logging.error('Error on history compaction: %s', e)
+        await a_sleep(app_settings.history_compaction_seconds)
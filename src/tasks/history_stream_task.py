@@ -0,0 +1,60 @@
+import logging
+from asyncio import CancelledError
+from asyncio import sleep as a_sleep
+from os import getpid
+from socket import gethostname
+from time import monotonic
+
+from src.core.config import app_settings
+from src.core.settings import HISTORY_WORKER_BLOCK_MS
+from src.core.settings import HISTORY_WORKER_RECORDS
+from src.db.adapters.redis_stream_group_db_adapter import RedisStreamGroupDbAdapter
+from src.db.adapters.usage_stream_db_adapter import UsageStreamGroupRedisAdapter
+from src.db.storages.redis_db import context_async_redis_client
+from src.service.history_db_service import HistoryDBService
+from src.service.history_processors import HistoryProcessor
+from src.service.history_stream_service import HistoryStreamWorker
+from src.service.history_stream_service import create_history_group
+
+
+def history_consumer_name() -> str:
+    """Name of consumer of process in consumer group (unique for every worker process)"""
+    return f'{gethostname()}-{getpid()}'
+
+
+async def create_history_group_task():
+    """Create consumer group of history workers on application startup (with history_stream_enabled set, regardless
+    of history_stream_worker_in_app), so usage records are kept for workers of other processes started later
+    """
+    async with context_async_redis_client('history consumer group') as client_obj:
+        await create_history_group(UsageStreamGroupRedisAdapter(RedisStreamGroupDbAdapter(client_obj)))
+
+
+async def history_stream_worker_task():
+    """Task started on application startup (with history_stream_enabled and history_stream_worker_in_app set) and by
+    manage.py worker history. Apply usage stream records to history, claim records pending on failed workers
+    """
+    consumer_name = history_consumer_name()
+    min_idle_ms = int(app_settings.history_stream_min_idle_seconds * 1000)
+    while True:
+        try:
+            async with context_async_redis_client('history stream worker') as client_obj:
+                worker = HistoryStreamWorker(
+                    UsageStreamGroupRedisAdapter(RedisStreamGroupDbAdapter(client_obj)),
+                    HistoryProcessor(HistoryDBService(client_obj)),
+                    consumer_name,
+                )
+                await worker.start()
+                claim_time = monotonic()
+                while True:
+                    if monotonic() >= claim_time:
+                        recovered_count = await worker.recover(min_idle_ms, HISTORY_WORKER_RECORDS)
+                        if recovered_count:
+                            logging.info('Pending usage records are applied to history, count: %d', recovered_count)
+                        claim_time = monotonic() + app_settings.history_stream_claim_seconds
+                    await worker.process_new(HISTORY_WORKER_RECORDS, HISTORY_WORKER_BLOCK_MS)
+        except CancelledError:
+            raise
+        except Exception as e:
+            logging.error('Error on history update from usage stream: %s', e)
+        await a_sleep(app_settings.history_stream_claim_seconds)
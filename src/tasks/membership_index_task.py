@@ -0,0 +1,30 @@
+import logging
+from asyncio import CancelledError
+from asyncio import sleep as a_sleep
+
+from src.api.di.db_di_routines import get_download_adapters
+from src.core.config import app_settings
+from src.db.adapters.redis_stream_db_adapter import RedisStreamDbAdapter
+from src.db.adapters.usage_stream_db_adapter import UsageStreamRedisAdapter
+from src.db.storages.redis_db import context_async_redis_client
+from src.service.membership_index_service import membership_index
+from src.service.usage_stream_service import get_usage_read_service
+
+
+async def refresh_membership_index_task():
+    """Task started on application startup (with membership index enabled).
+    Build membership index and keep it current with changes from usage stream
+    """
+    while True:
+        try:
+            async with context_async_redis_client('membership index refresh') as client_obj:
+                await membership_index.refresh(
+                    get_download_adapters(client_obj),
+                    get_usage_read_service(UsageStreamRedisAdapter(RedisStreamDbAdapter(client_obj))),
+                    app_settings.membership_index_rebuild_seconds,
+                )
+        except CancelledError:
+            raise
+        except Exception as e:
+            logging.error('Error on refresh of membership index: %s', e)
+        await a_sleep(app_settings.membership_index_refresh_seconds)
@@ -2,6 +2,8 @@ import logging
 from uuid import UUID
 
 from src.api.di.db_di_routines import get_set_db_adapter
+from src.service.derived_sets_cache_service import SetsTeardown
+from src.service.derived_sets_cache_service import derived_sets_cache
 
 
 async def delete_temp_sets_bg(erased_sets: list[UUID]):
@@ -9,3 +11,12 @@ async def delete_temp_sets_bg(erased_sets: list[UUID]):
         for eliminated_set in erased_sets:
             await set_db_adapter_obj.del_set(eliminated_set)
             logging.debug('Deleting temporarily set in background, set ID: %s', eliminated_set)
+
+
+async def teardown_sets_bg(teardown: SetsTeardown):
+    """Release cached derived sets (evicted unused ones are deleted) and delete temporarily sets"""
+    if teardown.released:
+        async for set_db_adapter_obj in get_set_db_adapter():
+            await derived_sets_cache.release(set_db_adapter_obj, teardown.released)
+    if teardown.deleted:
+        await delete_temp_sets_bg(teardown.deleted)
@@ -0,0 +1,65 @@
+import logging
+from asyncio import CancelledError
+from asyncio import sleep as a_sleep
+
+from src.api.di.db_di_routines import get_change_index
+from src.api.di.db_di_routines import get_download_adapters
+from src.core.config import app_settings
+from src.core.settings import HISTORY_CONSUMER_GROUP
+from src.core.settings import STREAM_USAGE_INFO
+from src.core.settings import USAGE_RETENTION_RECORDS
+from src.db.adapters.redis_stream_db_adapter import RedisStreamDbAdapter
+from src.db.adapters.redis_stream_group_db_adapter import RedisStreamGroupDbAdapter
+from src.db.adapters.usage_stream_db_adapter import UsageStreamGroupRedisAdapter
+from src.db.adapters.usage_stream_db_adapter import UsageStreamRedisAdapter
+from src.db.base_stream_group_db import StreamGroupInfo
+from src.db.storages.redis_db import context_async_redis_client
+from src.schemas.base_input_schema import now_cur_tz
+from src.service.usage_retention_service import prune_change_index
+from src.service.usage_retention_service import trim_usage_stream
+
+
+async def trim_usage_stream_task():
+    """Task started on application startup (with usage_retention_seconds and retention settings set).
+    Archive and trim the oldest records of usage stream
+    """
+    while True:
+        try:
+            async with context_async_redis_client('usage stream retention') as client_obj:
+                group_info = None
+                if app_settings.history_stream_enabled:
+                    # records not yet applied to history by history workers are kept (all records are kept while
+                    # consumer group is absent: nothing is acknowledged by it)
+                    group_info = (
+                        await UsageStreamGroupRedisAdapter(RedisStreamGroupDbAdapter(client_obj)).group_info(
+                            STREAM_USAGE_INFO, HISTORY_CONSUMER_GROUP
+                        )
+                        or StreamGroupInfo[str]()
+                    )
+                report = await trim_usage_stream(
+                    UsageStreamRedisAdapter(RedisStreamDbAdapter(client_obj)),
+                    now_cur_tz(),
+                    USAGE_RETENTION_RECORDS,
+                    group_info,
+                )
+                change_index = get_change_index(client_obj)
+                pruned_count = 0
+                if report.last_trimmed_id is not None and change_index is not None:
+                    # index of last changes covers the same time range as usage stream
+                    pruned_count = await prune_change_index(
+                        change_index, get_download_adapters(client_obj), report.last_trimmed_id
+                    )
+            if report.trimmed:
+                logging.info(
+                    'Usage stream is trimmed, archived records: %d, trimmed records: %d, last trimmed ID: %s, '
+                    'addresses removed from index of last changes: %d',
+                    report.archived,
+                    report.trimmed,
+                    report.last_trimmed_id,
+                    pruned_count,
+                )
+        except CancelledError:
+            raise
+        except Exception as e:
+            logging.error('Error on usage stream retention: %s', e)
+        await a_sleep(app_settings.usage_retention_seconds)
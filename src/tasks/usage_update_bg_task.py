@@ -1,10 +1,13 @@
 from typing import Optional
 from uuid import UUID
 
-from src.api.di.db_di_routines import get_stream_db_adapter
+from src.api.di.db_di_routines import get_change_index
+from src.db.adapters.redis_stream_db_adapter import RedisStreamDbAdapter
+from src.db.adapters.usage_stream_db_adapter import UsageStreamRedisAdapter
+from src.db.storages.redis_db import redis_client
 from src.schemas.addresses_schemas import AgentAddressesInfoWithGroup
 from src.schemas.usage_schemas import ActionType
-from src.service.usage_stream_service import UsageStreamAddService
+from src.service.usage_stream_service import get_usage_add_service
 
 
 async def update_usage_bg_task_ns(
@@ -14,6 +17,8 @@ async def update_usage_bg_task_ns(
     Update actual info (timestamp) of adding and deletion of banned addresses
     Use no session in background task call
     """
-    async for stream_db_obj in get_stream_db_adapter():
-        usage_add_service = UsageStreamAddService(usage_stream_id, stream_db_obj)
+    async for client_obj in redis_client():
+        usage_add_service = get_usage_add_service(
+            UsageStreamRedisAdapter(RedisStreamDbAdapter(client_obj)), usage_stream_id, get_change_index(client_obj)
+        )
         await usage_add_service.add(action, usage_info, address_category)
@@ -12,6 +12,7 @@ from pydantic_settings import BaseSettings
 
 from src.core.config_redis import RedisConfig
 from src.core.settings import REDIS_DOCKER_IMAGE_NAME
+from src.service.groups_cache_service import groups_cache
 from src.utils.subprocess_utils import execute_command
 from src.utils.subprocess_utils import logging_sp_exec_error
 
@@ -73,3 +74,9 @@ def redis_env_for_test() -> Generator[RedisForTestConfig, None, None]:
         # No redis configuration file detected!
         redis_config_for_test_obj = RedisForTestConfig(False, None)
         yield redis_config_for_test_obj
+
+
+@pytest.fixture(autouse=True)
+def clear_groups_cache():
+    # groups cache is shared by process, versions of memory storages start from zero for every test
+    groups_cache.clear()
@@ -0,0 +1,75 @@
+# Tests for DiffSetDb classes
+from typing import AsyncGenerator
+from uuid import UUID
+from uuid import uuid4
+
+import pytest
+import pytest_asyncio
+from redis.asyncio import Redis as RedisAsyncio
+
+from src.core.settings import SET_EXPIRE_SECONDS
+from src.db.adapters.diff_set_db_str_adapter import DiffSetDbTransformUUIDAdapter
+from src.db.adapters.redis_diff_set_db_adapter import RedisDiffSetDbAdapter
+from src.db.adapters.redis_set_db_adapter import RedisSetDbAdapter
+from src.db.adapters.redis_set_db_entity_adapter import RedisSetDbEntityAdapter
+from src.db.adapters.set_db_str_adapter import SetDbStrAdapterUUID
+from src.db.adapters.union_set_db_str_adapter import generate_str_uuid
+from src.db.base_diff_set_db import IDiffSetDb
+from src.db.base_set_db import ISetDb
+from src.db.base_set_db_entity import ISetDbEntity
+from src.db.storages.memory_set_storage import MemorySetStorage
+
+from .classes_for_set_db_test import SetDbEntityStrIntAdapter
+from .classes_for_set_db_test import SetTestData
+
+
+async def run_test_diff_set_db(
+    test_data: list[SetTestData[UUID, int]],
+    set_db_obj: ISetDb[UUID],
+    diff_set_db_obj: IDiffSetDb[UUID],
+    set_db_entity_obj: ISetDbEntity[UUID, int],
+):
+    for test_record in test_data:
+        await set_db_entity_obj.add_to_set(test_record.set_id, test_record.set_data)
+    first_set, second_set, third_set = (set(x.set_data) for x in test_data[:3])
+    first_set_id, second_set_id, third_set_id = (x.set_id for x in test_data[:3])
+    checked_diffs: tuple[tuple[tuple[list[UUID], list[UUID]], set[int]], ...] = (
+        (([first_set_id], [third_set_id]), first_set - third_set),
+        (([first_set_id, second_set_id], [third_set_id]), (first_set | second_set) - third_set),
+        (([first_set_id], [second_set_id, third_set_id]), first_set - second_set - third_set),
+        (([first_set_id, second_set_id], []), first_set | second_set),
+    )
+    for (set_ids, excluded_set_ids), expected_set in checked_diffs:
+        diff_set_id = await diff_set_db_obj.diff_set(set_ids, excluded_set_ids, SET_EXPIRE_SECONDS)
+        assert {x async for x in set_db_entity_obj.fetch_records(diff_set_id)} == expected_set
+        for set_id in set_ids:
+            assert await set_db_entity_obj.count(set_id) > 0, 'Source sets should not be changed'
+        await set_db_obj.del_set(diff_set_id)
+    for test_record in test_data:
+        await set_db_obj.del_set(test_record.set_id)
+
+
+@pytest.mark.asyncio
+async def test_memory_diff_set_db(union_set_test_data: list[SetTestData[UUID, int]]):
+    storage_obj = MemorySetStorage[UUID, int]()
+    await run_test_diff_set_db(
+        union_set_test_data,
+        storage_obj.set_db_adapter(),
+        storage_obj.diff_set_db_adapter(uuid4),
+        storage_obj.set_db_entity_adapter(),
+    )
+
+
+@pytest_asyncio.fixture
+async def redis_client_obj(redis_connection_pool) -> AsyncGenerator[RedisAsyncio, None]:
+    yield RedisAsyncio.from_pool(redis_connection_pool.connection_pool)
+
+
+@pytest.mark.asyncio
+async def test_redis_diff_set_db(redis_client_obj: RedisAsyncio, union_set_test_data: list[SetTestData[UUID, int]]):
+    await run_test_diff_set_db(
+        union_set_test_data,
+        SetDbStrAdapterUUID(RedisSetDbAdapter(redis_client_obj)),
+        DiffSetDbTransformUUIDAdapter(RedisDiffSetDbAdapter(redis_client_obj, generate_str_uuid)),
+        SetDbEntityStrIntAdapter(RedisSetDbEntityAdapter(redis_client_obj)),
+    )
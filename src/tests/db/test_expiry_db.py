@@ -0,0 +1,78 @@
+from ipaddress import IPv4Address
+from typing import AsyncGenerator
+from uuid import UUID
+from uuid import uuid4
+
+import pytest
+import pytest_asyncio
+from redis.asyncio import Redis as RedisAsyncio
+
+from src.db.adapters.expiry_db_str_adapter import ExpiryDbStrAdapterIpAddress
+from src.db.adapters.memory_expiry_db_adapter import MemoryExpiryDbAdapter
+from src.db.adapters.redis_expiry_db_adapter import RedisExpiryDbAdapter
+from src.db.adapters.redis_set_db_entity_adapter import RedisSetDbEntityAdapter
+from src.db.adapters.set_db_entity_str_adapter import SetDbEntityStrAdapterIpAddress
+from src.db.base_expiry_db import IExpiryDb
+from src.db.base_set_db_entity import ISetDbEntity
+from src.db.storages.memory_set_storage import MemorySetStorage
+
+ADDRESSES = [IPv4Address('10.0.0.1'), IPv4Address('10.0.0.2'), IPv4Address('10.0.0.3')]
+
+
+async def run_test_expiry_db(
+    expiry_db: IExpiryDb[UUID, IPv4Address],
+    set_db_entity: ISetDbEntity[UUID, IPv4Address],
+    set_id: UUID,
+    data_set_id: UUID,
+):
+    assert await expiry_db.pop_expired(set_id, data_set_id, 100, 10) == [], 'Empty index should have no expired values'
+    assert await expiry_db.count(set_id) == 0
+    await set_db_entity.add_to_set(data_set_id, ADDRESSES)
+    assert await expiry_db.set_expiry(set_id, ADDRESSES[:2], 10) == 2
+    assert await expiry_db.set_expiry(set_id, ADDRESSES[1:], 20) == 1, 'Expiration moment should be replaced'
+    assert await expiry_db.count(set_id) == 3
+    assert await expiry_db.pop_expired(set_id, data_set_id, 5, 10) == []
+    assert await expiry_db.pop_expired(set_id, data_set_id, 15, 10) == [(ADDRESSES[0], True)]
+    assert not await set_db_entity.contains(data_set_id, ADDRESSES[0]), 'Expired value should be removed from set'
+    assert await expiry_db.pop_expired(set_id, data_set_id, 15, 10) == [], 'Expired values should be removed from index'
+    assert await expiry_db.clear_expiry(set_id, ADDRESSES[2:]) == 1
+    # value removed from set before expiration is only removed from index
+    await set_db_entity.del_from_set(data_set_id, ADDRESSES[1:2])
+    assert await expiry_db.pop_expired(set_id, data_set_id, 25, 10) == [(ADDRESSES[1], False)]
+    assert await set_db_entity.contains(data_set_id, ADDRESSES[2]), 'Value without expiration should be kept'
+
+    await expiry_db.set_expiry(set_id, ADDRESSES, 30)
+    assert (
+        len(await expiry_db.pop_expired(set_id, data_set_id, 30, 2)) == 2
+    ), 'Expired values should be limited by count'
+    assert len(await expiry_db.pop_expired(set_id, data_set_id, 30, 2)) == 1
+
+
+@pytest.mark.asyncio
+async def test_memory_expiry_db():
+    set_storage = MemorySetStorage[str, str]()
+    await run_test_expiry_db(
+        ExpiryDbStrAdapterIpAddress(MemoryExpiryDbAdapter(set_storage.set_db_entity_adapter())),
+        SetDbEntityStrAdapterIpAddress(set_storage.set_db_entity_adapter()),
+        uuid4(),
+        uuid4(),
+    )
+
+
+@pytest_asyncio.fixture
+async def redis_expiry_db(
+    redis_connection_pool,
+) -> AsyncGenerator[tuple[IExpiryDb[UUID, IPv4Address], ISetDbEntity[UUID, IPv4Address], UUID, UUID], None]:
+    client = RedisAsyncio.from_pool(redis_connection_pool.connection_pool)
+    set_id, data_set_id = uuid4(), uuid4()
+    yield ExpiryDbStrAdapterIpAddress(RedisExpiryDbAdapter(client)), SetDbEntityStrAdapterIpAddress(
+        RedisSetDbEntityAdapter(client)
+    ), set_id, data_set_id
+    await client.delete(str(set_id), str(data_set_id))
+
+
+@pytest.mark.asyncio
+async def test_redis_expiry_db(
+    redis_expiry_db: tuple[IExpiryDb[UUID, IPv4Address], ISetDbEntity[UUID, IPv4Address], UUID, UUID]
+):
+    await run_test_expiry_db(*redis_expiry_db)
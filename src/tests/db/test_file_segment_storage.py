@@ -0,0 +1,37 @@
+import pytest
+
+from src.db.storages.file_segment_storage import FileSegmentStorage
+from src.utils.time_utils import datetime_from_epoch_time
+
+
+def records(first: int, count: int) -> list[tuple[str, dict[str, str]]]:
+    return [(f'{1000 * x}-0', {'value': str(x)}) for x in range(first, first + count)]
+
+
+@pytest.mark.asyncio
+async def test_file_segment_storage(tmp_path):
+    storage = FileSegmentStorage(tmp_path, 'test', 1024 * 1024)
+    assert await storage.last_id() is None
+    assert [x async for x in storage.fetch_records()] == []
+    assert await storage.append(records(1, 3)) == 3
+    assert await storage.append(records(2, 3)) == 1, 'Archived records should not be appended again'
+    assert await storage.last_id() == '4000-0'
+    assert [x async for x in storage.fetch_records()] == records(1, 4), 'Appended gzip members should be read'
+    assert len(storage.segments()) == 1
+
+
+@pytest.mark.asyncio
+async def test_file_segment_storage_rotation(tmp_path):
+    # every append starts new segment
+    storage = FileSegmentStorage(tmp_path, 'test', 1, 2)
+    for first in range(1, 10, 2):
+        await storage.append(records(first, 2))
+    assert [storage.segment_id(x) for x in storage.segments()] == [(7000, 0), (9000, 0)], 'Old segments are deleted'
+    assert [x async for x in storage.fetch_records()] == records(7, 4)
+
+    storage = FileSegmentStorage(tmp_path / 'all', 'test', 1)
+    for first in range(1, 10, 2):
+        await storage.append(records(first, 2))
+    # bounds of range are compared with epoch time of IDs, segments before range are skipped
+    fetched = [x async for x in storage.fetch_records(datetime_from_epoch_time(4000), datetime_from_epoch_time(7000))]
+    assert fetched == records(4, 4)
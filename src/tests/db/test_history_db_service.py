@@ -0,0 +1,191 @@
+from datetime import timedelta
+from ipaddress import IPv4Address
+from typing import Any
+from typing import Awaitable
+from typing import cast
+from uuid import uuid4
+
+import pytest
+from redis.asyncio import Redis as RedisAsyncio
+
+from src.core.config import app_settings
+from src.core.settings import BANNED_ADDRESSES_CATEGORY_NAME
+from src.core.settings import HISTORY_CONSUMER_GROUP
+from src.core.settings import RECORD_ENCODING_BINARY
+from src.core.settings import RECORD_ENCODING_JSON
+from src.core.settings import STREAM_USAGE_INFO
+from src.migration.migrate_record_encoding import migrate_history_encoding
+from src.models.record_codecs import is_binary_history_record
+from src.schemas.addresses_schemas import AgentAddressesInfoWithGroup
+from src.schemas.base_input_schema import now_cur_tz
+from src.schemas.usage_schemas import ActionType
+from src.service.history_compaction_service import HistoryCompactionService
+from src.service.history_compaction_service import HistoryRetentionPolicy
+from src.service.history_db_service import HistoryDBService
+from src.service.history_processors import HistoryProcessor
+from src.service.history_stream_service import HistoryStreamWorker
+from src.service.usage_stream_service import get_usage_add_service
+from src.tests.service.test_history_stream_service import usage_stream_storages
+
+ADDRESSES = [IPv4Address(167772160 + i) for i in range(1050)]
+WORKER_ADDRESSES = ADDRESSES[:3]
+
+
+@pytest.mark.asyncio
+async def test_history_processor_batches(redis_connection_pool, monkeypatch):
+    monkeypatch.setattr(app_settings, 'history_depth', 3)
+    client = RedisAsyncio.from_pool(redis_connection_pool.connection_pool)
+    history_db_service = HistoryDBService(client, uuid4())
+    history_processor_obj = HistoryProcessor(history_db_service)
+    action_time = now_cur_tz()
+    try:
+        # the first address is repeated, so it gets two records of the same action
+        added_info = AgentAddressesInfoWithGroup(
+            source_agent='test', addresses=[*ADDRESSES, ADDRESSES[0]], action_time=action_time
+        )
+        assert await history_processor_obj.update_history(
+            added_info, ActionType.add_action, BANNED_ADDRESSES_CATEGORY_NAME
+        ) == len(ADDRESSES), 'History should be created for every address'
+        # earlier action is sorted before existing records
+        deleted_info = AgentAddressesInfoWithGroup(
+            source_agent='test', addresses=ADDRESSES[:2], action_time=action_time - timedelta(seconds=1)
+        )
+        assert (
+            await history_processor_obj.update_history(
+                deleted_info, ActionType.remove_action, BANNED_ADDRESSES_CATEGORY_NAME
+            )
+            == 0
+        ), 'No history should be created for present records'
+        records = await history_db_service.read_records([str(ADDRESSES[0]), str(ADDRESSES[-1]), '10.255.0.1'])
+        assert records[2] is None
+        assert records[0] is not None and records[1] is not None
+        assert records[0].last_update_time == action_time
+        assert [x.action_type for x in records[0].history_records] == [
+            ActionType.remove_action,
+            ActionType.add_action,
+            ActionType.add_action,
+        ]
+        assert [x.action_type for x in records[1].history_records] == [ActionType.add_action]
+    finally:
+        await client.delete(str(history_db_service.set_id))
+
+
+@pytest.mark.asyncio
+async def test_history_compaction(redis_connection_pool, monkeypatch):
+    monkeypatch.setattr(app_settings, 'history_depth', 3)
+    client = RedisAsyncio.from_pool(redis_connection_pool.connection_pool)
+    history_db_service = HistoryDBService(client, uuid4())
+    cursor_id = uuid4()
+    compaction_service = HistoryCompactionService(
+        history_db_service, HistoryRetentionPolicy(max_records=1, idle=timedelta(days=1)), cursor_id
+    )
+    moment = now_cur_tz()
+    try:
+        for address, action_time in (ADDRESSES[0], moment), (ADDRESSES[1], moment - timedelta(days=2)):
+            agent_info = AgentAddressesInfoWithGroup(
+                source_agent='test', addresses=[address, address], action_time=action_time
+            )
+            await HistoryProcessor(history_db_service).update_history(
+                agent_info, ActionType.add_action, BANNED_ADDRESSES_CATEGORY_NAME
+            )
+        report = await compaction_service.compact(10, moment)
+        assert (report.scanned, report.rewritten, report.removed) == (2, 1, 1)
+        assert report.completed and report.reclaimed_bytes > 0
+        records = await history_db_service.read_records([str(ADDRESSES[0]), str(ADDRESSES[1])])
+        assert records[1] is None, 'History of idle address should be removed'
+        assert records[0] is not None and len(records[0].history_records) == 1
+        report = await compaction_service.compact(10, moment)
+        assert (report.scanned, report.rewritten, report.removed, report.reclaimed_bytes) == (1, 0, 0, 0)
+    finally:
+        await client.delete(str(history_db_service.set_id), str(cursor_id))
+
+
+@pytest.mark.asyncio
+async def test_replace_raw_records(redis_connection_pool):
+    client = RedisAsyncio.from_pool(redis_connection_pool.connection_pool)
+    history_db_service = HistoryDBService(client, uuid4())
+    keys = [str(x) for x in ADDRESSES[:4]]
+    try:
+        agent_info = AgentAddressesInfoWithGroup(source_agent='test', addresses=ADDRESSES[:3], action_time=now_cur_tz())
+        await HistoryProcessor(history_db_service).update_history(
+            agent_info, ActionType.add_action, BANNED_ADDRESSES_CATEGORY_NAME
+        )
+        raw_records = dict(zip(keys, await history_db_service.read_raw_records(keys)))
+        records = await history_db_service.read_records(keys)
+        assert records[0] is not None and records[1] is not None and records[3] is None
+        # history changed concurrently is skipped, the other records are applied
+        await history_db_service.write_record(keys[1], records[0])
+        applied_ids = await history_db_service.replace_raw_records(
+            raw_records, {keys[0]: records[1], keys[1]: records[0], keys[3]: records[0]}, [keys[2]]
+        )
+        assert sorted(applied_ids) == sorted([keys[0], keys[2], keys[3]])
+        assert await history_db_service.read_records(keys) == [records[1], records[0], None, records[0]]
+    finally:
+        await client.delete(str(history_db_service.set_id))
+
+
+@pytest.mark.asyncio
+async def test_migrate_history_encoding(redis_connection_pool):
+    client = RedisAsyncio.from_pool(redis_connection_pool.connection_pool)
+    set_id = uuid4()
+    json_db_service = HistoryDBService(client, set_id, RECORD_ENCODING_JSON)
+    binary_db_service = HistoryDBService(client, set_id, RECORD_ENCODING_BINARY)
+    try:
+        # binary records keep milliseconds of timestamps
+        agent_info = AgentAddressesInfoWithGroup(
+            source_agent='test', addresses=ADDRESSES[:10], action_time=now_cur_tz().replace(microsecond=0)
+        )
+        await HistoryProcessor(json_db_service).update_history(
+            agent_info, ActionType.add_action, BANNED_ADDRESSES_CATEGORY_NAME
+        )
+        json_records = await json_db_service.read_records([str(x) for x in ADDRESSES[:10]])
+        assert all(x is not None for x in json_records)
+        assert await migrate_history_encoding(binary_db_service, RECORD_ENCODING_BINARY) == 10
+        assert all(
+            is_binary_history_record(x) for x in (await cast(Awaitable[Any], client.hgetall(str(set_id)))).values()
+        )
+        assert await migrate_history_encoding(binary_db_service, RECORD_ENCODING_BINARY) == 0
+        # histories are read in both encodings
+        assert await json_db_service.read_records([str(x) for x in ADDRESSES[:10]]) == json_records
+        assert await migrate_history_encoding(json_db_service, RECORD_ENCODING_JSON) == 10
+    finally:
+        await client.delete(str(set_id))
+
+
+@pytest.mark.asyncio
+async def test_history_stream_worker(redis_connection_pool, monkeypatch):
+    monkeypatch.setattr(app_settings, 'history_depth', 10)
+    client = RedisAsyncio.from_pool(redis_connection_pool.connection_pool)
+    history_db_service = HistoryDBService(client, uuid4())
+    stream_db_obj, stream_group_db = usage_stream_storages()
+    worker = HistoryStreamWorker(stream_group_db, HistoryProcessor(history_db_service), 'consumer_1')
+    usage_add_service = get_usage_add_service(stream_db_obj)
+    moment = now_cur_tz().replace(microsecond=0)
+    try:
+        assert await worker.start()
+        assert not await worker.start(), 'Consumer group should be created once'
+        for action_type, action_time in (ActionType.add_action, moment), (ActionType.remove_action, moment):
+            agent_info = AgentAddressesInfoWithGroup(
+                source_agent='test', action_time=action_time, addresses=WORKER_ADDRESSES
+            )
+            await usage_add_service.add(action_type, agent_info, BANNED_ADDRESSES_CATEGORY_NAME)
+        assert await worker.process_new(1) == 1
+        # records delivered to failed consumer are recovered by worker
+        failed_records = await stream_group_db.read_group(STREAM_USAGE_INFO, HISTORY_CONSUMER_GROUP, 'failed', 10)
+        assert len(failed_records) == 1
+        assert await worker.process_new(10) == 0
+        assert await worker.recover(0, 1) == 1
+        group_info = await stream_group_db.group_info(STREAM_USAGE_INFO, HISTORY_CONSUMER_GROUP)
+        assert group_info is not None and group_info.pending_count == 0
+
+        # repeated delivery of applied records does not change history
+        await worker.apply(failed_records)
+        for history_record in await history_db_service.read_records([str(x) for x in WORKER_ADDRESSES]):
+            assert history_record is not None
+            assert [x.action_type for x in history_record.history_records] == [
+                ActionType.add_action,
+                ActionType.remove_action,
+            ]
+            assert {x.source for x in history_record.history_records} == {'test'}
+    finally:
+        await client.delete(str(history_db_service.set_id))
@@ -1,4 +1,5 @@
 from typing import AsyncGenerator
+from uuid import uuid4
 
 import pytest
 import pytest_asyncio
@@ -30,3 +31,13 @@ async def test_redis_db_adapter(
 
     redis_stock_info_stream_adapter = StockInfoDictStreamAdapter(redis_stream_adapter)
     await perform_stream_db_test(stocks_set_test_data, redis_stock_info_stream_adapter, order_on_add=True)
+
+
+@pytest.mark.asyncio
+async def test_redis_db_adapter_trim(redis_stream_adapter: IStreamDb):
+    stream_id = str(uuid4())
+    record_ids = [await redis_stream_adapter.save_by_timestamp(stream_id, {'value': str(x)}) for x in range(3)]
+    assert await redis_stream_adapter.trim(stream_id, record_ids[1]) == 2, 'Records up to passed ID should be trimmed'
+    assert [x[0] async for x in redis_stream_adapter.fetch_records(stream_id)] == record_ids[2:]
+    assert (await redis_stream_adapter.bounds(stream_id)).max_deleted_id == record_ids[1]
+    await redis_stream_adapter.trim(stream_id, record_ids[-1])
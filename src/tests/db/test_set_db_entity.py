@@ -1,21 +1,30 @@
 import dataclasses
+from ipaddress import IPv4Address
 from typing import AsyncGenerator
 from typing import Generator
 from uuid import UUID
+from uuid import uuid4
 
 import pytest
 import pytest_asyncio
 from redis.asyncio import Redis as RedisAsyncio
 
+from src.core.settings import ADDRESS_ENCODING_INT
 from src.db.adapters.redis_set_db_entity_adapter import RedisSetDbEntityAdapter
+from src.db.adapters.set_db_entity_str_adapter import address_int_set_db_entity_adapter
+from src.db.adapters.set_db_entity_str_adapter import address_set_db_entity_adapter
 from src.db.base_set_db_entity import ISetDbEntity
 from src.db.storages.memory_set_storage import MemorySetStorage
 
 from .classes_for_set_db_test import Car
 from .classes_for_set_db_test import SetDbEntityStrCarAdapter
+from .classes_for_set_db_test import SetDbEntityStrIntAdapter
 from .classes_for_set_db_test import SetTestData
 from .test_memory_set_storage import STORAGE_DATA_ATTR
 from .tools_for_set_db_entity_test import run_test_set_db_entity
+from .tools_for_set_db_entity_test import run_test_set_db_entity_batches
+from .tools_for_set_db_entity_test import run_test_set_db_entity_changed
+from .tools_for_set_db_entity_test import run_test_set_db_entity_contains_many
 from .tools_for_set_db_entity_test import teardown_test_set_db_entity
 
 
@@ -86,3 +95,70 @@ async def test_redis_set_db_entity(
         redis_set_str_db_entity_data.car_set_absent_test_data,
         redis_set_str_db_entity_data.redis_set_str_db_entity,
     )
+
+
+# batches of records with duplicates in neighbour batches (more than one pipeline for Redis)
+BATCHES_TEST_DATA = [list(range(position, position + 50)) for position in range(0, 2000, 40)]
+
+
+@pytest.mark.asyncio
+async def test_memory_set_db_entity_batches():
+    await run_test_set_db_entity_batches(
+        uuid4(), BATCHES_TEST_DATA, SetDbEntityStrIntAdapter(MemorySetStorage[str, str]().set_db_entity_adapter())
+    )
+
+
+@pytest.mark.asyncio
+async def test_redis_set_db_entity_batches(redis_connection_pool):
+    client = RedisAsyncio.from_pool(redis_connection_pool.connection_pool)
+    await run_test_set_db_entity_batches(
+        uuid4(), BATCHES_TEST_DATA, SetDbEntityStrIntAdapter(RedisSetDbEntityAdapter(client))
+    )
+
+
+@pytest.mark.asyncio
+async def test_memory_set_db_entity_contains_many():
+    await run_test_set_db_entity_contains_many(
+        [uuid4(), uuid4()], [1, 2, 3], 4, SetDbEntityStrIntAdapter(MemorySetStorage[str, str]().set_db_entity_adapter())
+    )
+
+
+@pytest.mark.asyncio
+async def test_redis_set_db_entity_contains_many(redis_connection_pool):
+    client = RedisAsyncio.from_pool(redis_connection_pool.connection_pool)
+    await run_test_set_db_entity_contains_many(
+        [uuid4(), uuid4()], [1, 2, 3], 4, SetDbEntityStrIntAdapter(RedisSetDbEntityAdapter(client))
+    )
+
+
+@pytest.mark.asyncio
+async def test_memory_set_db_entity_changed():
+    await run_test_set_db_entity_changed(
+        uuid4(), [1, 2, 3], SetDbEntityStrIntAdapter(MemorySetStorage[str, str]().set_db_entity_adapter())
+    )
+
+
+@pytest.mark.asyncio
+async def test_redis_set_db_entity_changed(redis_connection_pool):
+    client = RedisAsyncio.from_pool(redis_connection_pool.connection_pool)
+    await run_test_set_db_entity_changed(uuid4(), [1, 2, 3], SetDbEntityStrIntAdapter(RedisSetDbEntityAdapter(client)))
+
+
+@pytest.mark.asyncio
+async def test_address_set_db_entity_encoding():
+    storage_obj = MemorySetStorage[str, str]()
+    set_id = uuid4()
+    address = IPv4Address('10.0.0.1')
+    address_set_db_entity = address_set_db_entity_adapter(storage_obj.set_db_entity_adapter(), ADDRESS_ENCODING_INT)
+    address_int_set_db_entity = address_int_set_db_entity_adapter(
+        storage_obj.set_db_entity_adapter(), ADDRESS_ENCODING_INT
+    )
+    assert await address_set_db_entity.add_to_set(set_id, [address]) == 1
+    assert storage_obj.get_set(str(set_id)) == {str(int(address))}, 'Address should be stored as integer'
+    assert await address_int_set_db_entity.contains(set_id, int(address))
+    assert [x async for x in address_set_db_entity.fetch_records(set_id)] == [address]
+    # text encoding is used by default
+    text_set_id = uuid4()
+    text_set_db_entity = address_set_db_entity_adapter(storage_obj.set_db_entity_adapter())
+    assert await text_set_db_entity.add_to_set(text_set_id, [address]) == 1
+    assert storage_obj.get_set(str(text_set_id)) == {str(address)}
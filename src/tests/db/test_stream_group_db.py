@@ -0,0 +1,68 @@
+from uuid import uuid4
+
+import pytest
+from redis.asyncio import Redis as RedisAsyncio
+
+from src.db.adapters.redis_stream_db_adapter import RedisStreamDbAdapter
+from src.db.adapters.redis_stream_group_db_adapter import RedisStreamGroupDbAdapter
+from src.db.base_stream_db import IStreamDb
+from src.db.base_stream_group_db import IStreamGroupDb
+from src.db.storages.memory_stream_group_storage import MemoryStreamGroupStorage
+from src.db.storages.memory_stream_storage import MemoryStreamTsStorage
+
+GROUP_NAME = 'test_group'
+
+
+async def perform_stream_group_db_test(stream_db: IStreamDb, stream_group_db: IStreamGroupDb):
+    stream_id = str(uuid4())
+    await stream_db.save_by_timestamp(stream_id, {'value': 'before group'})
+    assert await stream_group_db.create_group(stream_id, GROUP_NAME)
+    assert not await stream_group_db.create_group(stream_id, GROUP_NAME), 'Existing group should not be created'
+    record_ids = [await stream_db.save_by_timestamp(stream_id, {'value': str(x)}) for x in range(5)]
+
+    records = await stream_group_db.read_group(stream_id, GROUP_NAME, 'consumer_1', 3)
+    assert records == [(record_ids[x], {'value': str(x)}) for x in range(3)], 'Only new records should be read'
+    assert await stream_group_db.read_group(stream_id, GROUP_NAME, 'consumer_2', 10) == [
+        (record_ids[x], {'value': str(x)}) for x in range(3, 5)
+    ], 'Delivered records should not be read again'
+    assert await stream_group_db.read_group(stream_id, GROUP_NAME, 'consumer_2', 10) == []
+    assert await stream_group_db.ack(stream_id, GROUP_NAME, record_ids[:1] + record_ids[3:]) == 3
+    assert await stream_group_db.ack(stream_id, GROUP_NAME, record_ids[:1]) == 0, 'Records are acknowledged once'
+    group_info = await stream_group_db.group_info(stream_id, GROUP_NAME)
+    assert group_info is not None
+    assert (group_info.last_delivered_id, group_info.pending_count, group_info.min_pending_id) == (
+        record_ids[-1],
+        2,
+        record_ids[1],
+    )
+
+    # records pending on failed consumer are claimed by another consumer in batches
+    next_id, claimed_records = await stream_group_db.claim_pending(stream_id, GROUP_NAME, 'consumer_2', 0, None, 1)
+    assert claimed_records == [(record_ids[1], {'value': '1'})]
+    assert next_id is not None
+    next_id, claimed_records = await stream_group_db.claim_pending(stream_id, GROUP_NAME, 'consumer_2', 0, next_id, 1)
+    assert claimed_records == [(record_ids[2], {'value': '2'})]
+    _, claimed_records = await stream_group_db.claim_pending(stream_id, GROUP_NAME, 'consumer_3', 60000, None, 10)
+    assert claimed_records == [], 'Recently claimed records should not be claimed'
+    # pending records deleted from stream are not claimed
+    await stream_db.delete(stream_id, record_ids[2:3])
+    next_id, claimed_records = await stream_group_db.claim_pending(stream_id, GROUP_NAME, 'consumer_3', 0, None, 10)
+    assert (next_id, claimed_records) == (None, [(record_ids[1], {'value': '1'})])
+    assert await stream_group_db.ack(stream_id, GROUP_NAME, record_ids[1:2]) == 1
+    group_info = await stream_group_db.group_info(stream_id, GROUP_NAME)
+    assert group_info is not None
+    assert (group_info.pending_count, group_info.min_pending_id) == (0, None)
+    assert await stream_group_db.group_info(stream_id, 'absent_group') is None
+    await stream_db.trim(stream_id, record_ids[-1])
+
+
+@pytest.mark.asyncio
+async def test_memory_stream_group_storage():
+    stream_db = MemoryStreamTsStorage[str, dict[str, str]]()
+    await perform_stream_group_db_test(stream_db, MemoryStreamGroupStorage(stream_db))
+
+
+@pytest.mark.asyncio
+async def test_redis_stream_group_db_adapter(redis_connection_pool):
+    client_obj = RedisAsyncio.from_pool(redis_connection_pool.connection_pool)
+    await perform_stream_group_db_test(RedisStreamDbAdapter(client_obj), RedisStreamGroupDbAdapter(client_obj))
@@ -0,0 +1,62 @@
+from ipaddress import IPv4Address
+from typing import AsyncGenerator
+from uuid import UUID
+from uuid import uuid4
+
+import pytest
+import pytest_asyncio
+from redis.asyncio import Redis as RedisAsyncio
+
+from src.db.adapters.memory_time_index_db_adapter import MemoryTimeIndexDbAdapter
+from src.db.adapters.redis_time_index_db_adapter import RedisTimeIndexDbAdapter
+from src.db.adapters.time_index_db_str_adapter import TimeIndexDbStrAdapterIpAddress
+from src.db.base_time_index_db import ITimeIndexDb
+
+ADDRESSES = [IPv4Address('10.0.0.1'), IPv4Address('10.0.0.2'), IPv4Address('10.0.0.3')]
+
+
+async def run_test_time_index_db(time_index_db: ITimeIndexDb[UUID, IPv4Address], set_id: UUID):
+    assert await time_index_db.moments(set_id, ADDRESSES) == [None, None, None], 'Empty index should have no moments'
+    assert await time_index_db.set_moments(set_id, ADDRESSES[:2], 10) == 2
+    assert await time_index_db.set_moments(set_id, ADDRESSES[1:], 20) == 1
+    assert await time_index_db.moments(set_id, ADDRESSES) == [10, 20, 20]
+    assert await time_index_db.set_moments(set_id, ADDRESSES, 15) == 0
+    assert await time_index_db.moments(set_id, ADDRESSES) == [15, 20, 20], 'Later moments should not be replaced'
+    assert await time_index_db.moments(set_id, []) == []
+    # range queries in ascending order of moments with pagination
+    assert await time_index_db.values_in_range(set_id, None, None) == [
+        (ADDRESSES[0], 15),
+        (ADDRESSES[1], 20),
+        (ADDRESSES[2], 20),
+    ]
+    assert await time_index_db.values_in_range(set_id, 16, None) == [(ADDRESSES[1], 20), (ADDRESSES[2], 20)]
+    assert await time_index_db.values_in_range(set_id, None, 15) == [(ADDRESSES[0], 15)]
+    assert await time_index_db.values_in_range(set_id, None, None, 1, 1) == [(ADDRESSES[1], 20)]
+    assert await time_index_db.values_in_range(set_id, None, None, 2) == [(ADDRESSES[2], 20)]
+    assert await time_index_db.values_in_range(set_id, 21, None) == []
+    assert await time_index_db.remove(set_id, [ADDRESSES[0], IPv4Address('10.0.0.4')]) == 1
+    assert await time_index_db.moments(set_id, ADDRESSES) == [None, 20, 20]
+    assert await time_index_db.remove(set_id, []) == 0
+    assert await time_index_db.remove_before(set_id, 20) == 0, 'Values at moment should be kept'
+    assert await time_index_db.remove_before(set_id, 21) == 2
+    assert await time_index_db.moments(set_id, ADDRESSES) == [None, None, None]
+
+
+@pytest.mark.asyncio
+async def test_memory_time_index_db():
+    await run_test_time_index_db(TimeIndexDbStrAdapterIpAddress(MemoryTimeIndexDbAdapter[str, str]()), uuid4())
+
+
+@pytest_asyncio.fixture
+async def redis_time_index_db(
+    redis_connection_pool,
+) -> AsyncGenerator[tuple[ITimeIndexDb[UUID, IPv4Address], UUID], None]:
+    client = RedisAsyncio.from_pool(redis_connection_pool.connection_pool)
+    set_id = uuid4()
+    yield TimeIndexDbStrAdapterIpAddress(RedisTimeIndexDbAdapter(client)), set_id
+    await client.delete(str(set_id))
+
+
+@pytest.mark.asyncio
+async def test_redis_time_index_db(redis_time_index_db: tuple[ITimeIndexDb[UUID, IPv4Address], UUID]):
+    await run_test_time_index_db(*redis_time_index_db)
@@ -0,0 +1,40 @@
+from typing import AsyncGenerator
+from uuid import UUID
+from uuid import uuid4
+
+import pytest
+import pytest_asyncio
+from redis.asyncio import Redis as RedisAsyncio
+
+from src.db.adapters.memory_version_db_adapter import MemoryVersionDbAdapter
+from src.db.adapters.redis_version_db_adapter import RedisVersionDbAdapter
+from src.db.adapters.version_db_str_adapter import VersionDbStrAdapterUUID
+from src.db.base_version_db import IVersionDb
+
+
+async def run_test_version_db(version_db: IVersionDb[UUID]):
+    set_id_one, set_id_two, set_id_absent = uuid4(), uuid4(), uuid4()
+    assert await version_db.versions([set_id_one, set_id_two]) == [0, 0], 'Versions of new sets should be zero'
+    assert await version_db.bump(set_id_one) == 1
+    assert await version_db.bump(set_id_one) == 2
+    assert await version_db.bump(set_id_two) == 1
+    assert await version_db.versions([set_id_two, set_id_absent, set_id_one]) == [1, 0, 2]
+    assert await version_db.versions([]) == []
+
+
+@pytest.mark.asyncio
+async def test_memory_version_db():
+    await run_test_version_db(MemoryVersionDbAdapter[UUID]())
+
+
+@pytest_asyncio.fixture
+async def redis_version_db(redis_connection_pool) -> AsyncGenerator[IVersionDb[UUID], None]:
+    client = RedisAsyncio.from_pool(redis_connection_pool.connection_pool)
+    versions_hash_id = str(uuid4())
+    yield VersionDbStrAdapterUUID(RedisVersionDbAdapter(client, versions_hash_id))
+    await client.delete(versions_hash_id)
+
+
+@pytest.mark.asyncio
+async def test_redis_version_db(redis_version_db: IVersionDb[UUID]):
+    await run_test_version_db(redis_version_db)
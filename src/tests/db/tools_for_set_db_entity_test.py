@@ -158,3 +158,49 @@ async def teardown_test_set_db_entity(
             await set_db_entity_obj.del_from_set(set_data.set_id, set_db_entity_absent_data)
             # assure that all records are eliminated
             assert await set_db_entity_obj.count(set_data.set_id) == 0, 'Unsuccessful set erasing operation'
+
+
+async def run_test_set_db_entity_batches(set_id: K, batches: list[list[V]], set_db_entity_obj: ISetDbEntity[K, V]):
+    """Testing of batched addition and deletion. Batches could contain duplicated records (in different batches)"""
+    unique_records = set(record for batch in batches for record in batch)
+    assert len(unique_records) < sum(len(batch) for batch in batches), 'Test data should contain duplicates'
+    assert await set_db_entity_obj.add_batches_to_set(set_id, batches) == len(unique_records)
+    assert await set_db_entity_obj.count(set_id) == len(unique_records)
+    assert await set_db_entity_obj.add_batches_to_set(set_id, batches) == 0, 'Expect no changes on repeated addition'
+    deleted_batches = batches[: len(batches) // 2]
+    deleted_records = set(record for batch in deleted_batches for record in batch)
+    assert await set_db_entity_obj.del_batches_from_set(set_id, deleted_batches) == len(deleted_records)
+    assert {x async for x in set_db_entity_obj.fetch_records(set_id)} == unique_records - deleted_records
+    assert await set_db_entity_obj.del_batches_from_set(set_id, batches) == len(unique_records - deleted_records)
+    assert await set_db_entity_obj.count(set_id) == 0, 'Expect deletion of all records'
+
+
+async def run_test_set_db_entity_contains_many(
+    set_ids: list[K], records: list[V], absent_record: V, set_db_entity_obj: ISetDbEntity[K, V]
+):
+    """Testing of bulk membership checks: first set contains all records, other sets contain nothing"""
+    await set_db_entity_obj.add_to_set(set_ids[0], records)
+    try:
+        checked_records = [*records, absent_record]
+        expected = [True] * len(records) + [False]
+        assert await set_db_entity_obj.contains_many(set_ids[0], checked_records) == expected
+        assert await set_db_entity_obj.contains_many(set_ids[0], []) == []
+        assert await set_db_entity_obj.contains_in_sets(set_ids, checked_records) == [expected] + [
+            [False] * len(checked_records) for _ in set_ids[1:]
+        ]
+    finally:
+        await set_db_entity_obj.del_from_set(set_ids[0], records)
+
+
+async def run_test_set_db_entity_changed(set_id: K, records: list[V], set_db_entity_obj: ISetDbEntity[K, V]):
+    """Testing of change-aware writes: only values actually added or removed are reported as changed"""
+    await set_db_entity_obj.add_to_set(set_id, records[:1])
+    try:
+        assert await set_db_entity_obj.add_to_set_changed(set_id, records) == [False] + [True] * (len(records) - 1)
+        assert await set_db_entity_obj.add_to_set_changed(set_id, records) == [False] * len(records)
+        assert await set_db_entity_obj.add_to_set_changed(set_id, []) == []
+        assert await set_db_entity_obj.del_from_set_changed(set_id, records[1:]) == [True] * (len(records) - 1)
+        assert await set_db_entity_obj.del_from_set_changed(set_id, records) == [True] + [False] * (len(records) - 1)
+        assert await set_db_entity_obj.count(set_id) == 0
+    finally:
+        await set_db_entity_obj.del_from_set(set_id, records)
@@ -70,6 +70,15 @@ async def run_test_set_db(
     await a_sleep(3)
     logging.debug('Continue db set test execution')
     assert not await set_db_obj.exists(copied_set_id), 'Copied set must be delete with TTL setting'
+    # checking references to shared set
+    shared_set_id: K = set_db_entity_test_data[0].set_id
+    assert await set_db_obj.acquire_set(shared_set_id, 10), 'Existing set should be reported on acquire'
+    assert not await set_db_obj.acquire_set(nonexistent_set_id, 10), 'Nonexistent set should be reported on acquire'
+    await set_db_obj.release_set(nonexistent_set_id)
+    assert not await set_db_obj.del_unused_set(shared_set_id), 'Referenced set should not be deleted'
+    await set_db_obj.release_set(shared_set_id)
+    assert await set_db_obj.del_unused_set(shared_set_id), 'Unused set should be deleted'
+    assert not await set_db_obj.exists(shared_set_id)
 
 
 async def teardown_test_set_db(
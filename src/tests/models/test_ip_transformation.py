@@ -1,8 +1,12 @@
 from dataclasses import dataclass
 from ipaddress import IPv4Address
 
+from src.models.ip_address_transformation import IPv4AddressDecimalStrTransformer
+from src.models.ip_address_transformation import IPv4AddressIntDecimalStrTransformer
+from src.models.ip_address_transformation import IPv4AddressIntStrTransformer
 from src.models.ip_address_transformation import IPv4AddressListStrTransformer
 from src.models.ip_address_transformation import IPv4AddressSetStrTransformer
+from src.models.ip_address_transformation import IPv4AddressStrTransformer
 
 
 @dataclass
@@ -38,3 +42,21 @@ def test_ip_addr_set_transformer():
                 assert IPv4Address(value) in source_set
         extracted_set = IPv4AddressSetStrTransformer.transform_from_storage(test_record.target)
         assert source_set == extracted_set
+
+
+def test_ip_addr_int_transformer():
+    for address in (IPv4Address('0.0.0.0'), IPv4Address('10.100.0.1'), IPv4Address('255.255.255.255')):
+        assert IPv4AddressIntStrTransformer.transform_to_storage(int(address)) == str(address)
+        assert IPv4AddressIntStrTransformer.transform_from_storage(str(address)) == int(address)
+
+
+def test_ip_addr_decimal_transformers():
+    for address in (IPv4Address('0.0.0.0'), IPv4Address('10.100.0.1'), IPv4Address('255.255.255.255')):
+        assert IPv4AddressDecimalStrTransformer.transform_to_storage(address) == str(int(address))
+        assert IPv4AddressIntDecimalStrTransformer.transform_to_storage(int(address)) == str(int(address))
+        # both encodings are read (for migration of sets between encodings)
+        for stored_value in (str(address), str(int(address))):
+            assert IPv4AddressDecimalStrTransformer.transform_from_storage(stored_value) == address
+            assert IPv4AddressIntDecimalStrTransformer.transform_from_storage(stored_value) == int(address)
+            assert IPv4AddressStrTransformer.transform_from_storage(stored_value) == address
+            assert IPv4AddressIntStrTransformer.transform_from_storage(stored_value) == int(address)
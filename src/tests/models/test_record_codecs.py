@@ -0,0 +1,113 @@
+from base64 import b64encode
+from datetime import datetime as dt_datetime
+from ipaddress import IPv4Address
+
+import pytest
+
+from src.core.settings import BANNED_ADDRESSES_CATEGORY_NAME
+from src.core.settings import EXPIRY_SOURCE_AGENT
+from src.core.settings import MSK_TZ
+from src.core.settings import RECORD_ENCODING_BINARY
+from src.core.settings import RECORD_ENCODING_JSON
+from src.core.settings import UTC_TZ
+from src.models.history_transformation import AHRBinaryStrTransformation
+from src.models.history_transformation import AHRJsonStrTransformation
+from src.models.history_transformation import history_record_transformation
+from src.models.record_codecs import ACTION_CODES
+from src.models.record_codecs import BINARY_RECORD_FIELD
+from src.models.record_codecs import USAGE_HEADER_V1_STRUCT
+from src.models.record_codecs import decode_moment
+from src.models.record_codecs import encode_moment
+from src.models.usage_transformation import SURBinaryDictTransformation
+from src.models.usage_transformation import SURDictTransformation
+from src.models.usage_transformation import usage_record_transformation
+from src.schemas.usage_schemas import ActionType
+from src.schemas.usage_schemas import AddressHistoryRecord
+from src.schemas.usage_schemas import HistoryRecordInfo
+from src.tests.models.test_usage_transformation import TEST_USAGE_FIXTURE
+
+HISTORY_RECORD = AddressHistoryRecord(
+    address=IPv4Address('10.100.0.1'),
+    last_update_time=dt_datetime(2024, 2, 1, 12, 23, 4, 123000, tzinfo=MSK_TZ),
+    history_records=[
+        HistoryRecordInfo(
+            source='agent_01',
+            action_time=dt_datetime(2024, 2, 1, 12, 20, tzinfo=MSK_TZ),
+            action_type=ActionType.add_action,
+            address_category=BANNED_ADDRESSES_CATEGORY_NAME,
+            address_group='group_01',
+        ),
+        HistoryRecordInfo(
+            source=EXPIRY_SOURCE_AGENT,
+            action_time=dt_datetime(2024, 2, 1, 12, 23, 4, 123000, tzinfo=MSK_TZ),
+            action_type=ActionType.remove_action,
+            address_category=BANNED_ADDRESSES_CATEGORY_NAME,
+            address_group='group_01',
+        ),
+        HistoryRecordInfo(source='agent_01', action_time=dt_datetime(2024, 1, 1), action_type=ActionType.add_action),
+    ],
+)
+
+
+def test_moment_encoding():
+    for value in (
+        dt_datetime(2024, 2, 1, 12, 23, 4, 123000, tzinfo=MSK_TZ),
+        dt_datetime(1969, 12, 31, 23, 59, 59, 999000, tzinfo=UTC_TZ),
+        dt_datetime(2024, 2, 1, 12, 23, 4, 5000),
+    ):
+        decoded_value = decode_moment(*encode_moment(value))
+        assert decoded_value == value
+        assert decoded_value.utcoffset() == value.utcoffset()
+    assert decode_moment(*encode_moment(dt_datetime(2024, 2, 1, 0, 0, 0, 1999))) == dt_datetime(
+        2024, 2, 1, 0, 0, 0, 1000
+    )
+
+
+def test_history_record_codecs():
+    binary_record = AHRBinaryStrTransformation.transform_to_storage(HISTORY_RECORD)
+    json_record = AHRJsonStrTransformation.transform_to_storage(HISTORY_RECORD)
+    assert len(binary_record) < len(json_record) / 2, 'Binary record should be compact'
+    # records of both encodings are read by both transformations
+    for transformation in (AHRBinaryStrTransformation, AHRJsonStrTransformation):
+        assert transformation.transform_from_storage(binary_record) == HISTORY_RECORD
+        assert transformation.transform_from_storage(json_record) == HISTORY_RECORD
+    empty_record = AddressHistoryRecord(
+        address=IPv4Address('10.100.0.2'), last_update_time=dt_datetime(2024, 1, 1, tzinfo=UTC_TZ), history_records=[]
+    )
+    assert (
+        AHRBinaryStrTransformation.transform_from_storage(AHRBinaryStrTransformation.transform_to_storage(empty_record))
+        == empty_record
+    )
+    assert history_record_transformation(RECORD_ENCODING_BINARY) is AHRBinaryStrTransformation
+    assert history_record_transformation(RECORD_ENCODING_JSON) is AHRJsonStrTransformation
+
+
+def test_usage_record_codecs():
+    for sur_obj, dict_obj in TEST_USAGE_FIXTURE:
+        binary_record = SURBinaryDictTransformation.transform_to_storage(sur_obj)
+        assert list(binary_record) == [BINARY_RECORD_FIELD]
+        assert SURDictTransformation.transform_from_storage(binary_record) == sur_obj
+        assert SURBinaryDictTransformation.transform_from_storage(dict_obj) == sur_obj
+    assert usage_record_transformation(RECORD_ENCODING_BINARY) is SURBinaryDictTransformation
+    assert usage_record_transformation(RECORD_ENCODING_JSON) is SURDictTransformation
+
+
+def test_usage_record_v1_codec():
+    sur_obj = TEST_USAGE_FIXTURE[2][0]
+    # version 1 records are written without source agent
+    header = USAGE_HEADER_V1_STRUCT.pack(
+        1, ACTION_CODES[sur_obj.action_type], *encode_moment(sur_obj.action_time), 2, 3, 4, len(sur_obj.addresses)
+    )
+    strings = b''.join(len(x).to_bytes(2, 'little') + x for x in (b'category_01', b'group_02'))
+    addresses = b''.join(int(x).to_bytes(4, 'little') for x in sur_obj.addresses)
+    record = {BINARY_RECORD_FIELD: b64encode(header + strings + addresses).decode('ascii')}
+    assert SURDictTransformation.transform_from_storage(record) == sur_obj
+
+
+def test_unknown_binary_version():
+    binary_record = AHRBinaryStrTransformation.transform_to_storage(HISTORY_RECORD)
+    with pytest.raises(ValueError):
+        AHRBinaryStrTransformation.transform_from_storage('~/' + binary_record[2:])
+    usage_record = SURBinaryDictTransformation.transform_to_storage(TEST_USAGE_FIXTURE[0][0])[BINARY_RECORD_FIELD]
+    with pytest.raises(ValueError):
+        SURDictTransformation.transform_from_storage({BINARY_RECORD_FIELD: '/' + usage_record[1:]})
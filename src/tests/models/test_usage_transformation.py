@@ -58,6 +58,22 @@ TEST_USAGE_FIXTURE: list[tuple[StreamUsageRecord, dict[str, str]]] = [
             'address_group': 'group_02',
         },
     ),
+    (
+        StreamUsageRecord(
+            action_type=ActionType.add_action,
+            action_time=dt_datetime(2024, 3, 5, 10, 0, 1, tzinfo=UTC_TZ),
+            addresses={'10.100.0.5'},
+            address_category=None,
+            address_group=None,
+            source_agent='agent_01',
+        ),
+        {
+            'action_type': 'add',
+            'action_time': '2024-03-05T10:00:01.000000+0000',
+            'addresses': '10.100.0.5',
+            'source_agent': 'agent_01',
+        },
+    ),
 ]
 
 
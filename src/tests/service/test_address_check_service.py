@@ -0,0 +1,78 @@
+from ipaddress import IPv4Address
+from ipaddress import IPv4Network
+
+import pytest
+import pytest_asyncio
+
+from src.api.di.db_di_routines import get_memory_download_adapters
+from src.core.settings import ALLOWED_ADDRESSES_SET_ID
+from src.core.settings import BANNED_ADDRESSES_GROUP_NAME
+from src.core.settings import BANNED_ADDRESSES_SET_ID
+from src.core.settings import DEFAULT_GROUP_NAME
+from src.schemas.set_group_schemas import AddGroupSet
+from src.service.address_check_service import AddressCheckService
+from src.service.address_check_service import address_check_cache
+from src.service.address_check_service import check_sources_cache
+from src.service.networks_db_service import AllowedNetworksSetDBEntityService
+from src.service.service_db_factories import ServiceAdapters
+from src.service.service_db_factories import groups_db_service_factory
+
+BANNED_GROUP_NAME = 'scanners'
+BANNED_ADDRESS = IPv4Address('10.0.0.1')
+BANNED_GROUP_ADDRESS = IPv4Address('10.0.0.2')
+ALLOWED_ADDRESS = IPv4Address('10.0.0.3')
+ALLOWED_NETWORK = IPv4Network('10.0.1.0/24')
+NETWORK_ADDRESS = IPv4Address('10.0.1.1')
+UNKNOWN_ADDRESS = IPv4Address('10.0.2.1')
+
+
+@pytest_asyncio.fixture
+async def service_adapter_obj() -> ServiceAdapters:
+    # caches are shared by process, versions of memory storage start from zero for every test
+    check_sources_cache.clear()
+    address_check_cache.clear()
+    adapters = get_memory_download_adapters()
+    banned_group = await groups_db_service_factory(
+        BANNED_ADDRESSES_GROUP_NAME, adapters.hash_db_service, adapters.version_db
+    ).add_group(AddGroupSet(group_name=BANNED_GROUP_NAME, group_description='Scanners'))
+    await adapters.address_set_db_entity.add_to_set(
+        BANNED_ADDRESSES_SET_ID, [BANNED_ADDRESS, ALLOWED_ADDRESS, NETWORK_ADDRESS]
+    )
+    await adapters.address_set_db_entity.add_to_set(banned_group.group_set_id, [BANNED_ADDRESS, BANNED_GROUP_ADDRESS])
+    await adapters.address_set_db_entity.add_to_set(ALLOWED_ADDRESSES_SET_ID, [ALLOWED_ADDRESS])
+    await AllowedNetworksSetDBEntityService(adapters.network_set_db_entity).write_records([ALLOWED_NETWORK])
+    return adapters
+
+
+@pytest.mark.asyncio
+async def test_address_check(service_adapter_obj: ServiceAdapters):
+    addresses = [
+        BANNED_ADDRESS,
+        BANNED_GROUP_ADDRESS,
+        ALLOWED_ADDRESS,
+        NETWORK_ADDRESS,
+        UNKNOWN_ADDRESS,
+        BANNED_ADDRESS,
+    ]
+    results = await AddressCheckService(service_adapter_obj).check(addresses)
+    assert [result.address for result in results] == addresses, 'Results should be in order of addresses'
+    assert [result.banned for result in results] == [True, True, False, False, False, True]
+    assert [result.allowed for result in results] == [False, False, True, True, False, False]
+    assert results[0].banned_groups == [BANNED_GROUP_NAME, DEFAULT_GROUP_NAME]
+    assert results[1].banned_groups == [BANNED_GROUP_NAME]
+    assert results[2].banned_groups == [DEFAULT_GROUP_NAME] and results[2].allowed_groups == [DEFAULT_GROUP_NAME]
+    assert results[3].in_allowed_networks is True and results[3].allowed_groups == []
+    assert results[4].banned_groups == [] and results[4].allowed_groups == []
+
+
+@pytest.mark.asyncio
+async def test_address_check_sources_renewal(service_adapter_obj: ServiceAdapters):
+    check_service_obj = AddressCheckService(service_adapter_obj)
+    sources = await check_service_obj.get_sources()
+    assert await check_service_obj.get_sources() is sources, 'Sources should be reused while nothing is changed'
+    await AllowedNetworksSetDBEntityService(
+        service_adapter_obj.network_set_db_entity, version_db=service_adapter_obj.version_db
+    ).write_records([IPv4Network('10.0.2.0/24')])
+    assert await check_service_obj.get_sources() is not sources, 'Sources should be reloaded on networks changes'
+    (result,) = await check_service_obj.check([UNKNOWN_ADDRESS])
+    assert result.in_allowed_networks is True
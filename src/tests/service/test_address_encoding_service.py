@@ -0,0 +1,13 @@
+from src.core.settings import ADDRESS_ENCODING_CONVERSION
+from src.core.settings import ADDRESS_ENCODING_INT
+from src.core.settings import ADDRESS_ENCODING_TEXT
+from src.service.address_encoding_service import address_encoding_error
+
+
+def test_address_encoding_error():
+    assert address_encoding_error(None, ADDRESS_ENCODING_TEXT) is None, 'Sets without stored encoding are text'
+    assert address_encoding_error(None, ADDRESS_ENCODING_INT) is not None
+    assert address_encoding_error(ADDRESS_ENCODING_INT, ADDRESS_ENCODING_INT) is None
+    assert address_encoding_error(ADDRESS_ENCODING_INT, ADDRESS_ENCODING_TEXT) is not None
+    for address_encoding in (ADDRESS_ENCODING_TEXT, ADDRESS_ENCODING_INT):
+        assert address_encoding_error(ADDRESS_ENCODING_CONVERSION, address_encoding) is not None
@@ -0,0 +1,74 @@
+from ipaddress import IPv4Address
+from time import time
+
+import pytest
+
+from src.api.di.db_di_routines import get_memory_download_adapters
+from src.core.settings import BANNED_ADDRESSES_CATEGORY_NAME
+from src.core.settings import BANNED_ADDRESSES_GROUP_NAME
+from src.core.settings import BANNED_ADDRESSES_SET_ID
+from src.schemas.set_group_schemas import AddGroupSet
+from src.schemas.set_group_schemas import GroupSet
+from src.service.address_expiry_service import AddressExpiryReaper
+from src.service.address_expiry_service import AddressExpiryService
+from src.service.service_db_factories import groups_db_service_factory
+
+TEMPORARY_ADDRESSES = [IPv4Address('10.0.0.1'), IPv4Address('10.0.0.2')]
+PERMANENT_ADDRESS = IPv4Address('10.0.0.3')
+REMOVED_ADDRESS = IPv4Address('10.0.0.4')
+
+
+@pytest.mark.asyncio
+async def test_address_expiry_reaper():
+    adapters = get_memory_download_adapters()
+    assert adapters.expiry_db is not None
+    group = await groups_db_service_factory(BANNED_ADDRESSES_GROUP_NAME, adapters.hash_db_service).add_group(
+        AddGroupSet(group_name='scanners', group_description='Scanners')
+    )
+    all_addresses = [*TEMPORARY_ADDRESSES, PERMANENT_ADDRESS]
+    for set_id in BANNED_ADDRESSES_SET_ID, group.group_set_id:
+        await adapters.address_set_db_entity.add_to_set(set_id, all_addresses)
+        expiry_service = AddressExpiryService(adapters.expiry_db, set_id)
+        await expiry_service.set_ttl(all_addresses, 60)
+        # address added again without TTL is kept forever
+        await expiry_service.set_ttl([PERMANENT_ADDRESS], None)
+    # address removed from set before expiration is not reported as removed
+    await AddressExpiryService(adapters.expiry_db, BANNED_ADDRESSES_SET_ID).set_ttl([REMOVED_ADDRESS], 60)
+
+    expired_records: list[tuple[str, str, list[IPv4Address]]] = list()
+
+    async def on_expired(address_category: str, expired_group: GroupSet, addresses: list[IPv4Address]):
+        expired_records.append((address_category, expired_group.group_name, addresses))
+
+    reaper = AddressExpiryReaper(adapters, on_expired)
+    assert await reaper.reap() == 0, 'Addresses should not be removed before expiration'
+    versions = await adapters.version_db.versions([BANNED_ADDRESSES_SET_ID])
+    assert await reaper.reap(time() + 61) == 4
+    for set_id in BANNED_ADDRESSES_SET_ID, group.group_set_id:
+        assert [x async for x in adapters.address_set_db_entity.fetch_records(set_id)] == [PERMANENT_ADDRESS]
+    assert await adapters.version_db.versions([BANNED_ADDRESSES_SET_ID]) != versions, 'Removal should change version'
+    assert sorted((group_name, sorted(addresses)) for _, group_name, addresses in expired_records) == [
+        ('default', TEMPORARY_ADDRESSES),
+        ('scanners', TEMPORARY_ADDRESSES),
+    ]
+    assert {address_category for address_category, _, _ in expired_records} == {BANNED_ADDRESSES_CATEGORY_NAME}
+    assert await reaper.reap(time() + 61) == 0, 'Expired addresses should be removed once'
+
+
+@pytest.mark.asyncio
+async def test_address_expiry_persist():
+    adapters = get_memory_download_adapters()
+    assert adapters.expiry_db is not None
+    expiry_service = AddressExpiryService(adapters.expiry_db, BANNED_ADDRESSES_SET_ID)
+    iterated: list[IPv4Address] = list()
+
+    def addresses():
+        for address in TEMPORARY_ADDRESSES:
+            iterated.append(address)
+            yield address
+
+    await expiry_service.persist(addresses())
+    assert iterated == [], 'Addresses should not be iterated for set without TTL'
+    await expiry_service.set_ttl([REMOVED_ADDRESS], 60)
+    await expiry_service.persist(addresses())
+    assert iterated == TEMPORARY_ADDRESSES
@@ -0,0 +1,183 @@
+from datetime import datetime
+from datetime import timedelta
+from ipaddress import IPv4Address
+from ipaddress import IPv4Network
+
+import pytest
+import pytest_asyncio
+
+from src.api.di.db_di_routines import get_memory_download_adapters
+from src.core.settings import ALLOWED_ADDRESSES_SET_ID
+from src.core.settings import ALLOWED_NETWORKS_CATEGORY_NAME
+from src.core.settings import BANNED_ADDRESSES_CATEGORY_NAME
+from src.core.settings import BANNED_ADDRESSES_SET_ID
+from src.core.settings import STREAM_USAGE_INFO
+from src.db.adapters.usage_stream_db_adapter import UsageStreamRedisAdapter
+from src.db.storages.memory_stream_storage import MemoryStreamTsStorage
+from src.schemas.addresses_schemas import AgentAddressesInfoWithGroup
+from src.schemas.base_input_schema import now_cur_tz
+from src.schemas.usage_schemas import ActionType
+from src.service.addresses_db_service import AllowedAddressesSetDBEntityService
+from src.service.blacklist_service import BlacklistService
+from src.service.blacklist_service import BlackListServiceError
+from src.service.derived_sets_cache_service import SetsTeardown
+from src.service.networks_db_service import AllowedNetworksSetDBEntityService
+from src.service.service_db_factories import ServiceAdapters
+from src.service.usage_stream_service import get_usage_add_service
+from src.service.usage_stream_service import get_usage_read_service
+from src.utils.ip_utils import IPv4NetworksMatcher
+from src.utils.ip_utils import random_ip_addresses
+from src.utils.time_utils import parse_stream_id
+
+BANNED_NETWORK = IPv4Network('10.100.0.0/22')
+ALLOWED_NETWORKS = {IPv4Network('10.100.1.0/24'), IPv4Network('10.100.2.128/25')}
+ALLOWED_ADDRESSES = {IPv4Address('10.100.0.1'), IPv4Address('10.100.3.3'), IPv4Address('10.100.1.1')}
+EXPECTED_RECORDS_COUNT = 1024 - 256 - 128 - 2
+
+
+@pytest_asyncio.fixture
+async def service_adapter_obj() -> ServiceAdapters:
+    adapters = get_memory_download_adapters()
+    await adapters.address_set_db_entity.add_to_set(BANNED_ADDRESSES_SET_ID, BANNED_NETWORK)
+    await adapters.address_set_db_entity.add_to_set(BANNED_ADDRESSES_SET_ID, random_ip_addresses(1000))
+    return adapters
+
+
+async def collect_records(records) -> list[str]:
+    return [address async for addresses in records for address in addresses.split()]
+
+
+@pytest.mark.asyncio
+async def test_blacklist_engines(service_adapter_obj: ServiceAdapters):
+    blacklist_service_obj = BlacklistService(service_adapter_obj)
+    args = (BANNED_ADDRESSES_SET_ID, ALLOWED_ADDRESSES, ALLOWED_NETWORKS)
+    per_object_records = await collect_records(blacklist_service_obj.get_banned_addresses(*args, 0))
+    array_records = await collect_records(blacklist_service_obj.get_banned_addresses_bulk(*args, 0))
+    assert len(array_records) == len(set(array_records)), 'Array engine should not produce duplicates'
+    assert set(per_object_records) == set(array_records), 'Engines should produce the same records'
+    assert array_records == sorted(array_records, key=lambda x: int(IPv4Address(x))), 'Records should be sorted'
+    banned_network_records = [x for x in array_records if IPv4Address(x) in BANNED_NETWORK]
+    assert len(banned_network_records) == EXPECTED_RECORDS_COUNT, 'Allowed addresses should be filtered'
+    assert '10.100.0.1' not in array_records
+    assert '10.100.0.2' in array_records
+    assert '10.100.2.200' not in array_records
+
+    limited_records = await collect_records(blacklist_service_obj.get_banned_addresses_bulk(*args, 10))
+    assert limited_records == array_records[:10], 'Array engine should stop on records count'
+    assert await blacklist_service_obj.use_array_engine(BANNED_ADDRESSES_SET_ID) is False
+
+
+@pytest.mark.asyncio
+async def test_blacklist_snapshot_etag(service_adapter_obj: ServiceAdapters):
+    blacklist_service_obj = BlacklistService(service_adapter_obj)
+    args = ([BANNED_ADDRESSES_SET_ID], [ALLOWED_ADDRESSES_SET_ID], True, 0)
+    etag = await blacklist_service_obj.snapshot_etag(*args)
+    assert etag.startswith('"') and etag.endswith('"'), 'ETag should be quoted'
+    assert etag == await blacklist_service_obj.snapshot_etag(*args), 'ETag should not change without data changes'
+    assert etag != await blacklist_service_obj.snapshot_etag([BANNED_ADDRESSES_SET_ID], [], False, 0)
+    assert etag != await blacklist_service_obj.snapshot_etag(
+        [BANNED_ADDRESSES_SET_ID], [ALLOWED_ADDRESSES_SET_ID], True, 5
+    )
+
+    allowed_service_obj = AllowedAddressesSetDBEntityService(
+        service_adapter_obj.address_set_db_entity, version_db=service_adapter_obj.version_db
+    )
+    # nothing is actually deleted, so version is not changed
+    assert await allowed_service_obj.del_records([IPv4Address('10.0.0.1')]) == 0
+    assert etag == await blacklist_service_obj.snapshot_etag(*args), 'ETag should not change without data changes'
+    assert await allowed_service_obj.write_records([IPv4Address('10.0.0.1')]) == 1
+    changed_etag = await blacklist_service_obj.snapshot_etag(*args)
+    assert changed_etag != etag, 'ETag should change on allowed addresses change'
+
+    networks_service_obj = AllowedNetworksSetDBEntityService(
+        service_adapter_obj.network_set_db_entity, version_db=service_adapter_obj.version_db
+    )
+    assert await networks_service_obj.write_records([IPv4Network('10.1.0.0/16')]) == 1
+    assert changed_etag != await blacklist_service_obj.snapshot_etag(*args), 'ETag should change on networks change'
+
+
+def usage_info(addresses: list[IPv4Address]) -> AgentAddressesInfoWithGroup:
+    return AgentAddressesInfoWithGroup(source_agent='test', action_time=now_cur_tz(), addresses=addresses)
+
+
+@pytest.mark.asyncio
+async def test_blacklist_delta(service_adapter_obj: ServiceAdapters):
+    blacklist_service_obj = BlacklistService(service_adapter_obj)
+    stream_db_obj = UsageStreamRedisAdapter(MemoryStreamTsStorage[str, dict[str, str]]())
+    usage_add_service = get_usage_add_service(stream_db_obj)
+    usage_read_service = get_usage_read_service(stream_db_obj)
+    args = ([BANNED_ADDRESSES_SET_ID], [ALLOWED_ADDRESSES_SET_ID], True)
+    start_cursor = await usage_add_service.add(ActionType.add_action, usage_info([]), BANNED_ADDRESSES_CATEGORY_NAME)
+
+    added_address, removed_address = IPv4Address('192.168.0.1'), IPv4Address('10.100.0.2')
+    await service_adapter_obj.address_set_db_entity.add_to_set(BANNED_ADDRESSES_SET_ID, [added_address])
+    await service_adapter_obj.address_set_db_entity.del_from_set(BANNED_ADDRESSES_SET_ID, [removed_address])
+    for address in (added_address, removed_address):
+        await usage_add_service.add(ActionType.add_action, usage_info([address]), BANNED_ADDRESSES_CATEGORY_NAME)
+    delta = await blacklist_service_obj.get_delta(usage_read_service, start_cursor, *args)
+    assert delta.full_download_required is False
+    assert delta.added == [added_address] and delta.removed == [removed_address]
+    assert delta.cursor is not None and parse_stream_id(delta.cursor) > parse_stream_id(start_cursor)
+
+    no_changes_delta = await blacklist_service_obj.get_delta(usage_read_service, delta.cursor, *args)
+    assert no_changes_delta.cursor == delta.cursor and not no_changes_delta.added and not no_changes_delta.removed
+
+    # memory stream storage keeps naive local time of records
+    moment_delta = await blacklist_service_obj.get_delta(
+        usage_read_service, (datetime.now() - timedelta(minutes=1)).isoformat(), *args
+    )
+    assert moment_delta.full_download_required is False
+    assert moment_delta.added == delta.added and moment_delta.removed == delta.removed
+    assert moment_delta.cursor == delta.cursor, 'Cursor of delta since moment should point to the last record'
+    late_moment_delta = await blacklist_service_obj.get_delta(
+        usage_read_service, (datetime.now() + timedelta(seconds=1)).isoformat(), *args
+    )
+    assert late_moment_delta.full_download_required is False, 'Moment after the last record gives empty delta'
+    assert late_moment_delta.cursor == delta.cursor
+    assert not late_moment_delta.added and not late_moment_delta.removed
+
+    await usage_add_service.add(ActionType.add_action, usage_info([]), ALLOWED_NETWORKS_CATEGORY_NAME)
+    networks_delta = await blacklist_service_obj.get_delta(usage_read_service, delta.cursor, *args)
+    assert networks_delta.full_download_required is True, 'Allowed networks change requires full download'
+
+    await stream_db_obj.delete(STREAM_USAGE_INFO, [start_cursor])
+    trimmed_delta = await blacklist_service_obj.get_delta(usage_read_service, start_cursor, *args)
+    assert trimmed_delta.full_download_required is True, 'Trimmed stream requires full download'
+    assert trimmed_delta.cursor == networks_delta.cursor
+
+    with pytest.raises(BlackListServiceError):
+        await blacklist_service_obj.get_delta(usage_read_service, 'wrong cursor', *args)
+
+
+@pytest.mark.asyncio
+async def test_blacklist_aggregation(service_adapter_obj: ServiceAdapters):
+    blacklist_service_obj = BlacklistService(service_adapter_obj)
+    args = (BANNED_ADDRESSES_SET_ID, ALLOWED_ADDRESSES, ALLOWED_NETWORKS, 0, True)
+    addresses = await collect_records(blacklist_service_obj.fetch_banned_addresses(*args))
+    networks = await collect_records(blacklist_service_obj.fetch_banned_addresses(*args, 32))
+    assert len(networks) < len(addresses), 'Contiguous addresses should be aggregated'
+    assert [str(x) for network in networks for x in IPv4Network(network)] == addresses, 'Aggregation should be exact'
+    assert '10.100.0.4/30' in networks
+
+    lossy_networks = await collect_records(blacklist_service_obj.fetch_banned_addresses(*args, 16))
+    lossy_matcher = IPv4NetworksMatcher(map(IPv4Network, lossy_networks))
+    assert all(IPv4Address(x) in lossy_matcher for x in addresses), 'Lossy aggregation should cover all addresses'
+    assert not any(x in lossy_matcher for x in ALLOWED_ADDRESSES), 'Allowed addresses should not be covered'
+
+
+@pytest.mark.asyncio
+async def test_blacklist_filtered_set(service_adapter_obj: ServiceAdapters):
+    blacklist_service_obj = BlacklistService(service_adapter_obj)
+    await service_adapter_obj.address_set_db_entity.add_to_set(ALLOWED_ADDRESSES_SET_ID, ALLOWED_ADDRESSES)
+    teardown = SetsTeardown()
+    filtered_set_id = await blacklist_service_obj.prepare_filtered_set(
+        [BANNED_ADDRESSES_SET_ID], [ALLOWED_ADDRESSES_SET_ID], teardown
+    )
+    assert teardown.released == [filtered_set_id], 'Set with difference should be released after processing'
+    filtered_records = await collect_records(
+        blacklist_service_obj.get_banned_addresses(filtered_set_id, set(), ALLOWED_NETWORKS, 0)
+    )
+    expected_records = await collect_records(
+        blacklist_service_obj.get_banned_addresses(BANNED_ADDRESSES_SET_ID, ALLOWED_ADDRESSES, ALLOWED_NETWORKS, 0)
+    )
+    assert sorted(filtered_records) == sorted(expected_records), 'Filtering in storage should give the same records'
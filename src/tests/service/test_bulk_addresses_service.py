@@ -0,0 +1,71 @@
+from ipaddress import IPv4Address
+from typing import AsyncGenerator
+from uuid import uuid4
+
+import pytest
+
+from src.db.adapters.memory_time_index_db_adapter import MemoryTimeIndexDbAdapter
+from src.db.adapters.set_db_entity_str_adapter import SetDbEntityStrAdapterIntAddress
+from src.db.adapters.time_index_db_str_adapter import TimeIndexDbStrAdapterIpAddress
+from src.db.storages.memory_set_storage import MemorySetStorage
+from src.schemas.base_input_schema import now_cur_tz
+from src.schemas.usage_schemas import ActionType
+from src.service.abstract_set_db_entity_service import AbstractSetDBEntityService
+from src.service.bulk_addresses_service import BulkAddressesService
+from src.service.seen_addresses_service import SeenAddressesService
+from src.utils.bulk_parse_utils import TEXT_BODY_FORMAT
+from src.utils.ip_array_utils import addresses_array
+from src.utils.ip_array_utils import render_addresses
+
+FLUSH_RECORDS = 100
+ADDRESSES = list(range(167772160, 167772160 + 1050))
+
+
+async def body_chunks(body: bytes, chunk_size: int = 1000) -> AsyncGenerator[bytes, None]:
+    for position in range(0, len(body), chunk_size):
+        yield body[position : position + chunk_size]
+
+
+@pytest.mark.asyncio
+async def test_bulk_addresses_service():
+    service_obj = AbstractSetDBEntityService[int](
+        SetDbEntityStrAdapterIntAddress(MemorySetStorage[str, str]().set_db_entity_adapter()), uuid4()
+    )
+    applied: list[int] = list()
+
+    async def apply(addresses: list[int]):
+        applied.extend(addresses)
+
+    seen_service = SeenAddressesService(TimeIndexDbStrAdapterIpAddress(MemoryTimeIndexDbAdapter[str, str]()))
+    seen_time = now_cur_tz()
+    body = (render_addresses(addresses_array(ADDRESSES)) + 'wrong\n' * 3).encode()
+    bulk_service_obj = BulkAddressesService(
+        service_obj,
+        ActionType.add_action,
+        apply,
+        FLUSH_RECORDS,
+        seen_service=seen_service,
+        seen_time=seen_time,
+    )
+    result = await bulk_service_obj.process(body_chunks(body), TEXT_BODY_FORMAT)
+    assert (result.received, result.changed, result.rejected) == (len(ADDRESSES) + 3, len(ADDRESSES), 3)
+    assert [x.line for x in result.rejected_lines] == [len(ADDRESSES) + i for i in range(1, 4)]
+    assert sorted(applied) == ADDRESSES, 'All addresses should be passed to callback'
+    assert sorted(await service_obj.get_records()) == ADDRESSES
+    assert await seen_service.last_seen(IPv4Address(ADDRESSES[0])) is None, 'Added addresses are not re-seen'
+    # repeated addition does not change set (addresses are re-seen), removal of part of addresses
+    result = await bulk_service_obj.process(body_chunks(body), TEXT_BODY_FORMAT)
+    assert result.changed == 0
+    assert len(applied) == len(ADDRESSES), 'Unchanged addresses should not be passed to callback'
+    assert await seen_service.last_seen(IPv4Address(ADDRESSES[-1])) == seen_time
+    removed: list[int] = list()
+
+    async def remove(addresses: list[int]):
+        removed.extend(addresses)
+
+    removed_body = render_addresses(addresses_array(ADDRESSES[:500] + ADDRESSES[:10])).encode()
+    bulk_service_obj = BulkAddressesService(service_obj, ActionType.remove_action, remove, FLUSH_RECORDS)
+    result = await bulk_service_obj.process(body_chunks(removed_body), TEXT_BODY_FORMAT)
+    assert result.changed == 500
+    assert sorted(removed) == ADDRESSES[:500], 'Only removed addresses should be passed to callback'
+    assert await service_obj.count() == len(ADDRESSES) - 500
@@ -0,0 +1,83 @@
+from datetime import datetime as dt_datetime
+from datetime import timedelta
+from ipaddress import IPv4Address
+
+import pytest
+
+from src.core.settings import ALLOWED_ADDRESSES_CATEGORY_NAME
+from src.core.settings import BANNED_ADDRESSES_CATEGORY_NAME
+from src.core.settings import CUR_TZ
+from src.db.adapters.memory_time_index_db_adapter import MemoryTimeIndexDbAdapter
+from src.db.adapters.time_index_db_str_adapter import TimeIndexDbStrAdapterIpAddress
+from src.schemas.usage_schemas import ActionType
+from src.schemas.usage_schemas import StreamUsageRecord
+from src.service.change_index_service import AddressChangeIndexService
+from src.service.change_index_service import change_index_set_id
+from src.utils.ip_array_utils import addresses_array
+
+ADDRESSES = [IPv4Address('10.0.0.1'), IPv4Address('10.0.0.2'), IPv4Address('10.0.0.3')]
+START_TIME = dt_datetime(2024, 1, 1, tzinfo=CUR_TZ)
+
+
+def usage_record(addresses: list[IPv4Address], address_category=None, address_group=None) -> StreamUsageRecord:
+    return StreamUsageRecord(
+        action_type=ActionType.add_action,
+        action_time=START_TIME,
+        addresses=set(addresses),
+        address_category=address_category,
+        address_group=address_group,
+    )
+
+
+def record_id(days: int) -> str:
+    return f'{int((START_TIME + timedelta(days=days)).timestamp() * 1000)}-0'
+
+
+def test_change_index_set_id():
+    assert change_index_set_id(None, 'group') == change_index_set_id(BANNED_ADDRESSES_CATEGORY_NAME, 'group')
+    assert change_index_set_id(None, None) != change_index_set_id(BANNED_ADDRESSES_CATEGORY_NAME, None)
+    assert change_index_set_id(ALLOWED_ADDRESSES_CATEGORY_NAME) != change_index_set_id(BANNED_ADDRESSES_CATEGORY_NAME)
+
+
+@pytest.mark.asyncio
+async def test_change_index_service():
+    service_obj = AddressChangeIndexService(
+        TimeIndexDbStrAdapterIpAddress(MemoryTimeIndexDbAdapter[str, str]()), by_group=True
+    )
+
+    async def records():
+        yield record_id(0), usage_record(ADDRESSES[:2])
+        yield record_id(2), usage_record(ADDRESSES[1:], ALLOWED_ADDRESSES_CATEGORY_NAME, 'group')
+
+    assert await service_obj.backfill(records()) == 3
+    # earlier record does not replace later change
+    assert await service_obj.record(record_id(1), usage_record(ADDRESSES[2:])) == 0
+    changes = await service_obj.changes(START_TIME + timedelta(days=1), None)
+    assert sorted(x.address for x in changes) == ADDRESSES[1:]
+    assert changes[-1].last_change_time == START_TIME + timedelta(days=2)
+    assert len(await service_obj.changes(None, None, 1, 1)) == 1
+    assert [x.address for x in await service_obj.not_changed_since(START_TIME + timedelta(days=1))] == ADDRESSES[:1]
+    # indexes per category and group
+    assert (
+        sorted(
+            x.address
+            for x in await service_obj.not_changed_since(
+                START_TIME + timedelta(days=1), address_category=BANNED_ADDRESSES_CATEGORY_NAME
+            )
+        )
+        == ADDRESSES
+    )
+    assert (
+        sorted(x.address for x in await service_obj.changes(None, None, 0, 0, ALLOWED_ADDRESSES_CATEGORY_NAME, 'group'))
+        == ADDRESSES[1:]
+    )
+    assert await service_obj.changed_addresses_sorted(START_TIME + timedelta(days=2)) == addresses_array(
+        sorted(map(int, ADDRESSES[1:]))
+    )
+    # changes of trimmed usage records are removed from all indexes (changes at moment of record are kept)
+    assert await service_obj.prune(record_id(1), [(ALLOWED_ADDRESSES_CATEGORY_NAME, 'group')]) == 1
+    assert sorted(x.address for x in await service_obj.changes(None, None)) == ADDRESSES[1:]
+    assert await service_obj.prune(record_id(2), [(ALLOWED_ADDRESSES_CATEGORY_NAME, 'group')]) == 0
+    assert await service_obj.prune(record_id(3), [(ALLOWED_ADDRESSES_CATEGORY_NAME, 'group')]) == 2
+    assert await service_obj.changes(None, None) == []
+    assert await service_obj.changes(None, None, 0, 0, ALLOWED_ADDRESSES_CATEGORY_NAME, 'group') == []
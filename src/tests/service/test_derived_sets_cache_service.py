@@ -0,0 +1,65 @@
+from ipaddress import IPv4Address
+from uuid import uuid4
+
+import pytest
+
+from src.api.di.db_di_routines import get_memory_download_adapters
+from src.service.abstract_set_db_entity_service import AbstractSetDBEntityService
+from src.service.derived_sets_cache_service import DerivedSetsCache
+from src.service.derived_sets_cache_service import SetsTeardown
+from src.service.derived_sets_cache_service import prepare_union_set
+
+
+@pytest.mark.asyncio
+async def test_union_set_reuse():
+    adapters = get_memory_download_adapters()
+    set_ids = [uuid4(), uuid4()]
+    first_set_service_obj = AbstractSetDBEntityService[IPv4Address](
+        adapters.address_set_db_entity, set_ids[0], version_db=adapters.version_db
+    )
+    await first_set_service_obj.write_records([IPv4Address('10.0.0.1'), IPv4Address('10.0.0.2')])
+    await adapters.address_set_db_entity.add_to_set(set_ids[1], [IPv4Address('10.0.0.3')])
+
+    first_teardown, second_teardown = SetsTeardown(), SetsTeardown()
+    union_set_id = await prepare_union_set(adapters, set_ids, first_teardown)
+    assert await adapters.address_set_db_entity.count(union_set_id) == 3
+    assert (
+        await prepare_union_set(adapters, list(reversed(set_ids)), second_teardown) == union_set_id
+    ), 'Union of the same sets should be reused'
+    assert first_teardown.released == second_teardown.released == [union_set_id]
+    assert not first_teardown.deleted, 'Cached union should not be deleted after request'
+    assert await prepare_union_set(adapters, set_ids[:1], SetsTeardown()) == set_ids[0], 'No union for one set'
+
+    await first_set_service_obj.write_records([IPv4Address('10.0.0.4')])
+    changed_union_set_id = await prepare_union_set(adapters, set_ids, SetsTeardown())
+    assert changed_union_set_id != union_set_id, 'Change of source set should produce new union'
+    assert await adapters.address_set_db_entity.count(changed_union_set_id) == 4
+
+
+@pytest.mark.asyncio
+async def test_derived_sets_eviction():
+    adapters = get_memory_download_adapters()
+    cache = DerivedSetsCache(max_records=3)
+    source_set_id = uuid4()
+    await adapters.address_set_db_entity.add_to_set(source_set_id, [IPv4Address('10.0.0.1'), IPv4Address('10.0.0.2')])
+
+    async def build(target_set_id):
+        await adapters.union_set_db.union_set([source_set_id], target_set_id)
+
+    first_set_id, second_set_id = uuid4(), uuid4()
+    assert await cache.acquire(adapters, first_set_id, build) == []
+    assert await cache.acquire(adapters, second_set_id, build) == [], 'Sets in use should not be evicted'
+    assert cache.records_count == 4 and len(cache) == 2
+    assert await cache.release(adapters.set_db, [second_set_id]) == [second_set_id], 'Unused set should be evicted'
+    assert not await adapters.set_db.exists(second_set_id), 'Evicted unused set should be deleted from storage'
+    assert await cache.release(adapters.set_db, [first_set_id]) == [], 'Set within the limit should be kept'
+    assert await adapters.set_db.exists(first_set_id)
+
+    shared_set_id, other_process_cache = uuid4(), DerivedSetsCache(max_records=3)
+    await other_process_cache.acquire(adapters, shared_set_id, build)
+    small_cache = DerivedSetsCache(max_records=1)
+    assert await small_cache.acquire(adapters, shared_set_id, build) == []
+    assert await small_cache.release(adapters.set_db, [shared_set_id]) == [shared_set_id]
+    assert await adapters.set_db.exists(shared_set_id), 'Set used by another process should be left in storage'
+    assert cache.records_count == 2
+    assert DerivedSetsCache(max_records=0).enabled is False
@@ -0,0 +1,58 @@
+from uuid import UUID
+from uuid import uuid4
+
+import pytest
+
+from src.api.di.db_di_routines import get_memory_download_adapters
+from src.core.settings import BANNED_ADDRESSES_GROUP_NAME
+from src.core.settings import BANNED_ADDRESSES_GROUPS_HASH_ID
+from src.core.settings import DEFAULT_GROUP_NAME
+from src.db.adapters.memory_version_db_adapter import MemoryVersionDbAdapter
+from src.schemas.set_group_schemas import AddGroupSet
+from src.schemas.set_group_schemas import GroupSet
+from src.service.groups_cache_service import GroupsCache
+from src.service.service_db_factories import groups_db_service_factory
+
+
+@pytest.mark.asyncio
+async def test_groups_cache():
+    moment = 0.0
+    loads_count = 0
+    version_db = MemoryVersionDbAdapter[UUID]()
+    group_hash_id = uuid4()
+    groups_cache = GroupsCache(10, lambda: moment)
+
+    async def load() -> list[GroupSet]:
+        nonlocal loads_count
+        loads_count += 1
+        return [GroupSet(group_set_id=uuid4(), group_name=f'group {loads_count}', group_description='', default=True)]
+
+    index = await groups_cache.get(group_hash_id, version_db, load)
+    assert list(index.by_name) == ['group 1']
+    assert await groups_cache.get(group_hash_id, version_db, load) is index
+    await version_db.bump(group_hash_id)
+    assert await groups_cache.get(group_hash_id, version_db, load) is index, 'Version should not be checked in period'
+    moment = 10
+    assert list((await groups_cache.get(group_hash_id, version_db, load)).by_name) == ['group 2']
+    moment = 20
+    await groups_cache.get(group_hash_id, version_db, load)
+    assert loads_count == 2, 'Groups should not be loaded without version change'
+    groups_cache.invalidate(group_hash_id)
+    await groups_cache.get(group_hash_id, version_db, load)
+    assert loads_count == 3
+
+
+@pytest.mark.asyncio
+async def test_groups_db_service_cache():
+    adapters = get_memory_download_adapters()
+    groups_service_obj = groups_db_service_factory(
+        BANNED_ADDRESSES_GROUP_NAME, adapters.hash_db_service, adapters.version_db
+    )
+    assert [group.group_name for group in await groups_service_obj.list_groups()] == [DEFAULT_GROUP_NAME]
+    added_group = await groups_service_obj.add_group(AddGroupSet(group_name='scanners', group_description='Scanners'))
+    assert await groups_service_obj.get_group_by_name('scanners') == added_group, 'Changes should drop cached groups'
+    assert await adapters.version_db.versions([BANNED_ADDRESSES_GROUPS_HASH_ID]) == [1]
+
+    # groups are resolved from cache without storage calls
+    await adapters.hash_db_service.delete_values(BANNED_ADDRESSES_GROUPS_HASH_ID, [added_group.group_set_id])
+    assert await groups_service_obj.get_group_by_name('scanners') == added_group
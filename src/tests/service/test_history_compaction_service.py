@@ -0,0 +1,61 @@
+from datetime import timedelta
+
+from src.schemas.base_input_schema import now_cur_tz
+from src.schemas.usage_schemas import ActionType
+from src.schemas.usage_schemas import AddressHistoryRecord
+from src.schemas.usage_schemas import HistoryRecordInfo
+from src.service.history_compaction_service import HistoryRetentionPolicy
+
+
+def history_record(days_ago: list[int]) -> AddressHistoryRecord:
+    moment = now_cur_tz()
+    return AddressHistoryRecord(
+        address='10.0.0.1',
+        last_update_time=moment - timedelta(days=min(days_ago)),
+        history_records=[
+            HistoryRecordInfo(
+                source='test',
+                action_time=moment - timedelta(days=x),
+                action_type=ActionType.add_action,
+                address_category='banned addresses',
+            )
+            for x in sorted(days_ago, reverse=True)
+        ],
+    )
+
+
+def test_history_retention_policy():
+    moment = now_cur_tz()
+    record_obj = history_record([1, 5, 10, 20])
+    assert not HistoryRetentionPolicy().active
+    assert HistoryRetentionPolicy().apply(record_obj, moment) is record_obj, 'Unchanged history should be kept as is'
+    assert HistoryRetentionPolicy(max_age=timedelta(days=30)).apply(record_obj, moment) is record_obj
+
+    compacted_obj = HistoryRetentionPolicy(max_age=timedelta(days=7)).apply(record_obj, moment)
+    assert compacted_obj is not None and len(compacted_obj.history_records) == 2
+    assert len(record_obj.history_records) == 4, 'Source history should not be changed'
+
+    compacted_obj = HistoryRetentionPolicy(max_records=3).apply(record_obj, moment)
+    assert compacted_obj is not None
+    assert compacted_obj.history_records == record_obj.history_records[1:], 'The latest records should be kept'
+
+    assert HistoryRetentionPolicy(idle=timedelta(days=2)).apply(history_record([3, 4]), moment) is None
+    assert HistoryRetentionPolicy(idle=timedelta(days=2)).apply(record_obj, moment) is record_obj
+
+
+def test_history_retention_policy_naive_record():
+    moment = now_cur_tz()
+    record_obj = history_record([1, 5, 10, 20])
+    naive_record_obj = record_obj.model_copy(
+        update={
+            'last_update_time': record_obj.last_update_time.replace(tzinfo=None),
+            'history_records': [
+                x.model_copy(update={'action_time': x.action_time.replace(tzinfo=None)})
+                for x in record_obj.history_records
+            ],
+        }
+    )
+    compacted_obj = HistoryRetentionPolicy(max_age=timedelta(days=7)).apply(naive_record_obj, moment)
+    assert compacted_obj is not None and len(compacted_obj.history_records) == 2, 'Naive times are in current timezone'
+    assert HistoryRetentionPolicy(idle=timedelta(hours=12)).apply(naive_record_obj, moment) is None
+    assert HistoryRetentionPolicy(max_records=3).apply(naive_record_obj, moment.replace(tzinfo=None)) is not None
@@ -0,0 +1,33 @@
+import json
+from ipaddress import IPv4Address
+
+import pytest
+
+from src.core.settings import BATCH_SIZE
+from src.service.history_read_service import addresses_page
+from src.service.history_read_service import stream_addresses
+from src.utils.ip_array_utils import addresses_array
+
+ADDRESSES = addresses_array(range(167772160, 167772160 + BATCH_SIZE + 5))
+
+
+def test_addresses_page():
+    page = addresses_page(ADDRESSES, None, 10)
+    assert page.addresses == ADDRESSES[:10] and page.next_cursor == IPv4Address(ADDRESSES[9])
+    page = addresses_page(ADDRESSES, page.next_cursor, 10)
+    assert page.addresses == ADDRESSES[10:20]
+    page = addresses_page(ADDRESSES, IPv4Address(ADDRESSES[-3]), 10)
+    assert page.addresses == ADDRESSES[-2:] and page.next_cursor is None, 'The last page should have no cursor'
+    page = addresses_page(ADDRESSES, None, 0)
+    assert page.addresses == ADDRESSES and page.next_cursor is None
+    # cursor address is not required to be in addresses
+    assert addresses_page(ADDRESSES, IPv4Address('9.255.255.255'), 1).addresses == ADDRESSES[:1]
+
+
+@pytest.mark.asyncio
+async def test_stream_addresses():
+    expected = [str(IPv4Address(x)) for x in ADDRESSES]
+    assert json.loads(''.join([x async for x in stream_addresses(ADDRESSES, False)])) == expected
+    assert json.loads(''.join([x async for x in stream_addresses(addresses_array(), False)])) == []
+    lines = ''.join([x async for x in stream_addresses(ADDRESSES, True)]).splitlines()
+    assert list(map(json.loads, lines)) == expected
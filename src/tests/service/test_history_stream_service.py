@@ -0,0 +1,106 @@
+from datetime import timedelta
+from ipaddress import IPv4Address
+
+import pytest
+
+from src.core.settings import BANNED_ADDRESSES_CATEGORY_NAME
+from src.core.settings import HISTORY_CONSUMER_GROUP
+from src.core.settings import STREAM_USAGE_INFO
+from src.db.adapters.usage_stream_db_adapter import UsageStreamGroupRedisAdapter
+from src.db.adapters.usage_stream_db_adapter import UsageStreamRedisAdapter
+from src.db.base_stream_group_db import StreamGroupInfo
+from src.db.storages.memory_stream_group_storage import MemoryStreamGroupStorage
+from src.db.storages.memory_stream_storage import MemoryStreamTsStorage
+from src.schemas.addresses_schemas import AgentAddressesInfoWithGroup
+from src.schemas.base_input_schema import now_cur_tz
+from src.schemas.usage_schemas import ActionType
+from src.schemas.usage_schemas import StreamUsageRecord
+from src.service.history_stream_service import create_history_group
+from src.service.history_stream_service import history_updates
+from src.service.history_stream_service import record_acknowledged
+from src.service.usage_retention_service import UsageStreamRetentionService
+from src.service.usage_stream_service import get_usage_add_service
+
+ADDRESSES = [IPv4Address('10.0.0.1'), IPv4Address('10.0.0.2'), IPv4Address('10.0.0.3')]
+
+
+def usage_stream_storages() -> tuple[UsageStreamRedisAdapter, UsageStreamGroupRedisAdapter]:
+    stream_storage = MemoryStreamTsStorage[str, dict[str, str]]()
+    return UsageStreamRedisAdapter(stream_storage), UsageStreamGroupRedisAdapter(
+        MemoryStreamGroupStorage(stream_storage)
+    )
+
+
+def test_history_updates():
+    action_time = now_cur_tz()
+    records = [
+        (
+            '1-0',
+            StreamUsageRecord(
+                action_type=ActionType.add_action,
+                action_time=action_time,
+                addresses=set(ADDRESSES[:2]),
+                address_category=BANNED_ADDRESSES_CATEGORY_NAME,
+                address_group='group_01',
+                source_agent='agent_01',
+            ),
+        ),
+        (
+            '2-0',
+            StreamUsageRecord(
+                action_type=ActionType.remove_action,
+                action_time=action_time,
+                addresses={ADDRESSES[0]},
+                source_agent='a',
+            ),
+        ),
+        (
+            '3-0',
+            StreamUsageRecord(action_type=ActionType.add_action, action_time=action_time, addresses=set(ADDRESSES)),
+        ),
+    ]
+    updates = history_updates(records)
+    assert sorted(updates) == [str(x) for x in ADDRESSES[:2]], 'Records without source agent should be skipped'
+    assert [x.action_type for x in updates[str(ADDRESSES[0])]] == [ActionType.add_action, ActionType.remove_action]
+    history_record_info_obj = updates[str(ADDRESSES[1])][0]
+    assert (
+        history_record_info_obj.source,
+        history_record_info_obj.address_category,
+        history_record_info_obj.address_group,
+        history_record_info_obj.action_time,
+    ) == ('agent_01', BANNED_ADDRESSES_CATEGORY_NAME, 'group_01', action_time)
+
+
+def test_record_acknowledged():
+    group_info = StreamGroupInfo[str](last_delivered_id='20-0', pending_count=2, min_pending_id='10-1')
+    assert [record_acknowledged(group_info, x) for x in ('5-0', '10-0', '10-1', '15-0', '20-1')] == [
+        True,
+        True,
+        False,
+        False,
+        False,
+    ]
+    assert record_acknowledged(StreamGroupInfo[str](last_delivered_id='20-0'), '20-0')
+    assert not record_acknowledged(StreamGroupInfo[str](), '1-0'), 'Nothing is acknowledged before delivery'
+
+
+@pytest.mark.asyncio
+async def test_usage_retention_keeps_pending_records():
+    stream_db_obj, stream_group_db = usage_stream_storages()
+    assert await create_history_group(stream_group_db)
+    assert not await create_history_group(stream_group_db), 'Existing group should not be created'
+    usage_add_service = get_usage_add_service(stream_db_obj)
+    moment = now_cur_tz()
+    for address in ADDRESSES:
+        agent_info = AgentAddressesInfoWithGroup(source_agent='test', action_time=moment, addresses=[address])
+        await usage_add_service.add(ActionType.add_action, agent_info, timestamp=moment - timedelta(days=10))
+    records = await stream_group_db.read_group(STREAM_USAGE_INFO, HISTORY_CONSUMER_GROUP, 'consumer', 2)
+    await stream_group_db.ack(STREAM_USAGE_INFO, HISTORY_CONSUMER_GROUP, [records[0][0]])
+
+    retention_service = UsageStreamRetentionService(stream_db_obj, None)
+    report = await retention_service.trim(moment, timedelta(days=7), None, 100, StreamGroupInfo[str]())
+    assert report.trimmed == 0, 'Records should be kept while consumer group is absent'
+    group_info = await stream_group_db.group_info(STREAM_USAGE_INFO, HISTORY_CONSUMER_GROUP)
+    report = await retention_service.trim(moment, timedelta(days=7), None, 100, group_info)
+    assert report.trimmed == 1, 'Only acknowledged records should be trimmed'
+    assert (await retention_service.trim(moment, timedelta(days=7), None, 100)).trimmed == 2
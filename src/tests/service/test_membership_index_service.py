@@ -0,0 +1,139 @@
+from ipaddress import IPv4Address
+from ipaddress import IPv4Network
+
+import pytest
+import pytest_asyncio
+
+from src.api.di.db_di_routines import get_memory_download_adapters
+from src.core.settings import ALLOWED_ADDRESSES_SET_ID
+from src.core.settings import BANNED_ADDRESSES_CATEGORY_NAME
+from src.core.settings import BANNED_ADDRESSES_GROUP_NAME
+from src.core.settings import BANNED_ADDRESSES_SET_ID
+from src.db.adapters.usage_stream_db_adapter import UsageStreamRedisAdapter
+from src.db.storages.memory_stream_storage import MemoryStreamTsStorage
+from src.schemas.addresses_schemas import AgentAddressesInfoWithGroup
+from src.schemas.base_input_schema import now_cur_tz
+from src.schemas.set_group_schemas import AddGroupSet
+from src.schemas.usage_schemas import ActionType
+from src.service.address_check_service import AddressCheckService
+from src.service.address_check_service import check_sources_cache
+from src.service.blacklist_service import BlacklistQuery
+from src.service.blacklist_service import BlacklistService
+from src.service.derived_sets_cache_service import SetsTeardown
+from src.service.membership_index_service import MembershipIndex
+from src.service.membership_index_service import fetch_indexed_blacklist
+from src.service.membership_index_service import indexed_blacklist_etag
+from src.service.networks_db_service import AllowedNetworksSetDBEntityService
+from src.service.service_db_factories import ServiceAdapters
+from src.service.service_db_factories import groups_db_service_factory
+from src.service.usage_stream_service import get_usage_add_service
+from src.service.usage_stream_service import get_usage_read_service
+from src.utils.ip_utils import random_ip_addresses
+
+BANNED_NETWORK = IPv4Network('10.100.0.0/22')
+ALLOWED_NETWORK = IPv4Network('10.100.1.0/24')
+ALLOWED_ADDRESSES = [IPv4Address('10.100.0.1'), IPv4Address('10.100.3.3')]
+REBUILD_SECONDS = 3600
+
+
+@pytest_asyncio.fixture
+async def service_adapter_obj() -> ServiceAdapters:
+    check_sources_cache.clear()
+    adapters = get_memory_download_adapters()
+    await adapters.address_set_db_entity.add_to_set(BANNED_ADDRESSES_SET_ID, BANNED_NETWORK)
+    await adapters.address_set_db_entity.add_to_set(BANNED_ADDRESSES_SET_ID, random_ip_addresses(1000))
+    await adapters.address_set_db_entity.add_to_set(ALLOWED_ADDRESSES_SET_ID, ALLOWED_ADDRESSES)
+    await AllowedNetworksSetDBEntityService(adapters.network_set_db_entity).write_records([ALLOWED_NETWORK])
+    return adapters
+
+
+def usage_info(addresses: list[IPv4Address]) -> AgentAddressesInfoWithGroup:
+    return AgentAddressesInfoWithGroup(source_agent='test', action_time=now_cur_tz(), addresses=addresses)
+
+
+async def storage_download(service_adapter_obj: ServiceAdapters, query: BlacklistQuery) -> list[str]:
+    blacklist_service_obj = BlacklistService(service_adapter_obj)
+    source = await blacklist_service_obj.prepare_download(query, SetsTeardown())
+    records = blacklist_service_obj.fetch_banned_addresses(
+        source.banned_set_id,
+        source.allowed_addresses,
+        source.allowed_networks,
+        query.records_count,
+        True,  # array engine produces sorted records as index
+        query.aggregate_prefix,
+    )
+    return [record async for addresses in records for record in addresses.split()]
+
+
+@pytest.mark.asyncio
+async def test_membership_index_check(service_adapter_obj: ServiceAdapters):
+    stream_db_obj = UsageStreamRedisAdapter(MemoryStreamTsStorage[str, dict[str, str]]())
+    usage_add_service = get_usage_add_service(stream_db_obj)
+    usage_read_service = get_usage_read_service(stream_db_obj)
+    index = MembershipIndex()
+    assert index.ready is False and index.view() is None
+    await index.refresh(service_adapter_obj, usage_read_service, REBUILD_SECONDS)
+    assert index.ready is True
+
+    addresses = [*ALLOWED_ADDRESSES, IPv4Address('10.100.0.2'), IPv4Address('10.100.1.5'), IPv4Address('8.8.8.8')]
+    check_service_obj = AddressCheckService(service_adapter_obj)
+    assert index.check(list(map(int, addresses))) == await check_service_obj.check_addresses(list(map(int, addresses)))
+
+    # changes are applied from usage stream, index is corrected by current state of storage
+    added_address, removed_address = IPv4Address('192.168.0.1'), IPv4Address('10.100.0.2')
+    await service_adapter_obj.address_set_db_entity.add_to_set(BANNED_ADDRESSES_SET_ID, [added_address])
+    await service_adapter_obj.address_set_db_entity.del_from_set(BANNED_ADDRESSES_SET_ID, [removed_address])
+    for address in added_address, removed_address:
+        await usage_add_service.add(ActionType.add_action, usage_info([address]), BANNED_ADDRESSES_CATEGORY_NAME)
+    view = index.view()
+    await index.refresh(service_adapter_obj, usage_read_service, REBUILD_SECONDS)
+    added_result, removed_result = index.check([int(added_address), int(removed_address)])
+    assert added_result.banned is True and removed_result.banned is False
+    assert view is not None and view.sets[BANNED_ADDRESSES_SET_ID] != index.view().sets[BANNED_ADDRESSES_SET_ID]
+
+    # groups are reloaded on changes of groups lists
+    banned_group = await groups_db_service_factory(
+        BANNED_ADDRESSES_GROUP_NAME, service_adapter_obj.hash_db_service, service_adapter_obj.version_db
+    ).add_group(AddGroupSet(group_name='scanners', group_description='Scanners'))
+    await service_adapter_obj.address_set_db_entity.add_to_set(banned_group.group_set_id, [added_address])
+    await index.refresh(service_adapter_obj, usage_read_service, REBUILD_SECONDS)
+    assert index.check([int(added_address)])[0].banned_groups == ['scanners', 'default']
+
+
+@pytest.mark.asyncio
+async def test_membership_index_download(service_adapter_obj: ServiceAdapters):
+    stream_db_obj = UsageStreamRedisAdapter(MemoryStreamTsStorage[str, dict[str, str]]())
+    index = MembershipIndex()
+    await index.refresh(service_adapter_obj, get_usage_read_service(stream_db_obj), REBUILD_SECONDS)
+    view = index.view()
+    assert view is not None and view is index.view(), 'View should be made once per index generation'
+    assert view.covers([BANNED_ADDRESSES_SET_ID, ALLOWED_ADDRESSES_SET_ID])
+    for filter_records, records_count, aggregate_prefix in (
+        (True, 0, None),
+        (False, 0, None),
+        (True, 10, None),
+        (True, 0, 24),
+        (True, 0, 32),
+    ):
+        query = BlacklistQuery(
+            (BANNED_ADDRESSES_SET_ID,), (ALLOWED_ADDRESSES_SET_ID,), filter_records, records_count, aggregate_prefix
+        )
+        indexed_records = [
+            record async for addresses in fetch_indexed_blacklist(view, query) for record in addresses.split()
+        ]
+        assert indexed_records == await storage_download(service_adapter_obj, query), f'Mismatch for {query}'
+    query = BlacklistQuery((BANNED_ADDRESSES_SET_ID,), (ALLOWED_ADDRESSES_SET_ID,), True, 0)
+    assert await indexed_blacklist_etag(view, query) != await indexed_blacklist_etag(
+        view, BlacklistQuery((BANNED_ADDRESSES_SET_ID,), (ALLOWED_ADDRESSES_SET_ID,), False, 0)
+    )
+    # index of another process (or rebuilt index) with the same contents gives the same ETag
+    other_index = MembershipIndex()
+    await other_index.refresh(service_adapter_obj, get_usage_read_service(stream_db_obj), REBUILD_SECONDS)
+    other_view = other_index.view()
+    assert other_view is not None
+    assert await indexed_blacklist_etag(other_view, query) == await indexed_blacklist_etag(view, query)
+    await service_adapter_obj.address_set_db_entity.add_to_set(BANNED_ADDRESSES_SET_ID, [IPv4Address('10.20.30.40')])
+    await other_index.build(service_adapter_obj, get_usage_read_service(stream_db_obj))
+    changed_view = other_index.view()
+    assert changed_view is not None
+    assert await indexed_blacklist_etag(changed_view, query) != await indexed_blacklist_etag(view, query)
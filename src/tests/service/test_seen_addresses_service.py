@@ -0,0 +1,44 @@
+from ipaddress import IPv4Address
+from uuid import UUID
+from uuid import uuid4
+
+import pytest
+
+from src.db.adapters.memory_time_index_db_adapter import MemoryTimeIndexDbAdapter
+from src.db.adapters.memory_version_db_adapter import MemoryVersionDbAdapter
+from src.db.adapters.set_db_entity_str_adapter import SetDbEntityStrAdapterIpAddress
+from src.db.adapters.time_index_db_str_adapter import TimeIndexDbStrAdapterIpAddress
+from src.db.storages.memory_set_storage import MemorySetStorage
+from src.schemas.base_input_schema import now_cur_tz
+from src.service.abstract_set_db_entity_service import AbstractSetDBEntityService
+from src.service.seen_addresses_service import SeenAddressesService
+
+ADDRESSES = [IPv4Address('10.0.0.1'), IPv4Address('10.0.0.2'), IPv4Address('10.0.0.3')]
+
+
+@pytest.mark.asyncio
+async def test_changed_records():
+    set_id = uuid4()
+    version_db = MemoryVersionDbAdapter[UUID]()
+    service_obj = AbstractSetDBEntityService[IPv4Address](
+        SetDbEntityStrAdapterIpAddress(MemorySetStorage[str, str]().set_db_entity_adapter()), set_id, version_db
+    )
+    await service_obj.write_records(ADDRESSES[:1])
+    version = (await version_db.versions([set_id]))[0]
+    assert await service_obj.write_changed_records([*ADDRESSES, ADDRESSES[1]]) == ADDRESSES[1:]
+    assert (await version_db.versions([set_id]))[0] != version, 'Changes should bump version'
+    version = (await version_db.versions([set_id]))[0]
+    assert await service_obj.write_changed_records(ADDRESSES) == [], 'Present addresses should not be changed'
+    assert (await version_db.versions([set_id]))[0] == version, 'Version should be kept without changes'
+    assert await service_obj.del_changed_records([ADDRESSES[0], IPv4Address('10.0.0.4')]) == ADDRESSES[:1]
+    assert sorted(await service_obj.get_records()) == ADDRESSES[1:]
+
+
+@pytest.mark.asyncio
+async def test_seen_addresses_service():
+    service_obj = SeenAddressesService(TimeIndexDbStrAdapterIpAddress(MemoryTimeIndexDbAdapter[str, str]()), uuid4())
+    assert await service_obj.last_seen(ADDRESSES[0]) is None
+    seen_time = now_cur_tz().replace(microsecond=0)
+    await service_obj.mark_seen(ADDRESSES[:2], seen_time)
+    assert await service_obj.last_seen(ADDRESSES[0]) == seen_time
+    assert await service_obj.last_seen(ADDRESSES[2]) is None
@@ -0,0 +1,24 @@
+import gzip
+
+import pytest
+
+from src.service.snapshot_cache_service import DownloadSnapshot
+from src.service.snapshot_cache_service import download_snapshot_cache
+from src.service.snapshot_cache_service import get_snapshot_body
+
+ETAG = '"snapshot-test"'
+
+
+@pytest.mark.asyncio
+async def test_snapshot_encoded_bodies():
+    body = b'10.0.0.1\n' * 1000
+    snapshot = DownloadSnapshot(body)
+    download_snapshot_cache.put(ETAG, snapshot)
+    cache_size = download_snapshot_cache.size
+    assert await get_snapshot_body(ETAG, snapshot, None) == body
+    encoded_body = await get_snapshot_body(ETAG, snapshot, 'gzip')
+    assert gzip.decompress(encoded_body) == body
+    assert snapshot.encoded_bodies == {'gzip': encoded_body}, 'Compressed variant should be kept in snapshot'
+    assert download_snapshot_cache.size == cache_size + len(encoded_body), 'Cache size should include variant'
+    assert await get_snapshot_body(ETAG, snapshot, 'gzip') is encoded_body, 'Body should not be compressed again'
+    download_snapshot_cache.pop(ETAG)
@@ -0,0 +1,50 @@
+from datetime import timedelta
+from ipaddress import IPv4Address
+
+import pytest
+
+from src.db.adapters.usage_stream_db_adapter import UsageStreamRedisAdapter
+from src.db.storages.file_segment_storage import FileSegmentStorage
+from src.db.storages.memory_stream_storage import MemoryStreamTsStorage
+from src.schemas.addresses_schemas import AgentAddressesInfoWithGroup
+from src.schemas.base_input_schema import now_cur_tz
+from src.schemas.usage_schemas import ActionType
+from src.service.usage_retention_service import UsageStreamRetentionService
+from src.service.usage_stream_service import get_usage_add_service
+from src.service.usage_stream_service import get_usage_read_service
+from src.utils.time_utils import datetime_from_epoch_time
+from src.utils.time_utils import get_epoch_time
+
+OLD_ADDRESSES = [IPv4Address('10.0.0.1'), IPv4Address('10.0.0.2'), IPv4Address('10.0.0.3')]
+NEW_ADDRESSES = [IPv4Address('10.0.1.1'), IPv4Address('10.0.1.2')]
+
+
+@pytest.mark.asyncio
+async def test_usage_stream_retention(tmp_path):
+    stream_db_obj = UsageStreamRedisAdapter(MemoryStreamTsStorage[str, dict[str, str]]())
+    archive_storage = FileSegmentStorage(tmp_path, 'usage', 1024 * 1024)
+    usage_add_service = get_usage_add_service(stream_db_obj)
+    moment = now_cur_tz()
+    for addresses, timestamp in (OLD_ADDRESSES, moment - timedelta(days=10)), (NEW_ADDRESSES, moment):
+        for address in addresses:
+            agent_info = AgentAddressesInfoWithGroup(source_agent='test', action_time=timestamp, addresses=[address])
+            await usage_add_service.add(ActionType.add_action, agent_info, timestamp=timestamp)
+
+    retention_service = UsageStreamRetentionService(stream_db_obj, archive_storage)
+    report = await retention_service.trim(moment, timedelta(days=7), None, 100)
+    assert (report.archived, report.trimmed) == (3, 3)
+    assert (await retention_service.trim(moment, timedelta(days=7), None, 100)).trimmed == 0
+    live_read_service = get_usage_read_service(stream_db_obj)
+    assert await live_read_service.read() == set(NEW_ADDRESSES), 'Old records should be trimmed'
+
+    read_service = get_usage_read_service(stream_db_obj, archive_storage=archive_storage)
+    assert await read_service.read() == {*OLD_ADDRESSES, *NEW_ADDRESSES}, 'Archived records should be read'
+    # memory stream storage compares record moments as naive datetimes
+    for days, expected_addresses in (20, {*OLD_ADDRESSES, *NEW_ADDRESSES}), (1, set(NEW_ADDRESSES)):
+        start_timestamp = datetime_from_epoch_time(get_epoch_time(moment - timedelta(days=days)))
+        assert await read_service.read(start_timestamp) == expected_addresses
+
+    report = await retention_service.trim(moment, None, 1, 100)
+    assert (report.archived, report.trimmed) == (1, 1), 'Records over max records should be trimmed'
+    assert await live_read_service.read() == set(NEW_ADDRESSES[1:])
+    assert await read_service.read() == {*OLD_ADDRESSES, *NEW_ADDRESSES}
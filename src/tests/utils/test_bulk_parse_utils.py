@@ -0,0 +1,79 @@
+import struct
+from ipaddress import IPv4Address
+from typing import AsyncGenerator
+
+import pytest
+
+from src.utils.bulk_parse_utils import BINARY_BODY_FORMAT
+from src.utils.bulk_parse_utils import NDJSON_BODY_FORMAT
+from src.utils.bulk_parse_utils import TEXT_BODY_FORMAT
+from src.utils.bulk_parse_utils import ParsedPiece
+from src.utils.bulk_parse_utils import body_format_from_content_type
+from src.utils.bulk_parse_utils import parse_address
+from src.utils.bulk_parse_utils import parse_bulk_body
+
+
+async def body_chunks(body: bytes, chunk_size: int) -> AsyncGenerator[bytes, None]:
+    for position in range(0, len(body), chunk_size):
+        yield body[position : position + chunk_size]
+
+
+async def parse_body(body: bytes, body_format: str, chunk_size: int = 5) -> ParsedPiece:
+    result = ParsedPiece()
+    async for piece in parse_bulk_body(body_chunks(body, chunk_size), body_format):
+        result.addresses.extend(piece.addresses)
+        result.rejected.extend(piece.rejected)
+    return result
+
+
+def test_parse_address():
+    for address in ('0.0.0.0', '10.20.30.40', '255.255.255.255', '192.168.0.1'):
+        assert parse_address(address) == int(IPv4Address(address))
+    for incorrect_value in (
+        '',
+        '1.2.3',
+        '1.2.3.4.5',
+        '1.2.3.256',
+        '01.2.3.4',
+        '1.2.3.-4',
+        '1.2.3.a',
+        '1..2.3',
+        '١.2.3.4',
+    ):
+        assert parse_address(incorrect_value) is None, f'Value {incorrect_value} should be rejected'
+
+
+def test_body_format_from_content_type():
+    assert body_format_from_content_type(None) == TEXT_BODY_FORMAT
+    assert body_format_from_content_type('text/plain; charset=utf-8') == TEXT_BODY_FORMAT
+    assert body_format_from_content_type('application/x-ndjson') == NDJSON_BODY_FORMAT
+    assert body_format_from_content_type('application/octet-stream') == BINARY_BODY_FORMAT
+    assert body_format_from_content_type('application/json') is None
+
+
+@pytest.mark.asyncio
+async def test_parse_text_body():
+    result = await parse_body(b'10.0.0.1\n\n10.0.0.2\r\nwrong\n10.0.0.3', TEXT_BODY_FORMAT)
+    assert result.addresses == [int(IPv4Address('10.0.0.1')) + i for i in range(3)]
+    assert result.rejected == [(4, 'wrong')]
+
+
+@pytest.mark.asyncio
+async def test_parse_ndjson_body():
+    body = b'"10.0.0.1"\n167772162\n{"address": "10.0.0.3"}\n4294967296\ntrue\n"10.0.0.4"\n'
+    result = await parse_body(body, NDJSON_BODY_FORMAT)
+    assert result.addresses == [
+        int(IPv4Address('10.0.0.1')),
+        int(IPv4Address('10.0.0.2')),
+        int(IPv4Address('10.0.0.4')),
+    ]
+    assert [line_number for line_number, _ in result.rejected] == [3, 4, 5]
+
+
+@pytest.mark.asyncio
+async def test_parse_binary_body():
+    addresses = [int(IPv4Address('10.0.0.1')), int(IPv4Address('192.168.1.1')), 0, 2**32 - 1]
+    body = struct.pack(f'!{len(addresses)}I', *addresses)
+    result = await parse_body(body + b'\x01\x02', BINARY_BODY_FORMAT, chunk_size=3)
+    assert result.addresses == addresses
+    assert result.rejected == [(len(addresses) + 1, '0102')], 'Incomplete trailing record should be rejected'
@@ -0,0 +1,44 @@
+from src.utils.cache_utils import SizeLimitedLRUCache
+from src.utils.cache_utils import TTLLRUCache
+
+
+def test_size_limited_lru_cache():
+    cache = SizeLimitedLRUCache[str, bytes](10, len)
+    assert cache.enabled is True
+    assert cache.put('a', b'1234') is True
+    assert cache.put('b', b'1234') is True
+    assert cache.get('a') == b'1234', 'Value should be in cache'
+    # 'b' is least recently used now
+    assert cache.put('c', b'1234') is True
+    assert cache.get('b') is None, 'Least recently used value should be evicted'
+    assert cache.get('a') == b'1234'
+    assert cache.size == 8 and len(cache) == 2
+    assert cache.put('d', b'12345678901') is False, 'Too large value should not be stored'
+    assert cache.put('a', b'12') is True
+    assert cache.size == 6, 'Replaced value size should be accounted'
+    assert cache.pop('a') == b'12'
+    assert cache.size == 4
+
+
+def test_disabled_cache():
+    cache = SizeLimitedLRUCache[str, bytes](0, len)
+    assert cache.enabled is False
+    assert cache.put('a', b'1') is False
+    assert cache.get('a') is None
+
+
+def test_ttl_lru_cache():
+    now = 0.0
+    cache = TTLLRUCache[str, int](2, 10, lambda: now)
+    assert cache.enabled is True
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    # 'b' is least recently used now
+    cache.put('c', 3)
+    assert cache.get('b') is None, 'Least recently used value should be evicted'
+    assert len(cache) == 2
+    now = 10.0
+    assert cache.get('a') is None, 'Expired value should not be returned'
+    assert len(cache) == 1
+    assert TTLLRUCache[str, int](2, 0).enabled is False, 'Cache with zero TTL should be disabled'
@@ -0,0 +1,43 @@
+import gzip
+
+import pytest
+
+from src.utils.compression_utils import compress
+from src.utils.compression_utils import compressed_stream
+from src.utils.compression_utils import encoded_etag
+from src.utils.compression_utils import parse_accept_encoding
+from src.utils.compression_utils import select_encoding
+
+BODY = ''.join(f'10.0.{x // 256}.{x % 256}\n' for x in range(5000))
+
+
+def test_select_encoding():
+    assert parse_accept_encoding('gzip, deflate;q=0.5, br;q=bad') == {'gzip': 1.0, 'deflate': 0.5, 'br': 0.0}
+    assert select_encoding(None) is None
+    assert select_encoding('') is None
+    assert select_encoding('deflate, br') is None, 'Unsupported encodings should be ignored'
+    assert select_encoding('gzip, deflate, br') == 'gzip'
+    assert select_encoding('GZIP;q=0.8') == 'gzip'
+    assert select_encoding('gzip;q=0') is None, 'Encoding with zero weight should not be selected'
+    assert select_encoding('*') is not None
+    assert select_encoding('*, gzip;q=0') != 'gzip'
+
+
+def test_encoded_etag():
+    assert encoded_etag('"abc"', None) == '"abc"'
+    assert encoded_etag('"abc"', 'gzip') == '"abc-gzip"'
+
+
+@pytest.mark.asyncio
+async def test_compression():
+    compressed_body = compress(BODY.encode(), 'gzip')
+    assert len(compressed_body) < len(BODY) / 4
+    assert gzip.decompress(compressed_body).decode() == BODY
+
+    async def chunks():
+        for position in range(0, len(BODY), 1000):
+            yield BODY[position : position + 1000]
+
+    compressed_chunks = [chunk async for chunk in compressed_stream(chunks(), 'gzip')]
+    assert len(compressed_chunks) > 1, 'Stream should be compressed chunk by chunk'
+    assert gzip.decompress(b''.join(compressed_chunks)).decode() == BODY
@@ -0,0 +1,43 @@
+from ipaddress import IPv4Address
+from ipaddress import IPv4Network
+from ipaddress import collapse_addresses
+
+from src.utils.ip_array_utils import addresses_array
+from src.utils.ip_array_utils import aggregate_addresses
+from src.utils.ip_array_utils import intervals_to_networks
+from src.utils.ip_array_utils import render_networks
+from src.utils.ip_utils import random_ip_addresses
+
+
+def networks_of(networks: list[tuple[int, int]]) -> list[IPv4Network]:
+    return [IPv4Network((address, prefix_length)) for address, prefix_length in networks]
+
+
+def test_exact_aggregation():
+    addresses = sorted(set(random_ip_addresses(2000)) | set(IPv4Network('10.20.0.0/23')))
+    networks = aggregate_addresses(addresses_array(map(int, addresses)))
+    assert networks_of(networks) == list(
+        collapse_addresses(map(IPv4Network, addresses))
+    ), 'Should match ipaddress.collapse_addresses'
+    assert IPv4Network('10.20.0.0/23') in networks_of(networks), 'Contiguous run should be collapsed'
+    assert aggregate_addresses(addresses_array()) == [], 'No addresses should produce no networks'
+    assert intervals_to_networks([(0, 2**32 - 1)]) == [(0, 0)], 'Full address space is one network'
+
+
+def test_lossy_aggregation():
+    addresses = [IPv4Address('192.168.1.1'), IPv4Address('192.168.1.200'), IPv4Address('192.168.2.5')]
+    excluded = [(int(IPv4Address('192.168.2.100')), int(IPv4Address('192.168.2.100')))]
+    networks = aggregate_addresses(addresses_array(map(int, addresses)), 24, excluded)
+    assert networks_of(networks) == [
+        IPv4Network('192.168.1.0/24'),
+        IPv4Network('192.168.2.5/32'),
+    ], 'Networks with excluded addresses should not be widened'
+    included = [(int(IPv4Address('192.168.0.0')), int(IPv4Address('192.168.0.255')))]
+    networks = aggregate_addresses(addresses_array(map(int, addresses)), 24, (), included)
+    assert networks_of(networks) == [IPv4Network('192.168.0.0/23'), IPv4Network('192.168.2.0/24')]
+
+
+def test_render_networks():
+    networks = [(int(IPv4Address('10.0.0.0')), 8), (int(IPv4Address('192.168.0.1')), 32)]
+    assert render_networks(networks) == '10.0.0.0/8\n192.168.0.1\n', 'Single addresses are rendered without prefix'
+    assert render_networks([]) == ''
@@ -0,0 +1,39 @@
+from ipaddress import IPv4Address
+from ipaddress import IPv4Network
+
+from src.utils.ip_utils import IPv4NetworksMatcher
+from src.utils.ip_utils import merge_networks_to_intervals
+from src.utils.ip_utils import random_ip_addresses
+
+NETWORKS = [
+    IPv4Network('192.168.1.0/24'),
+    IPv4Network('192.168.0.0/24'),
+    IPv4Network('10.0.0.0/8'),
+    IPv4Network('10.10.0.0/16'),
+    IPv4Network('172.16.5.4/32'),
+]
+
+
+def test_merge_networks_to_intervals():
+    assert merge_networks_to_intervals([]) == [], 'Empty networks list should produce no intervals'
+    assert merge_networks_to_intervals(NETWORKS) == [
+        (int(IPv4Address('10.0.0.0')), int(IPv4Address('10.255.255.255'))),
+        (int(IPv4Address('172.16.5.4')), int(IPv4Address('172.16.5.4'))),
+        (int(IPv4Address('192.168.0.0')), int(IPv4Address('192.168.1.255'))),
+    ], 'Nested and adjacent networks should be merged'
+
+
+def test_networks_matcher():
+    matcher = IPv4NetworksMatcher(NETWORKS)
+    assert len(matcher) == 3, 'Matcher should contain merged intervals'
+    assert IPv4Address('10.1.2.3') in matcher
+    assert IPv4Address('192.168.1.255') in matcher
+    assert IPv4Address('172.16.5.4') in matcher
+    assert IPv4Address('172.16.5.5') not in matcher
+    assert IPv4Address('9.255.255.255') not in matcher
+    assert IPv4Address('192.168.2.0') not in matcher
+    assert IPv4Address('0.0.0.0') not in IPv4NetworksMatcher([]), 'Empty matcher should not contain addresses'
+    for address in random_ip_addresses(1000):
+        assert (address in matcher) == any(address in network for network in NETWORKS), (
+            'Matcher result differs from linear scan for %s' % address
+        )
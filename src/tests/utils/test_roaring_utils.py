@@ -0,0 +1,41 @@
+from random import randint
+from random import sample
+
+from src.utils.roaring_utils import ARRAY_CONTAINER_MAX_SIZE
+from src.utils.roaring_utils import RoaringBitmap
+
+
+def random_values(count: int) -> set[int]:
+    # dense container (bitmap) with sparse values around it
+    dense = set(sample(range(0x0A000000, 0x0A010000), ARRAY_CONTAINER_MAX_SIZE + count))
+    return dense | {randint(0, 2**32 - 1) for _ in range(count)}
+
+
+def test_roaring_bitmap():
+    for _ in range(5):
+        left_values, right_values = random_values(1000), random_values(1000)
+        left, right = RoaringBitmap(left_values), RoaringBitmap(right_values)
+        assert len(left) == len(left_values)
+        assert list(left) == sorted(left_values), 'Values should be iterated in ascending order'
+        assert all(value in left for value in left_values)
+        assert not any(value in left for value in right_values - left_values)
+        assert list(left | right) == sorted(left_values | right_values)
+        assert list(left & right) == sorted(left_values & right_values)
+        assert list(left - right) == sorted(left_values - right_values)
+        assert left | right == RoaringBitmap.union([left, right])
+        assert left == RoaringBitmap(sorted(left_values, reverse=True)), 'Bitmap should not depend on values order'
+
+        copied = left.copy()
+        removed_values = set(sample(sorted(left_values), len(left_values) // 2))
+        copied.difference_update(removed_values)
+        copied.update(right_values)
+        assert list(copied) == sorted((left_values - removed_values) | right_values)
+        assert list(left) == sorted(left_values), 'Source of copy should not be changed'
+        assert list(left.to_array()) == sorted(left_values)
+
+    bitmap = RoaringBitmap([1, 2**32 - 1])
+    bitmap.discard(1)
+    bitmap.add(2)
+    assert list(bitmap) == [2, 2**32 - 1]
+    bitmap.difference_update([2, 2**32 - 1])
+    assert len(bitmap) == 0 and bitmap == RoaringBitmap(), 'Empty containers should be removed'
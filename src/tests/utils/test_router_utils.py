@@ -0,0 +1,23 @@
+from src.utils.router_utils import etag_matches
+from src.utils.router_utils import get_download_headers
+
+ETAG = '"0123abcd"'
+
+
+def test_etag_matches():
+    assert etag_matches(None, ETAG) is False
+    assert etag_matches('', ETAG) is False
+    assert etag_matches(ETAG, ETAG) is True
+    assert etag_matches('W/' + ETAG, ETAG) is True, 'Weak comparison should be used'
+    assert etag_matches('"other", ' + ETAG, ETAG) is True, 'List of ETags should be supported'
+    assert etag_matches('*', ETAG) is True
+    assert etag_matches('"other"', ETAG) is False
+
+
+def test_get_download_headers():
+    assert get_download_headers('') == {'Vary': 'Accept-Encoding'}
+    assert get_download_headers('black list.txt') == {
+        'Vary': 'Accept-Encoding',
+        'Content-Disposition': "attachment; filename*=utf-8''black%20list.txt",
+    }
+    assert get_download_headers('', 'gzip') == {'Vary': 'Accept-Encoding', 'Content-Encoding': 'gzip'}
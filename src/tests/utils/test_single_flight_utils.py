@@ -0,0 +1,172 @@
+import asyncio
+from typing import AsyncGenerator
+
+import pytest
+
+from src.utils.single_flight_utils import SharedStream
+from src.utils.single_flight_utils import SingleFlight
+from src.utils.single_flight_utils import StreamFlights
+
+PIECES_COUNT = 10
+CONSUMERS_COUNT = 5
+
+
+class PiecesSource:
+    """Pieces generator with tracking of sources count and closing"""
+
+    def __init__(self, pieces_count: int):
+        self.pieces_count = pieces_count
+        self.started = 0
+        self.closed = 0
+
+    async def pieces(self) -> AsyncGenerator[str, None]:
+        self.started += 1
+        try:
+            for i in range(self.pieces_count):
+                await asyncio.sleep(0)
+                yield f'piece {i}\n'
+        finally:
+            self.closed += 1
+
+
+async def collect(pieces: AsyncGenerator[str, None]) -> list[str]:
+    return [piece async for piece in pieces]
+
+
+@pytest.mark.asyncio
+async def test_single_flight():
+    flight = SingleFlight[str, int]()
+    executions = 0
+
+    async def compute() -> int:
+        nonlocal executions
+        executions += 1
+        await asyncio.sleep(0.01)
+        return 42
+
+    results = await asyncio.gather(*[flight.do('key', compute) for _ in range(CONSUMERS_COUNT)])
+    assert results == [42] * CONSUMERS_COUNT
+    assert executions == 1, 'Concurrent calls should await one computation'
+    assert await flight.do('key', compute) == 42
+    assert executions == 2, 'Finished computation should not be reused'
+    assert flight.stats.calls == CONSUMERS_COUNT + 1
+    assert flight.stats.executions == 2
+    assert flight.stats.coalesced == CONSUMERS_COUNT - 1
+    assert flight.stats.coalescing_ratio == (CONSUMERS_COUNT - 1) / (CONSUMERS_COUNT + 1)
+
+
+@pytest.mark.asyncio
+async def test_single_flight_errors():
+    flight = SingleFlight[str, int]()
+
+    async def fail() -> int:
+        await asyncio.sleep(0.01)
+        raise ValueError('Computation failed')
+
+    results = await asyncio.gather(*[flight.do('key', fail) for _ in range(2)], return_exceptions=True)
+    assert all(isinstance(result, ValueError) for result in results), 'Error should be passed to all callers'
+    assert flight.stats.executions == 1
+
+
+@pytest.mark.asyncio
+async def test_single_flight_cancellation():
+    flight = SingleFlight[str, int]()
+
+    async def compute() -> int:
+        await asyncio.sleep(0.01)
+        return 42
+
+    leader = asyncio.create_task(flight.do('key', compute))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(flight.do('key', compute))
+    await asyncio.sleep(0)
+    leader.cancel()
+    assert await follower == 42, 'Cancellation of one caller should not affect others'
+
+
+@pytest.mark.asyncio
+async def test_stream_flights():
+    source = PiecesSource(PIECES_COUNT)
+    flights = StreamFlights[str, str]()
+    results = await asyncio.gather(*[collect(flights.stream('key', source.pieces)) for _ in range(CONSUMERS_COUNT)])
+    expected = [f'piece {i}\n' for i in range(PIECES_COUNT)]
+    assert results == [expected] * CONSUMERS_COUNT, 'All consumers should receive all pieces'
+    assert source.started == 1, 'Concurrent consumers should read one source'
+    assert source.closed == 1
+    assert await collect(flights.stream('key', source.pieces)) == expected
+    assert source.started == 2, 'Finished stream should not be reused'
+    assert flights.stats.coalesced == CONSUMERS_COUNT - 1
+
+
+@pytest.mark.asyncio
+async def test_stream_flights_replay_limit():
+    source = PiecesSource(PIECES_COUNT)
+    flights = StreamFlights[str, str](replay_limit=2)
+    first_stream = flights.stream('key', source.pieces)
+    assert await first_stream.__anext__() == 'piece 0\n'
+    # joining consumer receives the stream from the start
+    second_stream = flights.stream('key', source.pieces)
+    assert await second_stream.__anext__() == 'piece 0\n'
+    assert source.started == 1
+    await asyncio.sleep(0.01)
+    # replay limit is exceeded, new source should be created
+    assert len(await collect(flights.stream('key', source.pieces))) == PIECES_COUNT
+    assert source.started == 2
+    assert (
+        await asyncio.gather(collect(first_stream), collect(second_stream))
+        == [[f'piece {i}\n' for i in range(1, PIECES_COUNT)]] * 2
+    )
+
+
+@pytest.mark.asyncio
+async def test_shared_stream_backpressure():
+    source = PiecesSource(1000)
+    shared_stream = SharedStream[str](source.pieces(), replay_limit=3)
+    await asyncio.sleep(0.01)
+    assert source.started == 0, 'Source should be read after the first consumer joins'
+    slow_stream = shared_stream.consume()
+    assert await slow_stream.__anext__() == 'piece 0\n'
+    fast_task = asyncio.create_task(collect(shared_stream.consume()))
+    await asyncio.sleep(0.05)
+    assert not fast_task.done(), 'Fast consumer should wait for the slowest one'
+    assert shared_stream.buffered <= 3, 'Source should not be read far ahead of the slowest consumer'
+    assert len(await collect(slow_stream)) == 999
+    assert len(await fast_task) == 1000
+
+
+@pytest.mark.asyncio
+async def test_stream_flights_disconnect():
+    source = PiecesSource(PIECES_COUNT)
+    flights = StreamFlights[str, str]()
+
+    async def is_disconnected() -> bool:
+        return True
+
+    assert await collect(flights.stream('key', source.pieces, is_disconnected)) == ['piece 0\n']
+    await asyncio.sleep(0.01)
+    assert source.closed == 1, 'Source should be closed when client is gone'
+
+
+@pytest.mark.asyncio
+async def test_stream_flights_consumers_gone():
+    source = PiecesSource(PIECES_COUNT)
+    flights = StreamFlights[str, str]()
+    stream = flights.stream('key', source.pieces)
+    assert await stream.__anext__() == 'piece 0\n'
+    await stream.aclose()
+    await asyncio.sleep(0.01)
+    assert source.closed == 1, 'Source should be closed when all consumers are gone'
+    assert await collect(flights.stream('key', source.pieces)) == [f'piece {i}\n' for i in range(PIECES_COUNT)]
+    assert source.started == 2, 'Cancelled stream should not be joined'
+
+
+@pytest.mark.asyncio
+async def test_stream_flights_errors():
+    flights = StreamFlights[str, str]()
+
+    async def failed_pieces() -> AsyncGenerator[str, None]:
+        yield 'piece\n'
+        raise ValueError('Stream failed')
+
+    with pytest.raises(ValueError):
+        await collect(flights.stream('key', failed_pieces))
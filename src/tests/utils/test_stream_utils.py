@@ -0,0 +1,57 @@
+from typing import AsyncGenerator
+
+import pytest
+
+from src.utils.stream_utils import chunked_stream
+
+RECORDS_COUNT = 100
+CHUNK_SIZE = 50
+
+
+class RecordsSource:
+    """Records generator with tracking of fetched records and closing"""
+
+    def __init__(self, records_count: int):
+        self.records_count = records_count
+        self.fetched = 0
+        self.closed = False
+
+    async def records(self) -> AsyncGenerator[str, None]:
+        try:
+            for i in range(self.records_count):
+                self.fetched += 1
+                yield f'10.0.0.{i}\n'
+        finally:
+            self.closed = True
+
+
+@pytest.mark.asyncio
+async def test_chunked_stream():
+    source = RecordsSource(RECORDS_COUNT)
+    chunks = [chunk async for chunk in chunked_stream(source.records(), CHUNK_SIZE)]
+    assert ''.join(chunks) == ''.join(f'10.0.0.{i}\n' for i in range(RECORDS_COUNT)), 'All records should be streamed'
+    assert len(chunks) > 1, 'Records should be split into several chunks'
+    max_record_length = len('10.0.0.99\n')
+    for chunk in chunks:
+        assert len(chunk) < CHUNK_SIZE + max_record_length, 'Chunk size should be bounded'
+    assert source.closed is True, 'Source generator should be closed'
+
+
+@pytest.mark.asyncio
+async def test_chunked_stream_disconnect():
+    source = RecordsSource(RECORDS_COUNT)
+
+    async def is_disconnected() -> bool:
+        return True
+
+    chunks = [chunk async for chunk in chunked_stream(source.records(), CHUNK_SIZE, is_disconnected)]
+    assert len(chunks) == 1, 'Streaming should stop after the first chunk on client disconnection'
+    assert source.fetched < RECORDS_COUNT, 'Fetching of records should stop on client disconnection'
+    assert source.closed is True, 'Source generator should be closed on client disconnection'
+
+
+@pytest.mark.asyncio
+async def test_chunked_stream_empty():
+    source = RecordsSource(0)
+    chunks = [chunk async for chunk in chunked_stream(source.records(), CHUNK_SIZE)]
+    assert chunks == [], 'Empty source should produce no chunks'
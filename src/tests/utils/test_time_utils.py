@@ -5,9 +5,11 @@ from zoneinfo import ZoneInfo
 
 from pytest import fixture
 
+from src.utils.time_utils import datetime_from_epoch_time
 from src.utils.time_utils import decode_datetime
 from src.utils.time_utils import encode_datetime
 from src.utils.time_utils import get_timedelta_for_history_query
+from src.utils.time_utils import parse_stream_id
 
 
 @dataclass
@@ -43,3 +45,10 @@ def test_encoding_and_decoding():
     curr_date_time_utc = datetime.datetime.now(tz=ZoneInfo('UTC'))
     encoded_str_utc: str = encode_datetime(curr_date_time_utc)
     assert curr_date_time_utc == decode_datetime(encoded_str_utc), 'Encode-decode operation (UTC tz) is not successful'
+
+
+def test_parse_stream_id():
+    assert parse_stream_id('1700000000000-0') == (1700000000000, 0)
+    assert parse_stream_id('1700000000000-00000012') == (1700000000000, 12)
+    assert parse_stream_id('1700000000000-2') < parse_stream_id('1700000000000-10'), 'Sequence compared as number'
+    assert datetime_from_epoch_time(1700000000000) == datetime.datetime.fromtimestamp(1700000000)
@@ -0,0 +1,131 @@
+# Incremental parsers of bulk address bodies (addresses are parsed to integers without IPv4Address objects)
+import json
+from array import array
+from dataclasses import dataclass
+from dataclasses import field
+from sys import byteorder
+from typing import AsyncGenerator
+from typing import AsyncIterator
+from typing import Optional
+
+from src.utils.ip_array_utils import ADDRESS_SIZE_BYTES
+from src.utils.ip_array_utils import addresses_array
+
+TEXT_BODY_FORMAT = 'text'
+NDJSON_BODY_FORMAT = 'ndjson'
+BINARY_BODY_FORMAT = 'binary'
+
+BODY_FORMATS_BY_CONTENT_TYPE = {
+    'text/plain': TEXT_BODY_FORMAT,
+    'application/x-ndjson': NDJSON_BODY_FORMAT,
+    'application/ndjson': NDJSON_BODY_FORMAT,
+    'application/octet-stream': BINARY_BODY_FORMAT,
+}
+
+ADDRESS_MAX_VALUE = 2**32 - 1
+
+
+@dataclass
+class ParsedPiece:
+    """Addresses parsed from piece of body and rejected lines (line number, line) of it"""
+
+    addresses: list[int] = field(default_factory=list)
+    rejected: list[tuple[int, str]] = field(default_factory=list)
+
+
+def body_format_from_content_type(content_type: Optional[str]) -> Optional[str]:
+    """Body format by Content-Type header (parameters are ignored), text is used by default"""
+    if not content_type:
+        return TEXT_BODY_FORMAT
+    return BODY_FORMATS_BY_CONTENT_TYPE.get(content_type.split(';', 1)[0].strip().lower())
+
+
+def parse_address(value: str) -> Optional[int]:
+    """Parse IPv4 address in dotted decimal notation to integer (None for incorrect value).
+    Rules are the same as for IPv4Address: four decimal octets without leading zeros
+    """
+    octets = value.split('.')
+    if len(octets) != 4:
+        return None
+    result = 0
+    for octet in octets:
+        if not (0 < len(octet) <= 3 and octet.isascii() and octet.isdigit()) or (len(octet) > 1 and octet[0] == '0'):
+            return None
+        octet_value = int(octet)
+        if octet_value > 255:
+            return None
+        result = (result << 8) | octet_value
+    return result
+
+
+def parse_ndjson_address(line: str) -> Optional[int]:
+    """Parse NDJSON record: address as a string or as an integer"""
+    try:
+        value = json.loads(line)
+    except ValueError:
+        return None
+    if isinstance(value, str):
+        return parse_address(value)
+    if isinstance(value, int) and not isinstance(value, bool) and 0 <= value <= ADDRESS_MAX_VALUE:
+        return value
+    return None
+
+
+async def split_lines(chunks: AsyncIterator[bytes]) -> AsyncGenerator[list[tuple[int, str]], None]:
+    """Split body to lines (with line numbers starting from 1) as chunks arrive. Empty lines are skipped"""
+    tail = b''
+    line_number = 0
+    async for chunk in chunks:
+        lines = (tail + chunk).split(b'\n')
+        tail = lines.pop()
+        numbered_lines: list[tuple[int, str]] = list()
+        for line in lines:
+            line_number += 1
+            decoded_line = line.decode(errors='replace').strip()
+            if decoded_line:
+                numbered_lines.append((line_number, decoded_line))
+        yield numbered_lines
+    decoded_tail = tail.decode(errors='replace').strip()
+    if decoded_tail:
+        yield [(line_number + 1, decoded_tail)]
+
+
+async def parse_lines_body(chunks: AsyncIterator[bytes], body_format: str) -> AsyncGenerator[ParsedPiece, None]:
+    """Parse newline separated addresses (text) or NDJSON records"""
+    parse = parse_ndjson_address if body_format == NDJSON_BODY_FORMAT else parse_address
+    async for numbered_lines in split_lines(chunks):
+        piece = ParsedPiece()
+        for line_number, line in numbered_lines:
+            address = parse(line)
+            if address is None:
+                piece.rejected.append((line_number, line))
+            else:
+                piece.addresses.append(address)
+        yield piece
+
+
+async def parse_binary_body(chunks: AsyncIterator[bytes]) -> AsyncGenerator[ParsedPiece, None]:
+    """Parse packed big-endian unsigned 32 bit integers. Incomplete trailing record is rejected (as hex string,
+    with record number instead of line number)
+    """
+    tail = b''
+    records_count = 0
+    async for chunk in chunks:
+        data = tail + chunk
+        complete_size = len(data) - len(data) % ADDRESS_SIZE_BYTES
+        addresses: array = addresses_array()
+        addresses.frombytes(data[:complete_size])
+        if byteorder == 'little':
+            addresses.byteswap()
+        tail = data[complete_size:]
+        records_count += len(addresses)
+        yield ParsedPiece(addresses.tolist())
+    if tail:
+        yield ParsedPiece(rejected=[(records_count + 1, tail.hex())])
+
+
+def parse_bulk_body(chunks: AsyncIterator[bytes], body_format: str) -> AsyncGenerator[ParsedPiece, None]:
+    """Parse body of bulk request as chunks arrive"""
+    if body_format == BINARY_BODY_FORMAT:
+        return parse_binary_body(chunks)
+    return parse_lines_body(chunks, body_format)
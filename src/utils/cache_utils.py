@@ -0,0 +1,108 @@
+# Utilities for in-process caching
+from collections import OrderedDict
+from time import monotonic
+from typing import Callable
+from typing import Generic
+from typing import Hashable
+from typing import Optional
+from typing import TypeVar
+
+CacheKey = TypeVar('CacheKey', bound=Hashable)
+CacheValue = TypeVar('CacheValue')
+
+
+class SizeLimitedLRUCache(Generic[CacheKey, CacheValue]):
+    """LRU cache bounded by total size of values (size of every value is calculated with size_of callback).
+    Cache with zero max_size is disabled: nothing is stored in it
+    """
+
+    def __init__(self, max_size: int, size_of: Callable[[CacheValue], int]):
+        self.__max_size = max_size
+        self.__size_of = size_of
+        self.__data: OrderedDict[CacheKey, CacheValue] = OrderedDict()
+        self.__size = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.__max_size > 0
+
+    @property
+    def size(self) -> int:
+        return self.__size
+
+    def __len__(self) -> int:
+        return len(self.__data)
+
+    def get(self, key: CacheKey) -> Optional[CacheValue]:
+        value = self.__data.get(key)
+        if value is not None:
+            self.__data.move_to_end(key)
+        return value
+
+    def put(self, key: CacheKey, value: CacheValue) -> bool:
+        """Store value in cache, evict least recently used values if cache size exceeds limit.
+        Return False if value is too large for cache
+        """
+        value_size = self.__size_of(value)
+        if value_size > self.__max_size:
+            return False
+        self.pop(key)
+        self.__data[key] = value
+        self.__size += value_size
+        while self.__size > self.__max_size:
+            _evicted_key, evicted_value = self.__data.popitem(last=False)
+            self.__size -= self.__size_of(evicted_value)
+        return True
+
+    def pop(self, key: CacheKey) -> Optional[CacheValue]:
+        value = self.__data.pop(key, None)
+        if value is not None:
+            self.__size -= self.__size_of(value)
+        return value
+
+    def clear(self):
+        self.__data.clear()
+        self.__size = 0
+
+
+class TTLLRUCache(Generic[CacheKey, CacheValue]):
+    """LRU cache bounded by entries count, entries expire in ttl_seconds after storing.
+    Cache with zero max_entries or ttl_seconds is disabled: nothing is stored in it
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, clock: Callable[[], float] = monotonic):
+        self.__max_entries = max_entries
+        self.__ttl_seconds = ttl_seconds
+        self.__clock = clock
+        # values with expiration moments
+        self.__data: OrderedDict[CacheKey, tuple[CacheValue, float]] = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        return self.__max_entries > 0 and self.__ttl_seconds > 0
+
+    def __len__(self) -> int:
+        return len(self.__data)
+
+    def get(self, key: CacheKey) -> Optional[CacheValue]:
+        entry = self.__data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at <= self.__clock():
+            del self.__data[key]
+            return None
+        self.__data.move_to_end(key)
+        return value
+
+    def put(self, key: CacheKey, value: CacheValue):
+        """Store value in cache, evict least recently used values if entries count exceeds limit"""
+        if not self.enabled:
+            return
+        self.__data.pop(key, None)
+        self.__data[key] = (value, self.__clock() + self.__ttl_seconds)
+        while len(self.__data) > self.__max_entries:
+            self.__data.popitem(last=False)
+
+    def clear(self):
+        self.__data.clear()
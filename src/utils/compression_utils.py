@@ -0,0 +1,135 @@
+# Utilities for compressed delivery of downloads (content encoding negotiation)
+import gzip
+import zlib
+from abc import ABC
+from abc import abstractmethod
+from typing import AsyncGenerator
+from typing import AsyncIterator
+from typing import Awaitable
+from typing import Callable
+from typing import Optional
+from typing import Type
+from typing import Union
+
+from src.core.settings import GZIP_COMPRESSION_LEVEL
+from src.core.settings import ZSTD_COMPRESSION_LEVEL
+
+try:
+    # optional dependency, zstd encoding is offered only if package is installed
+    import zstandard  # type: ignore[import-not-found]
+except ImportError:
+    zstandard = None
+
+GZIP_WBITS = 16 + zlib.MAX_WBITS  # gzip container for zlib stream compressor
+
+
+class ContentEncoder(ABC):
+    """Compression routines for one content encoding"""
+
+    name: str
+
+    @classmethod
+    @abstractmethod
+    def compress(cls, body: bytes) -> bytes:
+        """Compress whole body at once"""
+
+    @classmethod
+    @abstractmethod
+    def stream_compressor(cls) -> tuple[Callable[[bytes], bytes], Callable[[], bytes]]:
+        """Return functions for streaming compression: compress and flush a piece of data, finish stream"""
+
+
+class GzipEncoder(ContentEncoder):
+    name = 'gzip'
+
+    @classmethod
+    def compress(cls, body: bytes) -> bytes:
+        return gzip.compress(body, compresslevel=GZIP_COMPRESSION_LEVEL, mtime=0)
+
+    @classmethod
+    def stream_compressor(cls) -> tuple[Callable[[bytes], bytes], Callable[[], bytes]]:
+        compressor = zlib.compressobj(GZIP_COMPRESSION_LEVEL, zlib.DEFLATED, GZIP_WBITS)
+        return (lambda data: compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)), compressor.flush
+
+
+class ZstdEncoder(ContentEncoder):
+    name = 'zstd'
+
+    @classmethod
+    def compress(cls, body: bytes) -> bytes:
+        return zstandard.ZstdCompressor(level=ZSTD_COMPRESSION_LEVEL).compress(body)
+
+    @classmethod
+    def stream_compressor(cls) -> tuple[Callable[[bytes], bytes], Callable[[], bytes]]:
+        compressor = zstandard.ZstdCompressor(level=ZSTD_COMPRESSION_LEVEL).compressobj()
+        return (
+            lambda data: compressor.compress(data) + compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+        ), compressor.flush
+
+
+# supported encodings in order of preference
+CONTENT_ENCODERS: dict[str, Type[ContentEncoder]] = {
+    encoder.name: encoder for encoder in ([ZstdEncoder] if zstandard is not None else []) + [GzipEncoder]
+}
+
+
+def parse_accept_encoding(accept_encoding: str) -> dict[str, float]:
+    """Parse Accept-Encoding header to weights of encodings"""
+    weights: dict[str, float] = dict()
+    for item in accept_encoding.split(','):
+        name, _, parameters = item.partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        weight = 1.0
+        parameter_name, _, value = parameters.partition('=')
+        if parameter_name.strip().lower() == 'q':
+            try:
+                weight = float(value)
+            except ValueError:
+                weight = 0.0
+        weights[name] = weight
+    return weights
+
+
+def select_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Select supported content encoding by Accept-Encoding header. None is returned for identity encoding"""
+    if not accept_encoding:
+        return None
+    weights = parse_accept_encoding(accept_encoding)
+    selected: Optional[str] = None
+    selected_weight = 0.0
+    for name in CONTENT_ENCODERS:
+        weight = weights.get(name, weights.get('*', 0.0))
+        if weight > selected_weight:
+            selected, selected_weight = name, weight
+    return selected
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    return CONTENT_ENCODERS[encoding].compress(body)
+
+
+async def compressed_stream(chunks: AsyncIterator[str], encoding: str) -> AsyncGenerator[bytes, None]:
+    """Compress stream of chunks. Every chunk is flushed, so client receives data as soon as it is ready"""
+    compress_chunk, finish = CONTENT_ENCODERS[encoding].stream_compressor()
+    try:
+        async for chunk in chunks:
+            yield compress_chunk(chunk.encode())
+        yield finish()
+    finally:
+        aclose: Optional[Callable[[], Awaitable[None]]] = getattr(chunks, 'aclose', None)
+        if aclose is not None:
+            await aclose()
+
+
+def encoded_stream(chunks: AsyncIterator[str], encoding: Optional[str]) -> AsyncIterator[Union[str, bytes]]:
+    """Stream of chunks in content encoding (None for identity)"""
+    return chunks if encoding is None else compressed_stream(chunks, encoding)
+
+
+def encoded_etag(etag: str, encoding: Optional[str]) -> str:
+    """ETag of compressed representation (every representation has its own strong ETag)"""
+    if encoding is None:
+        return etag
+    return '"{}-{}"'.format(etag.strip('"'), encoding)
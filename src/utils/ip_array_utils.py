@@ -0,0 +1,152 @@
+# Utilities for bulk processing of IPv4 addresses packed in arrays of unsigned 32-bit integers
+import sys
+from array import array
+from bisect import bisect_left
+from bisect import bisect_right
+from itertools import filterfalse
+from itertools import islice
+from socket import inet_ntoa
+from struct import Struct
+from typing import AbstractSet
+from typing import Iterable
+from typing import Sequence
+
+from src.utils.ip_utils import merge_intervals
+
+ADDRESS_ARRAY_TYPECODE = 'I'
+ADDRESS_SIZE_BYTES = 4
+ADDRESS_BITS = 32
+ADDRESS_STRUCT = Struct('!I')
+
+
+def addresses_array(addresses: Iterable[int] = ()) -> array:
+    """Create array of packed addresses"""
+    return array(ADDRESS_ARRAY_TYPECODE, addresses)
+
+
+def without_addresses(addresses: array, excluded: AbstractSet[int]) -> array:
+    """Remove excluded addresses from array (order is kept)"""
+    if not excluded:
+        return addresses
+    return addresses_array(filterfalse(excluded.__contains__, addresses))
+
+
+def without_intervals(sorted_addresses: array, intervals: list[tuple[int, int]]) -> array:
+    """Remove addresses in intervals from sorted array.
+    Intervals should be sorted and non-overlapping (see merge_networks_to_intervals), bounds are included.
+    Every interval costs two binary searches and one slice copy, so no loop over addresses is performed
+    """
+    if not intervals:
+        return sorted_addresses
+    result = addresses_array()
+    position = 0
+    for start, end in intervals:
+        left = bisect_left(sorted_addresses, start, position)
+        right = bisect_right(sorted_addresses, end, left)
+        result.extend(sorted_addresses[position:left])
+        position = right
+    result.extend(sorted_addresses[position:])
+    return result
+
+
+def filter_addresses(
+    addresses: array, excluded_addresses: AbstractSet[int], excluded_intervals: list[tuple[int, int]]
+) -> array:
+    """Sort addresses and remove excluded addresses and intervals from them"""
+    return without_intervals(
+        addresses_array(sorted(without_addresses(addresses, excluded_addresses))), excluded_intervals
+    )
+
+
+def render_addresses(addresses: array) -> str:
+    """Render addresses as text (one address per line)"""
+    if not addresses:
+        return ''
+    packed = addresses_array(addresses)
+    if sys.byteorder == 'little':
+        # network byte order is expected by inet_ntoa
+        packed.byteswap()
+    raw = packed.tobytes()
+    return (
+        '\n'.join([inet_ntoa(raw[i : i + ADDRESS_SIZE_BYTES]) for i in range(0, len(raw), ADDRESS_SIZE_BYTES)]) + '\n'
+    )
+
+
+def address_runs(sorted_addresses: array) -> list[tuple[int, int]]:
+    """Collapse sorted addresses (without duplicates) to intervals of contiguous addresses (bounds included)"""
+    result: list[tuple[int, int]] = list()
+    if not sorted_addresses:
+        return result
+    start = end = sorted_addresses[0]
+    for address in islice(sorted_addresses, 1, None):
+        if address != end + 1:
+            result.append((start, end))
+            start = address
+        end = address
+    result.append((start, end))
+    return result
+
+
+def widen_to_prefix(
+    sorted_addresses: array, prefix_length: int, excluded_intervals: Sequence[tuple[int, int]]
+) -> list[tuple[int, int]]:
+    """Lossy aggregation: every network with prefix_length containing addresses is taken entirely.
+    Networks intersecting with excluded intervals (sorted and non-overlapping) are not widened,
+    contiguous runs of their addresses are taken as is
+    """
+    host_bits = ADDRESS_BITS - prefix_length
+    excluded_starts = [start for start, _ in excluded_intervals]
+    result: list[tuple[int, int]] = list()
+    position = 0
+    while position < len(sorted_addresses):
+        network_start = sorted_addresses[position] >> host_bits << host_bits
+        network_end = network_start + (1 << host_bits) - 1
+        next_position = bisect_right(sorted_addresses, network_end, position)
+        # the last excluded interval starting before the end of network is the only candidate for intersection
+        excluded_index = bisect_right(excluded_starts, network_end) - 1
+        if excluded_index >= 0 and excluded_intervals[excluded_index][1] >= network_start:
+            result.extend(address_runs(sorted_addresses[position:next_position]))
+        else:
+            result.append((network_start, network_end))
+        position = next_position
+    return result
+
+
+def intervals_to_networks(intervals: Iterable[tuple[int, int]]) -> list[tuple[int, int]]:
+    """Split intervals (bounds included) to minimal list of networks (network address, prefix length)"""
+    result: list[tuple[int, int]] = list()
+    for start, end in intervals:
+        while start <= end:
+            # the largest block aligned on start and fitting in the rest of interval
+            size = start & -start if start else 1 << ADDRESS_BITS
+            while size > end - start + 1:
+                size >>= 1
+            result.append((start, ADDRESS_BITS + 1 - size.bit_length()))
+            start += size
+    return result
+
+
+def aggregate_addresses(
+    sorted_addresses: array,
+    prefix_length: int = ADDRESS_BITS,
+    excluded_intervals: Sequence[tuple[int, int]] = (),
+    included_intervals: Sequence[tuple[int, int]] = (),
+) -> list[tuple[int, int]]:
+    """Collapse sorted addresses (and included intervals) to the minimal list of networks.
+    Aggregation is exact for prefix_length == 32, otherwise it is lossy (see widen_to_prefix)
+    """
+    if prefix_length >= ADDRESS_BITS:
+        intervals = address_runs(sorted_addresses)
+    else:
+        intervals = widen_to_prefix(sorted_addresses, prefix_length, excluded_intervals)
+    return intervals_to_networks(merge_intervals([*intervals, *included_intervals]))
+
+
+def render_networks(networks: list[tuple[int, int]]) -> str:
+    """Render networks as text (one network per line, single addresses are rendered without prefix length)"""
+    return ''.join(
+        [
+            inet_ntoa(ADDRESS_STRUCT.pack(address)) + ('\n' if prefix_length == ADDRESS_BITS else f'/{prefix_length}\n')
+            for address, prefix_length in networks
+        ]
+    )
@@ -1,6 +1,9 @@
+from bisect import bisect_right
 from ipaddress import IPv4Address
+from ipaddress import IPv4Network
 from random import randint
 from typing import Generator
+from typing import Iterable
 from typing import Optional
 
 from src.schemas.addresses_schemas import IpV4AddressList
@@ -22,3 +25,43 @@ def gen_random_ip(max_count: Optional[int] = None) -> Generator[IPv4Address, Non
 def random_ip_addresses(count: int) -> IpV4AddressList:
     """Generate random IP addresses"""
     return [x for x in gen_random_ip(count)]
+
+
+def merge_intervals(intervals: Iterable[tuple[int, int]]) -> list[tuple[int, int]]:
+    """Sort intervals of integer addresses (bounds included) and merge overlapping and adjacent ones"""
+    result: list[tuple[int, int]] = list()
+    for start, end in sorted(intervals):
+        if result and start <= result[-1][1] + 1:
+            # overlapping or adjacent interval, extend the last one
+            if end > result[-1][1]:
+                result[-1] = (result[-1][0], end)
+        else:
+            result.append((start, end))
+    return result
+
+
+def merge_networks_to_intervals(networks: Iterable[IPv4Network]) -> list[tuple[int, int]]:
+    """Convert networks to sorted list of non-overlapping intervals of integer addresses (bounds included)"""
+    return merge_intervals((int(network.network_address), int(network.broadcast_address)) for network in networks)
+
+
+class IPv4NetworksMatcher:
+    """Lookup structure for checking addresses against a bunch of networks.
+    Networks are merged to sorted intervals once, every check is performed with binary search in O(log M)
+    """
+
+    def __init__(self, networks: Iterable[IPv4Network]):
+        intervals = merge_networks_to_intervals(networks)
+        self.__starts: list[int] = [start for start, _ in intervals]
+        self.__ends: list[int] = [end for _, end in intervals]
+
+    def __len__(self) -> int:
+        return len(self.__starts)
+
+    def contains_int(self, address: int) -> bool:
+        """Check address passed as integer"""
+        position = bisect_right(self.__starts, address) - 1
+        return position >= 0 and address <= self.__ends[position]
+
+    def __contains__(self, address: IPv4Address) -> bool:
+        return self.contains_int(int(address))
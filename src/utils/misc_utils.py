@@ -1,6 +1,7 @@
 # Miscellaneous utilities
 from typing import Any
 from typing import Optional
+from typing import Sequence
 
 
 def crop_list_tail(list_to_filter: list[Any], filter_depth: Optional[int] = None) -> list[Any]:
@@ -15,3 +16,8 @@ def crop_list_tail(list_to_filter: list[Any], filter_depth: Optional[int] = None
 def split_str_list(values_comma_separated: str) -> list[str]:
     """parse list of values separated with commas"""
     return [x for x in map(lambda y: y.strip(), values_comma_separated.split(',')) if len(x) > 0]
+
+
+def split_to_batches(values: Sequence[Any], batch_size: int) -> list[Sequence[Any]]:
+    """Split sequence into batches of batch_size length (the last one could be shorter)"""
+    return [values[position : position + batch_size] for position in range(0, len(values), batch_size)]
@@ -0,0 +1,206 @@
+# Compressed bitmaps of unsigned 32 bit integers (roaring bitmaps) for sets of IPv4 addresses
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+from operator import and_
+from operator import or_
+from operator import sub
+from typing import Callable
+from typing import Iterable
+from typing import Iterator
+from typing import Optional
+from typing import Sequence
+from typing import Union
+from typing import cast
+
+from src.utils.ip_array_utils import addresses_array
+
+CONTAINER_BITS = 16
+CONTAINER_BYTES = (1 << CONTAINER_BITS) // 8
+LOW_MASK = (1 << CONTAINER_BITS) - 1
+# containers with more values are stored as bitmaps (array of 4096 values takes the same 8 KB as bitmap)
+ARRAY_CONTAINER_MAX_SIZE = 4096
+ARRAY_CONTAINER_TYPECODE = 'H'
+# positions of set bits in every byte value
+BYTE_BITS = tuple(tuple(bit for bit in range(8) if byte >> bit & 1) for byte in range(256))
+
+# sorted array of low 16 bits of values or bitmap of 2^16 bits
+Container = Union[array, bytes]
+
+
+def bitmap_from_values(lows: Iterable[int]) -> bytes:
+    bits = bytearray(CONTAINER_BYTES)
+    for low in lows:
+        bits[low >> 3] |= 1 << (low & 7)
+    return bytes(bits)
+
+
+def container_from_sorted(lows: Sequence[int]) -> Container:
+    """Create container from sorted unique low 16 bits of values"""
+    if len(lows) <= ARRAY_CONTAINER_MAX_SIZE:
+        return array(ARRAY_CONTAINER_TYPECODE, lows)
+    return bitmap_from_values(lows)
+
+
+def container_values(container: Container) -> Iterator[int]:
+    """Low 16 bits of values of container in ascending order"""
+    if isinstance(container, array):
+        return iter(container)
+    return (index << 3 | bit for index, byte in enumerate(container) if byte for bit in BYTE_BITS[byte])
+
+
+def container_to_int(container: Container) -> int:
+    if isinstance(container, bytes):
+        return int.from_bytes(container, 'little')
+    return int.from_bytes(bitmap_from_values(container), 'little')
+
+
+def container_from_int(bits: int) -> Optional[Container]:
+    """Create container from bitmap as integer (None for empty bitmap)"""
+    values_count = bits.bit_count()
+    if values_count == 0:
+        return None
+    data = bits.to_bytes(CONTAINER_BYTES, 'little')
+    if values_count > ARRAY_CONTAINER_MAX_SIZE:
+        return data
+    return array(ARRAY_CONTAINER_TYPECODE, container_values(data))
+
+
+def container_len(container: Container) -> int:
+    if isinstance(container, array):
+        return len(container)
+    return int.from_bytes(container, 'little').bit_count()
+
+
+def container_contains(container: Container, low: int) -> bool:
+    if isinstance(container, bytes):
+        return container[low >> 3] >> (low & 7) & 1 == 1
+    position = bisect_left(container, low)
+    return position < len(container) and container[position] == low
+
+
+def combine_containers(
+    left: Container, right: Container, set_operation: Callable, bits_operation: Callable[[int, int], int]
+) -> Optional[Container]:
+    """Combine containers with operation (None for empty result). Arrays are combined as sets of values,
+    bitmaps are combined as integers
+    """
+    if isinstance(left, array) and isinstance(right, array):
+        values = set_operation(set(left), set(right))
+        return container_from_sorted(sorted(values)) if values else None
+    return container_from_int(bits_operation(container_to_int(left), container_to_int(right)))
+
+
+class RoaringBitmap:
+    """Set of unsigned 32 bit integers. Values are split to containers by high 16 bits: containers with up to
+    ARRAY_CONTAINER_MAX_SIZE values are sorted arrays of low 16 bits, larger ones are bitmaps.
+    Membership check is a dict lookup with binary search (or bit test). Union, intersection and difference
+    are performed container by container. Containers are never changed in place, so copies of bitmap are cheap
+    and could be used in other threads while the bitmap is changed
+    """
+
+    def __init__(self, values: Iterable[int] = ()):
+        self.__containers: dict[int, Container] = dict()
+        self.update(values)
+
+    @classmethod
+    def from_containers(cls, containers: dict[int, Container]) -> 'RoaringBitmap':
+        result = cls()
+        result.__containers = containers
+        return result
+
+    @staticmethod
+    def group_values(values: Iterable[int]) -> dict[int, list[int]]:
+        """Group values by high 16 bits (to low 16 bits)"""
+        grouped: defaultdict[int, list[int]] = defaultdict(list)
+        for value in values:
+            grouped[value >> CONTAINER_BITS].append(value & LOW_MASK)
+        return grouped
+
+    def update(self, values: Iterable[int]):
+        """Add values to bitmap"""
+        for high, lows in self.group_values(values).items():
+            container = self.__containers.get(high)
+            if container is not None:
+                lows.extend(container_values(container))
+            self.__containers[high] = container_from_sorted(sorted(set(lows)))
+
+    def difference_update(self, values: Iterable[int]):
+        """Remove values from bitmap"""
+        for high, lows in self.group_values(values).items():
+            container = self.__containers.get(high)
+            if container is None:
+                continue
+            remaining = set(container_values(container)).difference(lows)
+            if remaining:
+                self.__containers[high] = container_from_sorted(sorted(remaining))
+            else:
+                del self.__containers[high]
+
+    def add(self, value: int):
+        self.update((value,))
+
+    def discard(self, value: int):
+        self.difference_update((value,))
+
+    def copy(self) -> 'RoaringBitmap':
+        return self.from_containers(dict(self.__containers))
+
+    def __contains__(self, value: int) -> bool:
+        container = self.__containers.get(value >> CONTAINER_BITS)
+        return container is not None and container_contains(container, value & LOW_MASK)
+
+    def __len__(self) -> int:
+        return sum(map(container_len, self.__containers.values()))
+
+    def __iter__(self) -> Iterator[int]:
+        for high in sorted(self.__containers):
+            base = high << CONTAINER_BITS
+            for low in container_values(self.__containers[high]):
+                yield base | low
+
+    def __eq__(self, other: object) -> bool:
+        # representation of container is determined by its values, so equal bitmaps have equal containers
+        return isinstance(other, RoaringBitmap) and self.__containers == other.__containers
+
+    def __or__(self, other: 'RoaringBitmap') -> 'RoaringBitmap':
+        containers = dict(self.__containers)
+        for high, container in other.__containers.items():
+            own_container = containers.get(high)
+            if own_container is None:
+                containers[high] = container
+            else:
+                # union of non-empty containers is never empty
+                containers[high] = cast(Container, combine_containers(own_container, container, or_, or_))
+        return self.from_containers(containers)
+
+    def __and__(self, other: 'RoaringBitmap') -> 'RoaringBitmap':
+        containers: dict[int, Container] = dict()
+        for high in self.__containers.keys() & other.__containers.keys():
+            container = combine_containers(self.__containers[high], other.__containers[high], and_, and_)
+            if container is not None:
+                containers[high] = container
+        return self.from_containers(containers)
+
+    def __sub__(self, other: 'RoaringBitmap') -> 'RoaringBitmap':
+        containers: dict[int, Container] = dict()
+        for high, own_container in self.__containers.items():
+            other_container = other.__containers.get(high)
+            if other_container is None:
+                containers[high] = own_container
+                continue
+            container = combine_containers(own_container, other_container, sub, lambda x, y: x & ~y)
+            if container is not None:
+                containers[high] = container
+        return self.from_containers(containers)
+
+    @classmethod
+    def union(cls, bitmaps: Iterable['RoaringBitmap']) -> 'RoaringBitmap':
+        result = cls()
+        for bitmap in bitmaps:
+            result = result | bitmap
+        return result
+
+    def to_array(self) -> array:
+        """Values as sorted array of addresses (see ip_array_utils)"""
+        return addresses_array(self)
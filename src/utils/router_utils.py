@@ -1,4 +1,6 @@
 # Router common routines
+from typing import Optional
+from urllib.parse import quote
 
 
 def get_query_params(records_count: int = 10, all_records: bool = False):
@@ -23,3 +25,28 @@ def get_query_params_for_download(
 def get_query_params_with_offset(records_count: int = 10, all_records: bool = False, offset: int = 0):
     """Common query params with offset"""
     return {'records_count': records_count, 'all_records': all_records, 'offset': offset}
+
+
+VARY_HEADER = 'Accept-Encoding'
+
+
+def get_download_headers(filename: str, encoding: Optional[str] = None) -> dict[str, str]:
+    """Headers for download as a file (if filename is specified) with content encoding (None for identity)"""
+    headers = {'Vary': VARY_HEADER}
+    if encoding is not None:
+        headers['Content-Encoding'] = encoding
+    if filename:
+        content_disposition_type = 'attachment'
+        headers['Content-Disposition'] = "{}; filename*=utf-8''{}".format(content_disposition_type, quote(filename))
+    return headers
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check value of If-None-Match header against ETag (weak comparison is used for If-None-Match)"""
+    if not if_none_match:
+        return False
+    for value in if_none_match.split(','):
+        value = value.strip()
+        if value == '*' or value.removeprefix('W/') == etag:
+            return True
+    return False
@@ -0,0 +1,238 @@
+# Utilities for coalescing of identical concurrent computations (single flight)
+import logging
+from asyncio import Condition
+from asyncio import Future
+from asyncio import Task
+from asyncio import create_task
+from asyncio import ensure_future
+from asyncio import shield
+from dataclasses import dataclass
+from functools import partial
+from itertools import count
+from typing import AsyncGenerator
+from typing import AsyncIterator
+from typing import Awaitable
+from typing import Callable
+from typing import Generic
+from typing import Hashable
+from typing import Optional
+from typing import TypeVar
+
+FlightKey = TypeVar('FlightKey', bound=Hashable)
+FlightValue = TypeVar('FlightValue')
+
+
+@dataclass
+class FlightStats:
+    """Counters of single flight: calls - all calls, executions - calls with real computation"""
+
+    calls: int = 0
+    executions: int = 0
+
+    @property
+    def coalesced(self) -> int:
+        return self.calls - self.executions
+
+    @property
+    def coalescing_ratio(self) -> float:
+        """Share of calls served with computation of another call"""
+        return self.coalesced / self.calls if self.calls else 0.0
+
+
+class SingleFlight(Generic[FlightKey, FlightValue]):
+    """Concurrent calls with the same key await one shared computation.
+    Computation runs in separate task, so cancellation of one caller does not affect others
+    """
+
+    def __init__(self):
+        self.__flights: dict[FlightKey, Future[FlightValue]] = dict()
+        self.stats = FlightStats()
+
+    async def do(self, key: FlightKey, func: Callable[[], Awaitable[FlightValue]]) -> FlightValue:
+        self.stats.calls += 1
+        future = self.__flights.get(key)
+        if future is None:
+            self.stats.executions += 1
+            future = ensure_future(func())
+            self.__flights[key] = future
+            future.add_done_callback(lambda done_future: self.__finish(key, done_future))
+        else:
+            logging.debug('Joined running computation, key: %s', key)
+        return await shield(future)
+
+    def __finish(self, key: FlightKey, future: Future[FlightValue]):
+        self.__flights.pop(key, None)
+        if not future.cancelled() and future.exception() is not None:
+            # exception is retrieved here to suppress warnings if all callers are gone
+            logging.debug('Shared computation failed, key: %s', key)
+
+
+class SharedStream(Generic[FlightValue]):
+    """Pieces of one source stream shared between consumers. Every consumer receives all pieces from the start.
+    Source is read in separate task started by the first consumer, it is cancelled when all consumers are gone.
+    If replay_limit is passed then new consumers can join only while count of produced pieces is within the limit,
+    after that pieces received by all consumers are dropped. Source is read at most replay_limit pieces ahead of
+    the slowest consumer, so memory usage is bounded for long streams (and consumers proceed at the pace of
+    the slowest one)
+    """
+
+    def __init__(
+        self,
+        source: AsyncIterator[FlightValue],
+        on_finish: Optional[Callable[[], None]] = None,
+        replay_limit: Optional[int] = None,
+    ):
+        self.__source = source
+        self.__on_finish = on_finish
+        self.__replay_limit = replay_limit
+        self.__pieces: list[FlightValue] = list()
+        # count of pieces dropped from the head of buffer
+        self.__dropped = 0
+        self.__finished = False
+        self.__cancelled = False
+        self.__error: Optional[BaseException] = None
+        self.__updated = Condition()
+        # positions of consumers in stream (count of received pieces)
+        self.__positions: dict[int, int] = dict()
+        self.__consumer_ids = count()
+        self.__task: Optional[Task] = None
+
+    @property
+    def produced(self) -> int:
+        return self.__dropped + len(self.__pieces)
+
+    @property
+    def buffered(self) -> int:
+        """Count of pieces kept in memory"""
+        return len(self.__pieces)
+
+    @property
+    def joinable(self) -> bool:
+        """Whether new consumer can join the stream and receive all pieces from the start"""
+        if self.__finished or self.__cancelled:
+            return False
+        return self.__replay_limit is None or self.produced <= self.__replay_limit
+
+    def __producible(self) -> bool:
+        """Whether next piece could be read from source (it is not too far ahead of the slowest consumer)"""
+        if self.__replay_limit is None or not self.__positions:
+            return True
+        return self.produced - min(self.__positions.values()) < self.__replay_limit
+
+    async def __produce(self):
+        try:
+            async for piece in self.__source:
+                self.__pieces.append(piece)
+                self.__trim()
+                async with self.__updated:
+                    self.__updated.notify_all()
+                    await self.__updated.wait_for(self.__producible)
+        except Exception as e:
+            self.__error = e
+        finally:
+            self.__finished = True
+            if self.__on_finish is not None:
+                self.__on_finish()
+            aclose: Optional[Callable[[], Awaitable[None]]] = getattr(self.__source, 'aclose', None)
+            if aclose is not None:
+                await aclose()
+            async with self.__updated:
+                self.__updated.notify_all()
+
+    def __available(self, position: int) -> bool:
+        """Whether consumer at position has something to receive (pieces or the end of stream)"""
+        return position < self.produced or self.__finished
+
+    def __trim(self):
+        """Drop pieces received by all consumers (when nobody can join the stream anymore)"""
+        if self.__replay_limit is None or self.produced <= self.__replay_limit or not self.__positions:
+            return
+        dropped_count = min(self.__positions.values()) - self.__dropped
+        if dropped_count > 0:
+            del self.__pieces[:dropped_count]
+            self.__dropped += dropped_count
+
+    async def __advance(self, consumer_id: int, position: int):
+        """Record position of consumer and wake up producer waiting for the slowest consumer"""
+        self.__positions[consumer_id] = position
+        self.__trim()
+        if self.__replay_limit is not None:
+            async with self.__updated:
+                self.__updated.notify_all()
+
+    async def consume(self) -> AsyncGenerator[FlightValue, None]:
+        consumer_id = next(self.__consumer_ids)
+        position = 0
+        self.__positions[consumer_id] = position
+        if self.__task is None:
+            self.__task = create_task(self.__produce())
+        try:
+            while True:
+                if position < self.produced:
+                    piece = self.__pieces[position - self.__dropped]
+                    position += 1
+                    await self.__advance(consumer_id, position)
+                    yield piece
+                    continue
+                if self.__finished:
+                    break
+                async with self.__updated:
+                    await self.__updated.wait_for(partial(self.__available, position))
+            if self.__error is not None:
+                raise self.__error
+        finally:
+            del self.__positions[consumer_id]
+            self.__trim()
+            if not self.__positions and not self.__finished and self.__task is not None:
+                logging.debug('All consumers of shared stream are gone, stop reading of source')
+                self.__cancelled = True
+                self.__task.cancel()
+            elif self.__replay_limit is not None:
+                # the slowest consumer could be gone
+                async with self.__updated:
+                    self.__updated.notify_all()
+
+
+class StreamFlights(Generic[FlightKey, FlightValue]):
+    """Concurrent streams with the same key are read from one shared source stream.
+    New consumers join the stream while it is joinable (see SharedStream), otherwise new source is created
+    """
+
+    def __init__(self, replay_limit: Optional[int] = None):
+        self.__replay_limit = replay_limit
+        self.__streams: dict[FlightKey, SharedStream[FlightValue]] = dict()
+        self.stats = FlightStats()
+
+    async def stream(
+        self,
+        key: FlightKey,
+        source_factory: Callable[[], AsyncIterator[FlightValue]],
+        is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None,
+    ) -> AsyncGenerator[FlightValue, None]:
+        """Pieces of shared stream. Stream is joined on the first iteration, if is_disconnected callback is passed
+        then it is checked after every piece and consumer leaves the stream when client has gone away
+        """
+        self.stats.calls += 1
+        shared_stream = self.__streams.get(key)
+        if shared_stream is None or not shared_stream.joinable:
+            self.stats.executions += 1
+            shared_stream = SharedStream[FlightValue](
+                source_factory(), lambda: self.__finish(key, shared_stream), self.__replay_limit
+            )
+            self.__streams[key] = shared_stream
+        else:
+            logging.debug('Joined running stream, key: %s', key)
+        pieces = shared_stream.consume()
+        try:
+            async for piece in pieces:
+                yield piece
+                if is_disconnected is not None and await is_disconnected():
+                    logging.debug('Client disconnected, leave shared stream, key: %s', key)
+                    return
+        finally:
+            await pieces.aclose()
+
+    def __finish(self, key: FlightKey, shared_stream: Optional[SharedStream[FlightValue]]):
+        # stream could be replaced with new one already (after exceeding of replay limit)
+        if self.__streams.get(key) is shared_stream:
+            del self.__streams[key]
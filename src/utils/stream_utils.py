@@ -0,0 +1,40 @@
+# Utilities for streaming responses
+import logging
+from typing import AsyncGenerator
+from typing import AsyncIterator
+from typing import Awaitable
+from typing import Callable
+from typing import Optional
+
+from src.core.settings import CHUNK_SIZE_BYTES
+
+
+async def chunked_stream(
+    records: AsyncIterator[str],
+    chunk_size: int = CHUNK_SIZE_BYTES,
+    is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None,
+) -> AsyncGenerator[str, None]:
+    """Join records into pieces of chunk_size length and yield every piece as soon as it is ready.
+    Memory usage is bounded by chunk size (plus the length of one record).
+    If is_disconnected callback is passed, it is checked after every sent piece and fetching of records stops
+    when client has gone away. Source generator is closed in any case.
+    """
+    parts: list[str] = []
+    accumulated = 0
+    try:
+        async for record in records:
+            parts.append(record)
+            accumulated += len(record)
+            if accumulated >= chunk_size:
+                yield ''.join(parts)
+                parts, accumulated = [], 0
+                if is_disconnected is not None and await is_disconnected():
+                    logging.debug('Client disconnected, stop fetching records for stream')
+                    return
+        if parts:
+            yield ''.join(parts)
+    finally:
+        # release source generator (and storage cursors) on exhaustion, disconnection or cancellation
+        aclose: Optional[Callable[[], Awaitable[None]]] = getattr(records, 'aclose', None)
+        if aclose is not None:
+            await aclose()
@@ -28,6 +28,11 @@ def get_current_time_with_tz() -> datetime.datetime:
     return datetime.datetime.now(tz=CUR_TZ)
 
 
+def with_cur_tz(value: datetime.datetime) -> datetime.datetime:
+    """Treat naive datetime (stored without timezone) as datetime in current timezone"""
+    return value.replace(tzinfo=CUR_TZ) if value.tzinfo is None else value
+
+
 def get_current_epoch_time() -> int:
     """Return unix epoch time in millis"""
     return int(round(datetime.datetime.now().timestamp() * 1000, 0))
@@ -38,6 +43,17 @@ def get_epoch_time(value: datetime.datetime) -> int:
     return int(round(value.timestamp() * 1000, 0))
 
 
+def datetime_from_epoch_time(value: int) -> datetime.datetime:
+    """Return datetime.datetime from unix epoch time in millis"""
+    return datetime.datetime.fromtimestamp(value / 1000)
+
+
+def parse_stream_id(value: str) -> tuple[int, int]:
+    """Parse stream record ID ({unix epoch time in millis}-{sequence number}) to comparable tuple"""
+    timestamp, _, sequence = value.partition('-')
+    return int(timestamp), int(sequence) if sequence else 0
+
+
 def encode_datetime(value: datetime.datetime) -> str:
     """Encoding datetime to str representation (with or without timezone)
     If we store datetime.datetime without timezone, no timezone info is saved